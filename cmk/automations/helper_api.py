@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Protocol between the GUI and the automation helper (cmk.base.automation_helper)
+
+The helper keeps the plugins and the configuration loaded and executes the
+automation calls of the GUI without starting a new "check_mk --automation"
+process for every call. Each connection carries exactly one call: The client
+sends the JSON encoded request and shuts down its sending side, the helper
+answers with the JSON encoded response and closes the connection. A helper which
+can not be reached or answers NOT_EXECUTED is treated like a helper that is not
+running. Otherwise the call is never executed a second time, as the helper may
+have executed it partially: The client waits for the response as long as it takes
+and reports a connection closed without a response as an error.
+
+The output of the automation is passed through unchanged, so the result is
+deserialized in the same way as the output of "check_mk --automation".
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import cmk.utils.paths
+from cmk.utils.exceptions import MKGeneralException
+
+_BUFFER_SIZE = 64 * 1024
+
+# A helper not taking the request within this time is treated like one that is not running
+_TIMEOUT = 10.0
+
+# Answer of a helper which refuses to execute the call
+NOT_EXECUTED = b"not executed"
+
+
+class HelperCallError(MKGeneralException):
+    """The helper has taken the call, but not answered it"""
+
+
+def socket_path() -> Path:
+    return cmk.utils.paths.omd_root / "tmp/run/automation-helper.sock"
+
+
+@dataclass(frozen=True)
+class AutomationRequest:
+    command: str
+    args: list[str]
+    stdin: str
+    log_level: int
+
+    def serialize(self) -> bytes:
+        return json.dumps(asdict(self)).encode("utf-8")
+
+    @classmethod
+    def deserialize(cls, raw: bytes) -> AutomationRequest:
+        return cls(**json.loads(raw))
+
+
+@dataclass(frozen=True)
+class AutomationResponse:
+    exit_code: int
+    output: str
+    error: str
+
+    def serialize(self) -> bytes:
+        return json.dumps(asdict(self)).encode("utf-8")
+
+    @classmethod
+    def deserialize(cls, raw: bytes) -> AutomationResponse:
+        return cls(**json.loads(raw))
+
+
+def receive_all(sock: socket.socket) -> bytes:
+    """Read from the socket until the peer has shut down its sending side"""
+    chunks = []
+    while chunk := sock.recv(_BUFFER_SIZE):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def call_helper(
+    request: AutomationRequest, path: Path | None = None, timeout: float = _TIMEOUT
+) -> AutomationResponse | None:
+    """Execute the automation call in the helper
+
+    Returns None in case the helper is not running, does not take the request
+    in time or refuses to execute it, so that the caller can fall back to
+    executing the call in a new process. Raises HelperCallError in case the helper has taken the request but
+    not answered it, as the call may have been executed partially.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(socket_path() if path is None else path))
+            sock.sendall(request.serialize())
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:  # Including the timeout
+            return None
+
+        # Calls like the service discovery may take long, wait for them to finish
+        sock.settimeout(None)
+        try:
+            raw = receive_all(sock)
+        except OSError as e:
+            raise HelperCallError(f"Failed to receive the response of the automation helper: {e}")
+        if not raw:
+            raise HelperCallError("The automation helper closed the connection without a response")
+        return None if raw == NOT_EXECUTED else AutomationResponse.deserialize(raw)
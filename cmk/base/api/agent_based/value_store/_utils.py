@@ -3,6 +3,7 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import os
 from ast import literal_eval
 from collections.abc import (
     Callable,
@@ -15,7 +16,7 @@ from collections.abc import (
 )
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Final, TypeVar
+from typing import Any, Final, IO, Literal, TypeVar
 
 import cmk.utils.cleanup
 import cmk.utils.paths
@@ -31,10 +32,19 @@ _PluginName = str
 _UserKey = str
 _ValueStoreKey = tuple[HostName, _PluginName, Item, _UserKey]
 
+ValueStoreFormat = Literal["text", "journal"]
+
 _TKey = TypeVar("_TKey", bound=Hashable)
 _TValue = TypeVar("_TValue")
 _TDefault = TypeVar("_TDefault")
 
+# Journals are compacted once a quarter of their lines, but at least this many, are outdated.
+# Loading dominates the costs, so the journals must not grow much larger than the data.
+_MIN_OUTDATED_LINES: Final = 100
+
+# The size of the first line of a journal, which is unique to every file written from scratch
+_HEADER_SIZE: Final = 19
+
 
 class _DynamicDiskSyncedMapping(dict[_TKey, _TValue]):
     """Represents the values that have been changed in a session
@@ -139,6 +149,184 @@ class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
                 raise MKGeneralException from exc
 
 
+class _JournalDiskSyncedMapping(Mapping[_TKey, _TValue]):
+    """Represents the values stored on disk as a journal of their changes
+
+    Every line of the file either sets the value of a key, or removes the key
+    (the value is an ``...`` then). Writing only appends the lines of the changed values, and synchronizing
+    again only reads the lines appended since. Once most lines of the file are
+    outdated, the file is rewritten with the current values.
+
+    Every file written from scratch starts with a header line holding a random
+    generation, so a file replaced by another one is noticed even if the new
+    file gets the same inode, which happens quickly on tmpfs.
+
+    The file is not read before the values are needed. A file in the format of
+    the :class:`_StaticDiskSyncedMapping` is read as well, it is rewritten
+    as a journal upon the first change.
+    """
+
+    def __init__(self, *, path: Path, log_debug: Callable[[str], None]) -> None:
+        self._path: Final = path
+        self._log_debug = log_debug
+        self._data: dict[_TKey, _TValue] = {}
+        self._loaded = False
+        # The file (device, inode, header) we have read up to which offset, and
+        # how many lines that were
+        self._file_id: tuple[int, int, bytes] | None = None
+        self._offset = 0
+        self._lines = 0
+        self._needs_rewrite = False
+
+    def _load(self) -> Mapping[_TKey, _TValue]:
+        if not self._loaded:
+            self.disksync()
+        return self._data
+
+    def __getitem__(self, key: _TKey) -> _TValue:
+        return self._load().__getitem__(key)
+
+    def __iter__(self) -> Iterator[_TKey]:
+        return self._load().__iter__()
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def disksync(
+        self,
+        *,
+        removed: Container[_TKey] = (),
+        updated: Iterable[tuple[_TKey, _TValue]] = (),
+    ) -> None:
+        """Read the changes of others and write our changes of the stored values
+
+        When this method returns, the data provided via the Mapping-interface and
+        the data stored on disk must be in sync.
+        """
+        self._log_debug("synchronizing")
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        with store.locked(self._path):
+            try:
+                self._read_changes()
+                self._loaded = True
+                self._write_changes(
+                    {key: ... for key in self._data if key in removed}
+                    | {
+                        key: value
+                        for key, value in updated
+                        if key not in self._data or self._data[key] != value
+                    }
+                )
+            except Exception as exc:
+                raise MKGeneralException from exc
+
+    def _read_changes(self) -> None:
+        with self._path.open("rb") as journal:
+            stat = os.fstat(journal.fileno())
+            file_id = (stat.st_dev, stat.st_ino, _read_header(journal))
+            if file_id != self._file_id or stat.st_size < self._offset:
+                self._log_debug("loading from disk")
+                self._data = {}
+                self._file_id = file_id
+                self._offset, self._lines, self._needs_rewrite = len(file_id[2]), 0, False
+            elif stat.st_size == self._offset:
+                self._log_debug("already loaded")
+                return
+            else:
+                self._log_debug("loading changes from disk")
+            journal.seek(self._offset)
+            raw = journal.read()
+
+        if not self._offset and raw.startswith(b"#"):
+            # A writer has been killed in the middle of the header
+            self._offset, self._needs_rewrite = len(raw), True
+            return
+
+        if not self._offset and raw.startswith(b"{"):
+            self._data = dict(literal_eval(raw.decode("utf-8")))
+            self._offset, self._needs_rewrite = len(raw), True
+            return
+
+        # A writer may have been killed in the middle of a line
+        complete = raw[: raw.rfind(b"\n") + 1]
+        self._needs_rewrite |= len(complete) < len(raw)
+        _replay_journal(self._data, _parse_journal(complete.decode("utf-8")))
+        self._offset += len(complete)
+        self._lines += complete.count(b"\n")
+
+    def _write_changes(self, changes: Mapping[_TKey, object]) -> None:
+        if not changes:
+            return
+
+        _replay_journal(self._data, changes)
+
+        outdated_lines = self._lines + len(changes) - len(self._data)
+        if self._needs_rewrite or outdated_lines >= max(len(self._data) // 4, _MIN_OUTDATED_LINES):
+            self._log_debug("writing to disk")
+            header = _make_header()
+            content = header + _serialize_journal(self._data.items()).encode("utf-8")
+            store.save_bytes_to_file(self._path, content)
+            stat = self._path.stat()
+            self._file_id = (stat.st_dev, stat.st_ino, header)
+            self._offset, self._lines, self._needs_rewrite = len(content), len(self._data), False
+            return
+
+        self._log_debug("appending changes to disk")
+        content = _serialize_journal(changes.items()).encode("utf-8")
+        if not self._offset:
+            assert self._file_id is not None
+            header = _make_header()
+            content = header + content
+            self._file_id = (*self._file_id[:2], header)
+        with self._path.open("ab") as journal:
+            journal.write(content)
+        self._offset += len(content)
+        self._lines += len(changes)
+
+
+def _make_header() -> bytes:
+    return b"# %s\n" % os.urandom(8).hex().encode("ascii")
+
+
+def _read_header(journal: IO[bytes]) -> bytes:
+    """Return the header of the journal, or nothing for a file without one"""
+    header = journal.readline(_HEADER_SIZE)
+    return header if header.startswith(b"#") and header.endswith(b"\n") else b""
+
+
+def _serialize_journal(changes: Iterable[tuple[object, object]]) -> str:
+    # The repr of a value never spans more than one line, the one of ... is no literal
+    return "".join(f"{key!r}: {'...' if value is ... else repr(value)}\n" for key, value in changes)
+
+
+def _parse_journal(text: str) -> Mapping[Any, Any]:
+    # One call to literal_eval is a lot faster than one for every line, and
+    # just like when replaying the lines, the last value of a key wins.
+    return literal_eval("{" + text.replace("\n", ",") + "}")
+
+
+def _replay_journal(data: dict[Any, Any], changes: Mapping[Any, Any]) -> None:
+    for key, value in changes.items():
+        if value is ...:
+            data.pop(key, None)
+        else:
+            data[key] = value
+
+
+def _deserialize(text: str) -> Mapping[Any, Any]:
+    """Load the values stored in either format"""
+    if text.startswith("{"):
+        return literal_eval(text)
+
+    if text.startswith("#"):
+        text = text[text.find("\n") + 1 :] if "\n" in text else ""
+    data: dict[Any, Any] = {}
+    _replay_journal(data, _parse_journal(text[: text.rfind("\n") + 1]))
+    return data
+
+
 class _DiskSyncedMapping(MutableMapping[_TKey, _TValue]):  # pylint: disable=too-many-ancestors
     """Implements the overlay logic between dynamic and static value store"""
 
@@ -165,7 +353,9 @@ class _DiskSyncedMapping(MutableMapping[_TKey, _TValue]):  # pylint: disable=too
         self,
         *,
         dynamic: _DynamicDiskSyncedMapping[_TKey, _TValue],
-        static: _StaticDiskSyncedMapping[_TKey, _TValue],
+        static: (
+            _StaticDiskSyncedMapping[_TKey, _TValue] | _JournalDiskSyncedMapping[_TKey, _TValue]
+        ),
     ) -> None:
         self._dynamic = dynamic
         self.static = static
@@ -276,12 +466,22 @@ class ValueStoreManager:
 
     STORAGE_PATH = Path(cmk.utils.paths.counters_dir)
 
-    def __init__(self, host_name: HostName) -> None:
-        self._value_store: _DiskSyncedMapping[_ValueStoreKey, Any] = _DiskSyncedMapping.make(
-            path=self.STORAGE_PATH / str(host_name),
-            log_debug=lambda x: logger.debug("value store: %s", x),
-            serializer=repr,
-            deserializer=literal_eval,
+    def __init__(self, host_name: HostName, *, storage_format: ValueStoreFormat = "text") -> None:
+        path = self.STORAGE_PATH / str(host_name)
+        log_debug: Callable[[str], None] = lambda x: logger.debug("value store: %s", x)
+        self._value_store: _DiskSyncedMapping[_ValueStoreKey, Any] = (
+            _DiskSyncedMapping(
+                dynamic=_DynamicDiskSyncedMapping(),
+                static=_JournalDiskSyncedMapping(path=path, log_debug=log_debug),
+            )
+            if storage_format == "journal"
+            # Both formats can read the files of the other one
+            else _DiskSyncedMapping.make(
+                path=path,
+                log_debug=log_debug,
+                serializer=repr,
+                deserializer=_deserialize,
+            )
         )
         self.active_service_interface: MutableMapping[str, Any] | None = None
         self._host_name = host_name
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Execute the automation calls of the GUI without starting a new process per call
+
+Every "check_mk --automation" call imports all plugins and loads the whole
+configuration before doing its actual work, which takes seconds on large sites.
+The automation helper does this once and forks a process for every call, which
+inherits the loaded state. The configuration is reloaded before a call in case
+one of its files changed since it was loaded. Plugins can not be unloaded, so
+the helper restarts itself once the local plugins changed.
+
+The GUI falls back to starting "check_mk --automation" if the helper is not
+running. See cmk.automations.helper_api for the protocol.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from types import FrameType
+from typing import IO, NoReturn
+
+import cmk.utils.daemon as daemon
+import cmk.utils.debug
+import cmk.utils.log as log
+import cmk.utils.paths as paths
+
+from cmk.automations.helper_api import (
+    AutomationRequest,
+    AutomationResponse,
+    NOT_EXECUTED,
+    receive_all,
+    socket_path,
+)
+
+import cmk.base.check_api as check_api
+import cmk.base.config as config
+from cmk.base.automations import Automations, automations, AUTOMATIONS_WITH_CONSOLE_LOGGING
+
+logger = logging.getLogger("cmk.base.automation_helper")
+
+_Fingerprint = tuple[tuple[str, int, int], ...]
+
+
+def _fingerprint(file_paths: Iterable[Path]) -> _Fingerprint:
+    entries = []
+    for path in file_paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(entries)
+
+
+def config_fingerprint() -> _Fingerprint:
+    return _fingerprint(config.get_config_file_paths(with_conf_d=True))
+
+
+def _is_plugin_source(path: Path) -> bool:
+    # Loading the plugins writes their byte code to __pycache__, which also changes the
+    # modification time of the directories
+    return path.is_file() and "__pycache__" not in path.parts and path.suffix != ".pyc"
+
+
+def plugins_fingerprint() -> _Fingerprint:
+    return _fingerprint(
+        path
+        for plugins_dir in (Path(paths.local_checks_dir), paths.local_lib_dir / "python3")
+        for path in sorted(plugins_dir.rglob("*"))
+        if _is_plugin_source(path)
+    )
+
+
+class AutomationHelper:
+    def __init__(self, path: Path, registry: Automations = automations) -> None:
+        self._path = path
+        self._registry = registry
+        self._plugins_fingerprint: _Fingerprint = ()
+        self._config_fingerprint: _Fingerprint | None = None
+
+    def load_plugins(self) -> None:
+        self._plugins_fingerprint = plugins_fingerprint()
+        for error in config.load_all_plugins(
+            check_api.get_check_api_context,
+            local_checks_dir=paths.local_checks_dir,
+            checks_dir=paths.checks_dir,
+        ):
+            logger.error(error)
+
+    def _update_config(self) -> bool:
+        """Reload the configuration if needed, return whether it is loaded"""
+        if (fingerprint := config_fingerprint()) == self._config_fingerprint:
+            return True
+
+        logger.info("Loading configuration")
+        try:
+            config.load(validate_hosts=False)
+        except Exception as e:
+            # The call loads the configuration on its own and reports the error
+            logger.error("Failed to load configuration: %s", e)
+            self._config_fingerprint = None
+            return False
+
+        self._config_fingerprint = fingerprint
+        return True
+
+    def serve(self) -> None:
+        """Handle the automation calls until the plugins have changed"""
+        # The processes of the calls are reaped automatically
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            self._path.unlink(missing_ok=True)
+            server.bind(str(self._path))
+            server.listen(socket.SOMAXCONN)
+            logger.info("Listening on %s", self._path)
+            try:
+                while True:
+                    connection, _address = server.accept()
+                    with connection:
+                        if plugins_fingerprint() != self._plugins_fingerprint:
+                            # Lets the client fall back to "check_mk --automation"
+                            logger.info("Plugins have changed")
+                            receive_all(connection)
+                            connection.sendall(NOT_EXECUTED)
+                            return
+
+                        config_loaded = self._update_config()
+                        if os.fork() == 0:
+                            server.close()
+                            self._handle_call(connection, config_loaded)
+            finally:
+                self._path.unlink(missing_ok=True)
+
+    def _handle_call(self, connection: socket.socket, config_loaded: bool) -> NoReturn:
+        try:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            request = AutomationRequest.deserialize(receive_all(connection))
+            connection.sendall(self._execute(request, config_loaded).serialize())
+        except Exception as e:
+            logger.exception("Failed to handle the automation call: %s", e)
+        finally:
+            os._exit(0)
+
+    def _execute(self, request: AutomationRequest, config_loaded: bool) -> AutomationResponse:
+        """Execute the call like "check_mk --automation" with redirected standard streams"""
+        with (
+            tempfile.TemporaryFile() as stdin,
+            tempfile.TemporaryFile() as stdout,
+            tempfile.TemporaryFile() as stderr,
+        ):
+            stdin.write(request.stdin.encode("utf-8"))
+            stdin.seek(0)
+            # Redirect the file descriptors as well, for the processes started by the call
+            os.dup2(stdin.fileno(), 0)
+            os.dup2(stdout.fileno(), 1)
+            os.dup2(stderr.fileno(), 2)
+            sys.stdin = open(0, encoding="utf-8", closefd=False)
+            sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+            sys.stderr = open(2, "w", encoding="utf-8", closefd=False)
+
+            log.setup_console_logging()
+            log.logger.setLevel(request.log_level)
+            if request.command not in AUTOMATIONS_WITH_CONSOLE_LOGGING:
+                log.clear_console_logging()
+
+            try:
+                exit_code = self._registry.execute(
+                    request.command,
+                    list(request.args),
+                    plugins_loaded=True,
+                    config_loaded=config_loaded,
+                )
+            except SystemExit as e:
+                exit_code = _exit_code(e)
+            except Exception as e:
+                # Only reached in debug mode, "check_mk" reports these in the same way
+                sys.stderr.write(f"{e}\n")
+                exit_code = 3
+
+            sys.stdout.flush()
+            sys.stderr.flush()
+            return AutomationResponse(
+                exit_code=exit_code, output=_read_all(stdout), error=_read_all(stderr)
+            )
+
+
+def _exit_code(e: SystemExit) -> int:
+    """The exit code of a process ending with the exception, like Python does it"""
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    sys.stderr.write(f"{e.code}\n")
+    return 1
+
+
+def _read_all(stream: IO[bytes]) -> str:
+    stream.seek(0)
+    return stream.read().decode("utf-8", errors="replace")
+
+
+def _terminate(signum: int, stackframe: FrameType | None) -> NoReturn:
+    raise SystemExit(0)
+
+
+def main(args: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--foreground", action="store_true", help="Do not daemonize")
+    parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    options = parser.parse_args(args)
+
+    if options.debug:
+        cmk.utils.debug.enable()
+    if not options.foreground:
+        daemon.daemonize()
+
+    log.setup_watched_file_logging_handler(Path(paths.log_dir, "automation-helper.log"))
+    signal.signal(signal.SIGTERM, _terminate)
+
+    with daemon.pid_file_lock(paths.omd_root / "tmp/run/automation-helper.pid"):
+        helper = AutomationHelper(socket_path())
+        helper.load_plugins()
+        helper.serve()
+
+    logger.info("Restarting to load the changed plugins")
+    argv = [sys.executable, *sys.argv]
+    if "--foreground" not in argv:
+        argv.append("--foreground")
+    os.execv(sys.executable, argv)
@@ -8,7 +8,7 @@ import os
 import signal
 from contextlib import redirect_stdout
 from types import FrameType
-from typing import Any, NoReturn
+from typing import Any, Final, NoReturn
 
 import cmk.utils.debug
 import cmk.utils.log as log
@@ -25,6 +25,18 @@ import cmk.base.config as config
 import cmk.base.obsolete_output as out
 import cmk.base.profiling as profiling
 
+# These automations buffer and handle their stdout/stderr on their own
+AUTOMATIONS_WITH_CONSOLE_LOGGING: Final = frozenset(
+    {
+        "restart",
+        "reload",
+        "start",
+        "create-diagnostics-dump",
+        "try-inventory",
+        "service-discovery-preview",
+    }
+)
+
 
 # TODO: Inherit from MKGeneralException
 class MKAutomationError(MKException):
@@ -41,7 +53,19 @@ class Automations:
             raise TypeError()
         self._automations[automation.cmd] = automation
 
-    def execute(self, cmd: str, args: list[str]) -> Any:
+    def execute(
+        self,
+        cmd: str,
+        args: list[str],
+        *,
+        plugins_loaded: bool = False,
+        config_loaded: bool = False,
+    ) -> Any:
+        """Execute the automation and write its serialized result to stdout
+
+        The automation helper (cmk.base.automation_helper) has already loaded the
+        plugins and the configuration before forking the process for the call.
+        """
         self._handle_generic_arguments(args)
 
         try:
@@ -53,13 +77,14 @@ class Automations:
             if automation.needs_checks:
                 with redirect_stdout(open(os.devnull, "w")):
                     log.setup_console_logging()
-                    config.load_all_plugins(
-                        check_api.get_check_api_context,
-                        local_checks_dir=paths.local_checks_dir,
-                        checks_dir=paths.checks_dir,
-                    )
-
-            if automation.needs_config:
+                    if not plugins_loaded:
+                        config.load_all_plugins(
+                            check_api.get_check_api_context,
+                            local_checks_dir=paths.local_checks_dir,
+                            checks_dir=paths.checks_dir,
+                        )
+
+            if automation.needs_config and not config_loaded:
                 config.load(validate_hosts=False)
 
             result = automation.execute(args)
@@ -55,6 +55,7 @@ from cmk.utils.paths import (
     counters_dir,
     data_source_cache_dir,
     discovered_host_labels_dir,
+    inventory_index_file,
     local_agent_based_plugins_dir,
     local_checks_dir,
     logwatch_dir,
@@ -68,6 +69,7 @@ from cmk.utils.paths import (
 )
 from cmk.utils.sectionname import SectionName
 from cmk.utils.servicename import ServiceName
+from cmk.utils.structured_data import InventoryIndex
 from cmk.utils.timeout import Timeout
 from cmk.utils.timeperiod import timeperiod_active
 from cmk.utils.version import edition_supports_nagvis
@@ -1007,6 +1009,9 @@ class AutomationRenameHosts(Automation):
         # HW/SW-Inventory
         if self._rename_host_file(var_dir + "/inventory", oldname, newname):
             self._rename_host_file(var_dir + "/inventory", oldname + ".gz", newname + ".gz")
+            self._rename_host_file(var_dir + "/inventory", oldname + ".pkl", newname + ".pkl")
+            # The new name is indexed with the next inventory of the host
+            InventoryIndex(inventory_index_file).remove(host_name=HostName(oldname))
             actions.append("inv")
 
         if self._rename_host_dir(var_dir + "/inventory_archive", oldname, newname):
@@ -1456,6 +1461,9 @@ class ABCDeleteHosts:
             for folder in os.listdir(baked_agents_dir):
                 self._delete_if_exists(f"{folder}/{hostname}")
 
+    def _delete_from_inventory_index(self, hostname: HostName) -> None:
+        InventoryIndex(inventory_index_file).remove(host_name=hostname)
+
     def _delete_logwatch(self, hostname: HostName) -> None:
         with suppress(FileNotFoundError):
             shutil.rmtree(f"{logwatch_dir}/{hostname}")
@@ -1487,6 +1495,7 @@ class AutomationDeleteHosts(ABCDeleteHosts, Automation):
             f"{var_dir}/persisted/{hostname}",
             f"{var_dir}/inventory/{hostname}",
             f"{var_dir}/inventory/{hostname}.gz",
+            f"{var_dir}/inventory/{hostname}.pkl",
             f"{var_dir}/agent_deployment/{hostname}",
         ]
 
@@ -1500,6 +1509,7 @@ class AutomationDeleteHosts(ABCDeleteHosts, Automation):
         for path in self._single_file_paths(hostname):
             self._delete_if_exists(path)
 
+        self._delete_from_inventory_index(hostname)
         self._delete_datasource_dirs(hostname)
         self._delete_baked_agents(hostname)
         self._delete_logwatch(hostname)
@@ -1528,6 +1538,7 @@ class AutomationDeleteHostsKnownRemote(ABCDeleteHosts, Automation):
             f"{var_dir}/persisted/{hostname}",
             f"{var_dir}/inventory/{hostname}",
             f"{var_dir}/inventory/{hostname}.gz",
+            f"{var_dir}/inventory/{hostname}.pkl",
         ]
 
     def _delete_host_files(self, hostname: HostName) -> None:
@@ -1540,6 +1551,7 @@ class AutomationDeleteHostsKnownRemote(ABCDeleteHosts, Automation):
         for path in self._single_file_paths(hostname):
             self._delete_if_exists(path)
 
+        self._delete_from_inventory_index(hostname)
         self._delete_datasource_dirs(hostname)
         self._delete_logwatch(hostname)
 
@@ -10,9 +10,11 @@ from __future__ import annotations
 import functools
 import itertools
 import logging
+import posix
 import time
 from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
 from functools import partial
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 from typing import Final, Literal
 
@@ -103,7 +105,12 @@ __all__ = [
 
 
 def _fetch_all(
-    sources: Iterable[Source], *, simulation: bool, file_cache_options: FileCacheOptions, mode: Mode
+    sources: Iterable[Source],
+    *,
+    simulation: bool,
+    file_cache_options: FileCacheOptions,
+    mode: Mode,
+    max_concurrency: int = 1,
 ) -> Sequence[
     tuple[
         SourceInfo,
@@ -111,16 +118,53 @@ def _fetch_all(
         Snapshot,
     ]
 ]:
+    """Fetch the raw data of all sources.
+
+    With `max_concurrency` greater than one, the fetchers run in a thread pool
+    of at most that many threads.  The results are always returned in the order
+    of the sources.
+
+    Note:
+        The CPU tracking is process wide, so the durations of fetchers that run
+        concurrently overlap.  In that case the fetch phase is measured as a
+        whole and shared among the sources in the proportions of their own
+        durations.  This way the durations still add up to the time spent.
+
+    """
     console.verbose("%s+%s %s\n", tty.yellow, tty.normal, "Fetching data".upper())
-    return [
-        _do_fetch(
+    jobs = [
+        (
             source.source_info(),
             source.file_cache(simulation=simulation, file_cache_options=file_cache_options),
             source.fetcher(),
-            mode=mode,
         )
         for source in sources
     ]
+    if max_concurrency <= 1 or len(jobs) <= 1:
+        return [_do_fetch(*job, mode=mode) for job in jobs]
+
+    console.vverbose("  Fetching concurrently (%d threads)\n", min(max_concurrency, len(jobs)))
+    with CPUTracker() as tracker, ThreadPool(processes=min(max_concurrency, len(jobs))) as pool:
+        fetched = pool.starmap(partial(_do_fetch, mode=mode), jobs)
+    durations = _share(tracker.duration, [duration for _info, _raw_data, duration in fetched])
+    return [
+        (source_info, raw_data, duration)
+        for (source_info, raw_data, _overlapping), duration in zip(fetched, durations)
+    ]
+
+
+def _share(total: Snapshot, durations: Sequence[Snapshot]) -> Sequence[Snapshot]:
+    """Split the total in the proportions of the (overlapping) durations"""
+    sums = sum(durations, Snapshot.null()).process
+    return [
+        Snapshot(
+            posix.times_result(
+                t * d / s if s else t / len(durations)
+                for t, d, s in zip(total.process, duration.process, sums)
+            )
+        )
+        for duration in durations
+    ]
 
 
 def _do_fetch(
@@ -343,6 +387,7 @@ class CMKFetcher:
             simulation=self.simulation_mode,
             file_cache_options=self.file_cache_options,
             mode=self.mode,
+            max_concurrency=self.config_cache.max_concurrent_fetchers(host_name),
         )
 
 
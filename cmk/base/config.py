@@ -3052,6 +3052,11 @@ class ConfigCache:
             inventory=1.5 * check_interval,
         )
 
+    def max_concurrent_fetchers(self, hostname: HostName) -> int:
+        """Number of data sources of the host that may be fetched at the same time"""
+        values = self.ruleset_matcher.get_host_values(hostname, max_concurrent_fetchers)
+        return values[0] if values else 1
+
     def exit_code_spec(self, hostname: HostName, data_source_id: str | None = None) -> ExitSpec:
         spec: _NestedExitSpec = {}
         # TODO: Can we use get_host_merged_dict?
@@ -3143,6 +3148,8 @@ class ConfigCache:
                 return SNMPBackendEnum.INLINE
             if host_backend == "classic":
                 return SNMPBackendEnum.CLASSIC
+            if host_backend == "asyncio":
+                return SNMPBackendEnum.ASYNCIO
             raise MKGeneralException(f"Bad Host SNMP Backend configuration: {host_backend}")
 
         # TODO(sk): remove this when netsnmp is fixed
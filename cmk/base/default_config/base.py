@@ -48,10 +48,14 @@ agent_exclude_sections: list[RuleSpec[dict[str, str]]] = []
 snmp_ports: list[RuleSpec[int]] = []
 tcp_connect_timeout = 5.0
 tcp_connect_timeouts: list[RuleSpec[float]] = []
+# Number of data sources of a host that may be fetched concurrently
+max_concurrent_fetchers: list[RuleSpec[int]] = []
 use_dns_cache = True  # prevent DNS by using own cache file
 delay_precompile = False  # delay Python compilation to Nagios execution
 restart_locking: Literal["abort", "wait"] | None = "abort"
 check_submission: Literal["file", "pipe"] = "file"
+# "journal" only appends the changed values of the checks to the counter files
+value_store_format: Literal["text", "journal"] = "text"
 default_host_group = "check_mk"
 
 check_max_cachefile_age = 0  # per default do not use cache files when checking
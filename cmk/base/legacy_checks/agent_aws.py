@@ -120,6 +120,8 @@ def agent_aws_arguments(  # pylint: disable=too-many-branches
         args += ["--cloudfront-host-assignment", cloudfront_host_assignment]
     # '--overall-tags': [('KEY_1', ['VAL_1', 'VAL_2']), ...)],
     args += _get_tag_options(params.get("overall_tags", []), "overall")
+    if "max_workers" in params:
+        args += ["--max-workers", str(params["max_workers"])]
     args += [
         "--hostname",
         hostname,
@@ -50,6 +50,7 @@ from cmk.utils.rulesets.ruleset_matcher import RulesetMatcher
 from cmk.utils.sectionname import SectionMap, SectionName
 from cmk.utils.structured_data import (
     ImmutableTree,
+    InventoryIndex,
     load_tree,
     MutableTree,
     RawIntervalFromConfig,
@@ -161,6 +162,8 @@ def parse_snmp_backend(backend: object) -> SNMPBackendEnum | None:
             return SNMPBackendEnum.CLASSIC
         case "stored-walk":
             return SNMPBackendEnum.STORED_WALK
+        case "asyncio":
+            return SNMPBackendEnum.ASYNCIO
         case _:
             raise ValueError(backend)
 
@@ -295,7 +298,7 @@ _SNMP_BACKEND_OPTION: Final = Option(
     long_option="snmp-backend",
     short_help="Override default SNMP backend",
     argument=True,
-    argument_descr="inline|classic|stored-walk",
+    argument_descr="inline|classic|stored-walk|asyncio",
 )
 
 # .
@@ -1579,14 +1582,7 @@ def mode_automation(args: list[str]) -> None:
     # At least for the automation calls that buffer and handle the stdout/stderr on their own
     # we can now enable this. In the future we should remove this call for all automations calls and
     # handle the output in a common way.
-    if args[0] not in [
-        "restart",
-        "reload",
-        "start",
-        "create-diagnostics-dump",
-        "try-inventory",
-        "service-discovery-preview",
-    ]:
+    if args[0] not in automations.AUTOMATIONS_WITH_CONSOLE_LOGGING:
         log.clear_console_logging()
 
     sys.exit(automations.automations.execute(args[0], args[1:]))
@@ -2209,7 +2205,8 @@ def mode_check(
         error_handler,
         plugin_contexts.current_host(hostname),
         set_value_store_manager(
-            ValueStoreManager(hostname), store_changes=not dry_run
+            ValueStoreManager(hostname, storage_format=config.value_store_format),
+            store_changes=not dry_run,
         ) as value_store_manager,
     ):
         console.vverbose("Checkmk version %s\n", cmk_version.__version__)
@@ -2529,6 +2526,7 @@ def _execute_active_check_inventory(
     tree_or_archive_store = TreeOrArchiveStore(
         cmk.utils.paths.inventory_output_dir,
         cmk.utils.paths.inventory_archive_dir,
+        InventoryIndex(cmk.utils.paths.inventory_index_file),
     )
     previous_tree = tree_or_archive_store.load_previous(host_name=host_name)
 
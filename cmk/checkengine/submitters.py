@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import abc
 import os
+import select
 import time
 from collections.abc import Iterable, Iterator
 from contextlib import contextmanager
@@ -199,20 +200,49 @@ class PipeSubmitter(Submitter):
         if not (pipe := PipeSubmitter._open_command_pipe()):
             return
 
-        for service, state, output, _cache_info in formatted_submittees:
-            msg = "[%d] PROCESS_SERVICE_CHECK_RESULT;%s;%s;%d;%s\n" % (
-                time.time(),
-                self.host_name,
-                service,
-                state,
-                output.replace("\n", "\\n"),
-            )
-            pipe.write(msg.encode())
+        now = int(time.time())
+        for chunk in _chunk_commands(
+            (
+                "[%d] PROCESS_SERVICE_CHECK_RESULT;%s;%s;%d;%s\n"
+                % (
+                    now,
+                    self.host_name,
+                    service,
+                    state,
+                    output.replace("\n", "\\n"),
+                )
+            ).encode()
+            for service, state, output, _cache_info in formatted_submittees
+        ):
+            pipe.write(chunk)
             # Important: Nagios needs the complete command in one single write() block!
             # Python buffers and sends chunks of 4096 bytes, if we do not flush.
             pipe.flush()
 
 
+def _chunk_commands(commands: Iterable[bytes], max_size: int = select.PIPE_BUF) -> Iterator[bytes]:
+    """Join the commands to chunks of at most `max_size` bytes
+
+    Writes of up to PIPE_BUF bytes to a pipe are atomic, so every write of a chunk
+    hands complete commands to the core.  Commands that are too large on their
+    own make up a chunk of their own.
+
+    >>> list(_chunk_commands([b"a\\n", b"bc\\n", b"d\\n", b"efghi\\n"], max_size=5))
+    [b'a\\nbc\\n', b'd\\n', b'efghi\\n']
+
+    """
+    chunk: list[bytes] = []
+    chunk_size = 0
+    for command in commands:
+        if chunk and chunk_size + len(command) > max_size:
+            yield b"".join(chunk)
+            chunk, chunk_size = [], 0
+        chunk.append(command)
+        chunk_size += len(command)
+    if chunk:
+        yield b"".join(chunk)
+
+
 class _RandomNameSequence:
     """An instance of _RandomNameSequence generates an endless
     sequence of unpredictable strings which can safely be incorporated
@@ -246,26 +276,26 @@ class FileSubmitter(Submitter):
 
     def _submit(self, formatted_submittees: Iterable[FormattedSubmittee]) -> None:
         now = time.time()
+        checkresults = []
+        for service, state, output, _cache_info in formatted_submittees:
+            output = output.replace("\n", "\\n")
+            checkresults.append(
+                f"host_name={self.host_name}\n"
+                f"service_description={service}\n"
+                "check_type=1\n"
+                "check_options=0\n"
+                "reschedule_check\n"
+                "latency=0.0\n"
+                f"start_time={now:.1f}\n"
+                f"finish_time={now:.1f}\n"
+                f"return_code={state}\n"
+                f"output={output}\n"
+                "\n"
+            )
 
+        # Write the whole file at once instead of once per service
         with self._open_checkresult_file() as fd:
-            for service, state, output, _cache_info in formatted_submittees:
-                output = output.replace("\n", "\\n")
-                os.write(
-                    fd,
-                    (
-                        f"host_name={self.host_name}\n"
-                        f"service_description={service}\n"
-                        "check_type=1\n"
-                        "check_options=0\n"
-                        "reschedule_check\n"
-                        "latency=0.0\n"
-                        f"start_time={now:.1f}\n"
-                        f"finish_time={now:.1f}\n"
-                        f"return_code={state}\n"
-                        f"output={output}\n"
-                        "\n"
-                    ).encode(),
-                )
+            os.write(fd, "".join(checkresults).encode())
 
     @classmethod
     @contextmanager
@@ -160,9 +160,11 @@ class Rule(TypedDict, total=False):
     contact_groups: ContactGroups
     count: Count
     customer: str  # TODO: This is a GUI-only feature, which doesn't belong here at all.
+    delay: int
     description: str
     docu_url: str
     disabled: bool
+    drop: bool | Literal["skip_pack"]
     expect: Expect
     event_limit: EventLimit
     hits: int
@@ -323,6 +325,7 @@ class ConfigFromWATO(TypedDict):
     archive_orphans: bool
     debug_rules: bool
     event_limit: EventLimits
+    event_processing_workers: int
     eventsocket_queue_len: int
     history_lifetime: int
     history_rotation: Literal["daily", "weekly"]
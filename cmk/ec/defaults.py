@@ -39,6 +39,7 @@ def default_config() -> ConfigFromWATO:
         actions=[],
         debug_rules=False,
         rule_optimizer=True,
+        event_processing_workers=0,
         log_level=LogConfig(
             {
                 "cmk.mkeventd": logging.INFO,
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Parse incoming messages and match them against the rules in worker processes
+
+The event server parses the incoming messages and matches the events against
+the rules in its own thread, so the regular expressions of the rules limit the
+throughput to what one CPU core can do. With "event_processing_workers"
+configured, a pool of processes does the parsing and matching. The event server
+thread stays the only one changing the event status: It processes the matched
+events in the order in which it received the messages, so the events of a host
+are never processed out of order.
+
+The workers are forked from the event server and inherit the compiled rules
+from it. The event server replaces the pool after it compiled new rules.
+
+The event server forks while the other threads are running, like the status
+server and the writer of the SQLite history. A lock held by one of them at that
+moment stays locked forever in the workers, so the workers must only run code
+which does not take any lock of these threads: They parse and match, but never
+touch the event status, the history or the sockets of the event server. The logging module resets its locks after forking, so logging is
+fine. Python 3.12 warns about forking a multi-threaded process for this reason.
+"""
+
+import multiprocessing
+import signal
+from collections import deque
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from multiprocessing.pool import AsyncResult
+from typing import Literal, NamedTuple
+
+from .config import Rule
+from .event import Event
+from .rule_matcher import MatchSuccess
+
+Address = tuple[str, int]
+
+Task = (
+    tuple[Literal["syslog"], Sequence[bytes], Address | None]
+    | tuple[Literal["trap"], bytes, Address]
+)
+
+
+class MatchedEvent(NamedTuple):
+    event: Event
+    rule_tries: int
+    rule_hits: Sequence[tuple[str, MatchSuccess]]
+    """The IDs of the matching rules, see cmk.ec.rule_matcher.find_rule_hits()"""
+    duration: float
+
+
+MatchFunction = Callable[[Task], Sequence[MatchedEvent]]
+
+# Pending tasks per worker, limits the memory used when the workers can not keep up
+_MAX_PENDING_PER_WORKER = 64
+
+_match_function: MatchFunction | None = None
+
+
+def _init_worker(match_function: MatchFunction) -> None:
+    global _match_function
+    # The signals are handled by the event server, the pool terminates the workers
+    for signum in (signal.SIGHUP, signal.SIGINT, signal.SIGQUIT):
+        signal.signal(signum, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _match_function = match_function
+
+
+def _match(task: Task) -> Sequence[MatchedEvent]:
+    assert _match_function is not None
+    return _match_function(task)
+
+
+class EventPipeline:
+    def __init__(
+        self,
+        num_workers: int,
+        match_function: MatchFunction,
+        rule_by_id: Mapping[str | None, Rule],
+    ) -> None:
+        self.num_workers = num_workers
+        self.rule_by_id = rule_by_id
+        """The rules the workers match against, the hits refer to them"""
+        self._max_pending = num_workers * _MAX_PENDING_PER_WORKER
+        self._pending: deque[AsyncResult[Sequence[MatchedEvent]]] = deque()
+        # Forked from the multi-threaded event server, see the module docstring
+        # for what the workers must not do
+        self._pool = multiprocessing.get_context("fork").Pool(
+            num_workers, initializer=_init_worker, initargs=(match_function,)
+        )
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def submit(self, task: Task) -> None:
+        self._pending.append(self._pool.apply_async(_match, (task,)))
+
+    def results(self, wait: bool = False) -> Iterator[MatchedEvent]:
+        """The matched events of the finished tasks in the order of submission
+
+        Waits for the tasks when there are too many pending or all of them when
+        requested.
+        """
+        while self._pending and (
+            wait or len(self._pending) > self._max_pending or self._pending[0].ready()
+        ):
+            yield from self._pending.popleft().get()
+
+    def close(self) -> None:
+        self._pending.clear()
+        self._pool.terminate()
+        self._pool.join()
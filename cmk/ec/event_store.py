@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Indexed storage of the currently open events"""
+
+from collections.abc import Iterable, Iterator, Sequence
+
+from .event import Event
+
+
+class EventStore:
+    """
+    Keeps the open events in the order of their creation, the oldest first.
+
+    The events are additionally indexed by their ID, their rule ID and their
+    host, so that the lookups done for every incoming message do not have to
+    scan all events.  We rely on the insertion order of dicts here: Every
+    index keeps the events in the same order as the whole store.
+
+    The index keys are taken when an event is added. An event must not change
+    its ID while it is in the store. If its rule ID or host changes, e.g. when
+    counting up an event, call `reindex()` afterwards.
+    """
+
+    def __init__(self, events: Iterable[Event] = ()) -> None:
+        self._by_id: dict[int, Event] = {}
+        self._by_rule_id: dict[str | None, dict[int, Event]] = {}
+        self._by_host: dict[str | None, dict[int, Event]] = {}
+        self._keys: dict[int, tuple[str | None, str | None]] = {}
+        for event in events:
+            self.add(event)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, event: object) -> bool:
+        if not isinstance(event, dict) or "id" not in event:
+            return False
+        return self._by_id.get(event["id"]) is event
+
+    def to_list(self) -> list[Event]:
+        return list(self._by_id.values())
+
+    def add(self, event: Event) -> None:
+        event_id = event["id"]
+        if event_id in self._by_id:
+            raise ValueError(f"Duplicate event ID {event_id}")
+        self._by_id[event_id] = event
+        self._keys[event_id] = (event.get("rule_id"), event["host"])
+        self._by_rule_id.setdefault(event.get("rule_id"), {})[event_id] = event
+        self._by_host.setdefault(event["host"], {})[event_id] = event
+
+    def remove(self, event: Event) -> None:
+        """Remove the event, raise ValueError if it is not in the store"""
+        if event not in self:
+            raise ValueError("Event not present")
+        event_id = event["id"]
+        del self._by_id[event_id]
+        rule_id, host = self._keys.pop(event_id)
+        self._remove_from_index(self._by_rule_id, rule_id, event_id)
+        self._remove_from_index(self._by_host, host, event_id)
+
+    def reindex(self, event: Event) -> None:
+        """Update the indices after the rule ID or the host of the event have changed"""
+        event_id = event["id"]
+        old_rule_id, old_host = self._keys[event_id]
+        new_rule_id, new_host = self._keys[event_id] = (event.get("rule_id"), event["host"])
+        if new_rule_id != old_rule_id:
+            self._remove_from_index(self._by_rule_id, old_rule_id, event_id)
+            self._add_to_index(self._by_rule_id, new_rule_id, event)
+        if new_host != old_host:
+            self._remove_from_index(self._by_host, old_host, event_id)
+            self._add_to_index(self._by_host, new_host, event)
+
+    @staticmethod
+    def _add_to_index(
+        index: dict[str | None, dict[int, Event]], key: str | None, event: Event
+    ) -> None:
+        # Keep the bucket ordered by age.  The event IDs are handed out in ascending order.
+        bucket = index.setdefault(key, {})
+        bucket[event["id"]] = event
+        index[key] = dict(sorted(bucket.items()))
+
+    @staticmethod
+    def _remove_from_index(
+        index: dict[str | None, dict[int, Event]], key: str | None, event_id: int
+    ) -> None:
+        bucket = index[key]
+        del bucket[event_id]
+        if not bucket:
+            del index[key]
+
+    def get(self, event_id: int) -> Event | None:
+        return self._by_id.get(event_id)
+
+    def oldest(self) -> Event | None:
+        return next(iter(self._by_id.values()), None)
+
+    def by_ids(self, event_ids: Iterable[int]) -> Sequence[Event]:
+        """The existing events with the given IDs, in the order of the IDs
+
+        The event IDs are handed out in ascending order, so this is the oldest first.
+        """
+        return [
+            event
+            for event_id in sorted(set(event_ids))
+            if (event := self._by_id.get(event_id)) is not None
+        ]
+
+    def by_rule_id(self, rule_id: str | None) -> Sequence[Event]:
+        """The events created by the given rule, the oldest first"""
+        return list(self._by_rule_id.get(rule_id, {}).values())
+
+    def by_host(self, host: str) -> Sequence[Event]:
+        """The events of the given host, the oldest first"""
+        return list(self._by_host.get(host, {}).values())
+
+    def oldest_of_rule(self, rule_id: str | None) -> Event | None:
+        return next(iter(self._by_rule_id.get(rule_id, {}).values()), None)
+
+    def oldest_of_host(self, host: str) -> Event | None:
+        return next(iter(self._by_host.get(host, {}).values()), None)
@@ -3,15 +3,17 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import bisect
 import itertools
 import shlex
 import subprocess
 import threading
 import time
-from collections.abc import Callable, Iterable, Sequence
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from logging import Logger
 from pathlib import Path
-from typing import Any
+from typing import Any, Final
 
 from cmk.utils.log import VERBOSE
 from cmk.utils.render import date_and_time
@@ -39,9 +41,16 @@ class FileHistory(History):
         self._history_columns = history_columns
         self._lock = threading.Lock()
         self._active_history_period = ActiveHistoryPeriod()
+        history_column_names = [name for name, _default in history_columns]
+        # Positions in a line of a history file, which lacks the history_line column
+        self._indexed_positions = [
+            history_column_names.index(name) - 1 for name in _INDEXED_COLUMNS
+        ]
+        self._indexes: dict[Path, _HistoryFileIndex] = {}
 
     def flush(self) -> None:
         _expire_logfiles(self._settings, self._config, self._logger, self._lock, True)
+        self._indexes.clear()
 
     def add(self, event: Event, what: HistoryWhat, who: str = "", addinfo: str = "") -> None:
         """Make a new entry in the event history.
@@ -66,12 +75,25 @@ class FileHistory(History):
                 for colname, defval in self._event_columns
             ]
 
-            with get_logfile(
+            path = get_logfile(
                 self._config,
                 self._settings.paths.history_dir.value,
                 self._active_history_period,
-            ).open(mode="ab") as f:
-                f.write(b"\t".join(columns) + b"\n")
+            )
+            line = b"\t".join(columns) + b"\n"
+            with path.open(mode="ab") as f:
+                offset = f.tell()
+                f.write(line)
+
+            # An index for the lines written so far is created on the next query
+            sidecar_path = _sidecar_path(path)
+            if offset == 0 or sidecar_path.exists():
+                with sidecar_path.open(mode="ab") as f:
+                    f.write(
+                        _index_record(
+                            offset, len(line), [columns[pos] for pos in self._indexed_positions]
+                        )
+                    )
 
     def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
         if not self._settings.paths.history_dir.value.exists():
@@ -114,17 +136,40 @@ class FileHistory(History):
             if not _intersects(time_range, _get_logfile_timespan(path)):
                 self._logger.debug("skipping history file %s because of time filters", path)
                 continue
-            tac = f"nl -b a {shlex.quote(str(path))} | tac"  # Process younger lines first
-            cmd = " | ".join([tac] + grep_pipeline)
-            self._logger.debug("preprocessing history file with command [%s]", cmd)
-            new_entries = parse_history_file(
-                self._history_columns, path, query.filter_row, cmd, limit, self._logger
-            )
+            if (lines := self._lookup(path, filters)) is not None:
+                self._logger.debug("reading indexed lines of history file %s", path)
+                new_entries = read_history_lines(
+                    self._history_columns, path, lines, query.filter_row, limit, self._logger
+                )
+            else:
+                tac = f"nl -b a {shlex.quote(str(path))} | tac"  # Process younger lines first
+                cmd = " | ".join([tac] + grep_pipeline)
+                self._logger.debug("preprocessing history file with command [%s]", cmd)
+                new_entries = parse_history_file(
+                    self._history_columns, path, query.filter_row, cmd, limit, self._logger
+                )
             history_entries += new_entries
             if limit is not None:
                 limit -= len(new_entries)
         return history_entries
 
+    def _lookup(
+        self, path: Path, filters: Sequence[QueryFilter]
+    ) -> Iterator[tuple[int, int]] | None:
+        with self._lock:
+            if (index := self._indexes.get(path)) is None:
+                index = _HistoryFileIndex(path, self._indexed_positions)
+            try:
+                index.update()
+            except OSError as e:
+                self._logger.warning("Cannot update the index of history file %s: %s", path, e)
+                return None
+            self._indexes[path] = index
+            while len(self._indexes) > _MAX_CACHED_INDEXES:
+                # The names of the history files are their creation times
+                del self._indexes[min(self._indexes)]
+            return index.lookup(filters)
+
     def housekeeping(self) -> None:
         _expire_logfiles(self._settings, self._config, self._logger, self._lock, False)
 
@@ -152,12 +197,187 @@ def _expire_logfiles(
                         "Deleting log file %s (age %s)", path, date_and_time(path.stat().st_mtime)
                     )
                     path.unlink()
+                    _sidecar_path(path).unlink(missing_ok=True)
         except Exception as e:
             if settings.options.debug:
                 raise
             logger.warning("Error expiring log files: %s", e)
 
 
+# The indexed columns of the history files, starting with the history_time
+_INDEXED_COLUMNS: Final = (
+    "history_time",
+    "event_id",
+    "event_host",
+    "event_rule_id",
+    "event_application",
+)
+
+# Keep the indexes of the latest history files in memory, the others are read from their
+# sidecar files when needed. An index takes about 32 bytes per line of its history file.
+_MAX_CACHED_INDEXES: Final = 2
+
+
+def _sidecar_path(path: Path) -> Path:
+    return path.with_suffix(".idx")
+
+
+def _index_record(offset: int, length: int, values: Sequence[bytes]) -> bytes:
+    return b"\t".join([str(offset).encode(), str(length).encode(), *values]) + b"\n"
+
+
+class _HistoryFileIndex:
+    """Find the lines of a history file by their time and the values of the indexed columns
+
+    The index is backed by a sidecar file, which is extended by FileHistory.add(). For every line
+    of the history file it contains the offset and length of the line and the values of the
+    indexed columns, tab-separated like the history file itself. Lines which are missing in the
+    sidecar file, e.g. of history files written before it existed, are indexed from the history
+    file itself.
+
+    History files can have millions of lines, so the index keeps its numbers in arrays instead
+    of lists of Python objects.
+    """
+
+    def __init__(self, path: Path, positions: Sequence[int]) -> None:
+        self._path = path
+        self._sidecar_path = _sidecar_path(path)
+        self._positions = positions
+        self._reset(inode=None)
+
+    def _reset(self, inode: int | None) -> None:
+        self._inode = inode
+        self._sidecar_end = 0
+        self._end = 0  # The end of the indexed lines in the history file
+        self._offsets: "array[int]" = array("q")
+        self._times: "array[float]" = array("d")
+        self._times_sorted = True
+        self._lines_by_value: "tuple[dict[str, array[int]], ...]" = tuple(
+            {} for _name in _INDEXED_COLUMNS[1:]
+        )
+
+    def update(self) -> None:
+        stat = self._path.stat()
+        if stat.st_ino != self._inode or stat.st_size < self._end:
+            self._reset(stat.st_ino)
+        if not self._read_sidecar():
+            self._reset(stat.st_ino)
+            self._sidecar_path.unlink(missing_ok=True)
+        if self._end < stat.st_size:
+            self._index_history_file()
+
+    def _read_sidecar(self) -> bool:
+        """Add the new records of the sidecar file, return False if it does not match"""
+        try:
+            f = self._sidecar_path.open(mode="rb")
+        except FileNotFoundError:
+            return True
+        with f:
+            f.seek(self._sidecar_end)
+            for record in f:
+                if not record.endswith(b"\n"):
+                    break
+                offset, length, *values = record.rstrip(b"\n").split(b"\t")
+                if (
+                    offset != str(self._end).encode()
+                    or not length.isdigit()
+                    or len(values) != len(_INDEXED_COLUMNS)
+                ):
+                    return False
+                self._add(int(length), values)
+                self._sidecar_end += len(record)
+        return True
+
+    def _index_history_file(self) -> None:
+        records = []
+        with self._path.open(mode="rb") as f:
+            f.seek(self._end)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                columns = line.rstrip(b"\n").split(b"\t")
+                values = [columns[pos] if pos < len(columns) else b"" for pos in self._positions]
+                records.append(_index_record(self._end, len(line), values))
+                self._add(len(line), values)
+        with self._sidecar_path.open(mode="ab") as f:
+            f.truncate(self._sidecar_end)
+            f.write(b"".join(records))
+            self._sidecar_end = f.tell()
+
+    def _add(self, length: int, values: Sequence[bytes]) -> None:
+        line_index = len(self._offsets)
+        self._offsets.append(self._end)
+        self._end += length
+        try:
+            entry_time = float(values[0])
+        except ValueError:
+            entry_time = self._times[-1] if self._times else 0.0
+        if self._times and entry_time < self._times[-1]:
+            self._times_sorted = False  # The clock has been set back
+        self._times.append(entry_time)
+        for lines_by_value, value in zip(self._lines_by_value, values[1:]):
+            key = value.decode("utf-8", errors="replace").lower()
+            if (lines := lines_by_value.get(key)) is None:
+                lines = lines_by_value[key] = array("I")
+            lines.append(line_index)
+
+    def lookup(self, filters: Sequence[QueryFilter]) -> Iterator[tuple[int, int]] | None:
+        """Line numbers and offsets of the lines which may match, the latest first
+
+        The lines still have to be filtered. None means that none of the filters can be answered
+        by the index.
+        """
+        candidates: set[int] | None = None
+        for f in filters:
+            if (lines := self._lines_with_value(f)) is not None:
+                candidates = lines if candidates is None else candidates & lines
+        time_range = self._lines_in_time_range(filters)
+
+        line_indexes: Iterable[int]
+        if candidates is not None:
+            line_indexes = sorted(
+                (i for i in candidates if time_range is None or i in time_range), reverse=True
+            )
+        elif time_range is not None:
+            line_indexes = reversed(time_range)
+        else:
+            return None
+        offsets = self._offsets
+        return ((line_index + 1, offsets[line_index]) for line_index in line_indexes)
+
+    def _lines_with_value(self, f: QueryFilter) -> set[int] | None:
+        if f.column_name not in _INDEXED_COLUMNS[1:]:
+            return None
+        if f.operator_name in ("=", "=~"):
+            keys = [f.argument]
+        elif f.operator_name == "in":
+            keys = f.argument
+        else:
+            return None
+        lines_by_value = self._lines_by_value[_INDEXED_COLUMNS.index(f.column_name) - 1]
+        return {line for key in keys for line in lines_by_value.get(str(key).lower(), ())}
+
+    def _lines_in_time_range(self, filters: Iterable[QueryFilter]) -> range | None:
+        if not self._times_sorted:
+            return None
+        times = self._times
+        start, stop = 0, len(times)
+        found = False
+        for f in filters:
+            if f.column_name != "history_time":
+                continue
+            found = True
+            if f.operator_name in (">=", "="):
+                start = max(start, bisect.bisect_left(times, f.argument))
+            elif f.operator_name == ">":
+                start = max(start, bisect.bisect_right(times, f.argument))
+            if f.operator_name in ("<=", "="):
+                stop = min(stop, bisect.bisect_right(times, f.argument))
+            elif f.operator_name == "<":
+                stop = min(stop, bisect.bisect_left(times, f.argument))
+        return range(start, stop) if found else None
+
+
 # Please note: Keep this in sync with packages/neb/src/TableEventConsole.cc.
 _GREPABLE_COLUMNS = {
     "event_id",
@@ -292,6 +512,34 @@ def parse_history_file(
     return entries
 
 
+def read_history_lines(
+    history_columns: Sequence[tuple[str, Any]],
+    path: Path,
+    lines: Iterable[tuple[int, int]],
+    filter_row: Callable[[Sequence[Any]], bool],
+    limit: int | None,
+    logger: Logger,
+) -> list[Any]:
+    """Read the lines at the given offsets, like parse_history_file() reads the grep output"""
+    entries: list[Any] = []
+    with path.open(mode="rb") as f:
+        for line_number, offset in lines:
+            if limit is not None and len(entries) > limit:
+                break
+            f.seek(offset)
+            line = f.readline()
+            try:
+                parts: list[Any] = line.decode("utf-8").rstrip("\n").split("\t")
+                parts.insert(0, line_number)
+                convert_history_line(history_columns, parts)
+                if filter_row(parts):
+                    entries.append(parts)
+            except Exception:
+                logger.exception("Invalid line '%s' in history file %s", line, path)
+
+    return entries
+
+
 def parse_history_file_python(
     history_columns: Sequence[tuple[str, Any]],
     path: Path,
@@ -6,6 +6,7 @@
 import itertools
 import json
 import sqlite3
+import threading
 import time
 from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
@@ -17,6 +18,7 @@ from typing import Final, Literal
 from .config import Config
 from .event import Event
 from .history import History, HistoryWhat
+from .perfcounters import Perfcounters
 from .query import Columns, QueryFilter, QueryGET
 from .settings import Options, Paths, Settings
 
@@ -53,6 +55,17 @@ TABLE_COLUMNS: Final = (
     "match_groups_syslog_application",
 )
 
+INDEXED_COLUMNS: Final = ("time", "id", "host", "application", "rule_id")
+"""Columns which are commonly filtered by the GUI"""
+
+INSERT_STATEMENT: Final = f"""INSERT INTO
+    history ({', '.join(TABLE_COLUMNS[1:])})
+        VALUES ({', '.join(itertools.repeat('?', len(TABLE_COLUMNS[1:])))});"""
+"""Always the same statement, so that sqlite3 reuses the prepared statement from its cache"""
+
+BATCH_SIZE: Final = 1000
+BATCH_INTERVAL: Final = 0.5
+
 SQLITE_PRAGMAS = {
     "PRAGMA journal_mode=WAL;": "WAL mode for concurrent reads and writes",
     "PRAGMA synchronous = NORMAL;": "Writes should not blocked by reads",
@@ -134,6 +147,16 @@ class SQLiteSettings:
 
 
 class SQLiteHistory(History):
+    """History in a sqlite database
+
+    New entries are collected and written by a background thread, which inserts
+    them in a single transaction once BATCH_SIZE entries are pending or
+    BATCH_INTERVAL seconds after the first of them has been added. Committing
+    every single entry would wait for the database file for every event. Pending
+    entries are written before reading from or cleaning up the table and when
+    closing the history, so they are never missing from a query.
+    """
+
     def __init__(
         self,
         settings: SQLiteSettings,
@@ -141,12 +164,19 @@ class SQLiteHistory(History):
         logger: Logger,
         event_columns: Columns,
         history_columns: Columns,
+        perfcounters: Perfcounters | None = None,
+        *,
+        batch_size: int = BATCH_SIZE,
+        batch_interval: float = BATCH_INTERVAL,
     ):
         self._settings = settings
         self._config = config
         self._logger = logger
         self._event_columns = event_columns
         self._history_columns = history_columns
+        self._perfcounters = perfcounters
+        self._batch_size = batch_size
+        self._batch_interval = batch_interval
         self._last_housekeeping = 0.0
 
         if isinstance(self._settings.database, Path):
@@ -155,8 +185,8 @@ class SQLiteHistory(History):
 
         configure_sqlite_types()
 
-        # TODO lookup our ec backend thread safety.
         # check_same_thread=False the connection may be accessed in multiple threads.
+        # All accesses of this class are serialized by self._connection_lock.
         self.conn = sqlite3.connect(
             self._settings.database, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES
         )
@@ -167,6 +197,17 @@ class SQLiteHistory(History):
             for pragma_string in SQLITE_PRAGMAS:
                 connection.execute(pragma_string)
 
+        self._create_table()
+
+        # Lock ordering: self._connection_lock before self._pending_changed
+        self._connection_lock = threading.Lock()
+        self._pending_changed = threading.Condition()
+        self._pending: list[Sequence[object]] = []
+        self._closed = False
+        self._writer = threading.Thread(target=self._run_writer, name="HistoryWriter", daemon=True)
+        self._writer.start()
+
+    def _create_table(self) -> None:
         with self.conn as connection:
             cur = connection.cursor()
             cur.execute(
@@ -204,32 +245,38 @@ class SQLiteHistory(History):
                         match_groups_syslog_application JSON
                     );"""
             )
+            for column in INDEXED_COLUMNS:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS history_{column} ON history ({column});")
 
     def flush(self) -> None:
-        """Drop the history table."""
-        self.conn.execute("DROP TABLE IF EXISTS history;")
-        self.conn.commit()
+        """Drop the history table and the pending entries, start with an empty table."""
+        with self._connection_lock:
+            with self._pending_changed:
+                self._pending = []
+                self._update_queue_length()
+            self.conn.execute("DROP TABLE IF EXISTS history;")
+            self.conn.commit()
+            self._create_table()
 
     def add(self, event: Event, what: HistoryWhat, who: str = "", addinfo: str = "") -> None:
-        """Add a single entry to the history table.
+        """Add a single entry to the history table, it is written with the next batch.
 
         No need to include the line column, as it is autoincremented."""
-        with self.conn as connection:
-            cur = connection.cursor()
-            cur.execute(
-                f"""INSERT INTO
-                    history ({', '.join(TABLE_COLUMNS[1:])})
-                        VALUES ({', '.join(itertools.repeat('?', len(TABLE_COLUMNS[1:])))});""",
-                tuple(
-                    itertools.chain(
-                        (time.time(), what, who, addinfo),
-                        [
-                            event.get(colname.removeprefix("event_"), defval)
-                            for colname, defval in self._event_columns
-                        ],
-                    )
-                ),
+        entry = tuple(
+            itertools.chain(
+                (time.time(), what, who, addinfo),
+                [
+                    event.get(colname.removeprefix("event_"), defval)
+                    for colname, defval in self._event_columns
+                ],
             )
+        )
+        with self._pending_changed:
+            self._pending.append(entry)
+            self._update_queue_length()
+            # Wake up the writer for the first entry of a batch and for a full batch
+            if len(self._pending) in (1, self._batch_size):
+                self._pending_changed.notify()
 
     def add_entries(self, entries: Sequence[Sequence[object]]) -> None:
         """Add multiple entries to the history table.
@@ -237,14 +284,10 @@ class SQLiteHistory(History):
         Used only by the cmk-update-config during EC history migration to sqlite.
         The first column is the line number, which is autoincremented, so ignored in TABLE_COLUMNS.
         """
-        with self.conn as connection:
-            cur = connection.cursor()
-            cur.executemany(
-                f"""INSERT INTO
-                    history ({', '.join(TABLE_COLUMNS[1:])})
-                        VALUES ({', '.join(itertools.repeat('?', len(TABLE_COLUMNS[1:])))});""",
-                (entry[1:] for entry in entries),
-            )
+        with self._connection_lock:
+            self._write_pending_locked()
+            with self.conn as connection:
+                connection.executemany(INSERT_STATEMENT, (entry[1:] for entry in entries))
 
     def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
         """Retrieve entries from the history table.
@@ -255,10 +298,12 @@ class SQLiteHistory(History):
         if query.limit:
             sqlite_query += " LIMIT ?"
             sqlite_arguments += f" {query.limit+1}"
-        with self.conn as connection:
-            cur = connection.cursor()
-            cur.execute(sqlite_query, sqlite_arguments)
-            return cur.fetchall()
+        with self._connection_lock:
+            self._write_pending_locked()
+            with self.conn as connection:
+                cur = connection.cursor()
+                cur.execute(sqlite_query, sqlite_arguments)
+                return cur.fetchall()
 
     def housekeeping(self) -> None:
         """Remove old entries from the history table.
@@ -268,18 +313,70 @@ class SQLiteHistory(History):
         now = time.time()
         if now - self._last_housekeeping > 3600:
             delta = now - timedelta(days=self._config["history_lifetime"]).total_seconds()
-            with self.conn as connection:
-                cur = connection.cursor()
-                cur.execute("DELETE FROM history WHERE time <= ?;", (delta,))
-            # should be executed outside of the transaction
-            self.conn.execute("VACUUM;")
+            with self._connection_lock:
+                self._write_pending_locked()
+                with self.conn as connection:
+                    cur = connection.cursor()
+                    cur.execute("DELETE FROM history WHERE time <= ?;", (delta,))
+                # should be executed outside of the transaction
+                self.conn.execute("VACUUM;")
             self._last_housekeeping = now
 
     def close(self) -> None:
-        """Explicitly close the connection to the sqlite database.
+        """Write the pending entries and explicitly close the connection to the sqlite database.
 
         Used during a new object instantiation,
         to avoid sqlite3.OperationalError: database is locked.
         """
-        self.conn.commit()
-        self.conn.close()
+        with self._pending_changed:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending_changed.notify()
+        self._writer.join()
+        with self._connection_lock:
+            self._write_pending_locked()
+            self.conn.commit()
+            self.conn.close()
+
+    def _run_writer(self) -> None:
+        while self._wait_for_batch():
+            try:
+                self.write_pending()
+            except Exception:
+                # The entries are lost, but the writer has to keep running
+                self._logger.exception("Failed to write the history entries")
+                if self._settings.options.debug:
+                    raise
+
+    def _wait_for_batch(self) -> bool:
+        """Wait until the pending entries are due, return False once the history is closed"""
+        with self._pending_changed:
+            self._pending_changed.wait_for(lambda: self._pending or self._closed)
+            self._pending_changed.wait_for(
+                lambda: len(self._pending) >= self._batch_size or self._closed,
+                timeout=self._batch_interval,
+            )
+            return not self._closed
+
+    def write_pending(self) -> None:
+        """Write the pending entries now instead of waiting for the writer"""
+        with self._connection_lock:
+            self._write_pending_locked()
+
+    def _write_pending_locked(self) -> None:
+        """Insert the pending entries in one transaction, self._connection_lock must be held"""
+        with self._pending_changed:
+            entries, self._pending = self._pending, []
+            self._update_queue_length()
+        if not entries:
+            return
+        tic = time.time()
+        with self.conn as connection:
+            connection.executemany(INSERT_STATEMENT, entries)
+        if self._perfcounters is not None:
+            self._perfcounters.count_time("history_flush", time.time() - tic)
+
+    def _update_queue_length(self) -> None:
+        if self._perfcounters is not None:
+            self._perfcounters.set_gauge("history_queue", len(self._pending))
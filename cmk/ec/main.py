@@ -53,6 +53,8 @@ from .config import Config, ConfigFromWATO, Count, ECRulePack, MatchGroups, Rule
 from .core_queries import HostInfo, query_hosts_scheduled_downtime_depth
 from .crash_reporting import CrashReportStore, ECCrashReport
 from .event import create_events_from_syslog_messages, Event, scrub_string
+from .event_pipeline import EventPipeline, MatchedEvent, Task
+from .event_store import EventStore
 from .helpers import ECLock, parse_bytes_into_syslog_messages
 from .history import ActiveHistoryPeriod, get_logfile, History, HistoryWhat, quote_tab, TimedHistory
 from .history_file import FileHistory
@@ -70,8 +72,16 @@ from .query import (
     QueryREPLICATE,
     StatusTable,
 )
-from .rule_matcher import compile_rule, match, MatchFailure, MatchResult, MatchSuccess, RuleMatcher
+from .rule_matcher import (
+    compile_rule,
+    find_rule_hits,
+    match,
+    MatchResult,
+    MatchSuccess,
+    RuleMatcher,
+)
 from .rule_packs import load_active_config
+from .rule_prefilter import RulePrefilter
 from .settings import create_settings, FileDescriptor, PortNumber, Settings
 from .snmp import SNMPTrapParser
 from .syslog import SyslogFacility, SyslogPriority
@@ -162,6 +172,7 @@ def create_history_raw(
     logger: Logger,
     event_columns: Columns,
     history_columns: Columns,
+    perfcounters: Perfcounters | None = None,
 ) -> History:
     """Factory for History objects based on the current configuration."""
     match config["archive_mode"]:
@@ -179,6 +190,7 @@ def create_history_raw(
                 logger,
                 event_columns,
                 history_columns,
+                perfcounters,
             )
         case _ as default:
             assert_never(default)
@@ -190,10 +202,13 @@ def create_history(
     logger: Logger,
     event_columns: Columns,
     history_columns: Columns,
+    perfcounters: Perfcounters | None = None,
 ) -> History:
     """Factory for History objects based on the current configuration, optionally augmented with timing information."""
 
-    history = create_history_raw(settings, config, logger, event_columns, history_columns)
+    history = create_history_raw(
+        settings, config, logger, event_columns, history_columns, perfcounters
+    )
     return TimedHistory(history) if logger.isEnabledFor(DEBUG) else history
 
 
@@ -375,6 +390,7 @@ class EventServer(ECServerThread):
         self._rules: list[Rule] = []
         self._rule_by_id: dict[str | None, Rule] = {}
         self._rule_hash: dict[int, dict[int, Any]] = {}
+        self._rule_prefilter = RulePrefilter([])
         self._hash_stats: list[list[int]] = []  # facility/priority
         for _unused_facility in range(32):
             self._hash_stats.append([0] * 8)
@@ -392,6 +408,8 @@ class EventServer(ECServerThread):
             omd_site_id=omd_site(),
             is_active_time_period=self._time_period.active,
         )
+        self._pipeline: EventPipeline | None = None
+        self._pipeline_rule_matcher: RuleMatcher | None = None
 
         # HACK for testing: The real fix would involve breaking up these huge
         # class monsters.
@@ -655,9 +673,13 @@ class EventServer(ECServerThread):
             if f is not None
         ]
         client_sockets: dict[FileDescr, tuple[socket.socket, tuple[str, int] | None, bytes]] = {}
-        select_timeout = 1
         unprocessed_pipe_data = b""
         while not self._terminate_event.is_set():
+            self._update_pipeline()
+            # Process the matched events soon
+            select_timeout = (
+                0.01 if self._pipeline is not None and self._pipeline.has_pending() else 1.0
+            )
             try:
                 readable: list[FileDescr | socket.socket] = select.select(
                     listen_list + list(client_sockets.keys()), [], [], select_timeout
@@ -730,9 +752,12 @@ class EventServer(ECServerThread):
             # Read events from builtin snmptrap server
             if self._snmp_trap_socket is not None and self._snmp_trap_socket in readable:
                 message, address = self._snmp_trap_socket.recvfrom(65535)
-                self.process_potential_event_instrumented(
-                    self.create_events_from_trap(message, parse_address("SNMP trap", address))
-                )
+                if self._pipeline is None:
+                    self.process_potential_event_instrumented(
+                        self.create_events_from_trap(message, parse_address("SNMP trap", address))
+                    )
+                else:
+                    self._pipeline.submit(("trap", message, parse_address("SNMP trap", address)))
 
             if spool_files := sorted(
                 self.settings.paths.spool_dir.value.glob("[!.]*"), key=lambda x: x.stat().st_mtime
@@ -743,6 +768,91 @@ class EventServer(ECServerThread):
             else:
                 select_timeout = 1  # restore default select timeout
 
+            if self._pipeline is not None:
+                self._process_matched_events(self._pipeline.results())
+
+        self._close_pipeline()
+
+    def _update_pipeline(self) -> None:
+        """Start the worker processes and restart them after the rules have been compiled"""
+        num_workers = self._config["event_processing_workers"]
+        if self._pipeline is not None and (
+            self._pipeline_rule_matcher is not self._rule_matcher
+            or self._pipeline.num_workers != num_workers
+        ):
+            self._close_pipeline()
+        if self._pipeline is None and num_workers:
+            self._logger.info("Starting %d event processing workers", num_workers)
+            # The rule matcher is replaced last when reloading the configuration
+            self._pipeline_rule_matcher = self._rule_matcher
+            self._pipeline = EventPipeline(num_workers, self._match_messages, self._rule_by_id)
+
+    def _close_pipeline(self) -> None:
+        """Process the pending messages and stop the worker processes"""
+        if self._pipeline is None:
+            return
+        try:
+            self._process_matched_events(self._pipeline.results(wait=True))
+        finally:
+            self._pipeline.close()
+            self._pipeline = None
+
+    def _match_messages(self, task: Task) -> Sequence[MatchedEvent]:
+        """Parse the messages and match them against the rules in a worker process
+
+        Nothing in here may change the state of the event server or use its
+        locks, which are not shared with the workers.
+        """
+        if task[0] == "syslog":
+            _syslog, messages, address = task
+            events = create_events_from_syslog_messages(
+                messages, address, self._logger if self._config["debug_rules"] else None
+            )
+        else:
+            _trap, data, trap_address = task
+            events = self.create_events_from_trap(data, trap_address)
+
+        return [self._match_event(event) for event in events]
+
+    def _match_event(self, event: Event) -> MatchedEvent:
+        before = time.time()
+        rule_tries = 0
+
+        def event_rule_matches(rule: Rule, event: Event) -> MatchResult:
+            nonlocal rule_tries
+            rule_tries += 1
+            return self._rule_matcher.event_rule_matches(rule, event)
+
+        self.do_translate_hostname(event)
+        rule_hits = find_rule_hits(
+            self._rule_candidates(event), event, event_rule_matches, self._logger
+        )
+        return MatchedEvent(
+            event=event,
+            rule_tries=rule_tries,
+            rule_hits=[(rule["id"], result) for rule, result in rule_hits],
+            duration=time.time() - before,
+        )
+
+    def _process_matched_events(self, matched_events: Iterable[MatchedEvent]) -> None:
+        """The part of process_potential_event_instrumented() after the worker processes"""
+        assert self._pipeline is not None
+        rule_by_id = self._pipeline.rule_by_id
+        for matched_event in matched_events:
+            self._perfcounters.count("messages")
+            self._perfcounters.count("rule_tries", matched_event.rule_tries)
+            before = time.time()
+            # In replication slave mode (when not took over), ignore all events
+            if not is_replication_slave(self._config) or self._slave_status["mode"] != "sync":
+                self._process_rule_hits(
+                    matched_event.event,
+                    [(rule_by_id[rule_id], result) for rule_id, result in matched_event.rule_hits],
+                )
+            elif self.settings.options.debug:
+                self._logger.info("Replication: we are in slave mode, ignoring event")
+            elapsed = matched_event.duration + time.time() - before
+            self._perfcounters.count_time("processing", elapsed)
+
     def create_events_from_trap(self, data: bytes, address: tuple[str, int]) -> Iterator[Event]:
         try:
             if varbinds_and_ipaddress := self._snmp_trap_parser(data, address):
@@ -767,8 +877,12 @@ class EventServer(ECServerThread):
             self._perfcounters.count_time("processing", elapsed)
 
     def process_syslog_messages(
-        self, messages: Iterable[bytes], address: tuple[str, int] | None
+        self, messages: Sequence[bytes], address: tuple[str, int] | None
     ) -> None:
+        if self._pipeline is not None:
+            if messages:
+                self._pipeline.submit(("syslog", messages, address))
+            return
         self.process_potential_event_instrumented(
             create_events_from_syslog_messages(
                 messages, address, self._logger if self._config["debug_rules"] else None
@@ -1165,6 +1279,7 @@ class EventServer(ECServerThread):
                         ):
                             count_unspecific += 1
 
+        self._rule_prefilter = RulePrefilter(self._rules)
         self._logger.info(
             "Compiled %d active rules (ignoring %d disabled rules)", count_rules, count_disabled
         )
@@ -1238,9 +1353,26 @@ class EventServer(ECServerThread):
                 (100.0 * count / float(total_count)),
             )
 
-    def process_potential_event(self, event: Event) -> None:  # pylint: disable=too-many-branches
+    def process_potential_event(self, event: Event) -> None:
         self.do_translate_hostname(event)
+        self._process_rule_hits(
+            event,
+            find_rule_hits(
+                self._rule_candidates(event), event, self.event_rule_matches, self._logger
+            ),
+        )
 
+    def _rule_candidates(self, event: Event) -> Sequence[Rule]:
+        if not self._config["rule_optimizer"]:
+            return self._rules
+        rules = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
+        if self._config["debug_rules"]:
+            return rules  # Show why each of the rules does not match
+        return self._rule_prefilter.candidates(rules, event)
+
+    def _process_rule_hits(  # pylint: disable=too-many-branches
+        self, event: Event, rule_hits: Sequence[tuple[Rule, MatchSuccess]]
+    ) -> None:
         # Log all incoming messages into a syslog-like text file if that is enabled
         if self._config["log_messages"]:
             self.log_message(event)
@@ -1248,133 +1380,84 @@ class EventServer(ECServerThread):
         # Rule optimizer
         if self._config["rule_optimizer"]:
             self._hash_stats[event["facility"]][event["priority"]] += 1
-            rule_candidates = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
-        else:
-            rule_candidates = self._rules
 
-        skip_pack = None
-        for rule in rule_candidates:
-            if skip_pack and rule["pack"] == skip_pack:
-                continue  # still in the rule pack that we want to skip
-            skip_pack = None  # new pack, reset skipping
+        for rule, result in rule_hits:
+            self._perfcounters.count("rule_hits")
+            if self._config["debug_rules"]:
+                self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
 
-            try:
-                result = self.event_rule_matches(rule, event)
-            except Exception as e:
-                result = MatchFailure(
-                    reason=f"Rule would match, but due to inverted matching does not. {e}"
+            self._event_status.count_rule_match(rule["id"])
+            if self._config["log_rulehits"]:
+                self._logger.info(
+                    "Rule '%s/%s' hit by message %s/%s - '%s'.",
+                    rule["pack"],
+                    rule["id"],
+                    SyslogFacility(event["facility"]),
+                    SyslogPriority(event["priority"]),
+                    event["text"],
                 )
-                self._logger.exception(result.reason)
-
-            if isinstance(result, MatchSuccess):
-                self._perfcounters.count("rule_hits")
-                if self._config["debug_rules"]:
-                    self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
-
-                self._event_status.count_rule_match(rule["id"])
-                if self._config["log_rulehits"]:
-                    self._logger.info(
-                        "Rule '%s/%s' hit by message %s/%s - '%s'.",
-                        rule["pack"],
-                        rule["id"],
-                        SyslogFacility(event["facility"]),
-                        SyslogPriority(event["priority"]),
-                        event["text"],
-                    )
-
-                if rule.get("drop"):
-                    if rule["drop"] == "skip_pack":
-                        skip_pack = rule["pack"]
-                        if self._config["debug_rules"]:
-                            self._logger.info("  skipping this rule pack (%s)", skip_pack)
-                        continue
-                    self._perfcounters.count("drops")
-                    return
-
-                if result.cancelling:
-                    self._event_status.cancel_events(
-                        self, self._event_columns, event, result.match_groups, rule
-                    )
-                    return
-
-                # Remember the rule id that this event originated from
-                event["rule_id"] = rule["id"]
-
-                # Attach optional contact group information for visibility
-                # and eventually for notifications
-                self._add_rule_contact_groups_to_event(rule, event)
 
-                # Store groups from matching this event. In order to make
-                # persistence easier, we do not save them as list but join
-                # them on ASCII-1.
-                match_groups_message = result.match_groups.get("match_groups_message", ())
-                assert match_groups_message is not False
-                event["match_groups"] = match_groups_message
+            if rule.get("drop"):
+                if rule["drop"] == "skip_pack":
+                    if self._config["debug_rules"]:
+                        self._logger.info("  skipping this rule pack (%s)", rule["pack"])
+                    continue
+                self._perfcounters.count("drops")
+                return
 
-                match_groups_syslog_application = result.match_groups.get(
-                    "match_groups_syslog_application", ()
+            if result.cancelling:
+                self._event_status.cancel_events(
+                    self, self._event_columns, event, result.match_groups, rule
                 )
-                assert match_groups_syslog_application is not False
-                event["match_groups_syslog_application"] = match_groups_syslog_application
+                return
 
-                self.rewrite_event(rule, event, result.match_groups)
+            # Remember the rule id that this event originated from
+            event["rule_id"] = rule["id"]
 
-                # Lookup the monitoring core hosts and add the core host
-                # name to the event when one can be matched.
-                #
-                # Needs to be done AFTER event rewriting, because the rewriting
-                # may change the "host" field.
-                #
-                # For the moment we have no rule/condition matching on this
-                # field. So we only add the core host info for matched events.
-                self._add_core_host_to_new_event(event)
-
-                if "count" in rule:
-                    count = rule["count"]
-                    # Check if a matching event already exists that we need to
-                    # count up. If the count reaches the limit, the event will
-                    # be opened and its rule actions performed.
-                    existing_event = self._event_status.count_event(self, event, rule, count)
-                    if existing_event:
-                        if "delay" in rule:
-                            if self._config["debug_rules"]:
-                                self._logger.info(
-                                    "Event opening will be delayed for %d seconds", rule["delay"]
-                                )
-                            existing_event["delay_until"] = time.time() + rule["delay"]
-                            existing_event["phase"] = "delayed"
-                        else:
-                            event_has_opened(
-                                self._history,
-                                self.settings,
-                                self._config,
-                                self._logger,
-                                self.host_config,
-                                self._event_columns,
-                                rule,
-                                existing_event,
-                            )
+            # Attach optional contact group information for visibility
+            # and eventually for notifications
+            self._add_rule_contact_groups_to_event(rule, event)
 
-                        self._history.add(existing_event, "COUNTREACHED")
+            # Store groups from matching this event. In order to make
+            # persistence easier, we do not save them as list but join
+            # them on ASCII-1.
+            match_groups_message = result.match_groups.get("match_groups_message", ())
+            assert match_groups_message is not False
+            event["match_groups"] = match_groups_message
 
-                        if "delay" not in rule and rule.get("autodelete"):
-                            existing_event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(existing_event, "AUTODELETE")
-                elif "expect" in rule:
-                    self._event_status.count_expected_event(self, event)
-                else:
+            match_groups_syslog_application = result.match_groups.get(
+                "match_groups_syslog_application", ()
+            )
+            assert match_groups_syslog_application is not False
+            event["match_groups_syslog_application"] = match_groups_syslog_application
+
+            self.rewrite_event(rule, event, result.match_groups)
+
+            # Lookup the monitoring core hosts and add the core host
+            # name to the event when one can be matched.
+            #
+            # Needs to be done AFTER event rewriting, because the rewriting
+            # may change the "host" field.
+            #
+            # For the moment we have no rule/condition matching on this
+            # field. So we only add the core host info for matched events.
+            self._add_core_host_to_new_event(event)
+
+            if "count" in rule:
+                count = rule["count"]
+                # Check if a matching event already exists that we need to
+                # count up. If the count reaches the limit, the event will
+                # be opened and its rule actions performed.
+                existing_event = self._event_status.count_event(self, event, rule, count)
+                if existing_event:
                     if "delay" in rule:
                         if self._config["debug_rules"]:
                             self._logger.info(
                                 "Event opening will be delayed for %d seconds", rule["delay"]
                             )
-                        event["delay_until"] = time.time() + rule["delay"]
-                        event["phase"] = "delayed"
+                        existing_event["delay_until"] = time.time() + rule["delay"]
+                        existing_event["phase"] = "delayed"
                     else:
-                        event["phase"] = "open"
-
-                    if self.new_event_respecting_limits(event) and event["phase"] == "open":
                         event_has_opened(
                             self._history,
                             self.settings,
@@ -1383,13 +1466,44 @@ class EventServer(ECServerThread):
                             self.host_config,
                             self._event_columns,
                             rule,
-                            event,
+                            existing_event,
                         )
-                        if rule.get("autodelete"):
-                            event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(event, "AUTODELETE")
-                return
+
+                    self._history.add(existing_event, "COUNTREACHED")
+
+                    if "delay" not in rule and rule.get("autodelete"):
+                        existing_event["phase"] = "closed"
+                        with self._event_status.lock:
+                            self._event_status.remove_event(existing_event, "AUTODELETE")
+            elif "expect" in rule:
+                self._event_status.count_expected_event(self, event)
+            else:
+                if "delay" in rule:
+                    if self._config["debug_rules"]:
+                        self._logger.info(
+                            "Event opening will be delayed for %d seconds", rule["delay"]
+                        )
+                    event["delay_until"] = time.time() + rule["delay"]
+                    event["phase"] = "delayed"
+                else:
+                    event["phase"] = "open"
+
+                if self.new_event_respecting_limits(event) and event["phase"] == "open":
+                    event_has_opened(
+                        self._history,
+                        self.settings,
+                        self._config,
+                        self._logger,
+                        self.host_config,
+                        self._event_columns,
+                        rule,
+                        event,
+                    )
+                    if rule.get("autodelete"):
+                        event["phase"] = "closed"
+                        with self._event_status.lock:
+                            self._event_status.remove_event(event, "AUTODELETE")
+            return
 
         # End of loop over rules.
         if self._config["archive_orphans"]:
@@ -2235,13 +2349,13 @@ class StatusServer(ECServerThread):
             raise MKClientError("Wrong number of arguments for DELETE")
         event_ids, user = arguments
         ids = {int(event_id) for event_id in event_ids.split(",")}
-        self._event_status.delete_events_by(lambda event: event["id"] in ids, user)
+        self._event_status.delete_events_by_ids(ids, user)
 
     def handle_command_delete_events_of_host(self, arguments: list[str]) -> None:
         if len(arguments) != 2:
             raise MKClientError("Wrong number of arguments for DELETE_EVENTS_OF_HOST")
         hostname, user = arguments
-        self._event_status.delete_events_by(lambda event: event["host"] == hostname, user)
+        self._event_status.delete_events_of_host(hostname, user)
 
     def handle_command_update(self, arguments: list[str]) -> None:
         event_ids, user, acknowledged, comment, contact = arguments
@@ -2287,6 +2401,7 @@ class StatusServer(ECServerThread):
             getLogger("cmk.mkeventd"),
             self._lock_configuration,
             self._history,
+            self._perfcounters,
             self._event_status,
             self._event_server,
             self,
@@ -2482,6 +2597,7 @@ def run_eventd(  # pylint: disable=too-many-branches
                     logger,
                     lock_configuration,
                     history,
+                    perfcounters,
                     event_status,
                     event_server,
                     status_server,
@@ -2536,9 +2652,13 @@ class EventStatus:
         self._config = config
         self._history = history
 
+    def close_history(self) -> None:
+        """Write the pending history entries on shutdown"""
+        self._history.close()
+
     def flush(self) -> None:
         # TODO: Improve types!
-        self._events: list[Event] = []
+        self._events = EventStore()
         self._next_event_id = 1
         self._rule_stats: dict[str, int] = {}
         # needed for expecting rules
@@ -2552,13 +2672,10 @@ class EventStatus:
 
     def events(self) -> list[Event]:
         # TODO: Improve type!
-        return self._events
+        return self._events.to_list()
 
     def event(self, eid: int) -> Event | None:
-        for event in self._events:
-            if event["id"] == eid:
-                return event
-        return None
+        return self._events.get(eid)
 
     def interval_start(self, rule_id: str, interval: int) -> int:
         """
@@ -2607,14 +2724,14 @@ class EventStatus:
     def pack_status(self) -> PackedEventStatus:
         return PackedEventStatus(
             next_event_id=self._next_event_id,
-            events=self._events,
+            events=self._events.to_list(),
             rule_stats=self._rule_stats,
             interval_starts=self._interval_starts,
         )
 
     def unpack_status(self, status: PackedEventStatus) -> None:
         self._next_event_id = status["next_event_id"]
-        self._events = status["events"]
+        self._events = EventStore(status["events"])
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
 
@@ -2645,8 +2762,20 @@ class EventStatus:
         if path.exists():
             try:
                 status = ast.literal_eval(path.read_text(encoding="utf-8"))
+                events: list[Event] = status["events"]
+                # Add new columns and fix broken events
+                for event in events:
+                    event.setdefault("ipaddress", "")
+                    event.setdefault("host", HostName(""))
+                    event.setdefault("application", "")
+                    event.setdefault("pid", 0)
+
+                    if "core_host" not in event:
+                        event_server.add_core_host_to_event(event)
+                        event["host_in_downtime"] = False
+
                 self._next_event_id = status["next_event_id"]
-                self._events = status["events"]
+                self._events = EventStore(events)
                 self._rule_stats = status["rule_stats"]
                 self._interval_starts = status.get("interval_starts", {})
                 self._logger.info("Loaded event state from %s.", path)
@@ -2654,17 +2783,6 @@ class EventStatus:
                 self._logger.exception("Error loading event state from %s", path)
                 raise
 
-        # Add new columns and fix broken events
-        for event in self._events:
-            event.setdefault("ipaddress", "")
-            event.setdefault("host", HostName(""))
-            event.setdefault("application", "")
-            event.setdefault("pid", 0)
-
-            if "core_host" not in event:
-                event_server.add_core_host_to_event(event)
-                event["host_in_downtime"] = False
-
         # core_host is needed to initialize the status
         self._initialize_event_limit_status()
 
@@ -2704,7 +2822,7 @@ class EventStatus:
         self._perfcounters.count("events")
         event["id"] = self._next_event_id
         self._next_event_id += 1
-        self._events.append(event)
+        self._events.add(event)
         self.num_existing_events += 1
         self._count_event_add(event)
         self._history.add(event, "NEW")
@@ -2728,8 +2846,8 @@ class EventStatus:
     def remove_oldest_event(self, ty: LimitKind, event: Event) -> None:
         if ty == "overall":
             self._logger.log(VERBOSE, "  Removing oldest event")
-            oldest_event = self._events[0]
-            self.remove_event(oldest_event, "AUTODELETE")
+            if (oldest_event := self._events.oldest()) is not None:
+                self.remove_event(oldest_event, "AUTODELETE")
         elif ty == "by_rule" and event["rule_id"] is not None:
             self._logger.log(VERBOSE, '  Removing oldest event of rule "%s"', event["rule_id"])
             self._remove_oldest_event_of_rule(event["rule_id"])
@@ -2739,17 +2857,13 @@ class EventStatus:
 
     # protected by self.lock
     def _remove_oldest_event_of_rule(self, rule_id: str) -> None:
-        for event in self._events:
-            if event["rule_id"] == rule_id:
-                self.remove_event(event, "AUTODELETE")
-                return
+        if (event := self._events.oldest_of_rule(rule_id)) is not None:
+            self.remove_event(event, "AUTODELETE")
 
     # protected by self.lock
     def _remove_oldest_event_of_host(self, hostname: str) -> None:
-        for event in self._events:
-            if event["host"] == hostname:
-                self.remove_event(event, "AUTODELETE")
-                return
+        if (event := self._events.oldest_of_host(hostname)) is not None:
+            self.remove_event(event, "AUTODELETE")
 
     # protected by self.lock
     def get_num_existing_events_by(self, ty: LimitKind, event: Event) -> int:
@@ -2777,10 +2891,8 @@ class EventStatus:
         """
         with self.lock:
             to_delete = []
-            for event in self._events:
-                if event["rule_id"] == rule["id"] and self.cancelling_match(
-                    match_groups, new_event, event, rule
-                ):
+            for event in self._events.by_rule_id(rule["id"]):
+                if self.cancelling_match(match_groups, new_event, event, rule):
                     # Fill a few fields of the cancelled event with data from
                     # the cancelling event so that action scripts have useful
                     # values and the logfile entry if more relevant.
@@ -2956,10 +3068,12 @@ class EventStatus:
                 preserve["contact"] = found["contact"]
         found.update(event)
         found.update(preserve)
+        if found in self._events:
+            self._events.reindex(found)
 
     def count_expected_event(self, event_server: EventServer, event: Event) -> None:
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"] and ev["phase"] == "counting":
+        for ev in self._events.by_rule_id(event["rule_id"]):
+            if ev["phase"] == "counting":
                 self.count_event_up(ev, event)
                 return
 
@@ -2969,7 +3083,7 @@ class EventStatus:
         event_server.new_event_respecting_limits(event)
 
     def count_event(
-        self, event_server: EventServer, event: Event, rule: str, count: Count
+        self, event_server: EventServer, event: Event, rule: Rule, count: Count
     ) -> Event | None:
         """
         Find previous occurrence of this event and account for
@@ -2978,31 +3092,30 @@ class EventStatus:
         since the event has been created because the count was too
         low in the specified period of time.
         """
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"]:
-                if ev["phase"] == "ack" and not count["count_ack"]:
-                    continue  # skip acknowledged events
+        for ev in self._events.by_rule_id(event["rule_id"]):
+            if ev["phase"] == "ack" and not count["count_ack"]:
+                continue  # skip acknowledged events
 
-                if count["separate_host"] and ev["host"] != event["host"]:
-                    continue  # treat events with separated hosts separately
+            if count["separate_host"] and ev["host"] != event["host"]:
+                continue  # treat events with separated hosts separately
 
-                if count["separate_application"] and ev["application"] != event["application"]:
-                    continue  # same for application
+            if count["separate_application"] and ev["application"] != event["application"]:
+                continue  # same for application
 
-                if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
-                    continue
+            if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
+                continue
 
-                count_duration = count.get("count_duration")
-                if count_duration is not None and ev["first"] + count_duration < event["time"]:
-                    # Counting has been discontinued on this event after a certain time
-                    continue
+            count_duration = count.get("count_duration")
+            if count_duration is not None and ev["first"] + count_duration < event["time"]:
+                # Counting has been discontinued on this event after a certain time
+                continue
 
-                if ev["host_in_downtime"] != event["host_in_downtime"]:
-                    continue  # treat events with different downtime states separately
+            if ev["host_in_downtime"] != event["host_in_downtime"]:
+                continue  # treat events with different downtime states separately
 
-                found = ev
-                self.count_event_up(found, event)
-                break
+            found = ev
+            self.count_event_up(found, event)
+            break
         else:
             event["count"] = 1
             event["phase"] = "counting"
@@ -3016,15 +3129,23 @@ class EventStatus:
         return None  # do not do event action
 
     def delete_events_by(self, predicate: Callable[[Event], bool], user: str) -> None:
-        for event in self._events[:]:
-            if predicate(event):
-                event["phase"] = "closed"
-                if user:
-                    event["owner"] = user
-                self.remove_event(event, "DELETE", user)
+        self._delete_events([event for event in self._events if predicate(event)], user)
+
+    def delete_events_by_ids(self, event_ids: Iterable[int], user: str) -> None:
+        self._delete_events(self._events.by_ids(event_ids), user)
+
+    def delete_events_of_host(self, hostname: str, user: str) -> None:
+        self._delete_events(self._events.by_host(hostname), user)
+
+    def _delete_events(self, events: Iterable[Event], user: str) -> None:
+        for event in events:
+            event["phase"] = "closed"
+            if user:
+                event["owner"] = user
+            self.remove_event(event, "DELETE", user)
 
     def get_events(self) -> Iterable[Event]:
-        return self._events
+        return self._events.to_list()
 
     def get_rule_stats(self) -> Iterable[tuple[str, int]]:
         return sorted(self._rule_stats.items(), key=lambda x: x[0])
@@ -3338,6 +3459,7 @@ def reload_configuration(
     logger: Logger,
     lock_configuration: ECLock,
     history: History,
+    perfcounters: Perfcounters,
     event_status: EventStatus,
     event_server: EventServer,
     status_server: StatusServer,
@@ -3348,7 +3470,12 @@ def reload_configuration(
 
         history.close()
         history = create_history(
-            settings, config, logger, StatusTableEvents.columns, StatusTableHistory.columns
+            settings,
+            config,
+            logger,
+            StatusTableEvents.columns,
+            StatusTableHistory.columns,
+            perfcounters,
         )
         event_server.reload_configuration(config, history)
 
@@ -3390,8 +3517,14 @@ def main() -> None:
 
         slave_status = default_slave_status_master()
         config = load_configuration(settings, logger, slave_status)
+        perfcounters = Perfcounters(logger.getChild("lock.perfcounters"))
         history = create_history(
-            settings, config, logger, StatusTableEvents.columns, StatusTableHistory.columns
+            settings,
+            config,
+            logger,
+            StatusTableEvents.columns,
+            StatusTableHistory.columns,
+            perfcounters,
         )
 
         pid_path = settings.paths.pid_file.value
@@ -3414,7 +3547,6 @@ def main() -> None:
         settings.paths.status_file.value.parent.mkdir(parents=True, exist_ok=True)
 
         # First do all things that might fail, before daemonizing
-        perfcounters = Perfcounters(logger.getChild("lock.perfcounters"))
         event_status = EventStatus(
             settings, config, perfcounters, history, logger.getChild("EventStatus")
         )
@@ -3495,6 +3627,9 @@ def main() -> None:
         logger.log(VERBOSE, "Saving final event state")
         event_status.save_status()
 
+        logger.log(VERBOSE, "Closing history")
+        event_status.close_history()
+
         logger.log(VERBOSE, "Cleaning up sockets")
         settings.paths.unix_socket.value.unlink()
         settings.paths.event_socket.value.unlink()
@@ -35,14 +35,21 @@ class Perfcounters:
         "processing": 0.99,  # event processing
         "sync": 0.95,  # Replication sync
         "request": 0.95,  # Client requests
+        "history_flush": 0.95,  # Writing a batch of history entries
     }
 
+    # Current values, not accumulated
+    _gauge_names: Sequence[str] = [
+        "history_queue",  # Pending history entries
+    ]
+
     # TODO: Why aren't self._times / self._rates / ... not initialized with their defaults?
     def __init__(self, logger: Logger) -> None:
         self._lock = ECLock(logger)
 
         # Initialize counters
         self._counters = {n: 0 for n in self._counter_names}
+        self._gauges = {n: 0 for n in self._gauge_names}
         self._old_counters: dict[str, int] = {}
         self._rates: dict[str, float] = {}
         self._average_rates: dict[str, float] = {}
@@ -51,9 +58,13 @@ class Perfcounters:
 
         self._logger = logger.getChild("Perfcounters")
 
-    def count(self, counter: str) -> None:
+    def count(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += value
+
+    def set_gauge(self, gauge: str, value: int) -> None:
         with self._lock:
-            self._counters[counter] += 1
+            self._gauges[gauge] = value
 
     def count_time(self, counter: str, ptime: float) -> None:
         with self._lock:
@@ -99,6 +110,9 @@ class Perfcounters:
         for name in cls._weights:
             columns.append((f"status_average_{name}_time", 0.0))
 
+        for name in cls._gauge_names:
+            columns.append((f"status_{name}", 0))
+
         return columns
 
     def get_status(self) -> Sequence[float]:
@@ -117,4 +131,7 @@ class Perfcounters:
             for name in self._weights:
                 row.append(self._times.get(name, 0.0))
 
+            for name in self._gauge_names:
+                row.append(self._gauges[name])
+
             return row
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import ipaddress
 import re
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from logging import Logger
 from typing import Literal, NamedTuple
@@ -143,6 +143,41 @@ def match_ip_network(pattern: str, ipaddress_text: str) -> bool:
     return ipaddress_ in network
 
 
+def find_rule_hits(
+    rules: Iterable[Rule],
+    event: Event,
+    event_rule_matches: Callable[[Rule, Event], MatchResult],
+    logger: Logger,
+) -> list[tuple[Rule, MatchSuccess]]:
+    """Find the matching rules up to the one deciding what happens with the event
+
+    A matching rule with the "skip_pack" drop option does not decide anything,
+    the remaining rules of its rule pack are skipped and matching continues with
+    the next pack.
+    """
+    hits: list[tuple[Rule, MatchSuccess]] = []
+    skip_pack = None
+    for rule in rules:
+        if skip_pack and rule["pack"] == skip_pack:
+            continue  # still in the rule pack that we want to skip
+        skip_pack = None  # new pack, reset skipping
+
+        try:
+            result = event_rule_matches(rule, event)
+        except Exception as e:
+            result = MatchFailure(
+                reason=f"Rule would match, but due to inverted matching does not. {e}"
+            )
+            logger.exception(result.reason)
+
+        if isinstance(result, MatchSuccess):
+            hits.append((rule, result))
+            if rule.get("drop") != "skip_pack":
+                break
+            skip_pack = rule["pack"]
+    return hits
+
+
 class RuleMatcher:
     def __init__(
         self,
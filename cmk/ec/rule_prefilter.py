@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Skip the rules which can not match an event without trying them
+
+Most rules only match messages containing some fixed text, e.g. the rule
+matching "disk (\\w+) failed" needs "disk " and " failed" in the message. The
+prefilter extracts the longest of these literals from the text, application and
+host conditions of each rule. For every event it looks up which of the literals
+of all rules occur in the event at once, and only the rules with all of their
+literals present are tried by the rule matcher. Like the rule hash, the
+prefilter is part of the rule optimizer.
+
+The prefilter only makes the matching cheaper, never changes the result: Rules
+without a literal condition, inverted rules and events with non ASCII fields
+(where case insensitive matching is not the same as comparing lower case texts)
+are passed through.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Final, Literal
+
+from .config import Rule, TextPattern
+from .event import Event
+
+Field = Literal["text", "application", "host"]
+
+# The rule attributes per event field, a rule fails when none of its present attributes match
+_RULE_ATTRIBUTES: Final[Mapping[Field, Sequence[str]]] = {
+    "text": ("match", "match_ok"),
+    "application": ("match_application", "cancel_application"),
+    "host": ("match_host",),
+}
+
+# Length of the leading part of the literals which is used for looking them up
+_KEY_LENGTH: Final = 3
+
+_QUANTIFIERS: Final = "?*{"
+_REPEAT: Final = re.compile(r"\d*(,\d*)?\}")
+
+
+def _literals_of_regex(pattern: str) -> Sequence[str]:
+    """The texts every match of the pattern must contain
+
+    Only the top level of the pattern is looked at: Groups, character classes,
+    escape sequences like \\d and optional characters end a literal. Patterns
+    with a top level alternative or the verbose flag have no literals.
+    """
+    literals = [""]
+    position = 0
+    while position < len(pattern):
+        char = pattern[position]
+        position += 1
+        if char == "\\":
+            if position >= len(pattern) or pattern[position].isalnum():
+                literals.append("")
+                position = _skip_escape(pattern, position)
+                continue
+            char = pattern[position]
+            position += 1
+        elif char == "|":
+            return []
+        elif char == "(":
+            if pattern.startswith("?", position) and _has_verbose_flag(pattern, position + 1):
+                return []
+            literals.append("")
+            position = _skip_group(pattern, position)
+            continue
+        elif char == "[":
+            literals.append("")
+            position = _skip_character_class(pattern, position)
+            continue
+        elif char in ".^$+)" or char in _QUANTIFIERS:
+            if char in _QUANTIFIERS:
+                literals[-1] = literals[-1][:-1]  # The quantified character is optional
+            literals.append("")
+            if char == "{" and (repeat := _REPEAT.match(pattern, position)):
+                position = repeat.end()
+            continue
+
+        if position < len(pattern) and pattern[position] in _QUANTIFIERS:
+            literals.append("")  # The character is optional
+            continue
+        literals[-1] += char
+        if position < len(pattern) and pattern[position] == "+":
+            literals.append("")
+    return literals
+
+
+def _skip_escape(pattern: str, position: int) -> int:
+    """Skip the escape sequence after the backslash, e.g. \\d, \\x41 or \\N{DASH}"""
+    char = pattern[position : position + 1]
+    if char == "N" and pattern.startswith("{", position + 1):
+        return pattern.find("}", position) + 1 or len(pattern)
+    if char.isdigit():
+        while position < len(pattern) and pattern[position].isdigit():
+            position += 1
+        return position
+    return position + 1 + {"x": 2, "u": 4, "U": 8}.get(char, 0)
+
+
+def _has_verbose_flag(pattern: str, position: int) -> bool:
+    flags = re.match(r"[aiLmsux]*", pattern[position:])
+    return flags is not None and "x" in flags.group()
+
+
+def _skip_group(pattern: str, position: int) -> int:
+    depth = 1
+    while position < len(pattern) and depth:
+        char = pattern[position]
+        position += 1
+        if char == "\\":
+            position += 1
+        elif char == "[":
+            position = _skip_character_class(pattern, position)
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+    return position
+
+
+def _skip_character_class(pattern: str, position: int) -> int:
+    if pattern.startswith("^", position):
+        position += 1
+    if pattern.startswith("]", position):
+        position += 1
+    while position < len(pattern):
+        char = pattern[position]
+        position += 1
+        if char == "\\":
+            position += 1
+        elif char == "]":
+            break
+    return position
+
+
+def required_literal(pattern: TextPattern) -> str | None:
+    """The longest lower case text contained in everything the pattern matches"""
+    if isinstance(pattern, str):
+        return pattern or None  # Already lower case, see compile_matching_value()
+    if pattern.flags & re.VERBOSE:
+        return None
+    literal = max(_literals_of_regex(pattern.pattern), key=len, default="").lower()
+    return literal if literal and literal.isascii() else None
+
+
+def _rule_condition(rule: Rule, field: Field) -> frozenset[str] | None:
+    """The literals of which at least one must be in the field for the rule to match
+
+    None in case the field does not restrict the rule.
+    """
+    if field == "text" and "match" not in rule:
+        # Without a message pattern every text matches, match_ok only decides about cancelling
+        return None
+    literals = set()
+    for attribute in _RULE_ATTRIBUTES[field]:
+        if (pattern := rule.get(attribute)) is None:
+            continue
+        if (literal := required_literal(pattern)) is None:  # type: ignore[arg-type]
+            return None
+        literals.add(literal)
+    return frozenset(literals) if literals else None
+
+
+class _LiteralIndex:
+    def __init__(self, literals: Iterable[str]) -> None:
+        self._short: list[str] = []
+        self._by_key: dict[str, list[str]] = defaultdict(list)
+        for literal in set(literals):
+            if len(literal) < _KEY_LENGTH:
+                self._short.append(literal)
+            else:
+                self._by_key[literal[:_KEY_LENGTH]].append(literal)
+
+    def find(self, text: str) -> set[str]:
+        """The literals contained in the lower case text"""
+        found = {literal for literal in self._short if literal in text}
+        keys = {text[start : start + _KEY_LENGTH] for start in range(len(text) - _KEY_LENGTH + 1)}
+        for key in keys.intersection(self._by_key):
+            found.update(literal for literal in self._by_key[key] if literal in text)
+        return found
+
+
+class RulePrefilter:
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        # Keyed by id(): The rules are dicts, the prefilter is built for exactly these objects
+        self._conditions: dict[int, Sequence[tuple[Field, frozenset[str]]]] = {}
+        literals: dict[Field, set[str]] = {field: set() for field in _RULE_ATTRIBUTES}
+        for rule in rules:
+            if rule.get("invert_matching") or rule.get("disabled"):
+                continue
+            conditions = []
+            for field in _RULE_ATTRIBUTES:
+                if (condition := _rule_condition(rule, field)) is not None:
+                    conditions.append((field, condition))
+                    literals[field].update(condition)
+            if conditions:
+                self._conditions[id(rule)] = conditions
+        self._indexes = {field: _LiteralIndex(literals[field]) for field in _RULE_ATTRIBUTES}
+
+    def candidates(self, rules: Sequence[Rule], event: Event) -> Sequence[Rule]:
+        """The rules which may match the event, in their original order"""
+        if not self._conditions:
+            return rules
+        found: dict[Field, set[str] | None] = {}
+        for field in _RULE_ATTRIBUTES:
+            value = str(event.get(field, ""))
+            found[field] = self._indexes[field].find(value.lower()) if value.isascii() else None
+        return [rule for rule in rules if self._may_match(rule, found)]
+
+    def _may_match(self, rule: Rule, found: Mapping[Field, set[str] | None]) -> bool:
+        for field, condition in self._conditions.get(id(rule), ()):
+            if (present := found[field]) is not None and present.isdisjoint(condition):
+                return False
+        return True
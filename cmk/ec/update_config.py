@@ -69,4 +69,5 @@ def history_files_to_sqlite(omd_root: Path, logger: logging.Logger) -> None:
         # processed files are not needed anymore
         file.rename(file.with_suffix(".bak"))
         logger.debug("Renamed file %s", file)
+    history_sqlite.close()
     logger.debug("Migrating history files to sqlite took: %s", timedelta(seconds=time.time() - tic))
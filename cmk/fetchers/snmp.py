@@ -62,6 +62,12 @@ def make_backend(
     if snmp_config.snmp_backend is SNMPBackendEnum.CLASSIC:
         return ClassicSNMPBackend(snmp_config, logger)
 
+    if snmp_config.snmp_backend is SNMPBackendEnum.ASYNCIO:
+        # pysnmp takes a while to import, only do so if it is used.
+        from .snmp_backend.asynchronous import AsyncSNMPBackend
+
+        return AsyncSNMPBackend(snmp_config, logger)
+
     raise NotImplementedError(f"Unknown SNMP backend: {snmp_config.snmp_backend}")
 
 
@@ -6,7 +6,16 @@
 
 from cmk.snmplib import SNMPRawValue
 
-__all__ = ["strip_snmp_value"]
+__all__ = ["bulk_repetitions", "strip_snmp_value"]
+
+
+def bulk_repetitions(bulk_walk_size_of: int, columns: int) -> int:
+    """The rows to ask for at once when walking the columns together
+
+    Agents answer tooBig to requests for too many variables, so a request for
+    several columns does not ask for more variables than one for a single column.
+    """
+    return max(1, bulk_walk_size_of // columns)
 
 
 def strip_snmp_value(value: str) -> SNMPRawValue:
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""SNMP backend talking to the devices in-process on an asyncio event loop
+
+Other than the classic backend, this one does not need a process per request.
+Its coroutines can be used to poll many hosts concurrently on one event loop,
+see :func:`fetch_snmp_sections`. The blocking methods of the
+:class:`SNMPBackend` interface run the coroutines on an event loop in a thread
+of its own.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from collections.abc import Awaitable, Coroutine, Iterable, Mapping, Sequence
+from typing import Any, Final, TypeVar
+
+from pyasn1.type import univ  # type: ignore[import]
+
+# The asyncio API is the one of pysnmp-lextudio, the version of pysnmp we ship.
+from pysnmp.hlapi.asyncio import (  # type: ignore[import]
+    bulkCmd,
+    CommunityData,
+    ContextData,
+    getCmd,
+    nextCmd,
+    ObjectIdentity,
+    ObjectType,
+    SnmpEngine,
+    Udp6TransportTarget,
+    UdpTransportTarget,
+    usmAesBlumenthalCfb192Protocol,
+    usmAesBlumenthalCfb256Protocol,
+    usmAesCfb128Protocol,
+    usmDESPrivProtocol,
+    usmHMAC128SHA224AuthProtocol,
+    usmHMAC192SHA256AuthProtocol,
+    usmHMAC256SHA384AuthProtocol,
+    usmHMAC384SHA512AuthProtocol,
+    usmHMACMD5AuthProtocol,
+    usmHMACSHAAuthProtocol,
+    UsmUserData,
+)
+from pysnmp.proto import errind, rfc1902, rfc1905  # type: ignore[import]
+
+from cmk.utils.exceptions import MKGeneralException, MKSNMPError
+from cmk.utils.hostaddress import HostName
+from cmk.utils.log import console
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import (
+    BackendSNMPTree,
+    get_snmp_table,
+    OID,
+    SNMPBackend,
+    SNMPContext,
+    SNMPContextTimeout,
+    SNMPHostConfig,
+    SNMPRawData,
+    SNMPRawValue,
+    SNMPRowInfo,
+    SNMPVersion,
+)
+
+from ._utils import bulk_repetitions
+
+__all__ = ["AsyncSNMPBackend", "fetch_snmp_sections"]
+
+_T = TypeVar("_T")
+
+# Same names as for the net-snmp command line tools of the classic backend
+_AUTH_PROTOCOLS: Final = {
+    "md5": usmHMACMD5AuthProtocol,
+    "sha": usmHMACSHAAuthProtocol,
+    "SHA-224": usmHMAC128SHA224AuthProtocol,
+    "SHA-256": usmHMAC192SHA256AuthProtocol,
+    "SHA-384": usmHMAC256SHA384AuthProtocol,
+    "SHA-512": usmHMAC384SHA512AuthProtocol,
+}
+
+# net-snmp extends the keys of AES-192 and AES-256 as in the Blumenthal draft
+_PRIV_PROTOCOLS: Final = {
+    "DES": usmDESPrivProtocol,
+    "AES": usmAesCfb128Protocol,
+    "AES-192": usmAesBlumenthalCfb192Protocol,
+    "AES-256": usmAesBlumenthalCfb256Protocol,
+}
+
+_MISSING_VALUES: Final = (
+    rfc1905.NoSuchObject,
+    rfc1905.NoSuchInstance,
+    rfc1905.EndOfMibView,
+)
+
+DEFAULT_MAX_CONCURRENT_HOSTS: Final = 256
+
+
+class AsyncSNMPBackend(SNMPBackend):
+    def __init__(
+        self,
+        snmp_config: SNMPHostConfig,
+        logger: logging.Logger,
+        *,
+        engine: SnmpEngine | None = None,
+    ) -> None:
+        """Create the backend of a host
+
+        An SNMP engine is bound to the event loop it is used on. Backends with an
+        engine of their own are meant for its event loop and the coroutines only.
+        All others share the engine of an event loop running in a thread of its
+        own, which also serves the blocking methods.
+        """
+        super().__init__(snmp_config, logger)
+        self._engine = engine
+        # Walks fetched by the coroutines, before the tables are put together
+        self._prefetched: dict[tuple[SNMPContext, OID], SNMPRowInfo | MKSNMPError] = {}
+
+    def get(self, /, oid: OID, *, context: SNMPContext) -> SNMPRawValue | None:
+        return self._run(self.async_get(oid, context=context))
+
+    def walk(
+        self,
+        /,
+        oid: OID,
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> SNMPRowInfo:
+        return self.walk_columns(
+            [oid], context=context, section_name=section_name, table_base_oid=table_base_oid
+        )[0]
+
+    def walk_columns(
+        self,
+        /,
+        oids: Sequence[OID],
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        if not all((context, oid) in self._prefetched for oid in oids):
+            return self._run(self.async_walk_columns(oids, context=context))
+
+        rowinfos = []
+        for oid in oids:
+            prefetched = self._prefetched[(context, oid)]
+            if isinstance(prefetched, MKSNMPError):
+                raise prefetched
+            rowinfos.append(prefetched)
+        return rowinfos
+
+    @staticmethod
+    def _run(coroutine: Coroutine[Any, Any, _T]) -> _T:
+        future = asyncio.run_coroutine_threadsafe(coroutine, _background_event_loop()[0])
+        try:
+            return future.result()
+        except BaseException:
+            # For example MKTimeout, the request must not go on in the background
+            future.cancel()
+            raise
+
+    async def async_get(self, /, oid: OID, *, context: SNMPContext) -> SNMPRawValue | None:
+        """Fetch a single OID, a GETNEXT request is sent for OIDs ending with .*"""
+        if oid.endswith(".*"):
+            oid_prefix = oid[:-2]
+            var_bind_table = await self._request(nextCmd, oid_prefix, context=context)
+            var_binds = var_bind_table[0] if var_bind_table else []
+        else:
+            oid_prefix = oid
+            var_binds = await self._request(getCmd, oid_prefix, context=context)
+
+        if not var_binds:
+            return None
+
+        name, value = var_binds[0]
+        if isinstance(value, _MISSING_VALUES):
+            return None
+        console.vverbose("SNMP answer: ==> [%r]\n" % value)
+        # In case of .*, check if prefix is the one we are looking for
+        if oid != oid_prefix and not _format_oid(name).startswith(f"{oid_prefix}."):
+            return None
+        return _format_value(value)
+
+    async def async_walk_columns(
+        self, /, oids: Sequence[OID], *, context: SNMPContext
+    ) -> Sequence[SNMPRowInfo]:
+        """Walk the columns of a table, the rows of every OID in the same order
+
+        With bulk walks enabled the columns are walked together, every GETBULK
+        request asks for the next rows of all columns which are not finished
+        yet, the rows of a bulk walk split among them. Otherwise the columns
+        are walked one after another with GETNEXT.
+        """
+        if self.config.use_bulkwalk:
+            rowinfos = await self._walk_interleaved(oids, context=context, bulk=True)
+        else:
+            rowinfos = [
+                (await self._walk_interleaved([oid], context=context, bulk=False))[0]
+                for oid in oids
+            ]
+
+        # Like snmpwalk, get the OID itself if there is nothing below it
+        for oid, rowinfo in zip(oids, rowinfos):
+            if not rowinfo and (value := await self.async_get(oid, context=context)) is not None:
+                rowinfo.append((oid, value))
+        return rowinfos
+
+    async def _walk_interleaved(
+        self, oids: Sequence[OID], *, context: SNMPContext, bulk: bool
+    ) -> Sequence[SNMPRowInfo]:
+        rowinfos: dict[OID, SNMPRowInfo] = {oid: [] for oid in oids}
+        # We do not insist on increasing OIDs, but we must not loop
+        seen: dict[OID, set[OID]] = {oid: set() for oid in oids}
+        next_oids = {oid: oid for oid in oids}
+        while next_oids:
+            columns = list(next_oids)
+            var_bind_table = await self._request(
+                bulkCmd if bulk else nextCmd, *next_oids.values(), context=context
+            )
+            if not var_bind_table:
+                break
+
+            finished: set[OID] = set()
+            for var_binds in var_bind_table:
+                for column, (name, value) in zip(columns, var_binds):
+                    if column in finished:
+                        continue
+                    row_oid = _format_oid(name)
+                    if (
+                        isinstance(value, _MISSING_VALUES)
+                        or not row_oid.startswith(f"{column}.")
+                        or row_oid in seen[column]
+                    ):
+                        finished.add(column)
+                        continue
+                    rowinfos[column].append((row_oid, _format_value(value)))
+                    seen[column].add(row_oid)
+                    next_oids[column] = row_oid
+
+            for column in finished:
+                del next_oids[column]
+
+        return [rowinfos[oid] for oid in oids]
+
+    async def _request(self, command: Any, *oids: OID, context: SNMPContext) -> Any:
+        arguments: tuple[object, ...] = (
+            self._snmp_engine(),
+            self._auth_data(),
+            self._transport_target(),
+            ContextData(contextName=context),
+        )
+        if command is bulkCmd:
+            arguments += (0, bulk_repetitions(self.config.bulk_walk_size_of, len(oids)))
+
+        console.vverbose(f"SNMP {command.__name__} {self.config.ipaddress} {' '.join(oids)}\n")
+        error_indication, error_status, error_index, var_binds = await command(
+            *arguments,
+            *(ObjectType(ObjectIdentity(oid.lstrip("."))) for oid in oids),
+            lookupMib=False,
+        )
+        if error_indication:
+            if isinstance(error_indication, errind.RequestTimedOut):
+                raise SNMPContextTimeout(
+                    f"SNMP Error on {self.config.ipaddress}: Timeout: No Response"
+                )
+            raise MKSNMPError(f"SNMP Error on {self.config.ipaddress}: {error_indication}")
+
+        if error_status:
+            # SNMPv1 agents answer noSuchName at the end of the MIB or for missing OIDs
+            if str(error_status) == "noSuchName":
+                return []
+            raise MKSNMPError(
+                f"SNMP Error on {self.config.ipaddress}: {error_status.prettyPrint()}"
+                f" at index {error_index}"
+            )
+        return var_binds
+
+    def _snmp_engine(self) -> SnmpEngine:
+        if self._engine is not None:
+            return self._engine
+        loop, engine = _background_event_loop()
+        if asyncio.get_running_loop() is not loop:
+            raise RuntimeError("SNMP engine of another event loop")
+        return engine
+
+    def _auth_data(self) -> CommunityData | UsmUserData:
+        credentials = self.config.credentials
+        if isinstance(credentials, str):
+            return CommunityData(
+                credentials, mpModel=0 if self.config.snmp_version is SNMPVersion.V1 else 1
+            )
+
+        match credentials:
+            case (_, sec_name):
+                return UsmUserData(sec_name)
+            case (_, auth_proto, sec_name, auth_pass):
+                return UsmUserData(
+                    sec_name, authKey=auth_pass, authProtocol=_auth_proto_for(auth_proto)
+                )
+            case (_, auth_proto, sec_name, auth_pass, priv_proto, priv_pass):
+                return UsmUserData(
+                    sec_name,
+                    authKey=auth_pass,
+                    privKey=priv_pass,
+                    authProtocol=_auth_proto_for(auth_proto),
+                    privProtocol=_priv_proto_for(priv_proto),
+                )
+        raise MKGeneralException("Invalid SNMP credentials")
+
+    def _transport_target(self) -> UdpTransportTarget | Udp6TransportTarget:
+        timing = self.config.timing
+        options = {
+            "timeout": timing.get("timeout", 1),
+            "retries": timing.get("retries", 5),
+        }
+        address = (self.config.ipaddress or "0.0.0.0", self.config.port)
+        if self.config.is_ipv6_primary:
+            return Udp6TransportTarget(address, **options)
+        return UdpTransportTarget(address, **options)
+
+    async def async_fetch_sections(
+        self, sections: Mapping[SectionName, Sequence[BackendSNMPTree]]
+    ) -> SNMPRawData:
+        """Fetch the tables of the given sections from the device"""
+        try:
+            for section_name, trees in sections.items():
+                await self._prefetch(section_name, trees)
+
+            # Everything we need is fetched, so this does not block anymore
+            walk_cache: dict[tuple[str, str, bool], SNMPRowInfo] = {}
+            return {
+                section_name: [
+                    get_snmp_table(
+                        section_name=section_name, tree=tree, walk_cache=walk_cache, backend=self
+                    )
+                    for tree in trees
+                ]
+                for section_name, trees in sections.items()
+            }
+        finally:
+            self._prefetched.clear()
+
+    async def _prefetch(self, section_name: SectionName, trees: Iterable[BackendSNMPTree]) -> None:
+        for context in self.config.snmpv3_contexts_of(section_name).contexts:
+            for tree in trees:
+                oids = [
+                    oid
+                    for oid in dict.fromkeys(
+                        f"{tree.base}.{oid.column}"
+                        for oid in tree.oids
+                        if isinstance(oid.column, str)
+                    )
+                    if (context, oid) not in self._prefetched
+                ]
+                if not oids:
+                    continue
+                try:
+                    columns: Sequence[SNMPRowInfo | MKSNMPError] = await self.async_walk_columns(
+                        oids, context=context
+                    )
+                except MKSNMPError as e:
+                    columns = [e] * len(oids)
+                self._prefetched.update(((context, oid), rows) for oid, rows in zip(oids, columns))
+
+
+@functools.cache
+def _background_event_loop() -> tuple[asyncio.AbstractEventLoop, SnmpEngine]:
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="snmp-event-loop", daemon=True).start()
+    return loop, SnmpEngine()
+
+
+def _auth_proto_for(proto_name: str) -> tuple[int, ...]:
+    try:
+        return _AUTH_PROTOCOLS[proto_name]
+    except KeyError:
+        raise MKGeneralException("Invalid SNMP auth protocol: %s" % proto_name)
+
+
+def _priv_proto_for(proto_name: str) -> tuple[int, ...]:
+    try:
+        return _PRIV_PROTOCOLS[proto_name]
+    except KeyError:
+        raise MKGeneralException("Invalid SNMP priv protocol: %s" % proto_name)
+
+
+def _format_oid(name: univ.ObjectIdentifier) -> OID:
+    return f".{name}"
+
+
+def _format_value(value: object) -> SNMPRawValue:
+    """Make the values look like the ones of the classic backend"""
+    if isinstance(value, rfc1902.IpAddress):
+        return value.prettyPrint().encode()
+    if isinstance(value, univ.OctetString):
+        return value.asOctets()
+    if isinstance(value, univ.ObjectIdentifier):
+        return _format_oid(value).encode()
+    # All kinds of counters, gauges and time ticks
+    if isinstance(value, univ.Integer):
+        return str(int(value)).encode()
+    return b""
+
+
+async def fetch_snmp_sections(
+    hosts: Iterable[tuple[SNMPHostConfig, Mapping[SectionName, Sequence[BackendSNMPTree]]]],
+    *,
+    logger: logging.Logger,
+    max_concurrent_hosts: int = DEFAULT_MAX_CONCURRENT_HOSTS,
+) -> Mapping[HostName, SNMPRawData | MKSNMPError]:
+    """Fetch the sections of many hosts concurrently on the running event loop
+
+    The requests of all hosts are multiplexed over one SNMP engine. Every host
+    gets the timeout and retries of its own configuration, the sections of one
+    host are fetched one after another. A failing host does not affect the
+    others, its error is returned instead of its data.
+    """
+    engine = SnmpEngine()
+    semaphore = asyncio.Semaphore(max_concurrent_hosts)
+
+    async def fetch(
+        backend: AsyncSNMPBackend, sections: Mapping[SectionName, Sequence[BackendSNMPTree]]
+    ) -> SNMPRawData | MKSNMPError:
+        async with semaphore:
+            try:
+                return await backend.async_fetch_sections(sections)
+            except MKSNMPError as e:
+                return e
+
+    jobs: dict[HostName, Awaitable[SNMPRawData | MKSNMPError]] = {}
+    for snmp_config, sections in hosts:
+        backend = AsyncSNMPBackend(snmp_config, logger, engine=engine)
+        jobs[snmp_config.hostname] = fetch(backend, sections)
+
+    try:
+        return dict(zip(jobs, await asyncio.gather(*jobs.values())))
+    finally:
+        if engine.transportDispatcher is not None:
+            engine.transportDispatcher.closeDispatcher()
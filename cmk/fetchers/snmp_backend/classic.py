@@ -4,7 +4,7 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import subprocess
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator, Sequence
 from typing import assert_never, Literal, TypeAlias
 
 import cmk.utils.tty as tty
@@ -14,11 +14,11 @@ from cmk.utils.sectionname import SectionName
 
 from cmk.snmplib import OID, SNMPBackend, SNMPContext, SNMPRawValue, SNMPRowInfo, SNMPVersion
 
-from ._utils import strip_snmp_value
+from ._utils import bulk_repetitions, strip_snmp_value
 
 __all__ = ["ClassicSNMPBackend"]
 
-CommandType: TypeAlias = Literal["snmpget", "snmpgetnext", "snmpwalk"]
+CommandType: TypeAlias = Literal["snmpget", "snmpgetnext", "snmpwalk", "snmpbulkget"]
 
 
 class ClassicSNMPBackend(SNMPBackend):
@@ -96,18 +96,85 @@ class ClassicSNMPBackend(SNMPBackend):
         section_name: SectionName | None = None,
         table_base_oid: str | None = None,
     ) -> SNMPRowInfo:
-        protospec = self._snmp_proto_spec()
+        command = self._snmp_base_command("snmpwalk", context) + ["-Cc"]
+        command += ["-OQ", "-OU", "-On", "-Ot", self._snmp_target_spec(), oid]
+        return [
+            (row_oid, strip_snmp_value(value))
+            for row_oid, value in self._run_walk_command(command)
+            if not _is_error_value(value)
+        ]
 
-        ipaddress = self.config.ipaddress or "0.0.0.0"
-        if self.config.is_ipv6_primary:
-            ipaddress = "[" + ipaddress + "]"
+    def walk_columns(
+        self,
+        /,
+        oids: Sequence[OID],
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        """Walk all columns at once with interleaved GETBULK requests
+
+        Every snmpbulkget asks for the next rows of all columns which are not
+        finished yet. The response contains the variables of the first row of
+        all these columns, then of the second row and so on, so the position
+        of a variable tells the column it belongs to. A column is finished as
+        soon as the agent answers with an OID outside of it. The rows of a bulk
+        walk are split among the columns.
+        """
+        if (
+            not self.config.use_bulkwalk
+            or len(oids) < 2
+            or any(other.startswith(f"{oid}.") for oid in oids for other in oids)
+        ):
+            # The variables of nested columns can not be told apart
+            return super().walk_columns(
+                oids, context=context, section_name=section_name, table_base_oid=table_base_oid
+            )
 
-        portspec = self._snmp_port_spec()
-        command = self._snmp_base_command("snmpwalk", context) + ["-Cc"]
-        command += ["-OQ", "-OU", "-On", "-Ot", f"{protospec}{ipaddress}{portspec}", oid]
+        rowinfos: dict[OID, SNMPRowInfo] = {oid: [] for oid in oids}
+        # Like snmpwalk -Cc we do not insist on increasing OIDs, but we must not loop
+        seen: dict[OID, set[OID]] = {oid: set() for oid in oids}
+        next_oids = {oid: oid for oid in oids}
+        while next_oids:
+            columns = list(next_oids)
+            command = self._snmp_base_command("snmpbulkget", context)
+            command += [f"-Cr{bulk_repetitions(self.config.bulk_walk_size_of, len(columns))}"]
+            command += ["-OQ", "-OU", "-On", "-Ot", self._snmp_target_spec(), *next_oids.values()]
+            variables = self._run_walk_command(command)
+            if not variables:
+                break
+
+            finished: set[OID] = set()
+            for position, (row_oid, value) in enumerate(variables):
+                column = columns[position % len(columns)]
+                if column in finished:
+                    continue
+                if (
+                    _is_error_value(value)
+                    or not row_oid.startswith(f"{column}.")
+                    or row_oid in seen[column]
+                ):
+                    finished.add(column)
+                    continue
+                rowinfos[column].append((row_oid, strip_snmp_value(value)))
+                seen[column].add(row_oid)
+                next_oids[column] = row_oid
+
+            for column in finished:
+                del next_oids[column]
+
+        # Like snmpwalk, get the OID itself if there is nothing below it
+        for oid, rowinfo in rowinfos.items():
+            if not rowinfo and (scalar := self.get(oid, context=context)) is not None:
+                rowinfo.append((oid, scalar))
+
+        return [rowinfos[oid] for oid in oids]
+
+    def _run_walk_command(self, command: list[str]) -> list[tuple[OID, str]]:
         console.vverbose("Running '%s'\n" % subprocess.list2cmdline(command))
 
-        rowinfo: SNMPRowInfo = []
+        variables: list[tuple[OID, str]] = []
         with subprocess.Popen(
             command,
             close_fds=True,
@@ -119,7 +186,7 @@ class ClassicSNMPBackend(SNMPBackend):
             assert snmp_process.stdout
             assert snmp_process.stderr
             try:
-                rowinfo = self._get_rowinfo_from_walk_output(snmp_process.stdout)
+                variables = list(_iter_walk_output(snmp_process.stdout))
                 error = snmp_process.stderr.read()
             except MKTimeout:
                 snmp_process.kill()
@@ -132,52 +199,21 @@ class ClassicSNMPBackend(SNMPBackend):
             raise MKSNMPError(
                 "SNMP Error on %s: %s (Exit-Code: %d)"
                 % (
-                    ipaddress,
+                    self._snmp_address(),
                     error.strip(),
                     snmp_process.returncode,
                 )
             )
-        return rowinfo
-
-    def _get_rowinfo_from_walk_output(self, lines: Iterable[str]) -> SNMPRowInfo:
-        # Ugly(1): in some cases snmpwalk inserts line feed within one
-        # dataset. This happens for example on hexdump outputs longer
-        # than a few bytes. Those dumps are enclosed in double quotes.
-        # So if the value begins with a double quote, but the line
-        # does not end with a double quote, we take the next line(s) as
-        # a continuation line.
-        rowinfo = []
-        line_iter = iter(lines)
-        while True:
-            try:
-                line = next(line_iter).strip()
-            except StopIteration:
-                break
+        return variables
 
-            parts = line.split("=", 1)
-            if len(parts) < 2:
-                continue  # broken line, must contain =
-            oid = parts[0].strip()
-            value = parts[1].strip()
-            # Filter out silly error messages from snmpwalk >:-P
-            if (
-                value.startswith("No more variables")
-                or value.startswith("End of MIB")
-                or value.startswith("No Such Object available")
-                or value.startswith("No Such Instance currently exists")
-            ):
-                continue
-
-            if value == '"' or (
-                len(value) > 1 and value[0] == '"' and (value[-1] != '"')
-            ):  # to be continued
-                while True:  # scan for end of this dataset
-                    nextline = next(line_iter).strip()
-                    value += " " + nextline
-                    if value[-1] == '"':
-                        break
-            rowinfo.append((oid, strip_snmp_value(value)))
-        return rowinfo
+    def _snmp_address(self) -> str:
+        ipaddress = self.config.ipaddress or "0.0.0.0"
+        if self.config.is_ipv6_primary:
+            return "[" + ipaddress + "]"
+        return ipaddress
+
+    def _snmp_target_spec(self) -> str:
+        return f"{self._snmp_proto_spec()}{self._snmp_address()}{self._snmp_port_spec()}"
 
     def _snmp_proto_spec(self) -> str:
         if self.config.is_ipv6_primary:
@@ -223,6 +259,8 @@ class ClassicSNMPBackend(SNMPBackend):
                     if self.config.use_bulkwalk
                     else ["snmpwalk"]
                 )
+            case "snmpbulkget":
+                command = ["snmpbulkget", "-Cn0"]
             case other:
                 assert_never(other)
 
@@ -311,3 +349,38 @@ def _priv_proto_for(proto_name: str) -> str:
     if proto_name in ("DES", "AES", "AES-256", "AES-192"):
         return proto_name
     raise MKGeneralException("Invalid SNMP priv protocol: %s" % proto_name)
+
+
+def _is_error_value(value: str) -> bool:
+    # Filter out silly error messages from snmpwalk >:-P
+    return (
+        value.startswith("No more variables")
+        or value.startswith("End of MIB")
+        or value.startswith("No Such Object available")
+        or value.startswith("No Such Instance currently exists")
+    )
+
+
+def _iter_walk_output(lines: Iterable[str]) -> Iterator[tuple[OID, str]]:
+    # Ugly(1): in some cases snmpwalk inserts line feed within one
+    # dataset. This happens for example on hexdump outputs longer
+    # than a few bytes. Those dumps are enclosed in double quotes.
+    # So if the value begins with a double quote, but the line
+    # does not end with a double quote, we take the next line(s) as
+    # a continuation line.
+    line_iter = iter(lines)
+    for line in line_iter:
+        parts = line.strip().split("=", 1)
+        if len(parts) < 2:
+            continue  # broken line, must contain =
+        oid = parts[0].strip()
+        value = parts[1].strip()
+
+        if value == '"' or (
+            len(value) > 1 and value[0] == '"' and (value[-1] != '"')
+        ):  # to be continued
+            for nextline in line_iter:  # scan for end of this dataset
+                value += " " + nextline.strip()
+                if value[-1] == '"':
+                    break
+        yield oid, value
@@ -4,14 +4,16 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """Abstract classes and types."""
 
+import bisect
 import logging
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
+from functools import lru_cache
 from pathlib import Path
 from typing import Final
 
 import cmk.utils.agent_simulator as agent_simulator
 from cmk.utils.agentdatatype import AgentRawData
-from cmk.utils.exceptions import MKException, MKGeneralException, MKSNMPError
+from cmk.utils.exceptions import MKGeneralException, MKSNMPError
 from cmk.utils.log import console
 from cmk.utils.sectionname import SectionName
 
@@ -22,6 +24,71 @@ from ._utils import strip_snmp_value
 __all__ = ["StoredWalkSNMPBackend"]
 
 
+class _WalkIndex:
+    """The rows of a stored walk, sorted by OID
+
+    The OIDs are encoded by `_encode_oid()`, which keeps their order and turns the
+    "is below" relation of OIDs into a prefix check on bytes. This way the rows can
+    be looked up by a binary search without converting OIDs over and over again.
+    """
+
+    def __init__(self, lines: Sequence[str]) -> None:
+        rows = []
+        for line in lines:
+            parts = line.split(None, 1)
+            oid = parts[0][1:]  # Walk lines always start with "."
+            rows.append((_encode_oid(oid), oid, parts[1] if len(parts) > 1 else ""))
+        rows.sort(key=lambda row: row[0])
+        self._keys: Final = [key for key, _oid, _value in rows]
+        self._oids: Final = [oid for _key, oid, _value in rows]
+        self._values: Final = [value for _key, _oid, value in rows]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def rows(self, oid_prefix: OID) -> Iterator[tuple[OID, str]]:
+        """The OIDs and unprocessed values of the OID and all OIDs below it, in order"""
+        prefix = _encode_oid(oid_prefix)
+        index = bisect.bisect_left(self._keys, prefix)
+        while index < len(self._keys) and self._keys[index].startswith(prefix):
+            yield self._oids[index], self._values[index]
+            index += 1
+
+
+def _encode_oid(oid: OID) -> bytes:
+    """Encode the OID so that the bytes sort like the OIDs
+
+    Every number is encoded big endian and prefixed with its length.  This way
+    the encoded numbers can be told apart without a separator, and an OID is
+    below another one if and only if its encoding starts with the other encoding.
+
+    >>> _encode_oid(".1.3.6.300").hex(" ")
+    '01 01 01 03 01 06 02 01 2c'
+    >>> _encode_oid("1.3.6.1.4.1.2021") < _encode_oid("1.3.6.1.4.1.311")
+    False
+    >>> _encode_oid("1.3.6.1.4.1.2021.4").startswith(_encode_oid("1.3.6.1.4.1.2021"))
+    True
+    """
+    encoded = bytearray()
+    try:
+        for number in map(int, oid.strip(".").split(".")):
+            length = (number.bit_length() + 7) // 8
+            encoded.append(length)
+            encoded += number.to_bytes(length, "big")
+    except (ValueError, OverflowError):
+        raise MKGeneralException("Invalid OID %s" % oid)
+    return bytes(encoded)
+
+
+@lru_cache(maxsize=16)
+def _load_walk_index(path: Path, _mtime_ns: int, _size: int) -> _WalkIndex:
+    # The modification time and the size are only part of the cache key
+    try:
+        return _WalkIndex(StoredWalkSNMPBackend.read_walk_from_path(path))
+    except OSError:
+        raise MKSNMPError("No snmpwalk file %s" % path)
+
+
 class StoredWalkSNMPBackend(SNMPBackend):
     def __init__(self, snmp_config: SNMPHostConfig, logger: logging.Logger, path: Path) -> None:
         super().__init__(snmp_config, logger)
@@ -59,32 +126,16 @@ class StoredWalkSNMPBackend(SNMPBackend):
             dot_star = False
 
         console.vverbose(f"  Loading {oid}")
-        lines = self.read_walk_data()
-
-        begin = 0
-        end = len(lines)
-        hit = None
-        while end - begin > 0:
-            current = (begin + end) // 2
-            parts = lines[current].split(None, 1)
-            comp = parts[0]
-            hit = StoredWalkSNMPBackend._compare_oids(oid_prefix, comp)
-            if hit == 0:
+        rowinfo = []
+        for row_oid, value in self.read_walk_index().rows(oid_prefix):
+            if dot_star and row_oid == oid_prefix:
+                continue
+            # FIXME: This encoding ping-pong is horrible...
+            value = agent_simulator.process(AgentRawData(value.encode())).decode()
+            # Fix for missing starting oids
+            rowinfo.append(("." + row_oid, strip_snmp_value(value)))
+            if dot_star:
                 break
-            if hit == 1:  # we are too low
-                begin = current + 1
-            else:
-                end = current
-
-        if hit != 0:
-            return []  # not found
-
-        rowinfo = StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current, -1)
-        rowinfo.reverse()
-        rowinfo += StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current + 1, 1)
-
-        if dot_star:
-            return [rowinfo[0]]
 
         return rowinfo
 
@@ -108,56 +159,12 @@ class StoredWalkSNMPBackend(SNMPBackend):
         except OSError:
             raise MKSNMPError("No snmpwalk file %s" % self.path)
 
-    @staticmethod
-    def _compare_oids(a: OID, b: OID) -> int:
-        aa = StoredWalkSNMPBackend._to_bin_string(a)
-        bb = StoredWalkSNMPBackend._to_bin_string(b)
-        if len(aa) <= len(bb) and bb[: len(aa)] == aa:
-            result = 0
-        else:
-            result = (aa > bb) - (aa < bb)
-        return result
+    def read_walk_index(self) -> _WalkIndex:
+        """The index of the walk file, shared by all backends of this process
 
-    @staticmethod
-    def _to_bin_string(oid: OID) -> tuple[int, ...]:
+        The file is parsed again once it has been modified."""
         try:
-            return tuple(map(int, oid.strip(".").split(".")))
-        except MKException:
-            raise
-        except Exception:
-            raise MKGeneralException("Invalid OID %s" % oid)
-
-    @staticmethod
-    def _collect_until(
-        oid: OID, oid_prefix: OID, lines: Sequence[str], index: int, direction: int
-    ) -> SNMPRowInfo:
-        rows = []
-        # Handle case, where we run after the end of the lines list
-        if index >= len(lines):
-            if direction > 0:
-                return []
-            index -= 1
-        while True:
-            line = lines[index]
-            parts = line.split(None, 1)
-            o = parts[0]
-            if o.startswith("."):
-                o = o[1:]
-            if o == oid or o.startswith(oid_prefix + "."):
-                if len(parts) > 1:
-                    # FIXME: This encoding ping-pong is horrible...
-                    value = agent_simulator.process(
-                        AgentRawData(
-                            parts[1].encode(),
-                        ),
-                    ).decode()
-                else:
-                    value = ""
-                # Fix for missing starting oids
-                rows.append(("." + o, strip_snmp_value(value)))
-                index += direction
-                if index < 0 or index >= len(lines):
-                    break
-            else:
-                break
-        return rows
+            stat = self.path.stat()
+        except OSError:
+            raise MKSNMPError("No snmpwalk file %s" % self.path)
+        return _load_walk_index(self.path, stat.st_mtime_ns, stat.st_size)
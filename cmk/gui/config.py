@@ -4,7 +4,9 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import copy
+import hashlib
 import os
+import pickle
 import sys
 from collections.abc import Callable, Mapping
 from dataclasses import asdict, dataclass, field, fields, make_dataclass
@@ -15,8 +17,11 @@ from typing import Any, Final
 
 from livestatus import SiteConfiguration, SiteConfigurations
 
+import cmk.utils.paths
+import cmk.utils.store as store
 import cmk.utils.tags
 import cmk.utils.version as cmk_version
+from cmk.utils.exceptions import MKGeneralException
 from cmk.utils.site import omd_site, url_prefix
 
 import cmk.gui.log as log
@@ -147,12 +152,9 @@ def _load_config_file_to(path: str, raw_config: dict[str, Any]) -> None:
         raise MKConfigError(_("Cannot read configuration file %s: %s:") % (path, e))
 
 
-# Load multisite.mk and all files in multisite.d/. This will happen
-# for *each* HTTP request.
-# FIXME: Optimize this to cache the config etc. until either the config files or plugins
-# have changed. We could make this being cached for multiple requests just like the
-# plugins of other modules. This may save significant time in case of small requests like
-# the graph ajax page or similar.
+# Load multisite.mk and all files in multisite.d/. This will happen for *each* HTTP request.
+# The loaded configuration is cached until either the config files or the default values
+# (e.g. of the config plugins) have changed, so most requests only unpickle the cache.
 def load_config() -> None:
     # Set default values for all user-changable configuration settings
     raw_config = get_default_config()
@@ -161,25 +163,40 @@ def load_config() -> None:
     # override possibly deleted sites
     raw_config["sites"] = default_single_site_configuration()
 
+    config_files = _config_files()
+    cache_key = _config_cache_key(raw_config, config_files)
+    if (cached_config := _load_cached_config(cache_key)) is not None:
+        raw_config = cached_config
+    else:
+        _load_config_files_to(config_files, raw_config)
+        _save_cached_config(cache_key, raw_config)
+
+    set_global_var("config", make_config_object(raw_config))
+    execute_post_config_load_hooks()
+
+
+def _config_files() -> list[str]:
     # Load assorted experimental parameters if any
-    experimental_config = cmk.utils.paths.make_experimental_config_file()
-    if experimental_config.exists():
-        _load_config_file_to(str(experimental_config), raw_config)
+    filelist = [str(cmk.utils.paths.make_experimental_config_file())]
 
     # First load main file
-    _load_config_file_to(cmk.utils.paths.default_config_dir + "/multisite.mk", raw_config)
+    filelist.append(cmk.utils.paths.default_config_dir + "/multisite.mk")
 
     # Load also recursively all files below multisite.d
     conf_dir = cmk.utils.paths.default_config_dir + "/multisite.d"
-    filelist = []
+    conf_dir_files = []
     if os.path.isdir(conf_dir):
         for root, _directories, files in os.walk(conf_dir):
             for filename in files:
                 if filename.endswith(".mk"):
-                    filelist.append(root + "/" + filename)
+                    conf_dir_files.append(root + "/" + filename)
 
-    filelist.sort()
-    for p in filelist:
+    conf_dir_files.sort()
+    return filelist + conf_dir_files
+
+
+def _load_config_files_to(config_files: list[str], raw_config: dict[str, Any]) -> None:
+    for p in config_files:
         _load_config_file_to(p, raw_config)
 
     raw_config["sites"] = prepare_raw_site_config(raw_config["sites"])
@@ -197,8 +214,63 @@ def load_config() -> None:
     for br in builtin_role_ids:
         raw_config["roles"].setdefault(br, {})
 
-    set_global_var("config", make_config_object(raw_config))
-    execute_post_config_load_hooks()
+
+def _config_cache_path() -> Path:
+    # In the tmpfs, so the cache is shared by all processes of the GUI
+    return Path(cmk.utils.paths.tmp_dir, "gui_config_cache.pkl")
+
+
+def _config_cache_key(default_config: dict[str, Any], config_files: list[str]) -> str | None:
+    """Identify the loaded configuration by the default values and the state of the files
+
+    The config files are not only assigning values, they may also extend the default values,
+    e.g. with roles.update(...). Missing files are skipped, just like when loading them.
+    Default values which can not be pickled, can not be cached either.
+    """
+    try:
+        key = hashlib.sha256(pickle.dumps(default_config))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+    for path in config_files:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        key.update(f"\0{path}\0{stat.st_ino}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    return key.hexdigest()
+
+
+def _load_cached_config(cache_key: str | None) -> dict[str, Any] | None:
+    if cache_key is None:
+        return None
+    try:
+        cached_key, raw_config = store.load_object_from_pickle_file(
+            _config_cache_path(), default=(None, None)
+        )
+    except (
+        MKGeneralException,
+        pickle.UnpicklingError,
+        EOFError,
+        AttributeError,
+        ImportError,
+        ValueError,
+    ):
+        # Not readable, broken, or written by a different version of the code
+        return None
+    return raw_config if cached_key == cache_key else None
+
+
+def _save_cached_config(cache_key: str | None, raw_config: dict[str, Any]) -> None:
+    if cache_key is None:
+        return
+    cache_path = _config_cache_path()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        store.save_object_to_pickle_file(cache_path, (cache_key, raw_config))
+    except (MKGeneralException, OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+        # E.g. the config files may define functions or import modules
+        log.logger.debug("Not caching the configuration: %s", e)
 
 
 def make_config_object(raw_config: dict[str, Any]) -> Config:
@@ -4,11 +4,15 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import functools
+import math
 import operator
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
 from typing import Literal, TypeVar
 
+import numpy as np
+import numpy.typing as npt
+
 from cmk.utils.exceptions import MKGeneralException
 
 import cmk.gui.utils.escaping as escaping
@@ -39,6 +43,11 @@ def derive_num_points_twindow(rrd_data: RRDData) -> tuple[int, tuple[int, int, i
     return 1, (0, 60, 60)
 
 
+# Evaluating the operators point by point is fine for a handful of operands. Sums over
+# hundreds of series (e.g. combined graphs) are computed on arrays instead.
+VECTORIZED_MIN_OPERANDS = 8
+
+
 def time_series_math(
     operator_id: Operators,
     operands_evaluated: list[TimeSeries],
@@ -60,14 +69,30 @@ def time_series_math(
         # Silently return so to get an empty graph slot
         return None
 
-    _op_title, op_func = operators[operator_id]
-    twindow = operands_evaluated[0].twindow
+    if len(operands_evaluated) >= VECTORIZED_MIN_OPERANDS:
+        return _time_series_math_vectorized(operator_id, operands_evaluated)
+    return _time_series_math_pointwise(operator_id, operands_evaluated)
 
+
+def _time_series_math_pointwise(
+    operator_id: Operators, operands_evaluated: Sequence[TimeSeries]
+) -> TimeSeries:
+    _op_title, op_func = time_series_operators()[operator_id]
     return TimeSeries(
-        [op_func_wrapper(op_func, list(tsp)) for tsp in zip(*operands_evaluated)], twindow
+        [op_func_wrapper(op_func, list(tsp)) for tsp in zip(*operands_evaluated)],
+        operands_evaluated[0].twindow,
     )
 
 
+def _time_series_math_vectorized(
+    operator_id: Operators, operands_evaluated: Sequence[TimeSeries]
+) -> TimeSeries:
+    op_func = _vectorized_time_series_operators()[operator_id]
+    with np.errstate(all="ignore"):
+        values = op_func(_to_array(operands_evaluated))
+    return TimeSeries(_from_array(values), operands_evaluated[0].twindow)
+
+
 _TOperatorReturn = TypeVar("_TOperatorReturn")
 
 
@@ -144,3 +169,76 @@ def time_series_operators() -> dict[
         "AVERAGE": (_("Average"), _time_series_operator_average),
         "MERGE": ("First non None", lambda x: next(iter(clean_time_series_point(x)))),
     }
+
+
+_Array = npt.NDArray[np.float64]
+
+
+def _to_array(operands: Sequence[TimeSeries]) -> _Array:
+    """Stack the operands into a 2D array, missing values (None) become NaN
+
+    Like zip(), this truncates all operands to the length of the shortest one.
+    """
+    num_points = min(len(ts) for ts in operands)
+    return np.array([ts.values[:num_points] for ts in operands], dtype=np.float64).reshape(
+        len(operands), num_points
+    )
+
+
+def _from_array(values: _Array) -> TimeSeriesValues:
+    return [None if math.isnan(v) else v for v in values.tolist()]
+
+
+def _vectorized_sum(values: _Array) -> _Array:
+    result = np.nansum(values, axis=0)
+    result[np.isnan(values).all(axis=0)] = np.nan
+    return result
+
+
+def _vectorized_product(values: _Array) -> _Array:
+    return np.prod(values, axis=0)
+
+
+def _vectorized_difference(values: _Array) -> _Array:
+    return values[0] - values[1]
+
+
+def _vectorized_fraction(values: _Array) -> _Array:
+    result = values[0] / values[1]
+    result[values[1] == 0] = np.nan
+    return result
+
+
+def _vectorized_maximum(values: _Array) -> _Array:
+    return np.fmax.reduce(values, axis=0)
+
+
+def _vectorized_minimum(values: _Array) -> _Array:
+    return np.fmin.reduce(values, axis=0)
+
+
+def _vectorized_average(values: _Array) -> _Array:
+    return np.nansum(values, axis=0) / np.count_nonzero(~np.isnan(values), axis=0)
+
+
+def _vectorized_merge(values: _Array) -> _Array:
+    first_valid = np.argmax(~np.isnan(values), axis=0)
+    return values[first_valid, np.arange(values.shape[1])]
+
+
+def _vectorized_time_series_operators() -> dict[Operators, Callable[[_Array], _Array]]:
+    """Array based counterparts of time_series_operators()
+
+    They work on all points at once and use NaN for missing values.  Floating point
+    errors (overflows, division by zero) must be ignored by the caller.
+    """
+    return {
+        "+": _vectorized_sum,
+        "*": _vectorized_product,
+        "-": _vectorized_difference,
+        "/": _vectorized_fraction,
+        "MAX": _vectorized_maximum,
+        "MIN": _vectorized_minimum,
+        "AVERAGE": _vectorized_average,
+        "MERGE": _vectorized_merge,
+    }
@@ -26,14 +26,20 @@ import cmk.utils.store as store
 from cmk.utils.exceptions import MKException, MKGeneralException
 from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.utils.structured_data import (
+    ArchivedTreeLoader,
+    compact_archived_nodes,
     ImmutableDeltaTree,
     ImmutableTree,
+    InventoryIndex,
+    is_archived_tree_file,
     load_tree,
     parse_visible_raw_path,
+    RetentionInterval,
     SDFilterChoice,
     SDKey,
     SDPath,
     SDRawTree,
+    SDValue,
 )
 
 import cmk.gui.sites as sites
@@ -121,12 +127,7 @@ def load_filtered_and_merged_tree(row: Row) -> ImmutableTree:
     merge these trees and returns the filtered tree"""
     host_name = row.get("host_name")
     inventory_tree = _load_tree_from_file(tree_type="inventory", host_name=host_name)
-    if raw_status_data_tree := row.get("host_structured_status"):
-        status_data_tree = ImmutableTree.deserialize(
-            ast.literal_eval(raw_status_data_tree.decode("utf-8"))
-        )
-    else:
-        status_data_tree = _load_tree_from_file(tree_type="status_data", host_name=host_name)
+    status_data_tree = _load_status_data_tree(host_name, row.get("host_structured_status"))
 
     merged_tree = inventory_tree.merge(status_data_tree)
     if isinstance(permitted_paths := _get_permitted_inventory_paths(), list):
@@ -135,6 +136,65 @@ def load_filtered_and_merged_tree(row: Row) -> ImmutableTree:
     return merged_tree
 
 
+def load_indexed_table_rows(
+    row: Row, path: SDPath
+) -> Sequence[Mapping[SDKey, tuple[SDValue, RetentionInterval | None]]] | None:
+    """Load the table rows below the path from the inventory index
+
+    Same as the table of load_filtered_and_merged_tree(), but without loading the inventory
+    tree of the host. None in case the index can not be used: The host is not indexed yet,
+    its tree changed since then, the status data has rows below the path or the permitted
+    paths of the user restrict the tree.
+    """
+    host_name = row.get("host_name")
+    if not host_name or "/" in host_name:
+        return None
+
+    if _get_permitted_inventory_paths() is not None:
+        return None
+
+    if (
+        _load_status_data_tree(host_name, row.get("host_structured_status"))
+        .get_tree(path)
+        .table.rows_by_ident
+    ):
+        return None
+
+    if (indexed_mtime_ns := _get_indexed_hosts().get(host_name)) is None:
+        return None
+
+    try:
+        tree_mtime_ns = (Path(cmk.utils.paths.inventory_output_dir) / host_name).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    if tree_mtime_ns != indexed_mtime_ns:
+        return None
+
+    return [
+        {key: (value, indexed_row.retentions.get(key)) for key, value in indexed_row.row.items()}
+        for indexed_row in _get_inventory_index().query(path, host_names=[host_name])
+    ]
+
+
+def _load_status_data_tree(
+    host_name: HostName | None, raw_status_data_tree: bytes | None
+) -> ImmutableTree:
+    if raw_status_data_tree:
+        return ImmutableTree.deserialize(ast.literal_eval(raw_status_data_tree.decode("utf-8")))
+    return _load_tree_from_file(tree_type="status_data", host_name=host_name)
+
+
+@request_memoize()
+def _get_inventory_index() -> InventoryIndex:
+    return InventoryIndex(cmk.utils.paths.inventory_index_file)
+
+
+@request_memoize()
+def _get_indexed_hosts() -> Mapping[HostName, int]:
+    return _get_inventory_index().indexed_hosts()
+
+
 def get_status_data_via_livestatus(site: livestatus.SiteId | None, hostname: HostName) -> Row:
     query = (
         "GET hosts\nColumns: host_structured_status\nFilter: host_name = %s\n"
@@ -294,7 +354,9 @@ def _get_history(
     except FilterInventoryHistoryPathsError:
         return [], []
 
-    cached_tree_loader = _CachedTreeLoader()
+    cached_tree_loader = _CachedTreeLoader(
+        ArchivedTreeLoader(Path(cmk.utils.paths.inventory_archive_dir, hostname))
+    )
     corrupted_history_files: set[Path] = set()
     history: list[HistoryEntry] = []
     filters = (
@@ -346,6 +408,7 @@ def _get_inventory_history_paths(hostname: HostName) -> Sequence[InventoryHistor
                 timestamp=int(filepath.name),
             )
             for filepath in sorted(inventory_archive_dir.iterdir())
+            if is_archived_tree_file(filepath)
         ]
     except FileNotFoundError:
         return []
@@ -378,6 +441,7 @@ def _get_pairs(
 
 @dataclass(frozen=True)
 class _CachedTreeLoader:
+    _archived_tree_loader: ArchivedTreeLoader
     _lookup: dict[Path, ImmutableTree] = field(default_factory=dict)
 
     def get_tree(self, filepath: Path) -> ImmutableTree:
@@ -391,7 +455,7 @@ class _CachedTreeLoader:
 
     def _load_tree_from_file(self, filepath: Path) -> ImmutableTree:
         try:
-            tree = load_tree(filepath)
+            tree = self._archived_tree_loader.load(filepath)
         except FileNotFoundError:
             raise LoadStructuredDataError()
 
@@ -716,6 +780,8 @@ class InventoryHousekeeping:
         inventory_archive_hosts = {
             x.name for x in self._inventory_archive_path.iterdir() if x.is_dir()
         }
+        for hostname in inventory_archive_hosts:
+            compact_archived_nodes(self._inventory_archive_path / hostname)
         inventory_delta_cache_hosts = {
             x.name for x in self._inventory_delta_cache_path.iterdir() if x.is_dir()
         }
@@ -753,7 +819,9 @@ class InventoryHousekeeping:
             pass
 
         for filename in [
-            x for x in (self._inventory_archive_path / hostname).iterdir() if not x.is_dir()
+            x
+            for x in (self._inventory_archive_path / hostname).iterdir()
+            if is_archived_tree_file(x)
         ]:
             timestamps.add(filename.name)
         return timestamps
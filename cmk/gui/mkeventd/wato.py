@@ -223,6 +223,7 @@ def register(
     config_var_registry.register(ConfigVariableEventConsoleStatisticsInterval)
     config_var_registry.register(ConfigVariableEventConsoleLogMessages)
     config_var_registry.register(ConfigVariableEventConsoleRuleOptimizer)
+    config_var_registry.register(ConfigVariableEventConsoleEventProcessingWorkers)
     config_var_registry.register(ConfigVariableEventConsoleActions)
     config_var_registry.register(ConfigVariableEventConsoleArchiveOrphans)
     config_var_registry.register(ConfigVariableHostnameTranslation)
@@ -4093,6 +4094,34 @@ class ConfigVariableEventConsoleRuleOptimizer(ConfigVariable):
         )
 
 
+class ConfigVariableEventConsoleEventProcessingWorkers(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupEventConsoleGeneric
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainEventConsole
+
+    def ident(self) -> str:
+        return "event_processing_workers"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Event processing worker processes"),
+            help=_(
+                "By default the Event Console parses the incoming messages and matches them "
+                "against the rules in one thread, which can only use one CPU core. With "
+                "lots of incoming messages and rules this may become the bottleneck. Here "
+                "you can configure a number of worker processes doing the parsing and rule "
+                "matching in parallel. The matched events are still processed one after "
+                "the other in the order the messages have been received. Set this to 0 "
+                "to process the messages without worker processes."
+            ),
+            minvalue=0,
+            label=_("Use"),
+            unit=_("worker processes"),
+        )
+
+
 class ConfigVariableEventConsoleActions(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupEventConsoleGeneric
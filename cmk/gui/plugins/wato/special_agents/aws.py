@@ -18,6 +18,7 @@ from cmk.gui.valuespec import (
     DictionaryEntry,
     DropdownChoice,
     FixedValue,
+    Integer,
     ListChoice,
     ListOf,
     ListOfStrings,
@@ -570,8 +571,23 @@ def _valuespec_special_agents_aws() -> Dictionary:
                 "overall_tags",
                 _vs_aws_tags(_("Restrict monitoring services by one of these AWS tags")),
             ),
+            (
+                "max_workers",
+                Integer(
+                    title=_("Query the AWS API in parallel"),
+                    help=_(
+                        "By default, the special agent queries the services of one region after "
+                        "another. With more than one thread, the services of all regions are "
+                        "queried in parallel. Services depending on the data of other services "
+                        "still wait for them."
+                    ),
+                    label=_("Number of threads"),
+                    minvalue=1,
+                    default_value=4,
+                ),
+            ),
         ],
-        optional_keys=["overall_tags", "proxy_details"],
+        optional_keys=["overall_tags", "proxy_details", "max_workers"],
     )
 
 
@@ -1459,6 +1459,12 @@ class RowTableInventory(ABCRowTable):
         self, hostrow: Row
     ) -> Sequence[Mapping[SDKey, tuple[SDValue, RetentionInterval | None]]]:
         try:
+            if (
+                indexed_rows := inventory.load_indexed_table_rows(
+                    hostrow, self._inventory_path.path
+                )
+            ) is not None:
+                return indexed_rows
             return (
                 inventory.load_filtered_and_merged_tree(hostrow)
                 .get_tree(self._inventory_path.path)
@@ -271,6 +271,7 @@ def register(
     rulespec_registry.register(ExtraServiceConfEscapePluginOutput)
     rulespec_registry.register(DyndnsHosts)
     rulespec_registry.register(PrimaryAddressFamily)
+    rulespec_registry.register(MaxConcurrentFetchers)
     rulespec_registry.register(SnmpCommunities)
     rulespec_registry.register(ManagementBoardConfig)
     rulespec_registry.register(SnmpCharacterEncodings)
@@ -5393,6 +5394,30 @@ PrimaryAddressFamily = HostRulespec(
 )
 
 
+def _valuespec_max_concurrent_fetchers():
+    return Integer(
+        minvalue=1,
+        maxvalue=32,
+        default_value=1,
+        title=_("Maximum number of concurrently fetched data sources"),
+        help=_(
+            "Per default the data sources of a host (Checkmk agent, special agents, "
+            "SNMP, IPMI management boards, piggyback data) are fetched one after "
+            "another, so the time needed to fetch the data of a host is the sum of "
+            "the time needed by every data source. With this rule you can allow the "
+            "data sources of a host to be fetched at the same time. The time needed "
+            "to fetch all data then roughly drops to the time of the slowest data source."
+        ),
+    )
+
+
+MaxConcurrentFetchers = HostRulespec(
+    group=RulespecGroupAgentGeneralSettings,
+    name="max_concurrent_fetchers",
+    valuespec=_valuespec_max_concurrent_fetchers,
+)
+
+
 def _valuespec_snmp_communities():
     return SNMPCredentials(
         title=_("SNMP credentials of monitored hosts"),
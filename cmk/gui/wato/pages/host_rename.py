@@ -467,7 +467,7 @@ class ModeRenameHost(WatoMode):
 
     def action(self) -> ActionResult:
         renamed_host_site = self._host.site_id()
-        if SiteChanges(renamed_host_site).read():
+        if SiteChanges(renamed_host_site).count():
             raise MKUserError(
                 "newname",
                 _(
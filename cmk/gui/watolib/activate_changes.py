@@ -19,22 +19,24 @@ import ast
 import enum
 import errno
 import hashlib
-import io
 import logging
 import multiprocessing
 import os
 import re
 import shutil
+import stat
 import subprocess
+import tempfile
 import time
 import traceback
 from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from itertools import filterfalse
 from multiprocessing.pool import AsyncResult, ThreadPool
 from pathlib import Path
-from typing import Any, Literal, NamedTuple
+from typing import Any, Final, IO, Literal, NamedTuple
 
 from setproctitle import setthreadtitle
 from typing_extensions import TypedDict
@@ -674,21 +676,21 @@ def _synchronize_files(
 
     We build a simple tar archive containing all files to be synchronized.  The list of file to
     be deleted and the current config generation is handed over using dedicated HTTP parameters.
+    The archive is sent from a temporary file, it is not kept in memory.
     """
 
-    sync_archive = _get_sync_archive(files_to_sync, site_config_dir)
-
     site = get_site_config(active_config, site_id)
-    response = cmk.gui.watolib.automations.do_remote_automation(
-        site,
-        "receive-config-sync",
-        [
-            ("site_id", site_id),
-            ("to_delete", repr(files_to_delete)),
-            ("config_generation", "%d" % remote_config_generation),
-        ],
-        files={"sync_archive": io.BytesIO(sync_archive)},
-    )
+    with _sync_archive(files_to_sync, site_config_dir) as sync_archive:
+        response = cmk.gui.watolib.automations.do_remote_automation(
+            site,
+            "receive-config-sync",
+            [
+                ("site_id", site_id),
+                ("to_delete", repr(files_to_delete)),
+                ("config_generation", "%d" % remote_config_generation),
+            ],
+            files={"sync_archive": sync_archive},
+        )
 
     if response is not True:
         raise MKGeneralException(_("Failed to synchronize with site: %s") % response)
@@ -1045,9 +1047,12 @@ class ActivateChanges:
         # Astroid 2.x bug prevents us from using NewType https://github.com/PyCQA/pylint/issues/2296
         # pylint: disable=not-an-iterable
         for site_id in activation_sites():
-            changes = SiteChanges(site_id).read()
+            site_changes = SiteChanges(site_id)
+            # Counting is cheaper than parsing and most sites have no changes at all
+            if not site_changes.count():
+                continue
             changes_counter += len(
-                list(change for change in changes if not has_been_activated(change))
+                list(change for change in site_changes.read() if not has_been_activated(change))
             )
         return changes_counter
 
@@ -2059,8 +2064,9 @@ class ReplicationPathType(enum.StrEnum):
 
 def _get_config_sync_file_infos_per_inode(
     replication_paths: Sequence[ReplicationPath],
+    file_hashes: ConfigSyncFileHashes,
 ) -> Mapping[int, ConfigSyncFileInfo]:
-    inode_sync_states = {}
+    file_paths: list[str] = []
 
     for replication_path in replication_paths:
         replication_path_full = os.path.join(cmk.utils.paths.omd_root, replication_path.site_path)
@@ -2069,21 +2075,22 @@ def _get_config_sync_file_infos_per_inode(
             continue
 
         if replication_path.ty == ReplicationPathType.FILE:
-            inode_sync_states[os.stat(replication_path_full).st_ino] = _get_config_sync_file_info(
-                replication_path_full
-            )
+            file_paths.append(replication_path_full)
         elif replication_path.ty == ReplicationPathType.DIR:
-            _get_replication_dir_config_sync_file_infos_per_inode(
-                inode_sync_states, replication_path_full, replication_path.excludes
+            _get_replication_dir_config_sync_file_paths(
+                file_paths, replication_path_full, replication_path.excludes
             )
         else:
             raise NotImplementedError()
 
-    return inode_sync_states
+    return {
+        os.stat(file_path).st_ino: file_info
+        for file_path, file_info in zip(file_paths, file_hashes.get_file_infos(file_paths))
+    }
 
 
-def _get_replication_dir_config_sync_file_infos_per_inode(
-    inode_sync_states: MutableMapping[int, ConfigSyncFileInfo],
+def _get_replication_dir_config_sync_file_paths(
+    file_paths: list[str],
     replication_path: str,
     replication_path_excludes: Sequence[str],
 ) -> None:
@@ -2100,12 +2107,12 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
                 and os.path.islink(dir_path)
                 and not dir_name == GENERAL_DIR_EXCLUDE
             ):
-                inode_sync_states[os.stat(dir_path).st_ino] = _get_config_sync_file_info(dir_path)
+                file_paths.append(dir_path)
 
         for file_name in file_names:
             file_path = os.path.join(root, file_name)
             if os.path.exists(file_path):
-                inode_sync_states[os.stat(file_path).st_ino] = _get_config_sync_file_info(file_path)
+                file_paths.append(file_path)
 
 
 def _prepare_for_activation_tasks(
@@ -2115,8 +2122,9 @@ def _prepare_for_activation_tasks(
     time_started: float,
     source: ActivationSource,
 ) -> tuple[Mapping[SiteId, ConfigSyncFileInfos], Mapping[SiteId, SiteActivationState]]:
+    file_hashes = ConfigSyncFileHashes.load()
     config_sync_file_infos_per_inode = _get_config_sync_file_infos_per_inode(
-        get_replication_paths()
+        get_replication_paths(), file_hashes
     )
     central_file_infos_per_site = {}
     site_activation_states_per_site = {}
@@ -2134,13 +2142,21 @@ def _prepare_for_activation_tasks(
 
             if activate_changes.is_sync_needed(site_id):
                 central_file_infos_per_site[site_id] = _get_site_central_file_infos(
-                    site_id, snapshot_settings, config_sync_file_infos_per_inode
+                    site_id, snapshot_settings, config_sync_file_infos_per_inode, file_hashes
                 )
         except Exception as e:
             _handle_activation_changes_exception(
                 logger.getChild(f"site[{site_id}]"), str(e), site_activation_state
             )
             _cleanup_activation(site_id, activation_id, source)
+
+    file_hashes.save()
+    logger.debug(
+        "Config sync file hashes: %d reused, %d computed in %.4f",
+        file_hashes.num_reused,
+        file_hashes.num_computed,
+        file_hashes.duration,
+    )
     return central_file_infos_per_site, site_activation_states_per_site
 
 
@@ -2148,6 +2164,7 @@ def _get_site_central_file_infos(
     site_id: SiteId,
     snapshot_settings: SnapshotSettings,
     config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo],
+    file_hashes: ConfigSyncFileHashes,
 ) -> ConfigSyncFileInfos:
     # In case we experience performance issues here, we could postpone the hashing of the
     # central files to only be done ad-hoc in get_file_names_to_sync when the other attributes
@@ -2158,6 +2175,7 @@ def _get_site_central_file_infos(
         snapshot_settings.snapshot_components,
         site_config_dir,
         config_sync_file_infos_per_inode,
+        file_hashes,
     )
 
     logger.getChild(f"site[{site_id}]").debug(
@@ -2797,65 +2815,83 @@ def _filter_remote_files(remote_files: set[str]) -> set[str]:
     return remote_files_to_keep
 
 
-def _get_sync_archive(to_sync: list[str], base_dir: Path) -> bytes:
-    # Use native tar instead of python tarfile for performance reasons
-    completed_process = subprocess.run(
-        [
-            "tar",
-            "-c",
-            "-C",
-            str(base_dir),
-            "-f",
-            "-",
-            "--null",
-            "-T",
-            "-",
-            "--preserve-permissions",
-        ],
-        input=b"\0".join(f.encode() for f in to_sync),
-        capture_output=True,
-        close_fds=True,
-        shell=False,
-        check=False,
-    )
-
-    # Since we don't stream the archive to the remote site (we could probably do this) it should be
-    # no problem to buffer it in memory for the moment
+@contextmanager
+def _sync_archive(to_sync: list[str], base_dir: Path) -> Iterator[IO[bytes]]:
+    """Write the tar archive to an anonymous temporary file and hand it out for reading
 
-    if completed_process.returncode:
-        raise MKGeneralException(
-            _("Failed to create sync archive [%d]: %s")
-            % (completed_process.returncode, completed_process.stderr.decode())
+    The archive can become large. Writing it to a file on disk instead of buffering it in
+    memory keeps the memory usage independent of its size, also with many sites being
+    activated in parallel.
+    """
+    with tempfile.TemporaryFile(dir=wato_var_dir()) as archive, tempfile.TemporaryFile() as stderr:
+        # Use native tar instead of python tarfile for performance reasons
+        completed_process = subprocess.run(
+            [
+                "tar",
+                "-c",
+                "-C",
+                str(base_dir),
+                "-f",
+                "-",
+                "--null",
+                "-T",
+                "-",
+                "--preserve-permissions",
+            ],
+            input=b"\0".join(f.encode() for f in to_sync),
+            stdout=archive,
+            stderr=stderr,
+            close_fds=True,
+            shell=False,
+            check=False,
         )
 
-    return completed_process.stdout
-
-
-def _unpack_sync_archive(sync_archive: bytes, base_dir: Path) -> None:
-    completed_process = subprocess.run(
-        [
-            "tar",
-            "-x",
-            "-C",
-            str(base_dir),
-            "-f",
-            "-",
-            "-U",
-            "--recursive-unlink",
-            "--preserve-permissions",
-        ],
-        input=sync_archive,
-        capture_output=True,
-        close_fds=True,
-        shell=False,
-        check=False,
-    )
+        if completed_process.returncode:
+            stderr.seek(0)
+            raise MKGeneralException(
+                _("Failed to create sync archive [%d]: %s")
+                % (completed_process.returncode, stderr.read().decode())
+            )
 
-    if completed_process.returncode:
-        raise MKGeneralException(
-            _("Failed to create sync archive [%d]: %s")
-            % (completed_process.returncode, completed_process.stderr.decode())
-        )
+        archive.seek(0)
+        yield archive
+
+
+def _unpack_sync_archive(sync_archive: IO[bytes], base_dir: Path) -> None:
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(
+            [
+                "tar",
+                "-x",
+                "-C",
+                str(base_dir),
+                "-f",
+                "-",
+                "-U",
+                "--recursive-unlink",
+                "--preserve-permissions",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
+            close_fds=True,
+            shell=False,
+        ) as process:
+            assert process.stdin is not None
+            try:
+                while chunk := sync_archive.read(64 * 1024):
+                    process.stdin.write(chunk)
+            except BrokenPipeError:
+                pass  # tar terminated early, the error is reported below
+            finally:
+                process.stdin.close()
+
+        if process.returncode:
+            stderr.seek(0)
+            raise MKGeneralException(
+                _("Failed to create sync archive [%d]: %s")
+                % (process.returncode, stderr.read().decode())
+            )
 
 
 class ConfigSyncFileInfo(NamedTuple):
@@ -2903,7 +2939,17 @@ class AutomationGetConfigSyncState(AutomationCommand):
 
     def execute(self, api_request: list[ReplicationPath]) -> GetConfigSyncStateResponse:
         with store.lock_checkmk_configuration():
-            file_infos = _get_config_sync_file_infos(api_request, base_dir=cmk.utils.paths.omd_root)
+            file_hashes = ConfigSyncFileHashes.load()
+            file_infos = _get_config_sync_file_infos(
+                api_request, base_dir=cmk.utils.paths.omd_root, file_hashes=file_hashes
+            )
+            file_hashes.save()
+            logger.debug(
+                "Config sync file hashes: %d reused, %d computed in %.4f",
+                file_hashes.num_reused,
+                file_hashes.num_computed,
+                file_hashes.duration,
+            )
             transport_file_infos = {
                 k: (v.st_mode, v.st_size, v.link_target, v.file_hash) for k, v in file_infos.items()
             }
@@ -2943,6 +2989,7 @@ def _get_config_sync_file_infos(
     replication_paths: list[ReplicationPath],
     base_dir: Path,
     config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo] | None = None,
+    file_hashes: ConfigSyncFileHashes | None = None,
 ) -> ConfigSyncFileInfos:
     """Scans the given replication paths for the information needed for the config sync
 
@@ -2953,8 +3000,12 @@ def _get_config_sync_file_infos(
     """
     if config_sync_file_infos_per_inode is None:
         config_sync_file_infos_per_inode = {}
+    if file_hashes is None:
+        file_hashes = ConfigSyncFileHashes({})
 
-    infos = {}
+    infos: dict[str, ConfigSyncFileInfo] = {}
+    # The site paths and full paths of the files without precomputed infos
+    missing: dict[str, str] = {}
     for replication_path in replication_paths:
         replication_path_full = str(base_dir.joinpath(replication_path.site_path))
 
@@ -2962,11 +3013,12 @@ def _get_config_sync_file_infos(
             continue  # Only report back existing things
 
         if replication_path.ty == ReplicationPathType.FILE:
-            infos[replication_path.site_path] = _get_config_sync_file_info(replication_path_full)
+            missing[replication_path.site_path] = replication_path_full
 
         elif replication_path.ty == ReplicationPathType.DIR:
             _get_replication_dir_config_sync_file_infos(
                 infos,
+                missing,
                 config_sync_file_infos_per_inode,
                 base_dir,
                 replication_path_full,
@@ -2974,11 +3026,14 @@ def _get_config_sync_file_infos(
             )
         else:
             raise NotImplementedError()
+
+    infos.update(zip(missing, file_hashes.get_file_infos(list(missing.values()))))
     return infos
 
 
 def _get_replication_dir_config_sync_file_infos(
     infos: MutableMapping[str, ConfigSyncFileInfo],
+    missing: MutableMapping[str, str],
     config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo],
     base_dir: Path,
     replication_path: str,
@@ -3002,20 +3057,84 @@ def _get_replication_dir_config_sync_file_infos(
                 ):
                     infos[valid_site_path] = sync_file_info
                 else:
-                    infos[valid_site_path] = _get_config_sync_file_info(config_sync_path)
+                    missing[valid_site_path] = config_sync_path
             except FileNotFoundError:  # e.g. broken symlinks
-                infos[valid_site_path] = _get_config_sync_file_info(config_sync_path)
+                missing[valid_site_path] = config_sync_path
 
 
-def _get_config_sync_file_info(file_path: str) -> ConfigSyncFileInfo:
-    stat = os.lstat(file_path)
-    is_symlink = os.path.islink(file_path)
-    return ConfigSyncFileInfo(
-        stat.st_mode,
-        stat.st_size,
-        os.readlink(str(file_path)) if is_symlink else None,
-        _create_config_sync_file_hash(file_path) if not is_symlink else None,
-    )
+_FileHashKey = tuple[int, int, int]
+
+
+class ConfigSyncFileHashes:
+    """Computes the sync file infos and keeps the file hashes for the next time
+
+    The hashes are keyed by inode, size and modification time of the files. As long as
+    these do not change, the hash of the previous activation is used. The missing hashes
+    are computed concurrently.
+
+    Only the hashes requested since loading are saved, which drops the ones of
+    vanished files.
+    """
+
+    _NUM_THREADS = 8
+
+    def __init__(self, hashes: Mapping[_FileHashKey, str]) -> None:
+        self._hashes: Final = hashes
+        self._used: Final[dict[_FileHashKey, str]] = {}
+        self.num_reused = 0
+        self.num_computed = 0
+        self.duration = 0.0
+
+    @staticmethod
+    def path() -> Path:
+        return wato_var_dir() / "config_sync_file_hashes.pkl"
+
+    @classmethod
+    def load(cls) -> ConfigSyncFileHashes:
+        try:
+            return cls(store.load_object_from_pickle_file(cls.path(), default={}))
+        except Exception as e:
+            logger.warning("Ignoring the config sync file hashes: %s", e)
+            return cls({})
+
+    def save(self) -> None:
+        store.save_object_to_pickle_file(self.path(), self._used)
+
+    def get_file_infos(self, file_paths: Sequence[str]) -> Sequence[ConfigSyncFileInfo]:
+        start = time.time()
+        stats = [os.lstat(file_path) for file_path in file_paths]
+        keys: list[_FileHashKey | None] = [
+            None if stat.S_ISLNK(st.st_mode) else (st.st_ino, st.st_size, st.st_mtime_ns)
+            for st in stats
+        ]
+
+        to_compute = {
+            key: file_path
+            for file_path, key in zip(file_paths, keys)
+            if key is not None and key not in self._hashes and key not in self._used
+        }
+        if len(to_compute) > 1:
+            with ThreadPool(min(self._NUM_THREADS, len(to_compute))) as pool:
+                computed = pool.map(_create_config_sync_file_hash, to_compute.values())
+        else:
+            computed = [_create_config_sync_file_hash(p) for p in to_compute.values()]
+        self._used.update(zip(to_compute, computed))
+        self.num_computed += len(computed)
+
+        infos = []
+        for file_path, st, key in zip(file_paths, stats, keys):
+            if key is None:
+                infos.append(
+                    ConfigSyncFileInfo(st.st_mode, st.st_size, os.readlink(file_path), None)
+                )
+                continue
+            if key not in self._used:
+                self._used[key] = self._hashes[key]
+                self.num_reused += 1
+            infos.append(ConfigSyncFileInfo(st.st_mode, st.st_size, None, self._used[key]))
+
+        self.duration += time.time() - start
+        return infos
 
 
 def _create_config_sync_file_hash(file_path: str) -> str:
@@ -3051,7 +3170,7 @@ def _config_generation_path() -> Path:
 
 class ReceiveConfigSyncRequest(NamedTuple):
     site_id: SiteId
-    sync_archive: bytes
+    sync_archive: IO[bytes]
     to_delete: list[str]
     config_generation: int
 
@@ -3073,7 +3192,7 @@ class AutomationReceiveConfigSync(AutomationCommand):
 
         return ReceiveConfigSyncRequest(
             site_id,
-            _request.uploaded_file("sync_archive")[2],
+            _request.uploaded_file_stream("sync_archive"),
             ast.literal_eval(_request.get_str_input_mandatory("to_delete")),
             _request.get_integer_input_mandatory("config_generation"),
         )
@@ -3098,7 +3217,7 @@ class AutomationReceiveConfigSync(AutomationCommand):
             logger.debug("Done")
             return True
 
-    def _update_config_on_remote_site(self, sync_archive: bytes, to_delete: list[str]) -> None:
+    def _update_config_on_remote_site(self, sync_archive: IO[bytes], to_delete: list[str]) -> None:
         """Use the given tar archive and list of files to be deleted to update the local files"""
         base_dir = cmk.utils.paths.omd_root
 
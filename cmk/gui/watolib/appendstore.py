@@ -5,8 +5,9 @@
 
 import abc
 import ast
+import json
 import os
-from collections.abc import Iterator, Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Generic, TypeVar
@@ -19,11 +20,17 @@ from cmk.gui.i18n import _
 
 _VT = TypeVar("_VT")
 
+_CHUNK_SIZE = 64 * 1024
+
 
 class ABCAppendStore(Generic[_VT], abc.ABC):
     """Managing a file with structured data that can be appended in a cheap way
 
-    The file holds basic python structures separated by "\\0".
+    The file holds basic python structures separated by "\\0". Entries are written as JSON
+    if they survive the round trip unchanged, otherwise as repr(). Both are read back.
+
+    The files can grow large. Use `read_last()`, `read_since()` or `count()` instead of `read()`
+    in case you do not need all the entries.
     """
 
     @staticmethod
@@ -60,13 +67,13 @@ class ABCAppendStore(Generic[_VT], abc.ABC):
         """Parse the file and return the entries"""
         try:
             with self._path.open("rb") as f:
-                return [
-                    self._deserialize(ast.literal_eval(entry.decode("utf-8")))
-                    for entry in f.read().split(b"\0")
-                    if entry
-                ]
+                return self._parse(f.read().split(b"\0"))
         except FileNotFoundError:
             return []
+
+    def _parse(self, raw_entries: Iterable[bytes]) -> list[_VT]:
+        try:
+            return [self._deserialize(_decode(raw)) for raw in raw_entries if raw]
         except SyntaxError as e:
             raise MKUserError(
                 None,
@@ -76,18 +83,91 @@ class ABCAppendStore(Generic[_VT], abc.ABC):
                     "content or remove the file before you visit this page "
                     "again.<br><br>The problematic entry is:<br>%s"
                 )
-                % (f.name, e.text),
+                % (self._path, e.text),
             )
 
     def read(self) -> Sequence[_VT]:
         with store.locked(self._path):
             return self.__read()
 
+    def read_last(self, num: int) -> Sequence[_VT]:
+        """Return the last `num` entries, the oldest first
+
+        Only the end of the file is read, the other entries are not parsed."""
+        if num <= 0:
+            return []
+        raw_entries: list[bytes] = []
+        with store.locked(self._path):
+            for raw in self.__iter_raw_reversed():
+                raw_entries.append(raw)
+                if len(raw_entries) == num:
+                    break
+        return self._parse(reversed(raw_entries))
+
+    def read_since(self, offset: int) -> tuple[Sequence[_VT], int]:
+        """Return the entries appended after the byte offset and the offset to continue from
+
+        Start with offset 0 and pass the returned offset to the next call to only read
+        what has been appended in the meantime. In case the file has been cleared or
+        rewritten to a smaller size since, it is read from the start again."""
+        with store.locked(self._path):
+            try:
+                with self._path.open("rb") as f:
+                    if offset > os.fstat(f.fileno()).st_size:
+                        offset = 0
+                    f.seek(offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return [], 0
+        # Only consume complete entries
+        end = data.rfind(b"\0") + 1
+        return self._parse(data[:end].split(b"\0")), offset + end
+
+    def count(self) -> int:
+        """Count the entries without parsing them"""
+        num = 0
+        pending = False  # Whether there are entry bytes not yet terminated by "\0"
+        with store.locked(self._path):
+            try:
+                with self._path.open("rb") as f:
+                    while chunk := f.read(_CHUNK_SIZE):
+                        *terminated, pending_part = chunk.split(b"\0")
+                        if terminated:
+                            # Ignore empty entries, like __read() does
+                            num += bool(pending or terminated[0])
+                            num += sum(1 for raw in terminated[1:] if raw)
+                            pending = False
+                        pending = pending or bool(pending_part)
+            except FileNotFoundError:
+                return 0
+        return num + pending
+
+    def __iter_raw_reversed(self) -> Iterator[bytes]:
+        """Yield the serialized entries, the last one first
+
+        The file is read in chunks from its end."""
+        try:
+            with self._path.open("rb") as f:
+                pos = f.seek(0, os.SEEK_END)
+                tail = b""
+                while pos > 0:
+                    size = min(_CHUNK_SIZE, pos)
+                    pos -= size
+                    f.seek(pos)
+                    parts = (f.read(size) + tail).split(b"\0")
+                    # The first part may be incomplete, keep it for the next chunk
+                    tail = parts[0]
+                    yield from (raw for raw in reversed(parts[1:]) if raw)
+                if tail:
+                    yield tail
+        except FileNotFoundError:
+            return
+
     def append(self, entry: _VT) -> None:
         with store.locked(self._path):
             try:
                 with self._path.open("ab+") as f:
-                    f.write(repr(self._serialize(entry)).encode("utf-8") + b"\0")
+                    f.write(_encode(self._serialize(entry)) + b"\0")
                     f.flush()
                     os.fsync(f.fileno())
                 self._path.chmod(0o660)
@@ -105,3 +185,30 @@ class ABCAppendStore(Generic[_VT], abc.ABC):
                     pass
                 for entry in entries:
                     self.append(entry)
+
+
+def _encode(raw: object) -> bytes:
+    """Serialize as JSON, which is a lot faster to parse than python literals
+
+    Fall back to repr() for values JSON can not represent faithfully, e.g. tuples."""
+    try:
+        text = json.dumps(raw, ensure_ascii=False, allow_nan=False)
+    except (TypeError, ValueError):
+        text = repr(raw)
+    else:
+        if json.loads(text) != raw:
+            text = repr(raw)
+    return text.encode("utf-8")
+
+
+def _decode(raw: bytes) -> object:
+    """Parse an entry written by `_encode()` or by older versions using repr()
+
+    A repr() never is valid JSON with a different meaning: It uses single quotes, True,
+    False, None, parentheses or escapes JSON does not know, which all make json.loads() fail.
+    """
+    text = raw.decode("utf-8")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return ast.literal_eval(text)
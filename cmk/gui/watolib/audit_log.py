@@ -75,8 +75,9 @@ class AuditLogStore(ABCAppendStore["AuditLogStore.Entry"]):
         @staticmethod
         def serialize(entry: AuditLogStore.Entry) -> dict[str, Any]:
             raw = entry._asdict()
+            # A list, not a tuple, to keep the entry JSON serializable
             raw["text"] = (
-                ("html", str(entry.text)) if isinstance(entry.text, HTML) else ("str", entry.text)
+                ["html", str(entry.text)] if isinstance(entry.text, HTML) else ["str", entry.text]
             )
             raw["object_ref"] = raw["object_ref"].serialize() if raw["object_ref"] else None
             return raw
@@ -148,7 +149,16 @@ class AuditLogStore(ABCAppendStore["AuditLogStore.Entry"]):
         return True
 
     def get_entries_since(self, timestamp: int) -> Sequence[AuditLogStore.Entry]:
-        return [entry for entry in self.read() if entry.time > timestamp]
+        """Return the entries logged after the timestamp
+
+        The entries of a site are appended in the order they are logged, so only the end of the
+        file is read until an older entry shows up."""
+        num = 100
+        while True:
+            entries = self.read_last(num)
+            if len(entries) < num or entries[0].time <= timestamp:
+                return [entry for entry in entries if entry.time > timestamp]
+            num *= 10
 
     @classmethod
     def to_json(cls, entries: Sequence[AuditLogStore.Entry]) -> str:
@@ -9,6 +9,7 @@ and similar things."""
 from __future__ import annotations
 
 import ast
+import io
 import json
 import logging
 import re
@@ -17,7 +18,7 @@ import uuid
 from collections.abc import Callable, Iterable, Mapping, Sequence
 from io import BytesIO
 from pathlib import Path
-from typing import NamedTuple
+from typing import Final, IO, NamedTuple
 
 import requests
 import urllib3
@@ -32,6 +33,7 @@ from cmk.utils.licensing.registry import get_license_state
 from cmk.utils.log import VERBOSE
 from cmk.utils.user import UserId
 
+from cmk.automations.helper_api import AutomationRequest, call_helper, HelperCallError
 from cmk.automations.results import result_type_registry, SerializedResult
 
 import cmk.gui.hooks as hooks
@@ -65,6 +67,9 @@ from cmk.gui.watolib.utils import mk_repr
 
 auto_logger = logger.getChild("automations")
 
+# The core is started by these commands, which should not become a child of the helper
+_COMMANDS_NOT_FOR_HELPER: Final = frozenset({"start", "restart", "reload"})
+
 # Disable python warnings in background job output or logs like "Unverified
 # HTTPS request is being made". We warn the user using analyze configuration.
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -101,8 +106,12 @@ def check_mk_local_automation_serialized(
 
     if auto_logger.isEnabledFor(logging.DEBUG):
         cmd.append("-vv")
+        log_level = logging.DEBUG
     elif auto_logger.isEnabledFor(VERBOSE):
         cmd.append("-v")
+        log_level = VERBOSE
+    else:
+        log_level = logging.INFO
 
     cmd += ["--automation", command] + new_args
 
@@ -117,13 +126,11 @@ def check_mk_local_automation_serialized(
     auto_logger.info("STDIN: %r" % stdin_data)
 
     try:
-        completed_process = subprocess.run(
+        completed_process = _run_automation(
             cmd,
-            capture_output=True,
-            close_fds=True,
-            encoding="utf-8",
-            input=stdin_data,
-            check=False,
+            AutomationRequest(
+                command=command, args=new_args, stdin=stdin_data, log_level=log_level
+            ),
         )
     except Exception as e:
         raise local_automation_failure(command=command, cmdline=cmd, exc=e)
@@ -162,6 +169,30 @@ def check_mk_local_automation_serialized(
     return cmd, SerializedResult(completed_process.stdout)
 
 
+def _run_automation(
+    cmd: Sequence[str], request: AutomationRequest
+) -> subprocess.CompletedProcess[str]:
+    """Execute the call in the automation helper, or in a new process if it is not available"""
+    try:
+        response = None if request.command in _COMMANDS_NOT_FOR_HELPER else call_helper(request)
+    except HelperCallError as e:
+        raise local_automation_failure(command=request.command, cmdline=cmd, exc=e)
+    if response is not None:
+        auto_logger.info("Executed by the automation helper")
+        return subprocess.CompletedProcess(
+            cmd, response.exit_code, stdout=response.output, stderr=response.error
+        )
+
+    return subprocess.run(
+        cmd,
+        capture_output=True,
+        close_fds=True,
+        encoding="utf-8",
+        input=request.stdin,
+        check=False,
+    )
+
+
 def local_automation_failure(
     command: str,
     cmdline: Iterable[str],
@@ -273,7 +304,7 @@ def _do_remote_automation_serialized(
     site: SiteConfiguration,
     command: str,
     vars_: Sequence[tuple[str, str]],
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> str:
     auto_logger.info("RUN [%s]: %s", site, command)
@@ -353,7 +384,7 @@ def do_remote_automation(
     site: SiteConfiguration,
     command: str,
     vars_: Sequence[tuple[str, str]],
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> object:
     serialized_response = _do_remote_automation_serialized(
@@ -381,21 +412,27 @@ def get_url_raw(
     insecure: bool,
     auth: tuple[str, str] | None = None,
     data: Mapping[str, str] | None = None,
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> requests.Response:
+    headers = {
+        "x-checkmk-version": cmk_version.__version__,
+        "x-checkmk-edition": cmk_version.edition().short,
+        "x-checkmk-license-state": get_license_state().readable,
+    }
+    body: Mapping[str, str] | _MultipartFormData | None = data
+    if files:
+        # requests would read the files into memory for encoding them
+        body = _MultipartFormData(data or {}, files)
+        headers["Content-Type"] = body.content_type
+
     response = requests.post(
         url,
-        data=data,
+        data=body,
         verify=not insecure,
         auth=auth,
-        files=files,
         timeout=timeout,
-        headers={
-            "x-checkmk-version": cmk_version.__version__,
-            "x-checkmk-edition": cmk_version.edition().short,
-            "x-checkmk-license-state": get_license_state().readable,
-        },
+        headers=headers,
     )
 
     response.encoding = "utf-8"  # Always decode with utf-8
@@ -414,6 +451,66 @@ def get_url_raw(
     return response
 
 
+class _MultipartFormData(io.RawIOBase):
+    """A multipart/form-data request body which reads the files while being sent
+
+    The length is known in advance, so the body is not sent chunked, which the
+    remote sites would not accept.
+    """
+
+    def __init__(self, fields: Mapping[str, str], files: Mapping[str, IO[bytes]]) -> None:
+        super().__init__()
+        boundary = uuid.uuid4().hex
+        self.content_type: Final = f"multipart/form-data; boundary={boundary}"
+        self._parts: list[IO[bytes]] = []
+        for name, value in fields.items():
+            self._parts.append(
+                BytesIO(
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+                    + value.encode()
+                    + b"\r\n"
+                )
+            )
+        for name, file in files.items():
+            self._parts.append(
+                BytesIO(
+                    f"--{boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{name}"; filename="{name}"\r\n'
+                    "Content-Type: application/octet-stream\r\n\r\n".encode()
+                )
+            )
+            self._parts.append(file)
+            self._parts.append(BytesIO(b"\r\n"))
+        self._parts.append(BytesIO(f"--{boundary}--\r\n".encode()))
+        self._length: Final = sum(self._remaining_size(part) for part in self._parts)
+        self._position = 0
+
+    @staticmethod
+    def _remaining_size(part: IO[bytes]) -> int:
+        position = part.tell()
+        size = part.seek(0, io.SEEK_END) - position
+        part.seek(position)
+        return size
+
+    def __len__(self) -> int:
+        return self._length
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        while self._parts:
+            if chunk := self._parts[0].read(len(buffer)):
+                buffer[: len(chunk)] = chunk
+                self._position += len(chunk)
+                return len(chunk)
+            self._parts.pop(0)
+        return 0
+
+
 def _verify_compatibility(response: requests.Response) -> None:
     """Ensure we are compatible with the remote site
 
@@ -518,7 +615,7 @@ def get_url(
     insecure: bool,
     auth: tuple[str, str] | None = None,
     data: Mapping[str, str] | None = None,
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> str:
     return get_url_raw(url, insecure, auth, data, files, timeout).text
@@ -529,7 +626,7 @@ def get_url_json(
     insecure: bool,
     auth: tuple[str, str] | None = None,
     data: Mapping[str, str] | None = None,
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> object:
     return get_url_raw(url, insecure, auth, data, files, timeout).json()
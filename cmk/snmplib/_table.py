@@ -58,6 +58,21 @@ def get_snmp_table(
     max_len = 0
     max_len_col = -1
 
+    # All columns of the tree are walked at once, backends may fetch them together
+    walked_columns = iter(
+        get_snmpwalks(
+            section_name,
+            tree.base,
+            [
+                (f"{tree.base}.{oid.column}", oid.save_to_cache)
+                for oid in tree.oids
+                if not isinstance(oid.column, SpecialColumn)
+            ],
+            walk_cache=walk_cache,
+            backend=backend,
+        )
+    )
+
     for oid in tree.oids:
         fetchoid: OID = f"{tree.base}.{oid.column}"
         # column may be integer or string like "1.5.4.2.3"
@@ -78,14 +93,7 @@ def get_snmp_table(
             index_column = len(columns)
             index_format = oid.column
         else:
-            rowinfo = get_snmpwalk(
-                section_name,
-                tree.base,
-                fetchoid,
-                walk_cache=walk_cache,
-                save_walk_cache=oid.save_to_cache,
-                backend=backend,
-            )
+            rowinfo = next(walked_columns)
             if len(rowinfo) > max_len:
                 max_len_col = len(columns)
 
@@ -184,19 +192,63 @@ def get_snmpwalk(
     save_walk_cache: bool,
     backend: SNMPBackend,
 ) -> SNMPRowInfo:
+    return get_snmpwalks(
+        section_name,
+        base_oid,
+        [(fetchoid, save_walk_cache)],
+        walk_cache=walk_cache,
+        backend=backend,
+    )[0]
+
+
+def get_snmpwalks(
+    section_name: SectionName | None,
+    base_oid: str,
+    fetchoids: Sequence[tuple[OID, bool]],
+    *,
+    walk_cache: MutableMapping[tuple[str, str, bool], SNMPRowInfo],
+    backend: SNMPBackend,
+) -> Sequence[SNMPRowInfo]:
+    """Walk the OIDs which are not in the walk cache yet, all of them at once
+
+    The OIDs come along with whether to save their walk to the cache file.
+    """
     contexts = backend.config.snmpv3_contexts_of(section_name).contexts
     context_string = "-".join(["no_context" if not c else c for c in contexts])
 
     # contexts are hashed in order not to exceed max pathname length
     context_hash = hashlib.shake_256(context_string.encode("utf-8")).hexdigest(15)
 
-    with contextlib.suppress(KeyError):
-        cache_info = walk_cache[(fetchoid, context_hash, save_walk_cache)]
-        console.vverbose(f"Already fetched OID: {fetchoid}\n")
-        return cache_info
+    rowinfos: dict[tuple[OID, bool], SNMPRowInfo] = {}
+    for fetchoid, save_walk_cache in fetchoids:
+        with contextlib.suppress(KeyError):
+            rowinfos[(fetchoid, save_walk_cache)] = walk_cache[
+                (fetchoid, context_hash, save_walk_cache)
+            ]
+            console.vverbose(f"Already fetched OID: {fetchoid}\n")
+
+    to_walk = [spec for spec in dict.fromkeys(fetchoids) if spec not in rowinfos]
+    if to_walk:
+        oids_to_walk = list(dict.fromkeys(fetchoid for fetchoid, _save_walk_cache in to_walk))
+        walked = dict(
+            zip(oids_to_walk, _walk_columns(section_name, base_oid, oids_to_walk, backend=backend))
+        )
+        for fetchoid, save_walk_cache in to_walk:
+            walk_cache[(fetchoid, context_hash, save_walk_cache)] = walked[fetchoid]
+            rowinfos[(fetchoid, save_walk_cache)] = walked[fetchoid]
+
+    return [rowinfos[fetchoid] for fetchoid in fetchoids]
 
-    added_oids: set[OID] = set()
-    rowinfo: SNMPRowInfo = []
+
+def _walk_columns(
+    section_name: SectionName | None,
+    base_oid: str,
+    fetchoids: Sequence[OID],
+    *,
+    backend: SNMPBackend,
+) -> Sequence[SNMPRowInfo]:
+    added_oids: list[set[OID]] = [set() for _fetchoid in fetchoids]
+    rowinfos: list[SNMPRowInfo] = [[] for _fetchoid in fetchoids]
 
     skip: set[SNMPContext] = set()
     context_config = backend.config.snmpv3_contexts_of(section_name)
@@ -205,8 +257,8 @@ def get_snmpwalk(
             continue
 
         try:
-            rows = backend.walk(
-                fetchoid,
+            columns = backend.walk_columns(
+                fetchoids,
                 section_name=section_name,
                 table_base_oid=base_oid,
                 context=context,
@@ -219,28 +271,28 @@ def get_snmpwalk(
             skip.add(context)
             continue
 
-        # I've seen a broken device (Mikrotik Router), that broke after an
-        # update to RouterOS v6.22. It would return 9 time the same OID when
-        # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
-        # by removing any duplicate OID information
-        if len(rows) > 1 and rows[0][0] == rows[1][0]:
-            console.vverbose(
-                "Detected broken SNMP agent. Ignoring duplicate OID %s.\n" % rows[0][0]
-            )
-            rows = rows[:1]
+        for rows, rowinfo, added in zip(columns, rowinfos, added_oids):
+            # I've seen a broken device (Mikrotik Router), that broke after an
+            # update to RouterOS v6.22. It would return 9 time the same OID when
+            # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
+            # by removing any duplicate OID information
+            if len(rows) > 1 and rows[0][0] == rows[1][0]:
+                console.vverbose(
+                    "Detected broken SNMP agent. Ignoring duplicate OID %s.\n" % rows[0][0]
+                )
+                rows = rows[:1]
 
-        for row_oid, val in rows:
-            if row_oid in added_oids:
-                console.vverbose(f"Duplicate OID found: {row_oid} ({val!r})\n")
-            else:
-                rowinfo.append((row_oid, val))
-                added_oids.add(row_oid)
+            for row_oid, val in rows:
+                if row_oid in added:
+                    console.vverbose(f"Duplicate OID found: {row_oid} ({val!r})\n")
+                else:
+                    rowinfo.append((row_oid, val))
+                    added.add(row_oid)
 
-    if skip and not rowinfo:
+    if skip and not all(rowinfos):
         raise MKSNMPError("SNMP Error on %s: SNMP query timed out" % backend.config.hostname)
 
-    walk_cache[(fetchoid, context_hash, save_walk_cache)] = rowinfo
-    return rowinfo
+    return rowinfos
 
 
 def _decode_column(
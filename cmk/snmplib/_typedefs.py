@@ -56,6 +56,7 @@ class SNMPBackendEnum(enum.Enum):
     INLINE = "Inline"
     CLASSIC = "Classic"
     STORED_WALK = "StoredWalk"
+    ASYNCIO = "Asyncio"
 
     def serialize(self) -> str:
         return self.name
@@ -202,6 +203,27 @@ class SNMPBackend(abc.ABC):
     ) -> SNMPRowInfo:
         return []
 
+    def walk_columns(
+        self,
+        /,
+        oids: Sequence[OID],
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        """Walk the columns of a table, the rows of every OID in the same order
+
+        Backends which can fetch the columns together override this, by default
+        they are walked one after another.
+        """
+        return [
+            self.walk(
+                oid, context=context, section_name=section_name, table_base_oid=table_base_oid
+            )
+            for oid in oids
+        ]
+
 
 class SpecialColumn(enum.IntEnum):
     # Until we remove all but the first, its worth having an enum
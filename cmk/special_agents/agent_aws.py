@@ -20,10 +20,11 @@ import re
 import sys
 from collections import Counter, defaultdict
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum, StrEnum
-from time import sleep
+from time import perf_counter, sleep
 from typing import Any, assert_never, Literal, NamedTuple, NotRequired, TYPE_CHECKING, TypeVar
 
 import boto3
@@ -648,6 +649,9 @@ class ResultDistributor:
     def add(self, sender_name: str, colleague: "AWSSection") -> None:
         self._colleagues[sender_name].append(colleague)
 
+    def colleagues(self, sender_name: str) -> Sequence["AWSSection"]:
+        return self._colleagues.get(sender_name, [])
+
     def distribute(self, sender: "AWSSection", result: "AWSComputedContent") -> None:
         for colleague in self._colleagues[sender.name]:
             if colleague.name != sender.name:
@@ -811,6 +815,11 @@ class AWSSection(DataCache):
             )
         return period
 
+    @property
+    def colleagues(self) -> Sequence["AWSSection"]:
+        """The sections receiving the content of this section"""
+        return [c for c in self._distributor.colleagues(self.name) if c.name != self.name]
+
     def _send(self, content: AWSComputedContent) -> None:
         self._distributor.distribute(self, content)
 
@@ -6423,6 +6432,7 @@ class AWSSections(abc.ABC):
         self._session = session
         self._debug = debug
         self._sections: list[AWSSection] = []
+        self._section_outcomes: dict[int, AWSSectionResults | Exception | None] = {}
         self.config = config
         self.account_id = account_id
 
@@ -6456,26 +6466,50 @@ class AWSSections(abc.ABC):
             logging.info("Invalid region name or client key %s: %s", client_key, e)
             raise
 
+    @property
+    def sections(self) -> Sequence[AWSSection]:
+        return self._sections
+
     def run(self, use_cache: bool = True) -> None:
+        for index in range(len(self._sections)):
+            self.run_section(index, use_cache=use_cache)
+        self.write_results()
+
+    def run_section(self, index: int, use_cache: bool = True) -> None:
+        """Run a section and keep its result for write_results()
+
+        The sections may run in different threads, see run_concurrently().
+        """
+        section = self._sections[index]
+        start = perf_counter()
+        try:
+            outcome: AWSSectionResults | Exception | None = section.run(use_cache=use_cache)
+        except AssertionError as e:
+            logging.info(e)
+            if self._debug:
+                raise
+            outcome = None
+        except Exception as e:
+            logging.info("%s: %s", section.__class__.__name__, e)
+            if self._debug:
+                raise
+            outcome = e
+        finally:
+            logging.info("%s/%s: %.3fs", section.region, section.name, perf_counter() - start)
+        self._section_outcomes[index] = outcome
+
+    def write_results(self) -> None:
         exceptions = []
         results: Results = {}
 
-        for section in self._sections:
-            try:
-                section_result = section.run(use_cache=use_cache)
-            except AssertionError as e:
-                logging.info(e)
-                if self._debug:
-                    raise
-            except Exception as e:
-                logging.info("%s: %s", section.__class__.__name__, e)
-                if self._debug:
-                    raise
-                exceptions.append(e)
-            else:
+        for index, section in enumerate(self._sections):
+            outcome = self._section_outcomes.get(index)
+            if isinstance(outcome, Exception):
+                exceptions.append(outcome)
+            elif outcome is not None:
                 results.setdefault(
-                    (section.name, section_result.cache_timestamp, section.cache_interval),
-                    section_result.results,
+                    (section.name, outcome.cache_timestamp, section.cache_interval),
+                    outcome.results,
                 )
 
         self._write_exceptions(exceptions)
@@ -6571,6 +6605,57 @@ class AWSSections(abc.ABC):
                 sys.stdout.write("<<<<>>>>\n")
 
 
+def run_concurrently(
+    all_sections: Sequence[AWSSections], use_cache: bool, max_workers: int
+) -> None:
+    """Run the sections of all regions in a pool of threads
+
+    A section receiving the content of another one via a distributor only runs after it.
+    Like in a sequential run, only the earlier of two sections sends its content to the later
+    one: The order is given by the regions and the order of their sections. The results are
+    written by AWSSections.write_results() afterwards.
+    """
+    tasks = [
+        (sections, index) for sections in all_sections for index in range(len(sections.sections))
+    ]
+    position_by_section = {
+        id(sections.sections[index]): position for position, (sections, index) in enumerate(tasks)
+    }
+    waiting_for: dict[int, set[int]] = defaultdict(set)
+    dependents: dict[int, list[int]] = defaultdict(list)
+    for position, (sections, index) in enumerate(tasks):
+        for colleague in sections.sections[index].colleagues:
+            if (colleague_position := position_by_section.get(id(colleague))) is None:
+                continue
+            first, second = sorted((position, colleague_position))
+            if first not in waiting_for[second]:
+                waiting_for[second].add(first)
+                dependents[first].append(second)
+
+    def submit(executor: ThreadPoolExecutor, position: int) -> Future[None]:
+        sections, index = tasks[position]
+        return executor.submit(sections.run_section, index, use_cache)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent_aws")
+    try:
+        pending = {
+            submit(executor, position): position
+            for position in range(len(tasks))
+            if not waiting_for[position]
+        }
+        while pending:
+            done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                position = pending.pop(future)
+                future.result()  # Only raises in debug mode, see AWSSections.run_section()
+                for dependent in dependents[position]:
+                    waiting_for[dependent].discard(position)
+                    if not waiting_for[dependent]:
+                        pending[submit(executor, dependent)] = dependent
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
 class AWSSectionsUSEast(AWSSections):
     """
     Some clients like CostExplorer only work with US East region:
@@ -7150,6 +7235,13 @@ def parse_arguments(argv: Sequence[str] | None) -> Args:
         action="store_true",
         help="Execute all sections, do not rely on cached data. Cached data will not be overwritten.",
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=1,
+        help="Number of threads running the sections of all regions at once."
+        " The sections run one after another by default.",
+    )
     parser.add_argument(
         "--access-key-id",
         required=True,
@@ -7550,6 +7642,10 @@ def main(sys_argv: Sequence[str] | None = None) -> int:  # pylint: disable=too-m
             raise
         return 1
 
+    # With more than one worker, the sections of all regions are run at once after all of them
+    # are initialized
+    concurrent_sections: list[AWSSections] = []
+
     for aws_services, aws_regions, aws_sections in [
         (global_services, [args.global_service_region], AWSSectionsUSEast),
         (regional_services, args.regions, AWSSectionsGeneric),
@@ -7564,6 +7660,9 @@ def main(sys_argv: Sequence[str] | None = None) -> int:  # pylint: disable=too-m
                     hostname, session, account_id, debug=args.debug, config=proxy_config
                 )
                 sections.init_sections(aws_services, region, aws_config, s3_limits_distributor)
+                if args.max_workers > 1:
+                    concurrent_sections.append(sections)
+                    continue
                 sections.run(use_cache=use_cache)
             except AwsAccessError as ae:
                 # can not access AWS, retreat
@@ -7578,6 +7677,12 @@ def main(sys_argv: Sequence[str] | None = None) -> int:  # pylint: disable=too-m
                 has_exceptions = True
                 if args.debug:
                     raise
+
+    if concurrent_sections:
+        run_concurrently(concurrent_sections, use_cache, args.max_workers)
+        for sections in concurrent_sections:
+            sections.write_results()
+
     if has_exceptions:
         return 1
     return 0
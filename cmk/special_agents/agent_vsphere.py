@@ -6,18 +6,19 @@
 
 import argparse
 import collections
+import itertools
 import json
 import re
 import socket
 import sys
 import time
 from collections import Counter
-from collections.abc import Sequence
-from typing import Any
-from xml.dom import minidom
-
-# TODO: minicompat include internal impl details. But NodeList is only defined there for <3.11
-from xml.dom.minicompat import NodeList
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import Any, Generic, NamedTuple, TypeVar
+from xml.sax import make_parser
+from xml.sax.handler import ContentHandler
+from xml.sax.saxutils import escape
+from xml.sax.xmlreader import AttributesImpl, IncrementalParser
 
 import dateutil.parser
 import requests
@@ -44,6 +45,9 @@ USER_AGENT = f"checkmk-special-vsphere-{__version__}"
 
 AGENT_TMP_PATH = cmk.utils.paths.tmp_dir / "agents/agent_vsphere"
 
+# The responses about all VMs of a vCenter are hundreds of MB, they are parsed while received
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
 REQUESTED_COUNTERS_KEYS = (
     "disk.numberReadAveraged",
     "disk.numberWriteAveraged",
@@ -1092,11 +1096,11 @@ class ESXSession(requests.Session):
             }
         )
 
-    def postsoap(self, request):
+    def postsoap(self, request, stream=False):
         soapdata = ESXSession.ENVELOPE % request
         # Watch out: we must provide the verify keyword to every individual request call!
         # Else it will be overwritten by the REQUESTS_CA_BUNDLE env variable
-        return super().post(self._post_url, data=soapdata, verify=self.verify)
+        return super().post(self._post_url, data=soapdata, verify=self.verify, stream=stream)
 
 
 class ESXConnection:
@@ -1188,6 +1192,30 @@ class ESXConnection:
 
         return "".join(response_data)
 
+    def stream_server(self, method: str, **kwargs: object) -> Iterator[Iterator[bytes]]:
+        """Like query_server, but yields the pages of the response while they are received
+
+        Every page is a complete SOAP response, which has to be consumed before the next one
+        is requested.
+        """
+        payload: str | None = getattr(self._soap_templates, method) % kwargs
+        while payload is not None:
+            response = self._session.postsoap(payload, stream=True)
+            chunks = response.iter_content(RESPONSE_CHUNK_SIZE)
+            # The chunks may be shorter than requested, even at the beginning of the response
+            head = b""
+            while len(head) < 512 and (chunk := next(chunks, None)) is not None:
+                head += chunk
+            self._check_not_authenticated(head[:512].decode("utf-8", errors="replace"))
+            # The <token> of a paged response is right at the beginning, see query_server
+            token = re.findall(b"<token>(.*)</token>", head[:512])
+            payload = (
+                self._soap_templates.continuetoken % {"token": token[0].decode("utf-8")}
+                if token
+                else None
+            )
+            yield itertools.chain([head], chunks)
+
     @property
     def perf_samples(self):
         """Return and cache the needed number of real-time samples
@@ -1240,6 +1268,171 @@ class ESXConnection:
             pass
 
 
+# .
+#   .--Parsing-------------------------------------------------------------.
+#   |                ____                _                                 |
+#   |               |  _ \ __ _ _ __ ___(_)_ __   __ _                      |
+#   |               | |_) / _` | '__/ __| | '_ \ / _` |                     |
+#   |               |  __/ (_| | |  \__ \ | | | | (_| |                     |
+#   |               |_|   \__,_|_|  |___/_|_| |_|\__, |                     |
+#   |                                           |___/                      |
+#   '----------------------------------------------------------------------'
+
+_T = TypeVar("_T")
+
+
+class PropertyObject(NamedTuple):
+    """An <objects> element of a property collector response
+
+    The values are the XML contained in the <val> elements, which the eval functions
+    look into.
+    """
+
+    obj: str
+    properties: Sequence[tuple[str, str]]
+
+
+class _SoapStreamHandler(ContentHandler, Generic[_T]):
+    """Collects the items of a SOAP response while it is parsed"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.path: list[str] = []
+        self.items: list[_T] = []
+        self._text: list[str] = []
+
+    def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        self.path.append(name)
+        self._text.clear()
+
+    def endElement(self, name: str) -> None:
+        self.path.pop()
+
+    def characters(self, content: str) -> None:
+        self._text.append(content)
+
+    def text(self) -> str:
+        return "".join(self._text)
+
+
+def _start_tag(name: str, attrs: AttributesImpl) -> str:
+    return "<%s>" % " ".join(
+        [name, *('%s="%s"' % (key, escape(value, {'"': "&quot;"})) for key, value in attrs.items())]
+    )
+
+
+class _PropertyObjectsHandler(_SoapStreamHandler[PropertyObject]):
+    """Collects the objects, the content of the <val> elements is written back as XML"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._obj = ""
+        self._properties: list[tuple[str, str]] = []
+        self._name = ""
+        self._val: list[str] | None = None
+
+    def startElement(self, name: str, attrs: AttributesImpl) -> None:
+        if self._val is not None:
+            self._val.append(_start_tag(name, attrs))
+        elif name == "val" and self.path[-1:] == ["propSet"]:
+            self._val = []
+        super().startElement(name, attrs)
+
+    def endElement(self, name: str) -> None:
+        super().endElement(name)
+        if self._val is not None:
+            if name == "val" and self.path[-1:] == ["propSet"]:
+                self._properties.append((self._name, "".join(self._val)))
+                self._val = None
+            else:
+                self._val.append("</%s>" % name)
+        elif name == "obj" and self.path[-1:] == ["objects"]:
+            self._obj = self.text()
+        elif name == "name" and self.path[-1:] == ["propSet"]:
+            self._name = self.text()
+        elif name == "objects":
+            self.items.append(PropertyObject(self._obj, self._properties))
+            self._properties = []
+
+    def characters(self, content: str) -> None:
+        if self._val is not None:
+            self._val.append(escape(content))
+        else:
+            super().characters(content)
+
+
+class _PerfMetricSeriesHandler(_SoapStreamHandler[tuple[str, str, Sequence[str]]]):
+    """Collects the counter ID, instance and values of the series in a QueryPerf response"""
+
+    def __init__(self, samples: int) -> None:
+        super().__init__()
+        self._samples = samples
+        self._id: dict[str, str] = {}
+        self._values: list[str] = []
+
+    def endElement(self, name: str) -> None:
+        super().endElement(name)
+        parent = self.path[-1:]
+        if name in ("counterId", "instance") and parent == ["id"]:
+            self._id[name] = self.text()
+        elif name == "value" and parent == ["value"]:
+            self._values.append(self.text())
+        elif name == "value" and parent == ["returnval"]:
+            if "counterId" in self._id and len(self._values) >= self._samples:
+                self.items.append(
+                    (
+                        self._id["counterId"],
+                        self._id.get("instance", ""),
+                        self._values[: self._samples],
+                    )
+                )
+            self._id = {}
+            self._values = []
+
+
+class _LicensesHandler(_SoapStreamHandler[dict[str, str]]):
+    """Collects the texts of the fields of the LicenseManagerLicenseInfo elements"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._fields: dict[str, str] = {}
+
+    def endElement(self, name: str) -> None:
+        super().endElement(name)
+        if self.path[-1:] == ["LicenseManagerLicenseInfo"]:
+            self._fields[name] = self.text()
+        elif name == "LicenseManagerLicenseInfo":
+            self.items.append(self._fields)
+            self._fields = {}
+
+
+def _parse_pages(
+    pages: Iterable[Iterable[bytes]], handler_factory: Callable[[], _SoapStreamHandler[_T]]
+) -> Iterator[_T]:
+    """Yields the items of the response pages while feeding them to the parser"""
+    for page in pages:
+        handler = handler_factory()
+        parser = make_parser()
+        assert isinstance(parser, IncrementalParser)
+        parser.setContentHandler(handler)
+        for chunk in page:
+            parser.feed(chunk)
+            yield from handler.items
+            handler.items.clear()
+        parser.close()
+        yield from handler.items
+
+
+def iter_property_objects(pages: Iterable[Iterable[bytes]]) -> Iterator[PropertyObject]:
+    return _parse_pages(pages, _PropertyObjectsHandler)
+
+
+def iter_perf_metric_series(
+    pages: Iterable[Iterable[bytes]], samples: int
+) -> Iterator[tuple[str, str, Sequence[str]]]:
+    return _parse_pages(pages, lambda: _PerfMetricSeriesHandler(samples))
+
+
 # .
 #   .--Counters------------------------------------------------------------.
 #   |           ____                  _                                    |
@@ -1320,30 +1513,13 @@ def fetch_counters(connection, host, counters_selected):
             for instance in instances
         )
 
-    response_text = connection.query_server(
+    response_pages = connection.stream_server(
         "perfcounterdata",
         esxhost=host,
         counters="".join(counter_data),
         samples=connection.perf_samples,
     )
-
-    # Python regex only supports up to 100 match groups in a regex..
-    # We are only extracting the whole value line and split it later on
-    # This is a perfect candidate for "Catastrophic Backtracking" :)
-    # Someday we should replace all of these get_pattern calls with
-    # one of these new and fancy xml parsers I've heard from
-    elements = get_pattern(
-        "<id><counterId>(.*?)</counterId><instance>(.*?)</instance></id>(%s)"
-        % ("<value>.*?</value>" * connection.perf_samples),
-        response_text,
-    )
-    counters_value = []
-    for entry in elements:
-        id_, instance, valuestring = entry
-        values = get_pattern("<value>(.*?)</value>", valuestring)
-        counters_value.append((id_, instance, values))
-
-    return counters_value
+    return list(iter_perf_metric_series(response_pages, connection.perf_samples))
 
 
 def get_section_counters(connection, hostsystems, datastores, opt):
@@ -1504,17 +1680,12 @@ EVAL_FUNCTIONS = {
 
 
 def fetch_hostsystem_data(connection):
-    esxhostdetails_response = connection.query_server("esxhostdetails")
-    hostsystems_objects = get_pattern("<objects>(.*?)</objects>", esxhostdetails_response)
-
     hostsystems_properties: dict[str, dict[Any, Any]] = {}
     hostsystems_sensors: dict[str, dict[Any, Any]] = {}
-    for entry in hostsystems_objects:
-        hostname = get_pattern('<obj type="HostSystem">(.*)</obj>', entry[:512])[0]
+    for hostname, elements in iter_property_objects(connection.stream_server("esxhostdetails")):
         hostsystems_properties[hostname] = {}
         hostsystems_sensors[hostname] = {}
 
-        elements = get_pattern("<propSet><name>(.*?)</name><val.*?>(.*?)</val></propSet>", entry)
         for current_propname, value in elements:
             eval_func = EVAL_FUNCTIONS.get(current_propname)
             if eval_func:
@@ -1800,27 +1971,15 @@ def get_section_datastores(datastores):
     return section_lines
 
 
-def _get_text(node: NodeList[minidom.Element]) -> str:
-    first = node.item(0)
-    if first is None:
-        raise ValueError("Node has no item")
-    child = first.firstChild
-    if child is None or not isinstance(child, minidom.Text):
-        raise ValueError("Node has no text")
-    return child.data
-
-
 def get_section_licenses(connection):
     section_lines = ["<<<esx_vsphere_licenses:sep(9)>>>"]
-    licenses_response = connection.query_server("licensesused")
-    root_node = minidom.parseString(licenses_response)
-    licenses_node = root_node.getElementsByTagName("LicenseManagerLicenseInfo")
-    for license_node in licenses_node:
-        total = _get_text(license_node.getElementsByTagName("total"))
+    for license_fields in _parse_pages(connection.stream_server("licensesused"), _LicensesHandler):
+        if not (total := license_fields.get("total")):
+            raise ValueError("License has no total")
         if total == "0":
             continue
-        name = _get_text(license_node.getElementsByTagName("name"))
-        used = _get_text(license_node.getElementsByTagName("used"))
+        if not (name := license_fields.get("name")) or not (used := license_fields.get("used")):
+            raise ValueError("License has no name or usage")
         section_lines.append(f"{name}\t{used} {total}")
     return section_lines
 
@@ -1830,11 +1989,8 @@ def fetch_virtual_machines(connection, hostsystems, datastores, opt):
     vm_esx_host: dict[str, list[Any]] = {}
 
     # <objects><propSet><name>...</name><val ..>...</val></propSet></objects>
-    vmdetails_response = connection.query_server("vmdetails")
-
-    elements = get_pattern("<objects>(.*?)</objects>", vmdetails_response)
-    for entry in elements:
-        vm_data = dict(get_pattern("<name>(.*?)</name><val.*?>(.*?)</val>", entry))
+    for entry in iter_property_objects(connection.stream_server("vmdetails")):
+        vm_data = dict(entry.properties)
         if opt.skip_placeholder_vm and is_placeholder_vm(vm_data.get("config.hardware.device")):
             continue
 
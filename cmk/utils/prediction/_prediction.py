@@ -9,6 +9,8 @@ from collections.abc import Callable, Iterable, Iterator, Sequence
 from pathlib import Path
 from typing import Final, Literal, NamedTuple, Protocol, Self
 
+import numpy as np
+import numpy.typing as npt
 from pydantic import BaseModel
 
 from cmk.agent_based.prediction_backend import PredictionInfo
@@ -160,7 +162,11 @@ def compute_prediction(
         if (response := get_recorded_data(f"{info.metric}.max", start, end))
     ]
 
-    return _calculate_data_for_prediction(raw_slices[0][0], raw_slices) if raw_slices else None
+    return (
+        _calculate_data_for_prediction_vectorized(raw_slices[0][0], raw_slices)
+        if raw_slices
+        else None
+    )
 
 
 def _calculate_data_for_prediction(
@@ -210,6 +216,74 @@ def _data_stats(slices: Iterable[Iterable[float | None]]) -> list[DataStat | Non
     ]
 
 
+def _calculate_data_for_prediction_vectorized(
+    youngest_range: range,
+    raw_slices: Sequence[tuple[range, Sequence[float | None], int]],
+) -> PredictionData:
+    """Same as _calculate_data_for_prediction, but computed on arrays
+
+    Missing values (None) are represented as NaN and masked out of the statistics.
+    """
+    slices = [
+        _forward_fill_resample_array(
+            current_range,
+            np.array(values, dtype=np.float64),
+            range(youngest_range.start - shift, youngest_range.stop - shift, youngest_range.step),
+        )
+        for current_range, values, shift in raw_slices
+    ]
+    # Like zip(*slices): only consider the time columns that all slices have
+    num_columns = min(len(s) for s in slices)
+    return PredictionData(
+        points=_data_stats_array(np.array([s[:num_columns] for s in slices], dtype=np.float64)),
+        start=youngest_range.start,
+        step=youngest_range.step,
+    )
+
+
+def _forward_fill_resample_array(
+    current_range: range, values: npt.NDArray[np.float64], new_range: range
+) -> npt.NDArray[np.float64]:
+    if current_range == new_range:
+        return values
+
+    targets = np.arange(new_range.start, new_range.stop, new_range.step, dtype=np.float64)
+    # astype(int) truncates towards zero, just like int() does
+    indices = ((targets - current_range.start) / current_range.step).astype(np.int64)
+    return values[np.clip(indices, 0, len(values) - 1)]
+
+
+def _data_stats_array(slices: npt.NDArray[np.float64]) -> list[DataStat | None]:
+    "Statistically summarize the upsampled RRD data, one slice per row"
+    valid = ~np.isnan(slices)
+    samples = np.count_nonzero(valid, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = np.nansum(slices, axis=0) / samples
+        stdev = np.sqrt(np.abs(np.nansum(slices**2, axis=0) - average**2 * samples) / (samples - 1))
+        minimum = np.fmin.reduce(slices, axis=0)
+        maximum = np.fmax.reduce(slices, axis=0)
+
+    return [
+        (
+            DataStat(
+                average=average_,
+                min_=min_,
+                max_=max_,
+                stdev=stdev_ if samples_ > 1 else None,
+            )
+            if samples_
+            else None
+        )
+        for samples_, average_, min_, max_, stdev_ in zip(
+            samples.tolist(),
+            average.tolist(),
+            minimum.tolist(),
+            maximum.tolist(),
+            stdev.tolist(),
+        )
+    ]
+
+
 def _std_dev(point_line: Sequence[float], average: float) -> float | None:
     samples = len(point_line)
     # In the case of a single data-point an unbiased standard deviation is undefined.
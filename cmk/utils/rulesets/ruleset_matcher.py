@@ -410,11 +410,6 @@ class RulesetOptimizer:
         # is enabled.
         self._all_processed_hosts = self._all_configured_hosts
 
-        # A factor which indicates how much hosts share the same host tag configuration (excluding folders).
-        # len(all_processed_hosts) / len(different tag combinations)
-        # It is used to determine the best rule evualation method
-        self._all_processed_hosts_similarity = 1.0
-
         self.__service_ruleset_cache: dict[tuple[int, bool], PreprocessedServiceRuleset] = {}
         self.__host_ruleset_cache: dict[tuple[int, bool], Mapping[HostAddress, Sequence[Any]]] = {}
         self._all_matching_hosts_match_cache: dict[
@@ -424,10 +419,8 @@ class RulesetOptimizer:
         # Reference dirname -> hosts in this dir including subfolders
         self._folder_host_lookup: dict[tuple[bool, str], set[HostName]] = {}
 
-        # Provides a list of hosts with the same hosttags, excluding the folder
-        self._hosts_grouped_by_tags: dict[tuple[tuple[TagGroupID, TagID], ...], set[HostName]] = {}
-        # Reference hostname -> tag group reference
-        self._host_grouped_ref: dict[HostName, tuple[tuple[TagGroupID, TagID], ...]] = {}
+        # Inverted index: (tag group, tag) -> all configured hosts having this tag
+        self._hosts_by_tag: dict[tuple[TagGroupID, TagID], set[HostName]] = {}
 
         # TODO: Clean this one up?
         self._initialize_host_lookup()
@@ -467,18 +460,6 @@ class RulesetOptimizer:
         # lookup are iterated one by one later on in all_matching_hosts
         self._folder_host_lookup = {}
 
-        used_groups = {
-            self._host_grouped_ref.get(hostname, ()) for hostname in self._all_processed_hosts
-        }
-
-        if not used_groups:
-            self._all_processed_hosts_similarity = 1.0
-            return
-
-        self._all_processed_hosts_similarity = (
-            1.0 * len(self._all_processed_hosts) / len(used_groups)
-        )
-
     def get_host_ruleset(
         self, ruleset: Sequence[RuleSpec[TRuleValue]], with_foreign_hosts: bool
     ) -> Mapping[HostAddress, Sequence[TRuleValue]]:
@@ -595,11 +576,12 @@ class RulesetOptimizer:
         # we only need the intersection of the folders hosts and the previously determined valid_hosts
         valid_hosts = self._get_hosts_within_folder(rule_path, with_foreign_hosts)
 
-        if tag_conditions and hostlist is None and not label_groups:
+        if tag_conditions:
             # TODO: Labels could also be optimized like the tags
-            matched_by_tags = self._match_hosts_by_tags(cache_id, valid_hosts, tag_conditions)
-            if matched_by_tags is not None:
-                return matched_by_tags
+            valid_hosts = self._match_hosts_by_tags(valid_hosts, tag_conditions)
+            if hostlist is None and not label_groups:
+                self._all_matching_hosts_match_cache[cache_id] = valid_hosts
+                return valid_hosts
 
         matching: set[HostName] = set()
         only_specific_hosts = (
@@ -611,14 +593,12 @@ class RulesetOptimizer:
         if hostlist == []:
             pass  # Empty host list -> Nothing matches
 
-        elif not tag_conditions and not label_groups and not hostlist:
-            # If no tags are specified and the hostlist only include @all (all hosts)
+        elif not label_groups and not hostlist:
+            # If no labels are specified and the hostlist only include @all (all hosts)
             matching = valid_hosts
 
-        elif (
-            not tag_conditions and not label_groups and only_specific_hosts and hostlist is not None
-        ):
-            # If no tags are specified and there are only specific hosts we already have the matches
+        elif not label_groups and only_specific_hosts and hostlist is not None:
+            # If no labels are specified and there are only specific hosts we already have the matches
             matching = valid_hosts.intersection(hostlist)
 
         else:
@@ -629,14 +609,7 @@ class RulesetOptimizer:
                 hosts_to_check = valid_hosts
 
             for hostname in hosts_to_check:
-                # When no tag matching is requested, do not filter by tags. Accept all hosts
-                # and filter only by hostlist
-                if tag_conditions and not matches_host_tags(
-                    self._host_tags[hostname],
-                    tag_conditions,
-                ):
-                    continue
-
+                # The hosts have already been filtered by their tags
                 if label_groups:
                     host_labels = self.labels_of_host(hostname)
                     if not matches_labels(host_labels, label_groups):
@@ -684,74 +657,59 @@ class RulesetOptimizer:
             rule_path,
         )
 
-    # TODO: Generalize this optimization: Build some kind of key out of the tag conditions
-    # (positive, negative, ...). Make it work with the new tag group based "$or" handling.
     def _match_hosts_by_tags(
         self,
-        cache_id: tuple[_ConditionCacheID, bool],
-        valid_hosts: set[HostName],
+        hosts: set[HostName],
         tag_conditions: Mapping[TagGroupID, TagCondition],
-    ) -> set[HostName] | None:
-        matching = set()
-        negative_match_tags = set()
-        positive_match_tags = set()
+    ) -> set[HostName]:
+        """The hosts matching the tag conditions, see `matches_host_tags()`
+
+        Uses the inverted tag index, so the costs depend on the number of hosts
+        having the tags, not on the number of tag conditions times the number of hosts.
+        """
+        required: list[set[HostName]] = []
+        excluded: list[set[HostName]] = []
         for taggroup_id, tag_condition in tag_conditions.items():
             if isinstance(tag_condition, dict):
                 if "$ne" in tag_condition:
-                    negative_match_tags.add(
-                        (
-                            taggroup_id,
-                            cast(TagConditionNE, tag_condition)["$ne"],
+                    excluded.append(
+                        self._hosts_with_tags(
+                            taggroup_id, [cast(TagConditionNE, tag_condition)["$ne"]]
                         )
                     )
-                    continue
-
-                if "$or" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
-
-                if "$nor" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
-
-                raise NotImplementedError()
-
-            positive_match_tags.add((taggroup_id, tag_condition))
-
-        # TODO:
-        # if has_specific_folder_tag or self._all_processed_hosts_similarity < 3.0:
-        if self._all_processed_hosts_similarity < 3.0:
-            # Without shared folders
-            for hostname in valid_hosts:
-                if positive_match_tags <= self._host_tags[
-                    hostname
-                ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                    matching.add(hostname)
-
-            self._all_matching_hosts_match_cache[cache_id] = matching
-            return matching
-
-        # With shared folders
-        checked_hosts: set[str] = set()
-        for hostname in valid_hosts:
-            if hostname in checked_hosts:
-                continue
-
-            hosts_with_same_tag = self._filter_hosts_with_same_tags_as_host(hostname, valid_hosts)
-            checked_hosts.update(hosts_with_same_tag)
-
-            if positive_match_tags <= self._host_tags[
-                hostname
-            ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                matching.update(hosts_with_same_tag)
+                elif "$or" in tag_condition:
+                    required.append(
+                        self._hosts_with_tags(
+                            taggroup_id, cast(TagConditionOR, tag_condition)["$or"]
+                        )
+                    )
+                elif "$nor" in tag_condition:
+                    excluded.append(
+                        self._hosts_with_tags(
+                            taggroup_id, cast(TagConditionNOR, tag_condition)["$nor"]
+                        )
+                    )
+                else:
+                    raise NotImplementedError()
+            else:
+                required.append(self._hosts_with_tags(taggroup_id, [tag_condition]))
 
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
+        # Start with the smallest set, intersections iterate the smaller operand
+        matching = min([hosts, *required], key=len)
+        matching = matching.intersection(hosts, *required)
+        return matching.difference(*excluded) if excluded else matching
 
-    def _filter_hosts_with_same_tags_as_host(
-        self,
-        hostname: HostName,
-        hosts: set[HostName],
+    def _hosts_with_tags(
+        self, taggroup_id: TagGroupID, tag_ids: Iterable[TagID | None]
     ) -> set[HostName]:
-        return self._hosts_grouped_by_tags[self._host_grouped_ref[hostname]].intersection(hosts)
+        # The tags of the hosts never contain None, so no host has the tag None, just like
+        # in matches_tag_condition()
+        present_tag_ids = [tag_id for tag_id in tag_ids if tag_id is not None]
+        if len(present_tag_ids) == 1:
+            return self._hosts_by_tag.get((taggroup_id, present_tag_ids[0]), set())
+        return set().union(
+            *(self._hosts_by_tag.get((taggroup_id, tag_id), set()) for tag_id in present_tag_ids)
+        )
 
     def _get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> set[HostName]:
         cache_id = with_foreign_hosts, folder_path
@@ -773,9 +731,8 @@ class RulesetOptimizer:
 
     def _initialize_host_lookup(self) -> None:
         for hostname in self._all_configured_hosts:
-            group_ref = tuple(sorted(self._host_tags[hostname]))
-            self._hosts_grouped_by_tags.setdefault(group_ref, set()).add(hostname)
-            self._host_grouped_ref[hostname] = group_ref
+            for tag in self._host_tags[hostname]:
+                self._hosts_by_tag.setdefault(tag, set()).add(hostname)
 
     def labels_of_host(self, hostname: HostName) -> Labels:
         """Returns the effective set of host labels from all available sources
@@ -9,9 +9,15 @@ structured monitoring data of Check_MK.
 
 from __future__ import annotations
 
+import ast
 import gzip
+import hashlib
 import io
+import logging
+import pickle
 import pprint
+import sqlite3
+import sys
 from collections import Counter
 from collections.abc import Callable, Iterable, Mapping, Sequence
 from dataclasses import dataclass, field
@@ -23,6 +29,8 @@ from typing_extensions import TypedDict
 from cmk.utils import store
 from cmk.utils.hostaddress import HostName
 
+logger = logging.getLogger("cmk.utils.structured_data")
+
 # TODO Cleanup path in utils, base, gui, find ONE place (type defs or similar)
 # TODO filter table rows?
 # TODO Check filter logic:
@@ -38,10 +46,11 @@ from cmk.utils.hostaddress import HostName
 #   - MISSING (see mk/base/agent_based/inventory.py::_get_intervals_from_config) -> _use_nothing
 #   - 'all' -> _use_all
 # TODO Centralize different stores and loaders of tree files:
-#   - inventory/HOSTNAME, inventory/HOSTNAME.gz, inventory/.last
-#   - inventory_archive/HOSTNAME/TIMESTAMP,
+#   - inventory/HOSTNAME, inventory/HOSTNAME.gz, inventory/HOSTNAME.pkl, inventory/.last
+#   - inventory_archive/HOSTNAME/TIMESTAMP, inventory_archive/HOSTNAME/.nodes
 #   - inventory_delta_cache/HOSTNAME/TIMESTAMP_{TIMESTAMP,None}
-#   - status_data/HOSTNAME, status_data/HOSTNAME.gz
+#   - status_data/HOSTNAME, status_data/HOSTNAME.gz, status_data/HOSTNAME.pkl
+#   - inventory_index.sqlite
 
 SDNodeName = str
 SDPath = tuple[SDNodeName, ...]
@@ -1266,6 +1275,10 @@ class ImmutableTree:
         if not isinstance(other, (MutableTree, ImmutableTree)):
             return NotImplemented
 
+        if self is other:
+            # Archived trees share their unchanged nodes, see ArchivedTreeLoader
+            return True
+
         if self.attributes != other.attributes or self.table != other.table:
             return False
 
@@ -1601,16 +1614,327 @@ class ImmutableDeltaTree:
 #   '----------------------------------------------------------------------'
 
 
+# The trees are also written as pickle files next to the Python literal files. Loading them
+# is an order of magnitude faster than parsing the Python literals. The pickle file is only
+# used if it is at least as recent as the Python literal file, which is still written for
+# Livestatus, older versions and other tools reading the tree files.
+
+
+def _pickle_file(filepath: Path) -> Path:
+    return filepath.with_name(f"{filepath.name}.pkl")
+
+
+def _intern_keys(raw: object) -> object:
+    # Pickle writes the same string object only once, the rows of a table share their keys
+    if isinstance(raw, dict):
+        return {
+            sys.intern(key) if isinstance(key, str) else key: _intern_keys(value)
+            for key, value in raw.items()
+        }
+    if isinstance(raw, list):
+        return [_intern_keys(value) for value in raw]
+    return raw
+
+
+def _load_raw_tree(filepath: Path) -> Mapping | None:
+    pickle_file = _pickle_file(filepath)
+    try:
+        if pickle_file.stat().st_mtime >= filepath.stat().st_mtime:
+            return store.load_object_from_pickle_file(pickle_file, default=None)
+    except (FileNotFoundError, pickle.UnpicklingError):
+        pass
+    return store.load_object_from_file(filepath, default=None)
+
+
 def load_tree(filepath: Path) -> ImmutableTree:
-    if raw_tree := store.load_object_from_file(filepath, default=None):
+    if raw_tree := _load_raw_tree(filepath):
         return ImmutableTree.deserialize(raw_tree)
     return ImmutableTree()
 
 
+# The inventory index contains the table rows of the inventory trees of all hosts: For every
+# table path, e.g. ("software", "packages"), there is one SQLite table with the rows of all
+# hosts and one column per key. SQLite compares column names case-insensitively, so the
+# columns are named after the hashes of the keys and the "columns" table maps the keys to them.
+# The values SQLite does not return unchanged (None, booleans and huge integers) are stored in
+# the "extra" column of the row instead.
+_INDEX_TIMEOUT = 30.0
+
+IndexOperator = Literal["=", "!=", "<", "<=", ">", ">=", "LIKE"]
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _key_column(key: SDKey) -> str:
+    return f"k_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _is_indexed_value(value: SDValue) -> bool:
+    return isinstance(value, (str, float)) or (
+        isinstance(value, int) and not isinstance(value, bool) and -(2**63) <= value < 2**63
+    )
+
+
+def _iter_tables(tree: ImmutableTree) -> Iterable[tuple[SDPath, ImmutableTable]]:
+    if tree.table.rows_by_ident:
+        yield tree.path, tree.table
+    for node in tree.nodes_by_name.values():
+        yield from _iter_tables(node)
+
+
+@dataclass(frozen=True, kw_only=True)
+class IndexedRow:
+    host_name: HostName
+    row: Mapping[SDKey, SDValue]
+    retentions: Mapping[SDKey, RetentionInterval]
+
+
+class InventoryIndex:
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self, *, create: bool) -> sqlite3.Connection | None:
+        if self._connection is None:
+            if not create and not self._path.exists():
+                return None
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self._path, timeout=_INDEX_TIMEOUT, isolation_level=None
+            )
+            self._connection.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS hosts
+                    (host_name TEXT PRIMARY KEY, tree_mtime_ns INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS tables
+                    (path TEXT PRIMARY KEY, table_name TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS columns
+                    (table_name TEXT NOT NULL, key TEXT NOT NULL, column_name TEXT NOT NULL,
+                    PRIMARY KEY (table_name, key));
+                """
+            )
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def _table_names(connection: sqlite3.Connection) -> dict[SDPath, str]:
+        return {
+            tuple(ast.literal_eval(raw_path)): table_name
+            for raw_path, table_name in connection.execute("SELECT path, table_name FROM tables")
+        }
+
+    @staticmethod
+    def _columns(connection: sqlite3.Connection, table_name: str) -> dict[SDKey, str]:
+        return dict(
+            connection.execute(
+                "SELECT key, column_name FROM columns WHERE table_name = ?", (table_name,)
+            )
+        )
+
+    def indexed_hosts(self) -> Mapping[HostName, int]:
+        """The indexed hosts and the modification times of their indexed tree files"""
+        if (connection := self._connect(create=False)) is None:
+            return {}
+        return {
+            HostName(host_name): tree_mtime_ns
+            for host_name, tree_mtime_ns in connection.execute(
+                "SELECT host_name, tree_mtime_ns FROM hosts"
+            )
+        }
+
+    def update(self, *, host_name: HostName, tree: ImmutableTree, tree_mtime_ns: int) -> None:
+        """Replace the rows of the host with the rows of its tree"""
+        assert (connection := self._connect(create=True)) is not None
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            table_names = self._remove_rows(connection, host_name)
+            for path, table in _iter_tables(tree):
+                if (table_name := table_names.get(path)) is None:
+                    table_name = table_names[path] = self._create_table(connection, path)
+                self._insert_rows(connection, host_name, table_name, table)
+            connection.execute(
+                "INSERT OR REPLACE INTO hosts (host_name, tree_mtime_ns) VALUES (?, ?)",
+                (host_name, tree_mtime_ns),
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def remove(self, *, host_name: HostName) -> None:
+        if (connection := self._connect(create=False)) is None:
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._remove_rows(connection, host_name)
+            connection.execute("DELETE FROM hosts WHERE host_name = ?", (host_name,))
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _remove_rows(
+        self, connection: sqlite3.Connection, host_name: HostName
+    ) -> dict[SDPath, str]:
+        table_names = self._table_names(connection)
+        for table_name in table_names.values():
+            connection.execute(
+                f"DELETE FROM {_quote_identifier(table_name)} WHERE host_name = ?", (host_name,)
+            )
+        return table_names
+
+    @staticmethod
+    def _create_table(connection: sqlite3.Connection, path: SDPath) -> str:
+        raw_path = repr(path)
+        table_name = f"table_{hashlib.sha256(raw_path.encode('utf-8')).hexdigest()[:16]}"
+        connection.execute(
+            f"CREATE TABLE {_quote_identifier(table_name)}"
+            " (host_name TEXT NOT NULL, retentions TEXT, extra TEXT)"
+        )
+        connection.execute(
+            f"CREATE INDEX {_quote_identifier(f'{table_name}_host_name')}"
+            f" ON {_quote_identifier(table_name)} (host_name)"
+        )
+        connection.execute(
+            "INSERT INTO tables (path, table_name) VALUES (?, ?)", (raw_path, table_name)
+        )
+        return table_name
+
+    def _insert_rows(
+        self,
+        connection: sqlite3.Connection,
+        host_name: HostName,
+        table_name: str,
+        table: ImmutableTable,
+    ) -> None:
+        keys = sorted({key for row in table.rows_by_ident.values() for key in row})
+        columns = self._columns(connection, table_name)
+        for key in keys:
+            if key not in columns:
+                column_name = columns[key] = _key_column(key)
+                connection.execute(
+                    f"ALTER TABLE {_quote_identifier(table_name)}"
+                    f" ADD COLUMN {_quote_identifier(column_name)}"
+                )
+                connection.execute(
+                    "INSERT INTO columns (table_name, key, column_name) VALUES (?, ?, ?)",
+                    (table_name, key, column_name),
+                )
+        values = []
+        for ident, row in table.rows_by_ident.items():
+            retentions = table.retentions.get(ident)
+            extra = {k: v for k, v in row.items() if not _is_indexed_value(v)}
+            values.append(
+                (
+                    host_name,
+                    repr({k: v.serialize() for k, v in retentions.items()}) if retentions else None,
+                    repr(extra) if extra else None,
+                    *(v if _is_indexed_value(v := row.get(key)) else None for key in keys),
+                )
+            )
+        columns_to_insert = [
+            "host_name",
+            "retentions",
+            "extra",
+            *(_quote_identifier(columns[key]) for key in keys),
+        ]
+        connection.executemany(
+            f"INSERT INTO {_quote_identifier(table_name)} ({', '.join(columns_to_insert)})"
+            f" VALUES ({', '.join('?' * len(columns_to_insert))})",
+            values,
+        )
+
+    def query(
+        self,
+        path: SDPath,
+        *,
+        host_names: Sequence[HostName] | None = None,
+        where: Sequence[tuple[SDKey, IndexOperator, SDValue]] = (),
+        order_by: Sequence[tuple[SDKey, Literal["ASC", "DESC"]]] = (),
+        limit: int | None = None,
+    ) -> Sequence[IndexedRow]:
+        """The rows of the table below the path of the given or all hosts
+
+        The rows of a host are in the order of its tree unless ordered by some keys. The
+        conditions and the sorting only apply to the values stored in the key columns.
+        """
+        if (connection := self._connect(create=False)) is None:
+            return []
+        if (table_name := self._table_names(connection).get(path)) is None:
+            return []
+        columns = self._columns(connection, table_name)
+
+        def column(key: SDKey) -> str:
+            return _quote_identifier(columns[key]) if key in columns else "NULL"
+
+        conditions = []
+        parameters: list[SDValue] = []
+        if host_names is not None:
+            conditions.append(f"host_name IN ({', '.join('?' * len(host_names))})")
+            parameters.extend(host_names)
+        for key, operator, value in where:
+            conditions.append(f"{column(key)} {operator} ?")
+            parameters.append(value)
+
+        statement = f"SELECT * FROM {_quote_identifier(table_name)}"
+        if conditions:
+            statement += f" WHERE {' AND '.join(conditions)}"
+        statement += " ORDER BY " + ", ".join(
+            [f"{column(key)} {direction}" for key, direction in order_by] + ["rowid"]
+        )
+        if limit is not None:
+            statement += " LIMIT ?"
+            parameters.append(limit)
+
+        cursor = connection.execute(statement, parameters)
+        keys_by_column = {column_name: key for key, column_name in columns.items()}
+        names = [description[0] for description in cursor.description]
+        return [self._make_row(keys_by_column, names, values) for values in cursor]
+
+    @staticmethod
+    def _make_row(
+        keys_by_column: Mapping[str, SDKey], names: Sequence[str], values: Sequence
+    ) -> IndexedRow:
+        row: dict[SDKey, SDValue] = {}
+        fields: dict[str, str | None] = {}
+        for name, value in zip(names, values):
+            if (key := keys_by_column.get(name)) is not None:
+                if value is not None:
+                    row[key] = value
+            else:
+                fields[name] = value
+        if raw_extra := fields["extra"]:
+            row.update(ast.literal_eval(raw_extra))
+        raw_retentions = ast.literal_eval(fields["retentions"] or "{}")
+        return IndexedRow(
+            host_name=HostName(str(fields["host_name"])),
+            row=row,
+            retentions={
+                key: RetentionInterval.deserialize(raw_interval)
+                for key, raw_interval in raw_retentions.items()
+            },
+        )
+
+
+def _remove_from_index(index: InventoryIndex, host_name: HostName) -> None:
+    try:
+        index.remove(host_name=host_name)
+    except sqlite3.Error as e:
+        logger.warning("Cannot remove host %s from the inventory index: %s", host_name, e)
+
+
 class TreeStore:
-    def __init__(self, tree_dir: Path | str) -> None:
+    def __init__(self, tree_dir: Path | str, index: InventoryIndex | None = None) -> None:
         self._tree_dir = Path(tree_dir)
         self._last_filepath = Path(tree_dir) / ".last"
+        self._index = index
 
     def load(self, *, host_name: HostName) -> ImmutableTree:
         return load_tree(self._tree_file(host_name))
@@ -1628,12 +1952,34 @@ class TreeStore:
             f.write((repr(output) + "\n").encode("utf-8"))
         store.save_bytes_to_file(self._gz_file(host_name), buf.getvalue())
 
+        # Written last, see load_tree()
+        store.save_bytes_to_file(
+            _pickle_file(tree_file),
+            pickle.dumps(_intern_keys(output), protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
+        if self._index is not None:
+            # The index is only a cache of the tree files, failing to update it must not fail
+            # the inventory. The GUI reads the trees of hosts missing in the index.
+            try:
+                self._index.update(
+                    host_name=host_name,
+                    tree=ImmutableTree.deserialize(output),
+                    tree_mtime_ns=tree_file.stat().st_mtime_ns,
+                )
+            except sqlite3.Error as e:
+                logger.warning("Cannot update the inventory index of host %s: %s", host_name, e)
+                _remove_from_index(self._index, host_name)
+
         # Inform Livestatus about the latest inventory update
         self._last_filepath.touch()
 
     def remove(self, *, host_name: HostName) -> None:
         self._tree_file(host_name).unlink(missing_ok=True)
         self._gz_file(host_name).unlink(missing_ok=True)
+        _pickle_file(self._tree_file(host_name)).unlink(missing_ok=True)
+        if self._index is not None:
+            self._index.remove(host_name=host_name)
 
     def _tree_file(self, host_name: HostName) -> Path:
         return self._tree_dir / str(host_name)
@@ -1642,23 +1988,172 @@ class TreeStore:
         return self._tree_dir / f"{host_name}.gz"
 
 
+# The archive of a host contains one file per archived tree, named after the time of the
+# inventory. Older archives contain the complete trees in these files. Now the files only
+# contain the digest of the root node and the nodes are stored in the ".nodes" file of the
+# host: One line per node with its digest and its attributes, table and the digests of its
+# child nodes. A node changing seldom is stored only once for all trees containing it.
+_ARCHIVE_NODES_FILE = ".nodes"
+
+
+def is_archived_tree_file(filepath: Path) -> bool:
+    return filepath.name.isdigit()
+
+
+def _read_archived_nodes(nodes_file: Path) -> str:
+    try:
+        return nodes_file.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+
+
+def _parse_archived_nodes(raw_nodes: str) -> dict[str, str]:
+    return {
+        digest: raw_node
+        for line in raw_nodes.splitlines(keepends=True)
+        # An incomplete last line is left by an interrupted archiving
+        if line.endswith("\n")
+        for digest, _sep, raw_node in [line.rstrip("\n").partition(" ")]
+    }
+
+
+def _add_archived_nodes(tree: ImmutableTree, nodes: dict[str, str]) -> str:
+    """Add the serialized tree and its sub trees to the nodes and return its digest"""
+    raw_node = repr(
+        {
+            "Attributes": tree.attributes.serialize(),
+            "Table": tree.table.serialize(),
+            "Nodes": {
+                name: _add_archived_nodes(node, nodes)
+                for name, node in tree.nodes_by_name.items()
+                if node
+            },
+        }
+    )
+    digest = hashlib.sha256(raw_node.encode("utf-8")).hexdigest()
+    nodes.setdefault(digest, raw_node)
+    return digest
+
+
+def archive_tree(host_dir: Path, timestamp: int, tree: ImmutableTree) -> None:
+    nodes: dict[str, str] = {}
+    root_digest = _add_archived_nodes(tree, nodes)
+
+    host_dir.mkdir(parents=True, exist_ok=True)
+    nodes_file = host_dir / _ARCHIVE_NODES_FILE
+    with store.locked(nodes_file):
+        raw_archived_nodes = _read_archived_nodes(nodes_file)
+        archived_nodes = _parse_archived_nodes(raw_archived_nodes)
+        if new_lines := [
+            f"{digest} {raw_node}\n"
+            for digest, raw_node in nodes.items()
+            if digest not in archived_nodes
+        ]:
+            if raw_archived_nodes and not raw_archived_nodes.endswith("\n"):
+                new_lines.insert(0, "\n")
+            with nodes_file.open("a", encoding="utf-8") as f:
+                f.write("".join(new_lines))
+
+        # The tree file is written after all of its nodes
+        store.save_object_to_file(host_dir / str(timestamp), root_digest)
+
+
+def _add_reachable_digests(raw_nodes: Mapping[str, str], digest: str, reachable: set[str]) -> None:
+    if digest in reachable or (raw_node := raw_nodes.get(digest)) is None:
+        return
+    reachable.add(digest)
+    for child_digest in ast.literal_eval(raw_node)["Nodes"].values():
+        _add_reachable_digests(raw_nodes, child_digest, reachable)
+
+
+def compact_archived_nodes(host_dir: Path) -> None:
+    """Remove the nodes which are not part of any archived tree of the host anymore
+
+    The archived trees themselves are removed by the disk space cleanup, which leaves their
+    nodes behind.
+    """
+    if not (nodes_file := host_dir / _ARCHIVE_NODES_FILE).exists():
+        return
+    with store.locked(nodes_file):
+        raw_nodes = _parse_archived_nodes(_read_archived_nodes(nodes_file))
+        reachable: set[str] = set()
+        for filepath in filter(is_archived_tree_file, host_dir.iterdir()):
+            if isinstance(root_digest := store.load_object_from_file(filepath, default=None), str):
+                _add_reachable_digests(raw_nodes, root_digest, reachable)
+        if len(reachable) == len(raw_nodes):
+            return
+        store.save_text_to_file(
+            nodes_file,
+            "".join(
+                f"{digest} {raw_node}\n"
+                for digest, raw_node in raw_nodes.items()
+                if digest in reachable
+            ),
+        )
+
+
+class ArchivedTreeLoader:
+    """Load the archived trees of a host
+
+    The nodes are read once per loader, the nodes shared by the trees are deserialized once
+    and are the same objects in all trees. Comparing the trees skips them quickly.
+    """
+
+    def __init__(self, host_dir: Path) -> None:
+        self._host_dir = host_dir
+        self._raw_nodes: dict[str, str] | None = None
+        self._trees: dict[tuple[SDPath, str], ImmutableTree] = {}
+
+    def load(self, filepath: Path) -> ImmutableTree:
+        if not isinstance(raw_tree := store.load_object_from_file(filepath, default=None), str):
+            return ImmutableTree.deserialize(raw_tree) if raw_tree else ImmutableTree()
+        if self._raw_nodes is None:
+            self._raw_nodes = _parse_archived_nodes(
+                _read_archived_nodes(self._host_dir / _ARCHIVE_NODES_FILE)
+            )
+        try:
+            return self._load_node(self._raw_nodes, (), raw_tree)
+        except KeyError:
+            return ImmutableTree()  # The nodes of the tree are missing
+
+    def _load_node(self, raw_nodes: Mapping[str, str], path: SDPath, digest: str) -> ImmutableTree:
+        if (tree := self._trees.get((path, digest))) is not None:
+            return tree
+        raw_node = ast.literal_eval(raw_nodes[digest])
+        return self._trees.setdefault(
+            (path, digest),
+            ImmutableTree(
+                path=path,
+                attributes=ImmutableAttributes.deserialize(raw_node["Attributes"]),
+                table=ImmutableTable.deserialize(raw_node["Table"]),
+                nodes_by_name={
+                    name: self._load_node(raw_nodes, path + (name,), child_digest)
+                    for name, child_digest in raw_node["Nodes"].items()
+                },
+            ),
+        )
+
+
 class TreeOrArchiveStore(TreeStore):
-    def __init__(self, tree_dir: Path | str, archive: Path | str) -> None:
-        super().__init__(tree_dir)
+    def __init__(
+        self, tree_dir: Path | str, archive: Path | str, index: InventoryIndex | None = None
+    ) -> None:
+        super().__init__(tree_dir, index)
         self._archive_dir = Path(archive)
 
     def load_previous(self, *, host_name: HostName) -> ImmutableTree:
         if (tree_file := self._tree_file(host_name=host_name)).exists():
             return load_tree(tree_file)
 
+        host_dir = self._archive_host_dir(host_name)
         try:
             latest_archive_tree_file = max(
-                self._archive_host_dir(host_name).iterdir(), key=lambda tp: int(tp.name)
+                filter(is_archived_tree_file, host_dir.iterdir()), key=lambda tp: int(tp.name)
             )
         except (FileNotFoundError, ValueError):
             return ImmutableTree()
 
-        return load_tree(latest_archive_tree_file)
+        return ArchivedTreeLoader(host_dir).load(latest_archive_tree_file)
 
     def _archive_host_dir(self, host_name: HostName) -> Path:
         return self._archive_dir / str(host_name)
@@ -1666,10 +2161,16 @@ class TreeOrArchiveStore(TreeStore):
     def archive(self, *, host_name: HostName) -> None:
         if not (tree_file := self._tree_file(host_name)).exists():
             return
-        target_dir = self._archive_host_dir(host_name)
-        target_dir.mkdir(parents=True, exist_ok=True)
-        tree_file.rename(target_dir / str(int(tree_file.stat().st_mtime)))
+        archive_tree(
+            self._archive_host_dir(host_name),
+            int(tree_file.stat().st_mtime),
+            load_tree(tree_file),
+        )
+        tree_file.unlink()
         self._gz_file(host_name).unlink(missing_ok=True)
+        _pickle_file(tree_file).unlink(missing_ok=True)
+        if self._index is not None:
+            self._index.remove(host_name=host_name)
 
 
 # .
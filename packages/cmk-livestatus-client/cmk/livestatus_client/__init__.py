@@ -17,16 +17,17 @@ import json
 import os
 import re
 import select
+import selectors
 import socket
 import ssl
 import threading
 import time
-from collections.abc import Iterator, Sequence
+from collections.abc import Generator, Iterable, Iterator, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
 from functools import cache
 from io import BytesIO
-from typing import Any, Literal, NamedTuple, NewType, TypedDict
+from typing import Any, Literal, NamedTuple, NewType, TypedDict, TypeVar
 
 UserId = NewType("UserId", str)
 SiteId = NewType("SiteId", str)
@@ -654,15 +655,23 @@ class SingleSiteConnection(Helpers):
                 pass
 
     def receive_data(self, size: int, timeout: float | None = None) -> bytes:
-        if self.socket is None:
+        return _wait_for(self._receive_data(size, timeout))
+
+    def _receive_data(
+        self, size: int, timeout: float | None = None
+    ) -> Generator[socket.socket, bool, bytes]:
+        """Receive the data, yielding the socket whenever waiting for it to become readable
+
+        The caller sends whether the socket became readable in the meantime."""
+        if (sock := self.socket) is None:
             raise MKLivestatusSocketError("Socket to '%s' is not connected" % self.socketurl)
 
         data = BytesIO()
-        self.socket.settimeout(timeout)
+        sock.settimeout(timeout)
         receive_start = time.time()
         while size > 0:
-            if is_socket_readable(self.socket, 0.1):
-                packet = self.socket.recv(size)
+            if (yield sock):
+                packet = sock.recv(size)
                 if not packet:
                     raise MKLivestatusSocketClosed(
                         "Read zero data from socket, remote peer closed connection."
@@ -740,9 +749,22 @@ class SingleSiteConnection(Helpers):
         suppress_exceptions: tuple[type[Exception], ...],
         timeout_at: float | None = None,
     ) -> bytes:
+        return _wait_for(self.receive_raw_response_steps(query, suppress_exceptions, timeout_at))
+
+    def receive_raw_response_steps(
+        self,
+        query: str,
+        suppress_exceptions: tuple[type[Exception], ...],
+        timeout_at: float | None = None,
+    ) -> Generator[socket.socket, bool, bytes]:
+        """Like receive_raw_response, but yields the socket whenever waiting for it
+
+        This way the responses of many sites can be received at the same time, see
+        MultiSiteConnection.query_parallel.
+        """
         try:
             # Headers are always ASCII encoded
-            resp = self.receive_data(16)
+            resp = yield from self._receive_data(16)
             code = resp[0:3].decode("ascii")
             try:
                 length = int(resp[4:15].lstrip())
@@ -757,7 +779,7 @@ class SingleSiteConnection(Helpers):
             # in the socket. The liveproxyd (same system) has the complete data available
             # while the data from a standard connection can still take some time.
             # 30 seconds should be more than enough for the maximum telegram size of 100MB
-            data = self.receive_data(length, 30)
+            data = yield from self._receive_data(length, 30)
 
             if code == "200":
                 return data
@@ -796,7 +818,11 @@ class SingleSiteConnection(Helpers):
                 self.connect()
                 self.send_query(query)
                 # do not send query again -> danger of infinite loop
-                return self.receive_raw_response(query, suppress_exceptions, timeout_at)
+                return (
+                    yield from self.receive_raw_response_steps(
+                        query, suppress_exceptions, timeout_at
+                    )
+                )
             raise MKLivestatusSocketError(str(e))
 
         except suppress_exceptions:
@@ -1182,19 +1208,51 @@ class MultiSiteConnection(Helpers):
         self.connections = stillalive
         return result
 
+    def iter_query(self, query: QueryTypes, add_headers: str = "") -> Iterator[LivestatusRow]:
+        """Yield the rows of the sites, the ones of a site as soon as its response arrived
+
+        Unlike with query(), the rows of the sites are not in the order of the sites, but
+        in the order their responses arrived. The rows of the fast sites can be processed
+        while the slow sites are still working on their responses.
+        """
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+
+        with _livestatus_output_format_switcher(normalized_query, self):
+            if not self.parallelize:
+                yield from self.query_non_parallel(normalized_query, add_headers)
+                return
+            for _site_id, rows in self._query_sites(normalized_query, add_headers):
+                yield from rows
+
     # New parallelized version of query(). The semantics differs in the handling
     # of Limit: since all sites are queried in parallel, the Limit: is simply
     # applied to all sites - resulting in possibly more results then Limit requests.
-    def query_parallel(  # pylint: disable=too-many-branches
+    def query_parallel(
         self,
         query: Query,
         add_headers: str = "",
     ) -> LivestatusResponse:
-        stillalive = []
+        site_rows = dict(self._query_sites(query, add_headers))
+        # The rows are in the order of the sites, no matter which site was the fastest
+        return LivestatusResponse(
+            [
+                row
+                for connected_site in self.connections
+                for row in site_rows.get(connected_site.id, [])
+            ]
+        )
+
+    def _query_sites(
+        self, query: Query, add_headers: str
+    ) -> Iterator[tuple[SiteId, LivestatusResponse]]:
+        """Query the sites in parallel, yield the rows of every site as soon as they arrived
+
+        All queries are sent first. Then the responses are received as data arrives on
+        any of the sockets, so no site has to wait for a slower one, and every response
+        is parsed as soon as it is complete.
+        """
         if self.only_sites is not None:
-            connect_to_sites = [c for c in self.connections if c[0] in self.only_sites]
-            # Unused sites are assumed to be alive
-            stillalive.extend([c for c in self.connections if c[0] not in self.only_sites])
+            connect_to_sites = [c for c in self.connections if c.id in self.only_sites]
         else:
             connect_to_sites = self.connections
 
@@ -1204,70 +1262,61 @@ class MultiSiteConnection(Helpers):
         else:
             limit_header = ""
 
-        # First send all queries
-        retrieve_responses: list[tuple[str, ConnectedSite]] = []
-        for connected_site in connect_to_sites:
-            try:
-                str_query = connected_site.connection.build_query(query, add_headers + limit_header)
-                connected_site.connection.send_query(str_query)
-                retrieve_responses.append((str_query, connected_site))
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
+        # Only the dead sites are dropped, unused sites are assumed to be alive
+        dead_site_ids: set[SiteId] = set()
 
-        # Then retrieve all raw responses. We will be as slow as the slowest of all connections.
-        site_responses: list[tuple[ConnectedSite, bytes]] = []
-        for str_query, connected_site in retrieve_responses:
-            try:
-                site_responses.append(
-                    (
-                        connected_site,
-                        connected_site.connection.receive_raw_response(
-                            str_query, query.suppress_exceptions
-                        ),
+        def mark_dead(connected_site: ConnectedSite, exception: Exception) -> None:
+            self.deadsites[connected_site.id] = {
+                "exception": exception,
+                "site": connected_site.config,
+            }
+            dead_site_ids.add(connected_site.id)
+
+        try:
+            # First send all queries
+            receivers: list[tuple[ConnectedSite, Generator[socket.socket, bool, bytes]]] = []
+            for connected_site in connect_to_sites:
+                try:
+                    str_query = connected_site.connection.build_query(
+                        query, add_headers + limit_header
                     )
-                )
-            except query.suppress_exceptions:
-                # Mostly handles exception types MKLivestatusTableNotFoundError
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
+                    connected_site.connection.send_query(str_query)
+                    receivers.append(
+                        (
+                            connected_site,
+                            connected_site.connection.receive_raw_response_steps(
+                                str_query, query.suppress_exceptions
+                            ),
+                        )
+                    )
+                except LivestatusTestingError:
+                    raise
+                except Exception as e:
+                    mark_dead(connected_site, e)
 
-        # Convert responses to python format
-        result: list[LivestatusRow] = []
-        for connected_site, raw_response in site_responses:
-            try:
-                rows = connected_site.connection.parse_raw_response(raw_response, query)
-                stillalive.append(connected_site)
-                if self.prepend_site:
-                    for row in rows:
-                        row.insert(0, connected_site.id)
-                result.extend(rows)
-            except query.suppress_exceptions:
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
+            # Then retrieve the raw responses as they arrive and convert them to python format
+            with contextlib.closing(_receive_concurrently(receivers)) as responses:
+                for connected_site, raw_response in responses:
+                    try:
+                        if isinstance(raw_response, Exception):
+                            raise raw_response
+                        rows = connected_site.connection.parse_raw_response(raw_response, query)
+                    except query.suppress_exceptions:
+                        # Mostly handles exception types MKLivestatusTableNotFoundError
+                        continue
+                    except LivestatusTestingError:
+                        raise
+                    except Exception as e:
+                        connected_site.connection.disconnect()
+                        mark_dead(connected_site, e)
+                        continue
 
-        self.connections = stillalive
-        return LivestatusResponse(result)
+                    if self.prepend_site:
+                        for row in rows:
+                            row.insert(0, connected_site.id)
+                    yield connected_site.id, rows
+        finally:
+            self.connections = [c for c in self.connections if c.id not in dead_site_ids]
 
     def command(self, command: str, sitename: SiteId | None = SiteId("local")) -> None:
         if sitename in self.deadsites:
@@ -1296,6 +1345,85 @@ class MultiSiteConnection(Helpers):
         raise KeyError("Connection does not exist")
 
 
+_T = TypeVar("_T")
+
+
+def _wait_for(receiver: Generator[socket.socket, bool, _T]) -> _T:
+    """Run a receiver of SingleSiteConnection, blocking while it waits for its socket"""
+    try:
+        sock = next(receiver)
+        while True:
+            sock = receiver.send(is_socket_readable(sock, 0.1))
+    except StopIteration as e:
+        result: _T = e.value
+        return result
+
+
+def _receive_concurrently(
+    receivers: Iterable[tuple[ConnectedSite, Generator[socket.socket, bool, bytes]]],
+) -> Generator[tuple[ConnectedSite, bytes | Exception], None, None]:
+    """Run the receivers of many sites at once, yield the responses as they are complete
+
+    A receiver is only resumed when its socket is readable, or every 0.1 seconds so
+    it can handle its timeouts, just like _wait_for does. Receivers which did not
+    complete when this generator is closed are closed, and their sites are
+    disconnected, as the rest of their responses is still on the way.
+    """
+    waiting = {
+        connected_site.id: (connected_site, receiver) for connected_site, receiver in receivers
+    }
+    sockets: dict[SiteId, socket.socket] = {}
+    # Which receivers to resume, and whether their sockets are readable
+    steps: list[tuple[ConnectedSite, Generator[socket.socket, bool, bytes], bool | None]] = [
+        (connected_site, receiver, None) for connected_site, receiver in waiting.values()
+    ]
+    next_timeout_check = time.time() + 0.1
+
+    with selectors.DefaultSelector() as selector:
+        try:
+            while True:
+                for connected_site, receiver, readable in steps:
+                    try:
+                        sock = next(receiver) if readable is None else receiver.send(readable)
+                        if sockets.get(connected_site.id) is not sock:
+                            # The receiver reconnected or just started
+                            if connected_site.id in sockets:
+                                selector.unregister(sockets.pop(connected_site.id))
+                            selector.register(sock, selectors.EVENT_READ, connected_site.id)
+                            sockets[connected_site.id] = sock
+                        continue
+                    except StopIteration as e:
+                        response: bytes | Exception = e.value
+                    except Exception as e:
+                        response = e
+
+                    del waiting[connected_site.id]
+                    if connected_site.id in sockets:
+                        selector.unregister(sockets.pop(connected_site.id))
+                    yield connected_site, response
+
+                if not waiting:
+                    return
+
+                # Decrypted data of SSL sockets may be pending without the socket being readable
+                pending = {
+                    site_id
+                    for site_id, sock in sockets.items()
+                    if isinstance(sock, ssl.SSLSocket) and sock.pending()
+                }
+                events = selector.select(0 if pending else 0.1)
+                readable_site_ids = pending.union(key.data for key, _mask in events)
+                if (now := time.time()) < next_timeout_check:
+                    steps = [(*waiting[site_id], True) for site_id in readable_site_ids]
+                    continue
+                next_timeout_check = now + 0.1
+                steps = [(*waiting[site_id], site_id in readable_site_ids) for site_id in waiting]
+        finally:
+            for connected_site, receiver in waiting.values():
+                receiver.close()
+                connected_site.connection.disconnect()
+
+
 @contextlib.contextmanager
 def _livestatus_output_format_switcher(
     query: Query, connection: MultiSiteConnection | SingleSiteConnection
@@ -88,6 +88,12 @@ TableEventConsoleStatus::TableEventConsoleStatus() {
                                       offsets));
     addColumn(ECRow::makeDoubleColumn("status_average_sync_time",
                                       "The average sync time", offsets));
+    addColumn(ECRow::makeDoubleColumn(
+        "status_average_history_flush_time",
+        "The average time for writing a batch of history entries", offsets));
+    addColumn(ECRow::makeIntColumn(
+        "status_history_queue",
+        "The number of history entries waiting to be written", offsets));
     addColumn(ECRow::makeStringColumn(
         "status_replication_slavemode",
         "The replication slavemode (empty or one of sync/takeover)", offsets));
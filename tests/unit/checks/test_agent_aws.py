@@ -141,6 +141,7 @@ from tests.testlib import SpecialAgent
                     "role_arn_id": ["ut_role_arn_id_1", "ut_role_arn_id_2"],
                 },
                 "regions": ["ut_region_1"],
+                "max_workers": 8,
                 # mandatory params:
                 "access_key_id": "ut_access_key_id",
                 "secret_access_key": ("store", "ut_secret_access_key_store"),
@@ -186,6 +187,8 @@ from tests.testlib import SpecialAgent
                 "ut-key",
                 "--overall-tag-values",
                 "ut-value",
+                "--max-workers",
+                "8",
                 "--hostname",
                 "testhost",
                 "--piggyback-naming-convention",
@@ -17,8 +17,10 @@ from cmk.checkengine.checking import CheckPluginName, ServiceID
 from cmk.base.api.agent_based.value_store._utils import (
     _DiskSyncedMapping,
     _DynamicDiskSyncedMapping,
+    _JournalDiskSyncedMapping,
     _StaticDiskSyncedMapping,
     _ValueStore,
+    ValueStoreFormat,
     ValueStoreManager,
 )
 
@@ -257,3 +259,206 @@ class TestValueStoreManager:
             assert vsm.active_service_interface["key"] == "outer"
 
         assert vsm.active_service_interface is None
+
+    @staticmethod
+    @pytest.mark.parametrize("written_format", ["text", "journal"])
+    @pytest.mark.parametrize("read_format", ["text", "journal"])
+    def test_storage_formats(
+        written_format: ValueStoreFormat,
+        read_format: ValueStoreFormat,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        monkeypatch.setattr(ValueStoreManager, "STORAGE_PATH", tmp_path)
+        service = ServiceID(CheckPluginName("unit_test"), "item")
+        for value in ("first", "second"):
+            vsm = ValueStoreManager(HostName("test-host"), storage_format=written_format)
+            with vsm.namespace(service):
+                assert vsm.active_service_interface is not None
+                vsm.active_service_interface["key"] = value
+                vsm.active_service_interface.pop("removed", None)
+                vsm.active_service_interface["removed"] = value
+            vsm.save()
+
+        vsm = ValueStoreManager(HostName("test-host"), storage_format=read_format)
+        with vsm.namespace(service):
+            assert vsm.active_service_interface == {"key": "second", "removed": "second"}
+
+
+def _run_check_cycles(host_name: HostName, storage_format: ValueStoreFormat, changed: int) -> None:
+    """Run checks like the interface checks, which read and write their counters"""
+    for cycle in range(3):
+        vsm = ValueStoreManager(host_name, storage_format=storage_format)
+        for interface in range(50):
+            with vsm.namespace(ServiceID(CheckPluginName("interfaces"), str(interface))):
+                value_store = vsm.active_service_interface
+                assert value_store is not None
+                for counter in ("in_octets", "out_octets", "in_errors", "out_errors"):
+                    value_store.get(counter)
+                    if cycle == 0 or interface * 4 < changed:
+                        value_store[counter] = (1700000000.0 + 60 * cycle, 12345678 * cycle)
+        vsm.save()
+
+
+def _stored_counters(host_name: HostName, storage_format: ValueStoreFormat) -> list[object]:
+    vsm = ValueStoreManager(host_name, storage_format=storage_format)
+    counters: list[object] = []
+    for interface in range(50):
+        with vsm.namespace(ServiceID(CheckPluginName("interfaces"), str(interface))):
+            value_store = vsm.active_service_interface
+            assert value_store is not None
+            counters.append(dict(value_store))
+    return counters
+
+
+@pytest.mark.parametrize("changed", [200, 20])
+def test_storage_formats_of_check_cycles(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, changed: int
+) -> None:
+    monkeypatch.setattr(ValueStoreManager, "STORAGE_PATH", tmp_path)
+    _run_check_cycles(HostName("text-host"), "text", changed)
+    _run_check_cycles(HostName("journal-host"), "journal", changed)
+
+    assert (
+        _stored_counters(HostName("text-host"), "text")
+        == _stored_counters(HostName("journal-host"), "journal")
+        == _stored_counters(HostName("journal-host"), "text")
+    )
+
+
+def _journal_lines(path: Path) -> list[str]:
+    header, *lines = path.read_text().splitlines()
+    assert header.startswith("# ")
+    return lines
+
+
+class Test_JournalDiskSyncedMapping:
+    @staticmethod
+    def _get_jdsm(path: Path) -> _JournalDiskSyncedMapping[tuple[str, str | None, str], object]:
+        return _JournalDiskSyncedMapping(path=path, log_debug=lambda msg: None)
+
+    def test_lazy_loading(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        jdsm = self._get_jdsm(path)
+        assert not path.exists()
+
+        assert not jdsm
+        assert path.exists()
+
+    def test_mapping_features(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        self._get_jdsm(path).disksync(
+            updated=[
+                (("check1", None, "stored-user-key-1"), 23),
+                (("check2", "item", "stored-user-key-2"), 42),
+            ]
+        )
+
+        jdsm = self._get_jdsm(path)
+        assert jdsm.get(("check_no", None, "moo")) is None
+        assert jdsm[("check1", None, "stored-user-key-1")] == 23
+        assert dict(jdsm) == {
+            ("check1", None, "stored-user-key-1"): 23,
+            ("check2", "item", "stored-user-key-2"): 42,
+        }
+
+    def test_write_changes_only(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        jdsm = self._get_jdsm(path)
+        jdsm.disksync(updated=[(("check1", None, "key"), 23), (("check2", None, "key"), 42)])
+        jdsm.disksync(
+            removed={("check1", None, "key"), ("check3", None, "key")},
+            updated=[(("check2", None, "key"), 42), (("check4", "ü", "key"), (1.5, "x\ny"))],
+        )
+
+        assert _journal_lines(path) == [
+            "('check1', None, 'key'): 23",
+            "('check2', None, 'key'): 42",
+            "('check1', None, 'key'): ...",
+            "('check4', 'ü', 'key'): (1.5, 'x\\ny')",
+        ]
+        assert (
+            dict(self._get_jdsm(path))
+            == dict(jdsm)
+            == {
+                ("check2", None, "key"): 42,
+                ("check4", "ü", "key"): (1.5, "x\ny"),
+            }
+        )
+
+    def test_read_changes_of_others(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        jdsm, other = self._get_jdsm(path), self._get_jdsm(path)
+        jdsm.disksync(updated=[(("check1", None, "key"), 23)])
+        other.disksync(updated=[(("check2", None, "key"), 42)])
+
+        jdsm.disksync()
+        assert dict(jdsm) == dict(other)
+
+        # the other one compacts the journal
+        for n in range(100):
+            other.disksync(updated=[(("check2", None, "key"), n)])
+        assert len(_journal_lines(path)) == 2
+
+        jdsm.disksync()
+        assert dict(jdsm) == {("check1", None, "key"): 23, ("check2", None, "key"): 99}
+
+    def test_compaction(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        jdsm = self._get_jdsm(path)
+        for n in range(1000):
+            jdsm.disksync(updated=[(("check", None, "key"), n)])
+            assert len(_journal_lines(path)) <= 100
+
+        assert dict(self._get_jdsm(path)) == {("check", None, "key"): 999}
+
+    def test_read_replaced_file_with_same_inode(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        jdsm = self._get_jdsm(path)
+        jdsm.disksync(updated=[(("check1", None, "key"), 23)])
+        replacement = self._get_jdsm(tmp_path / "replacement")
+        replacement.disksync(updated=[((f"check{n}", None, "key"), n) for n in range(2, 10)])
+
+        # Like a rewritten file which got the inode of the file it replaced
+        inode = path.stat().st_ino
+        path.write_bytes((tmp_path / "replacement").read_bytes())
+        assert path.stat().st_ino == inode
+
+        jdsm.disksync()
+        assert dict(jdsm) == dict(replacement)
+
+    def test_read_journal_without_header(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        path.write_text("('check1', None, 'key'): 23\n")
+
+        jdsm = self._get_jdsm(path)
+        assert dict(jdsm) == {("check1", None, "key"): 23}
+
+        jdsm.disksync(updated=[(("check2", None, "key"), 42)])
+        assert dict(self._get_jdsm(path)) == dict(jdsm)
+
+    def test_read_text_format(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        path.write_text(repr({("check1", None, "key"): 23, ("check2", None, "key"): 42}))
+
+        jdsm = self._get_jdsm(path)
+        assert dict(jdsm) == {("check1", None, "key"): 23, ("check2", None, "key"): 42}
+
+        jdsm.disksync(updated=[(("check2", None, "key"), 43)])
+        assert _journal_lines(path) == [
+            "('check1', None, 'key'): 23",
+            "('check2', None, 'key'): 43",
+        ]
+
+    def test_ignore_unfinished_line(self, tmp_path: Path) -> None:
+        path = tmp_path / "test-host"
+        path.write_text("('check1', None, 'key'): 23\n('check2', None, 'k")
+
+        jdsm = self._get_jdsm(path)
+        assert dict(jdsm) == {("check1", None, "key"): 23}
+
+        jdsm.disksync(updated=[(("check3", None, "key"), 42)])
+        assert _journal_lines(path) == [
+            "('check1', None, 'key'): 23",
+            "('check3', None, 'key'): 42",
+        ]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+import cmk.utils.debug
+import cmk.utils.paths
+
+from cmk.automations.helper_api import (
+    AutomationRequest,
+    AutomationResponse,
+    call_helper,
+    HelperCallError,
+    receive_all,
+)
+from cmk.automations.results import ABCAutomationResult, SerializedResult
+
+import cmk.base.config as config
+from cmk.base.automation_helper import _exit_code, AutomationHelper, plugins_fingerprint
+from cmk.base.automations import Automation, Automations, MKAutomationError
+
+_NUM_LOADS = 0
+
+
+def _count_load(*args: object, **kwargs: object) -> None:
+    global _NUM_LOADS
+    _NUM_LOADS += 1
+
+
+@dataclass
+class _EchoResult(ABCAutomationResult):
+    text: str
+
+    @staticmethod
+    def automation_call() -> str:
+        return "echo"
+
+
+class _EchoAutomation(Automation):
+    cmd = "echo"
+    needs_config = True
+
+    def execute(self, args: list[str]) -> _EchoResult:
+        if args == ["fail"]:
+            raise MKAutomationError("Failed as requested")
+        return _EchoResult(f"{' '.join(args)} {sys.stdin.read()} {_NUM_LOADS}")
+
+
+@pytest.fixture(name="main_config_file")
+def fixture_main_config_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    main_config_file = tmp_path / "main.mk"
+    main_config_file.write_text("# initial\n")
+    monkeypatch.setattr(cmk.utils.paths, "main_config_file", str(main_config_file))
+    monkeypatch.setattr(cmk.utils.paths, "check_mk_config_dir", str(tmp_path / "conf.d"))
+    monkeypatch.setattr(cmk.utils.paths, "final_config_file", str(tmp_path / "final.mk"))
+    monkeypatch.setattr(cmk.utils.paths, "local_config_file", str(tmp_path / "local.mk"))
+    return main_config_file
+
+
+@pytest.fixture(name="local_checks_dir")
+def fixture_local_checks_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    local_checks_dir = tmp_path / "local/checks"
+    local_checks_dir.mkdir(parents=True)
+    monkeypatch.setattr(cmk.utils.paths, "local_checks_dir", local_checks_dir)
+    monkeypatch.setattr(cmk.utils.paths, "local_lib_dir", tmp_path / "local/lib")
+    return local_checks_dir
+
+
+@pytest.fixture(name="helper")
+def fixture_helper(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    main_config_file: Path,
+    local_checks_dir: Path,
+) -> Iterator[tuple[Path, int]]:
+    monkeypatch.setattr(config, "load", _count_load)
+    socket_path = tmp_path / "helper.sock"
+    registry = Automations()
+    registry.register(_EchoAutomation())
+    helper = AutomationHelper(socket_path, registry)
+    monkeypatch.setattr(helper, "load_plugins", lambda: None)
+    # Report the errors like in production instead of raising them
+    cmk.utils.debug.disable()
+
+    if (pid := os.fork()) == 0:
+        try:
+            helper.serve()
+        finally:
+            os._exit(0)
+
+    for _attempt in range(100):
+        if socket_path.exists():
+            break
+        time.sleep(0.05)
+
+    yield socket_path, pid
+
+    with suppress(ProcessLookupError, ChildProcessError):
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+def _call(socket_path: Path, args: list[str], stdin: str = "") -> AutomationResponse | None:
+    return call_helper(
+        AutomationRequest(command="echo", args=args, stdin=stdin, log_level=20),
+        socket_path,
+    )
+
+
+def test_call_helper_not_running(tmp_path: Path) -> None:
+    assert _call(tmp_path / "missing.sock", []) is None
+
+
+def test_call_helper_not_taking_request(tmp_path: Path) -> None:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(tmp_path / "helper.sock"))
+        server.listen()
+        assert (
+            call_helper(
+                AutomationRequest(command="echo", args=[], stdin="x" * 10_000_000, log_level=20),
+                tmp_path / "helper.sock",
+                timeout=0.1,
+            )
+            is None
+        )
+
+
+def _close_without_response(server: socket.socket) -> None:
+    connection, _address = server.accept()
+    with connection:
+        receive_all(connection)
+
+
+def test_call_helper_closing_connection(tmp_path: Path) -> None:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(tmp_path / "helper.sock"))
+        server.listen()
+        thread = threading.Thread(target=_close_without_response, args=(server,))
+        thread.start()
+        with pytest.raises(HelperCallError):
+            call_helper(
+                AutomationRequest(command="echo", args=[], stdin="", log_level=20),
+                tmp_path / "helper.sock",
+            )
+        thread.join()
+
+
+def test_automation_helper_executes_call(helper: tuple[Path, int]) -> None:
+    socket_path, _pid = helper
+    response = _call(socket_path, ["a", "b"], stdin="input")
+
+    assert response == AutomationResponse(exit_code=0, output="('a b input 1',)\n", error="")
+    assert _EchoResult.deserialize(SerializedResult(response.output)) == _EchoResult("a b input 1")
+
+
+def test_automation_helper_reports_errors(helper: tuple[Path, int]) -> None:
+    socket_path, _pid = helper
+    response = _call(socket_path, ["fail"])
+
+    assert response is not None
+    assert response.exit_code == 1
+    assert response.output == ""
+    assert "Failed as requested" in response.error
+
+
+@pytest.mark.parametrize(
+    "code, exit_code, error",
+    [(None, 0, ""), (0, 0, ""), (2, 2, ""), ("Stopped", 1, "Stopped\n")],
+)
+def test_exit_code(
+    capsys: pytest.CaptureFixture[str], code: object, exit_code: int, error: str
+) -> None:
+    assert _exit_code(SystemExit(code)) == exit_code
+    assert capsys.readouterr().err == error
+
+
+def test_automation_helper_reloads_changed_config(
+    helper: tuple[Path, int], main_config_file: Path
+) -> None:
+    socket_path, _pid = helper
+    assert (response := _call(socket_path, [])) is not None and response.output == "('  1',)\n"
+    assert (response := _call(socket_path, [])) is not None and response.output == "('  1',)\n"
+
+    main_config_file.write_text("# changed\n")
+    assert (response := _call(socket_path, [])) is not None and response.output == "('  2',)\n"
+
+
+def test_plugins_fingerprint_ignores_byte_code(local_checks_dir: Path) -> None:
+    plugin = cmk.utils.paths.local_lib_dir / "python3/cmk/base/plugins/agent_based/my_plugin.py"
+    plugin.parent.mkdir(parents=True)
+    plugin.write_text("# plugin\n")
+    fingerprint = plugins_fingerprint()
+
+    (plugin.parent / "__pycache__").mkdir()
+    (plugin.parent / "__pycache__/my_plugin.cpython-312.pyc").write_bytes(b"byte code")
+    (local_checks_dir / "my_check.pyc").write_bytes(b"byte code")
+    assert plugins_fingerprint() == fingerprint
+
+    plugin.write_text("# changed plugin\n")
+    assert plugins_fingerprint() != fingerprint
+
+
+def test_automation_helper_stops_on_changed_plugins(
+    helper: tuple[Path, int], local_checks_dir: Path
+) -> None:
+    socket_path, pid = helper
+    assert _call(socket_path, []) is not None
+
+    (local_checks_dir / "my_check").write_text("# new plugin\n")
+
+    assert _call(socket_path, []) is None
+    assert os.waitpid(pid, 0)[1] == 0
+    assert not socket_path.exists()
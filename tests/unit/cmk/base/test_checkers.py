@@ -5,6 +5,8 @@
 
 # pylint: disable=protected-access
 
+import posix
+import threading
 import time
 from collections.abc import Iterable, Mapping
 from typing import Literal
@@ -14,15 +16,22 @@ from pytest import MonkeyPatch
 
 from tests.testlib.base import Scenario
 
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.cpu_tracking import Snapshot
 from cmk.utils.hostaddress import HostName
 
+from cmk.fetchers import Fetcher, Mode
+from cmk.fetchers.filecache import FileCache, FileCacheOptions, NoCache
+
+from cmk.checkengine.checking import make_timing_results
 from cmk.checkengine.checkresults import ServiceCheckResult
-from cmk.checkengine.fetcher import HostKey, SourceType
+from cmk.checkengine.fetcher import FetcherType, HostKey, SourceInfo, SourceType
 from cmk.checkengine.parameters import TimespecificParameters, TimespecificParameterSet
 
 import cmk.base.checkers as checkers
 import cmk.base.config as config
 from cmk.base.plugins.agent_based.agent_based_api.v1.type_defs import CheckResult
+from cmk.base.sources import Source
 
 from cmk.agent_based.prediction_backend import (
     InjectedParameters,
@@ -32,6 +41,176 @@ from cmk.agent_based.prediction_backend import (
 from cmk.agent_based.v1 import Metric, Result, State
 
 
+class _FakeClock:
+    """Lets concurrent fetchers take their time without actually waiting
+
+    The fetchers start at the same time and set the time of their thread to
+    their end.  The other threads are at the time the last fetcher finished."""
+
+    def __init__(self) -> None:
+        self._fetcher_end = threading.local()
+        self._ends: list[float] = [0.0]
+
+    def finish(self, end: float) -> None:
+        self._fetcher_end.time = end
+        self._ends.append(end)
+
+    def take(self) -> Snapshot:
+        now = getattr(self._fetcher_end, "time", max(self._ends))
+        return Snapshot(posix.times_result((0.0, 0.0, 0.0, 0.0, now)))
+
+
+class _BarrierFetcher(Fetcher[AgentRawData]):
+    """Only returns once `parties` fetchers are fetching at the same time."""
+
+    def __init__(
+        self,
+        barrier: threading.Barrier,
+        payload: bytes,
+        clock: _FakeClock | None = None,
+        duration: float = 0.0,
+    ) -> None:
+        self.barrier = barrier
+        self.payload = payload
+        self.clock = clock
+        self.duration = duration
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _fetch_from_io(self, mode: Mode) -> AgentRawData:
+        self.barrier.wait(timeout=10)
+        if self.clock is not None:
+            self.clock.finish(self.duration)
+        return AgentRawData(self.payload)
+
+
+class _BarrierSource(Source[AgentRawData]):
+    def __init__(self, ident: str, fetcher: _BarrierFetcher) -> None:
+        self.ident = ident
+        self._fetcher = fetcher
+
+    def source_info(self) -> SourceInfo:
+        return SourceInfo(
+            HostName("testhost"), None, self.ident, FetcherType.PROGRAM, SourceType.HOST
+        )
+
+    def fetcher(self) -> Fetcher[AgentRawData]:
+        return self._fetcher
+
+    def file_cache(
+        self, *, simulation: bool, file_cache_options: FileCacheOptions
+    ) -> FileCache[AgentRawData]:
+        return NoCache()
+
+
+def test_fetch_all_concurrently_preserves_order() -> None:
+    barrier = threading.Barrier(3)
+    sources = [
+        _BarrierSource(f"source{n}", _BarrierFetcher(barrier, b"<<<section%d>>>" % n))
+        for n in range(3)
+    ]
+
+    fetched = checkers._fetch_all(
+        sources,
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+        max_concurrency=3,
+    )
+
+    assert [source_info.ident for source_info, _raw_data, _duration in fetched] == [
+        "source0",
+        "source1",
+        "source2",
+    ]
+    assert [raw_data.ok for _source_info, raw_data, _duration in fetched] == [
+        b"<<<section0>>>",
+        b"<<<section1>>>",
+        b"<<<section2>>>",
+    ]
+
+
+def test_fetch_all_sequentially() -> None:
+    sources = [
+        _BarrierSource(f"source{n}", _BarrierFetcher(threading.Barrier(1), b"")) for n in range(3)
+    ]
+
+    fetched = checkers._fetch_all(
+        sources,
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+    )
+
+    assert [source_info.ident for source_info, _raw_data, _duration in fetched] == [
+        "source0",
+        "source1",
+        "source2",
+    ]
+
+
+def test_fetch_all_concurrently_does_not_sum_overlapping_durations(
+    monkeypatch: MonkeyPatch,
+) -> None:
+    clock = _FakeClock()
+    monkeypatch.setattr(Snapshot, "take", staticmethod(clock.take))
+    barrier = threading.Barrier(2)
+    sources = [
+        _BarrierSource("short", _BarrierFetcher(barrier, b"", clock, duration=0.2)),
+        _BarrierSource("long", _BarrierFetcher(barrier, b"", clock, duration=0.4)),
+    ]
+
+    fetched = checkers._fetch_all(
+        sources,
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+        max_concurrency=2,
+    )
+    timing = make_timing_results(
+        Snapshot.null(),
+        [(source_info, duration) for source_info, _raw_data, duration in fetched],
+        perfdata_with_times=False,
+    )
+
+    assert timing.metrics[0] == "execution_time=0.400"
+    assert [duration.process.elapsed for _source_info, _raw_data, duration in fetched] == [
+        pytest.approx(0.4 / 3),
+        pytest.approx(0.8 / 3),
+    ]
+
+
+@pytest.mark.parametrize(
+    "hostname, result",
+    [
+        (HostName("testhost1"), 1),
+        (HostName("testhost2"), 4),
+    ],
+)
+def test_config_cache_max_concurrent_fetchers(
+    monkeypatch: MonkeyPatch, hostname: HostName, result: int
+) -> None:
+    ts = Scenario()
+    ts.add_host(hostname)
+    ts.set_ruleset(
+        "max_concurrent_fetchers",
+        [
+            {
+                "id": "01",
+                "condition": {"host_name": [HostName("testhost2")]},
+                "value": 4,
+                "options": {},
+            }
+        ],
+    )
+    config_cache = ts.apply(monkeypatch)
+    assert config_cache.max_concurrent_fetchers(hostname) == result
+
+
 def make_timespecific_params_list(
     entries: Iterable[Mapping[str, object]],
 ) -> TimespecificParameters:
@@ -13,6 +13,7 @@ from pathlib import Path
 from pprint import pprint
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pytest
 import time_machine
 
@@ -211,6 +212,7 @@ def test_data_stats(
     slices: list[Sequence[float | None]], result: Sequence[DataStat | None]
 ) -> None:
     assert _prediction._data_stats(slices) == result
+    assert _prediction._data_stats_array(np.array(slices, dtype=np.float64)) == result
 
 
 class TestPredictionStore:
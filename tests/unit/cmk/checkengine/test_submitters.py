@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import io
+import os
+import select
+from collections.abc import Sequence
+from pathlib import Path
+
+import pytest
+
+import cmk.utils.paths
+from cmk.utils.hostaddress import HostName
+
+from cmk.checkengine.checkresults import ServiceCheckResult
+from cmk.checkengine.submitters import FileSubmitter, PipeSubmitter, Submittee
+
+_NUM_SERVICES = 400
+
+
+class _CountingPipe(io.BytesIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes: list[bytes] = []
+        self.flushes = 0
+
+    def write(self, data: object) -> int:
+        assert isinstance(data, bytes)
+        self.writes.append(data)
+        return super().write(data)
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+def _submittees(num: int) -> Sequence[Submittee]:
+    return [
+        Submittee(
+            name=f"Interface {n}",
+            result=ServiceCheckResult(
+                0,
+                f"[{n}], (up), Speed: 10 GBit/s\nIn: 1.2 MB/s, Out: 3.4 MB/s",
+                [("in", 1234567.0, None, None, 0, 1250000000.0)],
+            ),
+            cache_info=None,
+            pending=False,
+        )
+        for n in range(num)
+    ]
+
+
+@pytest.fixture(name="pipe")
+def fixture_pipe(monkeypatch: pytest.MonkeyPatch) -> _CountingPipe:
+    pipe = _CountingPipe()
+    monkeypatch.setattr(PipeSubmitter, "_nagios_command_pipe", pipe)
+    return pipe
+
+
+def test_pipe_submitter_writes_complete_commands(pipe: _CountingPipe) -> None:
+    PipeSubmitter(HostName("horst"), perfdata_format="pnp", show_perfdata=False).submit(
+        _submittees(_NUM_SERVICES)
+    )
+
+    commands = pipe.getvalue().decode().splitlines()
+    assert len(commands) == _NUM_SERVICES
+    assert all(";horst;Interface " in command for command in commands)
+    assert all(len(chunk) <= select.PIPE_BUF for chunk in pipe.writes)
+    assert all(chunk.endswith(b"\n") for chunk in pipe.writes)
+    assert pipe.flushes == len(pipe.writes)
+
+
+def test_pipe_submitter_syscalls_per_host(pipe: _CountingPipe) -> None:
+    PipeSubmitter(HostName("horst"), perfdata_format="pnp", show_perfdata=False).submit(
+        _submittees(_NUM_SERVICES)
+    )
+
+    total_size = len(pipe.getvalue())
+    # Every chunk but the last one is filled to at least half of PIPE_BUF
+    assert len(pipe.writes) <= 2 * total_size // select.PIPE_BUF + 1
+
+
+def test_pipe_submitter_large_command(pipe: _CountingPipe) -> None:
+    submittee = Submittee(
+        "Huge", ServiceCheckResult(0, "x" * 2 * select.PIPE_BUF), cache_info=None, pending=False
+    )
+    PipeSubmitter(HostName("horst"), perfdata_format="pnp", show_perfdata=False).submit(
+        [submittee, *_submittees(2)]
+    )
+
+    assert len(pipe.writes) == 2
+    assert pipe.writes[0].count(b"\n") == 1
+
+
+def test_file_submitter_writes_once(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(cmk.utils.paths, "check_result_path", str(tmp_path))
+    writes: list[bytes] = []
+
+    def counting_write(fd: int, data: bytes) -> int:
+        writes.append(data)
+        return os_write(fd, data)
+
+    os_write = os.write
+    monkeypatch.setattr(os, "write", counting_write)
+
+    FileSubmitter(HostName("horst"), perfdata_format="pnp", show_perfdata=False).submit(
+        _submittees(_NUM_SERVICES)
+    )
+
+    assert len(writes) == 1
+    (checkresult_file,) = (p for p in tmp_path.iterdir() if p.suffix != ".ok")
+    content = checkresult_file.read_text()
+    assert content.count("host_name=horst\n") == _NUM_SERVICES
+    assert "output=[0], (up), Speed: 10 GBit/s\\nIn: 1.2 MB/s" in content
+    assert (tmp_path / f"{checkresult_file.name}.ok").exists()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+from collections.abc import Sequence
+
+import pytest
+
+import cmk.ec.export as ec
+from cmk.ec.config import Config, ECRulePackSpec, ServiceLevel
+from cmk.ec.history_file import FileHistory
+from cmk.ec.host_config import HostConfig
+from cmk.ec.main import EventServer, EventStatus
+from cmk.ec.perfcounters import Perfcounters
+
+
+def _rule(rule_id: str, match: str, **kwargs: object) -> ec.Rule:
+    rule: ec.Rule = ec.Rule(
+        actions=[],
+        actions_in_downtime=True,
+        autodelete=False,
+        cancel_action_phases="always",
+        cancel_actions=[],
+        comment="",
+        description="",
+        disabled=False,
+        docu_url="",
+        id=rule_id,
+        invert_matching=False,
+        sl=ServiceLevel(precedence="message", value=0),
+        state=-1,
+        match=match,
+        **kwargs,  # type: ignore[typeddict-item]
+    )
+    return rule
+
+
+_RULE_PACKS = [
+    ECRulePackSpec(
+        id="skipped",
+        title="Skipped for some messages",
+        disabled=False,
+        rules=[
+            _rule("skip", "unimportant", drop="skip_pack"),
+            _rule("never", "unimportant"),
+        ],
+    ),
+    ECRulePackSpec(
+        id="main",
+        title="Main",
+        disabled=False,
+        rules=[
+            _rule("drop", "noise", drop=True),
+            _rule("disk", r"disk (\w+) failed"),
+            _rule("other", ".*"),
+        ],
+    ),
+]
+
+
+def _messages(num: int) -> list[bytes]:
+    texts = ["disk sda failed", "some noise", "unimportant stuff", "something else"]
+    return [
+        f"<78>Jan  1 12:00:00 host{n % 7} app: {texts[n % len(texts)]} {n}".encode()
+        for n in range(num)
+    ]
+
+
+@pytest.fixture(name="configured_event_server")
+def fixture_configured_event_server(
+    event_server: EventServer,
+    config: Config,
+    history: FileHistory,
+    monkeypatch: pytest.MonkeyPatch,
+) -> EventServer:
+    # No monitoring core to ask for the hosts
+    monkeypatch.setattr(HostConfig, "get_canonical_name", lambda self, host_name: None)
+    event_server.reload_configuration({**config, "rule_packs": _RULE_PACKS}, history)
+    return event_server
+
+
+def _process(event_server: EventServer, num_workers: int, messages: Sequence[bytes]) -> None:
+    event_server._config = {**event_server._config, "event_processing_workers": num_workers}
+    event_server._update_pipeline()
+    try:
+        for chunk_start in range(0, len(messages), 10):
+            event_server.process_syslog_messages(messages[chunk_start : chunk_start + 10], None)
+            if event_server._pipeline is not None:
+                event_server._process_matched_events(event_server._pipeline.results())
+    finally:
+        event_server._close_pipeline()
+
+
+@pytest.mark.parametrize("num_workers", [0, 3])
+def test_process_messages(
+    configured_event_server: EventServer,
+    event_status: EventStatus,
+    perfcounters: Perfcounters,
+    num_workers: int,
+) -> None:
+    _process(configured_event_server, num_workers, _messages(40))
+
+    events = [
+        (event["id"], event["host"], event["rule_id"], event["text"])
+        for event in event_status.events()
+    ]
+    # The events of all hosts are processed in the order the messages were received
+    assert [event_id for event_id, *_rest in events] == list(range(1, 31))
+    assert [text.split()[-1] for *_rest, text in events] == [
+        str(n) for n in range(40) if n % 4 != 1
+    ]
+    assert events[:2] == [
+        (1, "host0", "disk", "disk sda failed 0"),
+        (2, "host2", "other", "unimportant stuff 2"),
+    ]
+    assert {rule_id for _event_id, _host, rule_id, _text in events} == {"disk", "other"}
+    assert event_status._rule_stats == {"skip": 10, "drop": 10, "disk": 10, "other": 20}
+    assert perfcounters._counters["messages"] == 40
+    assert perfcounters._counters["rule_hits"] == 50
+    assert perfcounters._counters["drops"] == 10
+    # Only the rules with their text in the message are tried, see cmk.ec.rule_prefilter
+    # skip: 10, never: 0, drop: 10, disk: 10, other: 20
+    assert perfcounters._counters["rule_tries"] == 50
+    assert configured_event_server._pipeline is None
+
+
+def test_pipeline_restarted_after_reload(
+    configured_event_server: EventServer, config: Config, history: FileHistory
+) -> None:
+    configured_event_server._config = {
+        **configured_event_server._config,
+        "event_processing_workers": 2,
+    }
+    configured_event_server._update_pipeline()
+    pipeline = configured_event_server._pipeline
+    assert pipeline is not None
+    configured_event_server.process_syslog_messages(_messages(4), None)
+
+    configured_event_server.reload_configuration(
+        {**config, "rule_packs": _RULE_PACKS, "event_processing_workers": 2}, history
+    )
+    configured_event_server._update_pipeline()
+
+    assert configured_event_server._pipeline is not pipeline
+    assert not pipeline.has_pending()
+    configured_event_server._close_pipeline()
@@ -8,9 +8,11 @@
 import datetime
 import logging
 import shlex
+from collections.abc import Sequence
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+import pytest
 import time_machine
 
 from cmk.utils.hostaddress import HostName
@@ -20,6 +22,7 @@ from cmk.ec.config import Config
 from cmk.ec.history import _current_history_period
 from cmk.ec.history_file import (
     _grep_pipeline,
+    _sidecar_path,
     convert_history_line,
     FileHistory,
     parse_history_file,
@@ -112,3 +115,114 @@ def test_history_parse(tmp_path: Path) -> None:
 
     assert len(new_entries) == 4
     assert new_entries[0][1] == 1666942292.3000507
+
+
+def _query(history: FileHistory, *headers: str) -> QueryGET:
+    def get_table(name: str) -> StatusTable:
+        assert name == "history"
+        return StatusTableHistory(logging.getLogger("cmk.mkeventd"), history)
+
+    return QueryGET(get_table, ["GET history", *headers], logging.getLogger("cmk.mkeventd"))
+
+
+def _get_grepped(
+    history: FileHistory, query: QueryGET, monkeypatch: pytest.MonkeyPatch
+) -> Sequence[object]:
+    with monkeypatch.context() as m:
+        m.setattr(history, "_lookup", lambda path, filters: None)
+        return list(history.get(query))
+
+
+def _write_history_file(history: FileHistory, num_lines: int, start_time: float) -> Path:
+    """Write a history file like FileHistory.add() does, but faster and without a sidecar file"""
+    history.add(ec.Event(host=HostName("template"), text="Some text", rule_id="rule"), "NEW")
+    (path,) = history._settings.paths.history_dir.value.glob("*.log")
+    template = path.read_bytes().rstrip(b"\n").split(b"\t")
+    path.unlink()
+    _sidecar_path(path).unlink()
+
+    lines = []
+    for n in range(num_lines):
+        columns = list(template)
+        columns[0] = str(start_time + n).encode()
+        columns[4] = str(n + 1).encode()  # event_id
+        columns[11] = f"host{n % 500}".encode()  # event_host
+        columns[13] = f"app{n % 7}".encode()  # event_application
+        columns[17] = f"rule{n % 30}".encode()  # event_rule_id
+        lines.append(b"\t".join(columns) + b"\n")
+    path.write_bytes(b"".join(lines))
+    return path
+
+
+_QUERIES = [
+    ["Filter: event_host = host42"],
+    ["Filter: event_host =~ HOST42"],
+    ["Filter: event_host in host1 host2 unknown"],
+    ["Filter: event_id = 1234"],
+    ["Filter: event_rule_id = rule7", "Filter: event_application = app3"],
+    ["Filter: event_rule_id = rule7", "Filter: history_time > 1700000100"],
+    ["Filter: history_time >= 1700001000", "Filter: history_time < 1700001100"],
+    ["Filter: history_time = 1700001000"],
+    ["Filter: event_host = host42", "Filter: event_text ~ Some"],
+    ["Filter: event_host = host42", "Limit: 3"],
+    ["Filter: event_host = unknown"],
+]
+
+
+@pytest.mark.parametrize("headers", _QUERIES)
+def test_indexed_get_matches_grep(
+    history: FileHistory, monkeypatch: pytest.MonkeyPatch, headers: list[str]
+) -> None:
+    path = _write_history_file(history, 2000, 1700000000.0)
+    query = _query(history, *headers)
+
+    assert list(history.get(query)) == _get_grepped(history, query, monkeypatch)
+    assert _sidecar_path(path).exists()
+
+
+def test_indexed_get_after_add(history: FileHistory, monkeypatch: pytest.MonkeyPatch) -> None:
+    for n in range(20):
+        history.add(ec.Event(id=n, host=HostName(f"host{n % 3}"), text="text"), "NEW")
+    query = _query(history, "Filter: event_host = host1")
+    assert len(list(history.get(query))) == 7
+
+    history.add(ec.Event(id=42, host=HostName("host1"), text="text"), "DELETE")
+    rows = list(history.get(query))
+
+    assert len(rows) == 8
+    assert rows == _get_grepped(history, query, monkeypatch)
+    assert rows[0][0] == 21  # history_line, the latest first
+
+
+def test_indexed_get_rebuilds_broken_sidecar(
+    history: FileHistory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = _write_history_file(history, 100, 1700000000.0)
+    _sidecar_path(path).write_bytes(b"0\tgarbage\n")
+    query = _query(history, "Filter: event_host = host42")
+
+    assert list(history.get(query)) == _get_grepped(history, query, monkeypatch)
+    assert len(_sidecar_path(path).read_bytes().splitlines()) == 100
+
+
+def test_indexed_get_with_clock_set_back(
+    history: FileHistory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = _write_history_file(history, 100, 1700000000.0)
+    path.write_bytes(path.read_bytes() + path.read_bytes().splitlines(keepends=True)[0])
+    query = _query(history, "Filter: history_time >= 1700000050")
+
+    assert list(history.get(query)) == _get_grepped(history, query, monkeypatch)
+
+
+def test_indexed_get_caches_latest_indexes(
+    history: FileHistory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = _write_history_file(history, 100, 1700000000.0)
+    for n in range(1, 4):
+        path.with_name(f"{int(path.stem) - n * 86400}.log").write_bytes(path.read_bytes())
+    query = _query(history, "Filter: event_host = host42")
+
+    assert list(history.get(query)) == _get_grepped(history, query, monkeypatch)
+    assert len(history._indexes) == 2
+    assert path in history._indexes
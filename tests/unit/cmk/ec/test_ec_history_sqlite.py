@@ -6,15 +6,19 @@
 
 import logging
 import sqlite3
+import time
 from collections.abc import Iterator
+from pathlib import Path
 
 import pytest
 
 from cmk.utils.hostaddress import HostName
 
 import cmk.ec.export as ec
-from cmk.ec.history_sqlite import filters_to_sqlite_query, SQLiteHistory
-from cmk.ec.main import StatusTableHistory
+from cmk.ec.config import Config
+from cmk.ec.history_sqlite import filters_to_sqlite_query, SQLiteHistory, SQLiteSettings
+from cmk.ec.main import StatusTableEvents, StatusTableHistory
+from cmk.ec.perfcounters import Perfcounters
 from cmk.ec.query import QueryFilter, QueryGET, StatusTable
 
 
@@ -208,6 +212,7 @@ def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
     event2 = ec.Event(host=HostName("ABC2"), text="Event2 text", core_host=HostName("ABC"))
     history_sqlite.add(event=event1, what="NEW")
     history_sqlite.add(event=event2, what="NEW")
+    history_sqlite.write_pending()
 
     with history_sqlite.conn as connection:
         cur = connection.cursor()
@@ -218,3 +223,144 @@ def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
         history_sqlite.housekeeping()
         cur.execute("SELECT count(*) FROM history;")
         assert cur.fetchone()["count(*)"] == 1
+
+
+def _sqlite_history(
+    settings: ec.Settings,
+    config: Config,
+    database: Path,
+    *,
+    batch_size: int = 1000,
+    batch_interval: float = 60.0,
+    perfcounters: Perfcounters | None = None,
+) -> SQLiteHistory:
+    return SQLiteHistory(
+        SQLiteSettings.from_settings(settings, database=database),
+        {**config, "archive_mode": "sqlite"},
+        logging.getLogger("cmk.mkeventd"),
+        StatusTableEvents.columns,
+        StatusTableHistory.columns,
+        perfcounters,
+        batch_size=batch_size,
+        batch_interval=batch_interval,
+    )
+
+
+def _add_events(history: SQLiteHistory, num: int) -> None:
+    for n in range(num):
+        history.add(
+            ec.Event(host=HostName(f"host{n % 10}"), text=f"Event {n}", core_host=None, id=n),
+            what="NEW",
+        )
+
+
+def _num_rows(database: Path) -> int:
+    with sqlite3.connect(database) as connection:
+        num_rows: int = connection.execute("SELECT count(*) FROM history;").fetchone()[0]
+    return num_rows
+
+
+def _wait_for_rows(database: Path, num: int) -> None:
+    for _attempt in range(100):
+        if _num_rows(database) == num:
+            return
+        time.sleep(0.05)
+    assert _num_rows(database) == num
+
+
+def test_indexes_of_common_filters(history_sqlite: SQLiteHistory) -> None:
+    cur = history_sqlite.conn.cursor()
+    cur.row_factory = None
+    cur.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='history';")
+    assert {name for (name,) in cur.fetchall()} >= {
+        "history_time",
+        "history_host",
+        "history_rule_id",
+        "history_application",
+        "history_id",
+    }
+
+
+def test_flush_recreates_table(history_sqlite: SQLiteHistory) -> None:
+    _add_events(history_sqlite, 3)
+    history_sqlite.flush()
+    _add_events(history_sqlite, 1)
+    history_sqlite.write_pending()
+
+    assert history_sqlite.conn.execute("SELECT count(*) FROM history;").fetchone()[0] == 1
+
+
+def test_pending_entries_are_visible(history_sqlite: SQLiteHistory) -> None:
+    _add_events(history_sqlite, 3)
+
+    def get_table(name: str) -> StatusTable:
+        return StatusTableHistory(logging.getLogger("cmk.mkeventd"), history_sqlite)
+
+    query = QueryGET(get_table, ["GET history", "Filter: event_host = host1"], logging.getLogger())
+    assert [row["text"] for row in history_sqlite.get(query)] == ["Event 1"]  # type: ignore[call-overload]
+
+
+def test_writes_full_batch(settings: ec.Settings, config: Config, tmp_path: Path) -> None:
+    database = tmp_path / "history.sqlite"
+    history = _sqlite_history(settings, config, database, batch_size=10)
+    try:
+        _add_events(history, 9)
+        time.sleep(0.1)
+        assert _num_rows(database) == 0
+
+        _add_events(history, 1)
+        _wait_for_rows(database, 10)
+    finally:
+        history.close()
+
+
+def test_writes_after_interval(settings: ec.Settings, config: Config, tmp_path: Path) -> None:
+    database = tmp_path / "history.sqlite"
+    history = _sqlite_history(settings, config, database, batch_interval=0.1)
+    try:
+        _add_events(history, 5)
+        _wait_for_rows(database, 5)
+    finally:
+        history.close()
+
+
+def test_close_writes_pending(settings: ec.Settings, config: Config, tmp_path: Path) -> None:
+    database = tmp_path / "history.sqlite"
+    history = _sqlite_history(settings, config, database)
+    _add_events(history, 5)
+    assert _num_rows(database) == 0
+
+    history.close()
+    history.close()
+
+    assert _num_rows(database) == 5
+
+
+def test_perfcounters(
+    settings: ec.Settings, config: Config, tmp_path: Path, perfcounters: Perfcounters
+) -> None:
+    history = _sqlite_history(
+        settings, config, tmp_path / "history.sqlite", perfcounters=perfcounters
+    )
+    try:
+        _add_events(history, 5)
+        status = dict(
+            zip(
+                (name for name, _default in perfcounters.status_columns()),
+                perfcounters.get_status(),
+            )
+        )
+        assert status["status_history_queue"] == 5
+        assert status["status_average_history_flush_time"] == 0.0
+
+        history.write_pending()
+        status = dict(
+            zip(
+                (name for name, _default in perfcounters.status_columns()),
+                perfcounters.get_status(),
+            )
+        )
+        assert status["status_history_queue"] == 0
+        assert status["status_average_history_flush_time"] > 0.0
+    finally:
+        history.close()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import re
+from collections.abc import Sequence
+
+import pytest
+
+from livestatus import SiteId
+
+import cmk.ec.export as ec
+from cmk.ec.config import ServiceLevel
+from cmk.ec.event import create_event_from_syslog_message
+from cmk.ec.rule_matcher import find_rule_hits
+from cmk.ec.rule_prefilter import required_literal, RulePrefilter
+
+logger = logging.getLogger("cmk.mkeventd")
+
+
+def _rule(rule_id: str, invert_matching: bool = False, **kwargs: str) -> ec.Rule:
+    rule: ec.Rule = ec.Rule(
+        actions=[],
+        actions_in_downtime=True,
+        autodelete=False,
+        cancel_action_phases="always",
+        cancel_actions=[],
+        comment="",
+        description="",
+        disabled=False,
+        docu_url="",
+        id=rule_id,
+        invert_matching=invert_matching,
+        sl=ServiceLevel(precedence="message", value=0),
+        state=-1,
+        pack="pack",
+        **kwargs,  # type: ignore[typeddict-item]
+    )
+    ec.compile_rule(rule)
+    return rule
+
+
+def _event(message: str) -> ec.Event:
+    return create_event_from_syslog_message(message.encode(), None, None)
+
+
+@pytest.mark.parametrize(
+    "pattern,literal",
+    [
+        ("disk failed", "disk failed"),
+        (re.compile(r"disk (\w+) failed"), " failed"),
+        (re.compile(r"^Accepted \w+ for (\S+) from"), "accepted "),
+        (re.compile(r"colou?r depth"), "r depth"),
+        (re.compile(r"a\.b\x41c"), "a.b"),
+        (re.compile(r"temp(erature)? \d+C too high"), "c too high"),
+        (re.compile(r"x{2,3}yz"), "yz"),
+        (re.compile(r"fan [0-9]+ failed"), " failed"),
+        (re.compile(r"error|failure"), None),
+        (re.compile(r"(?x) verbose \s mode"), None),
+        (re.compile(r"\d+\.\d+"), "."),
+        (re.compile(r"gr[üu]n status"), "n status"),
+        (re.compile(r"grün"), None),
+    ],
+)
+def test_required_literal(pattern: ec.TextPattern, literal: str | None) -> None:
+    assert required_literal(pattern) == literal
+
+
+def test_candidates() -> None:
+    rules = [
+        _rule("disk", match=r"disk (\w+) failed"),
+        _rule("no_literal", match=r"\d+\s\w+"),
+        _rule("inverted", match="disk", invert_matching=True),
+        _rule("ok", match="link down", match_ok="link up"),
+        _rule("application", match="", match_application="sshd"),
+        _rule("host", match="failure", match_host="db01"),
+    ]
+    prefilter = RulePrefilter(rules)
+
+    def candidates(message: str) -> list[str]:
+        return [rule["id"] for rule in prefilter.candidates(rules, _event(message))]
+
+    assert candidates("<78>Jan  1 12:00:00 web01 cron: nothing happened") == [
+        "no_literal",
+        "inverted",
+    ]
+    assert candidates("<78>Jan  1 12:00:00 web01 kernel: DISK sda FAILED") == [
+        "disk",
+        "no_literal",
+        "inverted",
+    ]
+    assert candidates("<78>Jan  1 12:00:00 web01 kernel: Link up") == [
+        "no_literal",
+        "inverted",
+        "ok",
+    ]
+    assert candidates("<78>Jan  1 12:00:00 db01 sshd[12]: authentication failure") == [
+        "no_literal",
+        "inverted",
+        "application",
+        "host",
+    ]
+    # Lower case is not the same as case insensitive for all non ASCII texts
+    assert candidates("<78>Jan  1 12:00:00 web01 kernel: Größe") == [
+        "disk",
+        "no_literal",
+        "inverted",
+        "ok",
+    ]
+
+
+def _corpus_rules(num_rules: int) -> list[ec.Rule]:
+    templates = [
+        {"match": r"^Failed password for (invalid user )?(\S+) from {n}\."},
+        {"match": r"Out of memory: Killed process (\d+) \(job{n}\)"},
+        {"match": r"I/O error, dev sd{n}, sector \d+", "match_application": "kernel"},
+        {"match": r"link{n} (down|up)", "match_ok": r"link{n} is up again"},
+        {"match": "backup job {n} failed", "match_host": r"^backup"},
+        {"match": r"temperature (\d+)C above threshold on sensor {n}\b"},
+        {"match": r"service{n}\.service: Main process exited", "match_application": "systemd"},
+        {"match": r"\d+ queued messages for relay{n}"},
+    ]
+    rules = []
+    for number in range(num_rules):
+        template = templates[number % len(templates)]
+        rules.append(
+            _rule(
+                f"rule{number}",
+                False,
+                **{key: value.replace("{n}", str(number)) for key, value in template.items()},
+            )
+        )
+    rules.append(_rule("catch_all", match=""))
+    return rules
+
+
+def _corpus_messages(num_messages: int) -> list[str]:
+    texts = [
+        "sshd[812]: Failed password for invalid user admin from 8.8.8.8 port 22 ssh2",
+        "sshd[812]: Failed password for root from 16.1.1.1 port 22 ssh2",
+        "kernel: Out of memory: Killed process 4711 (job24)",
+        "kernel: blk_update_request: I/O error, dev sd42, sector 1024",
+        "NetworkManager[1]: link3 down",
+        "NetworkManager[1]: link3 is up again",
+        "cron[99]: backup job 4 failed",
+        "sensord: temperature 82C above threshold on sensor 5",
+        "systemd[1]: service6.service: Main process exited, code=exited, status=1/FAILURE",
+        "postfix/qmgr[3]: 1234 queued messages for relay7",
+        "CRON[4242]: (root) CMD (command -v debian-sa1 > /dev/null && debian-sa1 1 1)",
+        "dhclient[777]: DHCPACK of 10.0.0.17 from 10.0.0.1",
+    ]
+    hosts = ["web01", "db02", "backup03", "fw04"]
+    return [
+        f"<78>Jan  1 12:00:00 {hosts[number % len(hosts)]} {texts[number % len(texts)]}"
+        for number in range(num_messages)
+    ]
+
+
+def _rule_hits(
+    matcher: ec.RuleMatcher, rules: Sequence[ec.Rule], event: ec.Event
+) -> list[tuple[str, ec.MatchSuccess]]:
+    return [
+        (rule["id"], result)
+        for rule, result in find_rule_hits(rules, event, matcher.event_rule_matches, logger)
+    ]
+
+
+def test_candidates_match_like_all_rules() -> None:
+    rules = _corpus_rules(200)
+    prefilter = RulePrefilter(rules)
+    matcher = ec.RuleMatcher(None, SiteId("test_site"), lambda time_period_name: True)
+
+    for message in _corpus_messages(48):
+        event = _event(message)
+        assert _rule_hits(matcher, prefilter.candidates(rules, event), event) == _rule_hits(
+            matcher, rules, event
+        )
+        assert len(prefilter.candidates(rules, event)) < len(rules) // 4
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        _rule("match_ok", match="", match_ok="recovered"),
+        _rule("match_ok_only", match_ok="recovered"),
+        _rule("cancel_application", match="", cancel_application="sshd"),
+        _rule("cancel_application_only", cancel_application="sshd"),
+        _rule("cancel_application_and_match", match="failed", cancel_application="sshd"),
+    ],
+)
+@pytest.mark.parametrize(
+    "message",
+    [
+        "<78>Jan  1 12:00:00 web01 kernel: disk failed",
+        "<78>Jan  1 12:00:00 web01 kernel: disk recovered",
+        "<78>Jan  1 12:00:00 web01 sshd[12]: disk failed",
+        "<78>Jan  1 12:00:00 web01 sshd[12]: disk recovered",
+    ],
+)
+def test_candidates_without_positive_pattern(rule: ec.Rule, message: str) -> None:
+    matcher = ec.RuleMatcher(None, SiteId("test_site"), lambda time_period_name: True)
+    event = _event(message)
+    assert _rule_hits(matcher, RulePrefilter([rule]).candidates([rule], event), event) == (
+        _rule_hits(matcher, [rule], event)
+    )
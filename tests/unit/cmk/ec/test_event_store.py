@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import pytest
+
+from tests.testlib import CMKEventConsole
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.ec.event import Event
+from cmk.ec.event_store import EventStore
+from cmk.ec.main import EventStatus
+
+
+def _event(event_id: int, host: str, rule_id: str) -> Event:
+    event = CMKEventConsole.new_event({"host": HostName(host), "rule_id": rule_id})
+    event["id"] = event_id
+    return event
+
+
+@pytest.fixture(name="store")
+def fixture_store() -> EventStore:
+    return EventStore(
+        [
+            _event(1, "host1", "rule1"),
+            _event(2, "host2", "rule1"),
+            _event(3, "host1", "rule2"),
+            _event(4, "host2", "rule2"),
+        ]
+    )
+
+
+def _ids(events: object) -> list[int]:
+    assert isinstance(events, list)
+    return [event["id"] for event in events]
+
+
+def test_event_store_keeps_order(store: EventStore) -> None:
+    assert _ids(store.to_list()) == [1, 2, 3, 4]
+    assert len(store) == 4
+
+
+def test_event_store_lookups(store: EventStore) -> None:
+    assert store.get(3) is store.to_list()[2]
+    assert store.get(42) is None
+    assert _ids(store.by_rule_id("rule2")) == [3, 4]
+    assert _ids(store.by_host("host2")) == [2, 4]
+    assert _ids(store.by_ids([4, 1, 42])) == [1, 4]
+    assert store.by_rule_id("unknown") == []
+
+
+def test_event_store_oldest(store: EventStore) -> None:
+    assert (oldest := store.oldest()) is not None and oldest["id"] == 1
+    assert (oldest := store.oldest_of_rule("rule2")) is not None and oldest["id"] == 3
+    assert (oldest := store.oldest_of_host("host2")) is not None and oldest["id"] == 2
+    assert store.oldest_of_host("unknown") is None
+
+
+def test_event_store_remove(store: EventStore) -> None:
+    event = store.get(1)
+    assert event is not None
+    store.remove(event)
+
+    assert _ids(store.to_list()) == [2, 3, 4]
+    assert _ids(store.by_host("host1")) == [3]
+    assert _ids(store.by_rule_id("rule1")) == [2]
+    with pytest.raises(ValueError):
+        store.remove(event)
+
+
+def test_event_store_remove_equal_copy(store: EventStore) -> None:
+    event = store.get(1)
+    assert event is not None
+    with pytest.raises(ValueError):
+        store.remove(Event(**event))
+
+
+def test_event_store_duplicate_id(store: EventStore) -> None:
+    with pytest.raises(ValueError):
+        store.add(_event(1, "host3", "rule3"))
+
+
+def test_event_store_reindex(store: EventStore) -> None:
+    event = store.get(3)
+    assert event is not None
+    event["host"] = HostName("host2")
+    store.reindex(event)
+
+    assert _ids(store.by_host("host1")) == [1]
+    assert _ids(store.by_host("host2")) == [2, 3, 4]
+
+    store.remove(event)
+    assert _ids(store.by_host("host2")) == [2, 4]
+
+
+def test_remove_oldest_event_of_host(event_status: EventStatus) -> None:
+    for host in ("host1", "host2", "host1"):
+        event_status.new_event(
+            CMKEventConsole.new_event({"host": HostName(host), "core_host": None})
+        )
+
+    event_status.remove_oldest_event(
+        "by_host", CMKEventConsole.new_event({"host": HostName("host1"), "core_host": None})
+    )
+
+    assert [(event["id"], event["host"]) for event in event_status.events()] == [
+        (2, "host2"),
+        (3, "host1"),
+    ]
+    assert (
+        event_status.get_num_existing_events_by(
+            "by_host", {"host": HostName("host1"), "core_host": None}
+        )
+        == 1
+    )
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import asyncio
+import bisect
+import threading
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import cast
+
+import pytest
+from pyasn1.codec.ber import decoder, encoder  # type: ignore[import]
+from pysnmp import hlapi  # type: ignore[import]
+from pysnmp.proto import api, rfc1902, rfc1905  # type: ignore[import]
+
+from cmk.utils.exceptions import MKGeneralException
+from cmk.utils.hostaddress import HostAddress, HostName
+from cmk.utils.log import logger
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import (
+    BackendOIDSpec,
+    BackendSNMPTree,
+    SNMPBackendEnum,
+    SNMPContextTimeout,
+    SNMPHostConfig,
+    SNMPVersion,
+    SpecialColumn,
+)
+
+from cmk.fetchers.snmp import make_backend
+from cmk.fetchers.snmp_backend.asynchronous import AsyncSNMPBackend, fetch_snmp_sections
+
+_OIDTuple = tuple[int, ...]
+
+_IF_TABLE = (1, 3, 6, 1, 2, 1, 2, 2, 1)
+
+_RECORDS: Mapping[_OIDTuple, object] = {
+    (1, 3, 6, 1, 2, 1, 1, 1, 0): rfc1902.OctetString(b"Stand-in agent"),
+    (1, 3, 6, 1, 2, 1, 1, 2, 0): rfc1902.ObjectName((1, 3, 6, 1, 4, 1, 8072)),
+    (1, 3, 6, 1, 2, 1, 1, 3, 0): rfc1902.TimeTicks(4242),
+    **{(*_IF_TABLE, 1, index): rfc1902.Integer(index) for index in range(1, 4)},
+    (*_IF_TABLE, 2, 1): rfc1902.OctetString(b"lo"),
+    (*_IF_TABLE, 2, 2): rfc1902.OctetString(b"eth0"),
+    (*_IF_TABLE, 2, 3): rfc1902.OctetString(b"\x00\xff"),
+    (*_IF_TABLE, 10, 1): rfc1902.Counter32(1000),
+    (*_IF_TABLE, 10, 2): rfc1902.Counter32(2000),
+    (*_IF_TABLE, 10, 3): rfc1902.Counter32(3000),
+    (1, 3, 6, 1, 2, 1, 4, 20, 1, 1, 127, 0, 0, 1): rfc1902.IpAddress("127.0.0.1"),
+}
+
+
+class _StandInAgent(asyncio.DatagramProtocol):
+    """Answers SNMPv1 and SNMPv2c requests from a fixed set of records"""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        records: Mapping[_OIDTuple, object],
+        *,
+        delay: float,
+        silent: bool,
+    ) -> None:
+        self._loop = loop
+        self._records = sorted(records.items())
+        self._oids = [oid for oid, _value in self._records]
+        self._delay = delay
+        self._silent = silent
+        self._transport: asyncio.DatagramTransport | None = None
+        self.requests = 0
+        self.bulk_variables: list[int] = []
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = cast(asyncio.DatagramTransport, transport)
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self.requests += 1
+        if self._silent:
+            return
+        response = self._respond(data)
+        self._loop.call_later(self._delay, self._send, response, addr)
+
+    def _send(self, response: bytes, addr: tuple[str, int]) -> None:
+        assert self._transport is not None
+        self._transport.sendto(response, addr)
+
+    def _next(self, oid: _OIDTuple) -> tuple[_OIDTuple, object] | None:
+        index = bisect.bisect_right(self._oids, oid)
+        return self._records[index] if index < len(self._records) else None
+
+    def _respond(self, data: bytes) -> bytes:
+        version = int(api.decodeMessageVersion(data))
+        proto = api.protoModules[version]
+        request, _rest = decoder.decode(data, asn1Spec=proto.Message())
+        response = proto.apiMessage.getResponse(request)
+        pdu = proto.apiMessage.getPDU(request)
+        oids = [tuple(oid) for oid, _value in proto.apiPDU.getVarBinds(pdu)]
+
+        if pdu.isSameTypeWith(proto.GetRequestPDU()):
+            records = dict(self._records)
+            variables = [(oid, records.get(oid)) for oid in oids]
+        elif pdu.isSameTypeWith(proto.GetNextRequestPDU()):
+            variables = [self._next(oid) or (oid, None) for oid in oids]
+        else:
+            repetitions = proto.apiBulkPDU.getMaxRepetitions(pdu)
+            self.bulk_variables.append(repetitions * len(oids))
+            variables = []
+            for _repetition in range(repetitions):
+                variables += [self._next(oid) or (oid, None) for oid in oids]
+                oids = [oid for oid, _value in variables[-len(oids) :]]
+
+        response_pdu = proto.apiMessage.getPDU(response)
+        if version == api.protoVersion1 and any(value is None for _oid, value in variables):
+            proto.apiPDU.setErrorStatus(response_pdu, "noSuchName")
+            proto.apiPDU.setErrorIndex(response_pdu, 1)
+            proto.apiPDU.setVarBinds(response_pdu, [(oid, rfc1902.Null()) for oid in oids])
+        else:
+            missing = (
+                rfc1905.noSuchInstance
+                if pdu.isSameTypeWith(proto.GetRequestPDU())
+                else rfc1905.endOfMibView
+            )
+            proto.apiPDU.setVarBinds(
+                response_pdu,
+                [(oid, missing if value is None else value) for oid, value in variables],
+            )
+        return encoder.encode(response)
+
+
+@contextmanager
+def _stand_in_agents(
+    count: int, *, delay: float = 0.0, silent: Sequence[int] = ()
+) -> Iterator[Sequence[tuple[int, _StandInAgent]]]:
+    """Run agents on local UDP ports in a thread of their own"""
+    loop = asyncio.new_event_loop()
+    agents = []
+
+    async def start() -> None:
+        for number in range(count):
+            agent = _StandInAgent(loop, _RECORDS, delay=delay, silent=number in silent)
+            transport, _protocol = await loop.create_datagram_endpoint(
+                lambda agent=agent: agent, local_addr=("127.0.0.1", 0)  # type: ignore[misc]
+            )
+            agents.append((transport.get_extra_info("sockname")[1], agent))
+
+    loop.run_until_complete(start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield agents
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def _snmp_config(
+    port: int,
+    *,
+    hostname: str = "stand-in",
+    snmp_version: SNMPVersion = SNMPVersion.V2C,
+    credentials: str | tuple[str, ...] = "public",
+    bulkwalk_enabled: bool = True,
+    bulk_walk_size_of: int = 2,
+) -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName(hostname),
+        ipaddress=HostAddress("127.0.0.1"),
+        credentials=credentials,
+        port=port,
+        bulkwalk_enabled=bulkwalk_enabled,
+        snmp_version=snmp_version,
+        bulk_walk_size_of=bulk_walk_size_of,
+        timing={"timeout": 0.2, "retries": 0},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.ASYNCIO,
+    )
+
+
+_IF_TABLE_COLUMNS = [f".1.3.6.1.2.1.2.2.1.{column}" for column in (1, 2, 10)]
+
+_IF_TABLE_ROWS = [
+    [
+        (f"{_IF_TABLE_COLUMNS[0]}.1", b"1"),
+        (f"{_IF_TABLE_COLUMNS[0]}.2", b"2"),
+        (f"{_IF_TABLE_COLUMNS[0]}.3", b"3"),
+    ],
+    [
+        (f"{_IF_TABLE_COLUMNS[1]}.1", b"lo"),
+        (f"{_IF_TABLE_COLUMNS[1]}.2", b"eth0"),
+        (f"{_IF_TABLE_COLUMNS[1]}.3", b"\x00\xff"),
+    ],
+    [
+        (f"{_IF_TABLE_COLUMNS[2]}.1", b"1000"),
+        (f"{_IF_TABLE_COLUMNS[2]}.2", b"2000"),
+        (f"{_IF_TABLE_COLUMNS[2]}.3", b"3000"),
+    ],
+]
+
+
+def test_make_backend(tmp_path: Path) -> None:
+    backend = make_backend(_snmp_config(161), logger, use_cache=False, stored_walk_path=tmp_path)
+    assert isinstance(backend, AsyncSNMPBackend)
+
+
+@pytest.mark.parametrize("snmp_version", [SNMPVersion.V1, SNMPVersion.V2C])
+def test_get(snmp_version: SNMPVersion) -> None:
+    with _stand_in_agents(1) as [(port, _agent)]:
+        backend = AsyncSNMPBackend(_snmp_config(port, snmp_version=snmp_version), logger)
+        assert backend.get(".1.3.6.1.2.1.1.1.0", context="") == b"Stand-in agent"
+        assert backend.get(".1.3.6.1.2.1.1.2.0", context="") == b".1.3.6.1.4.1.8072"
+        assert backend.get(".1.3.6.1.2.1.1.3.0", context="") == b"4242"
+        assert backend.get(".1.3.6.1.2.1.1.4.0", context="") is None
+        assert backend.get(".1.3.6.1.2.1.4.20.1.1.*", context="") == b"127.0.0.1"
+        assert backend.get(".1.3.6.1.2.1.4.21.*", context="") is None
+
+
+@pytest.mark.parametrize(
+    "snmp_version, bulkwalk_enabled",
+    [
+        (SNMPVersion.V1, False),
+        (SNMPVersion.V2C, False),
+        (SNMPVersion.V2C, True),
+    ],
+)
+def test_walk_columns(snmp_version: SNMPVersion, bulkwalk_enabled: bool) -> None:
+    with _stand_in_agents(1) as [(port, _agent)]:
+        backend = AsyncSNMPBackend(
+            _snmp_config(port, snmp_version=snmp_version, bulkwalk_enabled=bulkwalk_enabled),
+            logger,
+        )
+        assert backend.walk_columns(_IF_TABLE_COLUMNS, context="") == _IF_TABLE_ROWS
+        assert backend.walk(_IF_TABLE_COLUMNS[1], context="") == _IF_TABLE_ROWS[1]
+        assert not backend.walk(".1.3.6.1.2.1.2.2.1.5", context="")
+        assert backend.walk(".1.3.6.1.2.1.1.1.0", context="") == [
+            (".1.3.6.1.2.1.1.1.0", b"Stand-in agent")
+        ]
+        assert not backend.walk(".1.3.6.1.2.1.5", context="")
+
+
+def test_walk_columns_in_bulk() -> None:
+    with _stand_in_agents(1) as [(port, agent)]:
+        backend = AsyncSNMPBackend(_snmp_config(port, bulk_walk_size_of=6), logger)
+        assert backend.walk_columns(_IF_TABLE_COLUMNS, context="") == _IF_TABLE_ROWS
+        # Two rows of all columns per request, the last one finds their ends
+        assert agent.requests == 2
+        assert agent.bulk_variables == [6, 6]
+
+
+def test_walk_columns_in_bulk_with_more_columns_than_rows() -> None:
+    with _stand_in_agents(1) as [(port, agent)]:
+        backend = AsyncSNMPBackend(_snmp_config(port, bulk_walk_size_of=2), logger)
+        assert backend.walk_columns(_IF_TABLE_COLUMNS, context="") == _IF_TABLE_ROWS
+        # One row of all columns per request
+        assert agent.bulk_variables == [3, 3, 3, 3]
+
+
+def test_walk_columns_of_nested_columns() -> None:
+    with _stand_in_agents(1) as [(port, _agent)]:
+        backend = AsyncSNMPBackend(_snmp_config(port), logger)
+        assert backend.walk_columns([".1.3.6.1.2.1.2.2", _IF_TABLE_COLUMNS[0]], context="") == [
+            [row for rows in _IF_TABLE_ROWS for row in rows],
+            _IF_TABLE_ROWS[0],
+        ]
+
+
+def test_timeout() -> None:
+    with _stand_in_agents(1, silent=[0]) as [(port, agent)]:
+        backend = AsyncSNMPBackend(_snmp_config(port), logger)
+        with pytest.raises(SNMPContextTimeout):
+            backend.get(".1.3.6.1.2.1.1.1.0", context="")
+        with pytest.raises(SNMPContextTimeout):
+            backend.walk_columns(_IF_TABLE_COLUMNS, context="")
+        assert agent.requests == 2
+
+
+@pytest.mark.parametrize(
+    "credentials, auth_protocol, priv_protocol",
+    [
+        (
+            ("noAuthNoPriv", "user"),
+            hlapi.usmNoAuthProtocol,
+            hlapi.usmNoPrivProtocol,
+        ),
+        (
+            ("authNoPriv", "SHA-256", "user", "authpass"),
+            hlapi.usmHMAC192SHA256AuthProtocol,
+            hlapi.usmNoPrivProtocol,
+        ),
+        (
+            ("authPriv", "md5", "user", "authpass", "AES-256", "privpass"),
+            hlapi.usmHMACMD5AuthProtocol,
+            hlapi.usmAesBlumenthalCfb256Protocol,
+        ),
+    ],
+)
+def test_v3_auth_data(
+    credentials: tuple[str, ...], auth_protocol: object, priv_protocol: object
+) -> None:
+    auth_data = AsyncSNMPBackend(
+        _snmp_config(161, snmp_version=SNMPVersion.V3, credentials=credentials), logger
+    )._auth_data()
+    assert auth_data.userName == "user"
+    assert auth_data.authProtocol == auth_protocol
+    assert auth_data.privProtocol == priv_protocol
+
+
+@pytest.mark.parametrize(
+    "credentials",
+    [
+        ("authNoPriv", "sha1", "user", "authpass"),
+        ("authPriv", "sha", "user", "authpass", "3DES", "privpass"),
+    ],
+)
+def test_v3_auth_data_unknown_protocol(credentials: tuple[str, ...]) -> None:
+    backend = AsyncSNMPBackend(
+        _snmp_config(161, snmp_version=SNMPVersion.V3, credentials=credentials), logger
+    )
+    with pytest.raises(MKGeneralException):
+        backend._auth_data()
+
+
+_SECTIONS = {
+    SectionName("snmp_info"): [
+        BackendSNMPTree(
+            base=".1.3.6.1.2.1.1",
+            oids=[
+                BackendOIDSpec("1.0", "string", False),
+                BackendOIDSpec("3.0", "string", False),
+            ],
+        )
+    ],
+    SectionName("interfaces"): [
+        BackendSNMPTree(
+            base=".1.3.6.1.2.1.2.2.1",
+            oids=[
+                BackendOIDSpec(SpecialColumn.END, "string", False),
+                BackendOIDSpec("2", "binary", False),
+                BackendOIDSpec("10", "string", False),
+            ],
+        )
+    ],
+}
+
+_SECTIONS_DATA = {
+    SectionName("snmp_info"): [[["Stand-in agent", "4242"]]],
+    SectionName("interfaces"): [
+        [
+            ["1", [108, 111], "1000"],
+            ["2", [101, 116, 104, 48], "2000"],
+            ["3", [0, 255], "3000"],
+        ]
+    ],
+}
+
+
+def test_fetch_snmp_sections() -> None:
+    with _stand_in_agents(20, silent=[3]) as agents:
+        hosts = [
+            (_snmp_config(port, hostname=f"host{number}"), _SECTIONS)
+            for number, (port, _agent) in enumerate(agents)
+        ]
+        fetched = asyncio.run(fetch_snmp_sections(hosts, logger=logger))
+
+    assert list(fetched) == [f"host{number}" for number in range(20)]
+    for hostname, raw_data in fetched.items():
+        if hostname == "host3":
+            assert isinstance(raw_data, SNMPContextTimeout)
+        else:
+            assert raw_data == _SECTIONS_DATA
+
+
+def test_fetch_snmp_sections_one_by_one() -> None:
+    with _stand_in_agents(5, delay=0.01) as agents:
+        hosts = [
+            (_snmp_config(port, hostname=f"host{number}"), _SECTIONS)
+            for number, (port, _agent) in enumerate(agents)
+        ]
+        one_by_one = asyncio.run(fetch_snmp_sections(hosts, logger=logger, max_concurrent_hosts=1))
+        concurrently = asyncio.run(fetch_snmp_sections(hosts, logger=logger))
+
+    assert one_by_one == concurrently == {f"host{number}": _SECTIONS_DATA for number in range(5)}
@@ -5,7 +5,10 @@
 
 # pylint: disable=protected-access
 
+import os
+import sys
 from collections.abc import Sequence
+from pathlib import Path
 from typing import NamedTuple
 
 import pytest
@@ -330,3 +333,169 @@ def test_priv_proto(proto: str, result: str) -> None:
 def test_priv_proto_unknown(proto: str) -> None:
     with pytest.raises(MKGeneralException):
         classic_snmp._priv_proto_for(proto)
+
+
+# Answers like snmpget, snmpbulkwalk and snmpbulkget of net-snmp from an snmprec file.
+# Every request to the agent takes the given round trip time.
+_FAKE_NET_SNMP = r"""
+import bisect, os, sys, time
+
+def oid_key(oid):
+    return tuple(int(part) for part in oid.strip(".").split("."))
+
+records = []
+with open(os.environ["FAKE_SNMPREC"]) as snmprec:
+    for line in snmprec:
+        oid, tag, value = line.rstrip("\n").split("|", 2)
+        records.append((oid_key(oid), "." + oid, f'"{value}"' if tag == "4" else value))
+keys = [key for key, _oid, _value in records]
+
+def request(oids, repetitions):
+    with open(os.environ["FAKE_SNMP_LOG"], "a") as log:
+        log.write(f"{os.path.basename(sys.argv[0])}[{os.getpid()}]:{len(oids) * repetitions}\n")
+    time.sleep(float(os.environ["FAKE_SNMP_RTT"]))
+    found = [records[bisect.bisect_right(keys, oid_key(oid)):][:repetitions] for oid in oids]
+    return [
+        found[column][row][1:] if row < len(found[column]) else (oids[column], "END")
+        for row in range(repetitions)
+        for column in range(len(oids))
+    ]
+
+def get(oid):
+    request([], 0)
+    return [(oid, value) for _key, record_oid, value in records if record_oid == oid]
+
+oids = [arg for arg in sys.argv[1:] if arg.startswith(".")]
+if sys.argv[0].endswith("snmpget"):
+    variables = get(oids[0]) or [(oids[0], "No Such Object available on this agent at this OID")]
+elif sys.argv[0].endswith("snmpbulkget"):
+    repetitions = next(int(arg[3:]) for arg in sys.argv if arg.startswith("-Cr"))
+    variables = request(oids, repetitions)
+else:
+    repetitions = next(int(arg[3:]) for arg in sys.argv if arg.startswith("-Cr"))
+    variables, last = [], oids[0]
+    while True:
+        response = [(oid, value) for oid, value in request([last], repetitions) if value != "END"]
+        inside = [(oid, value) for oid, value in response if oid.startswith(f"{oids[0]}.")]
+        variables += inside
+        if not response or len(inside) < len(response) or len(response) < repetitions:
+            break
+        last = response[-1][0]
+    variables = variables or get(oids[0])
+for oid, value in variables:
+    print(oid, "=", "No more variables left in this MIB View" if value == "END" else value)
+"""
+
+_IF_TABLE = ".1.3.6.1.2.1.2.2.1"
+
+
+def _if_table_columns(columns: int) -> Sequence[str]:
+    return [f"{_IF_TABLE}.{column}" for column in range(1, columns + 1)]
+
+
+@pytest.fixture(name="fake_net_snmp")
+def fixture_fake_net_snmp(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    rows = 200
+    records = [
+        f"{oid.lstrip('.')}.{row}|{4 if column % 2 else 2}|{f'port {row}' if column % 2 else row}"
+        for column, oid in enumerate(_if_table_columns(22), start=1)
+        for row in range(1, rows + 1)
+    ]
+    (tmp_path / "if.snmprec").write_text(
+        "\n".join(["1.3.6.1.2.1.1.5.0|4|switch", *records, "1.3.6.1.2.1.31.1.1.1.1.1|4|eth0"])
+        + "\n"
+    )
+    for command in ("snmpget", "snmpbulkwalk", "snmpbulkget"):
+        (tmp_path / command).write_text(f"#!{sys.executable} -S\n{_FAKE_NET_SNMP}")
+        (tmp_path / command).chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_SNMPREC", str(tmp_path / "if.snmprec"))
+    monkeypatch.setenv("FAKE_SNMP_LOG", str(tmp_path / "requests.log"))
+    monkeypatch.setenv("FAKE_SNMP_RTT", "0.002")
+    return tmp_path / "requests.log"
+
+
+def _bulkwalk_backend() -> ClassicSNMPBackend:
+    return ClassicSNMPBackend(
+        SNMPHostConfig(
+            is_ipv6_primary=False,
+            hostname=HostName("switch"),
+            ipaddress=HostAddress("127.0.0.1"),
+            credentials="public",
+            port=161,
+            bulkwalk_enabled=True,
+            snmp_version=SNMPVersion.V2C,
+            bulk_walk_size_of=10,
+            timing={},
+            oid_range_limits={},
+            snmpv3_contexts=[],
+            character_encoding=None,
+            snmp_backend=SNMPBackendEnum.CLASSIC,
+        ),
+        logger,
+    )
+
+
+def test_walk_columns_like_walk(fake_net_snmp: Path) -> None:
+    backend = _bulkwalk_backend()
+    columns = [*_if_table_columns(22)[1:5], f"{_IF_TABLE}.22", ".1.3.6.1.2.1.31.1.1.1.1"]
+
+    assert backend.walk_columns(columns, context="") == [
+        backend.walk(column, context="") for column in columns
+    ]
+    assert backend.walk_columns(columns, context="")[0][:2] == [
+        (f"{_IF_TABLE}.2.1", b"1"),
+        (f"{_IF_TABLE}.2.2", b"2"),
+    ]
+    assert backend.walk_columns(columns, context="")[-1] == [(".1.3.6.1.2.1.31.1.1.1.1.1", b"eth0")]
+
+
+def test_walk_columns_of_scalars(fake_net_snmp: Path) -> None:
+    backend = _bulkwalk_backend()
+    columns = [".1.3.6.1.2.1.1.5.0", ".1.3.6.1.2.1.1.6.0", f"{_IF_TABLE}.2"]
+
+    assert backend.walk_columns(columns, context="") == [
+        backend.walk(column, context="") for column in columns
+    ]
+    assert backend.walk_columns(columns, context="")[:2] == [
+        [(".1.3.6.1.2.1.1.5.0", b"switch")],
+        [],
+    ]
+
+
+def test_walk_columns_of_nested_columns(fake_net_snmp: Path) -> None:
+    backend = _bulkwalk_backend()
+    columns = [_IF_TABLE, f"{_IF_TABLE}.2"]
+
+    assert backend.walk_columns(columns, context="") == [
+        backend.walk(column, context="") for column in columns
+    ]
+    assert {request.split("[")[0] for request in fake_net_snmp.read_text().split()} == {
+        "snmpbulkwalk"
+    }
+
+
+@pytest.mark.parametrize("columns", [2, 4, 20])
+def test_walk_columns_asks_for_bulk_walk_size(fake_net_snmp: Path, columns: int) -> None:
+    backend = _bulkwalk_backend()
+    backend.walk_columns(_if_table_columns(columns), context="")
+
+    variables = [
+        int(request.rsplit(":", 1)[1])
+        for request in fake_net_snmp.read_text().split()
+        if request.startswith("snmpbulkget")
+    ]
+    assert variables
+    assert max(variables) <= max(backend.config.bulk_walk_size_of, columns)
+
+
+def test_walk_columns_needs_fewer_requests(fake_net_snmp: Path) -> None:
+    backend = _bulkwalk_backend()
+    columns = _if_table_columns(20)
+
+    walked = [backend.walk(column, context="") for column in columns]
+    walk_requests = fake_net_snmp.read_text().split()
+    fake_net_snmp.unlink()
+
+    assert backend.walk_columns(columns, context="") == walked
+    assert len(fake_net_snmp.read_text().split()) < len(walk_requests)
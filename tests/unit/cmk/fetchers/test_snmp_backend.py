@@ -5,11 +5,19 @@
 
 # pylint: disable=protected-access
 
+import logging
+from collections.abc import Sequence
 from pathlib import Path
 
 import pytest
 
+from cmk.utils.exceptions import MKGeneralException
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+
 import cmk.fetchers.snmp_backend._utils as utils
+import cmk.fetchers.snmp_backend.stored_walk as stored_walk
 from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
 
 
@@ -35,13 +43,35 @@ class TestStoredWalkSNMPBackend:
             ("1.2.3", ".1.2.3", 0),
             (".1.2.3", "1.2.3", 0),
             (".1.2.3", ".1.2.3", 0),
-            ("1.2.3", "1.2.3.4", 0),
+            ("1.2.3", "1.2.3.4", -1),
             ("1.2.3.4", "1.2.3", 1),
             ("1.2.3", "4.5.6", -1),
+            ("1.2.10", "1.2.9", 1),
+            ("1.2.256", "1.2.255.1", 1),
+            ("1.2.0", "1.2", 1),
+        ],
+    )
+    def test_encode_oid_keeps_order(self, a: str, b: str, result: int) -> None:
+        aa = stored_walk._encode_oid(a)
+        bb = stored_walk._encode_oid(b)
+        assert (aa > bb) - (aa < bb) == result
+
+    @pytest.mark.parametrize(
+        "oid, prefix, result",
+        [
+            ("1.2.3.4", "1.2.3", True),
+            ("1.2.3", "1.2.3", True),
+            ("1.2.34", "1.2.3", False),
+            ("1.2.300", "1.2.3", False),
+            ("1.2", "1.2.3", False),
         ],
     )
-    def test_compare_oids(self, a: str, b: str, result: int) -> None:
-        assert StoredWalkSNMPBackend._compare_oids(a, b) == result
+    def test_encode_oid_prefix(self, oid: str, prefix: str, result: bool) -> None:
+        assert stored_walk._encode_oid(oid).startswith(stored_walk._encode_oid(prefix)) is result
+
+    def test_encode_invalid_oid(self) -> None:
+        with pytest.raises(MKGeneralException):
+            stored_walk._encode_oid("1.2.a")
 
     def test_read_walk_data(self, tmpdir: Path) -> None:
         assert StoredWalkSNMPBackend.read_walk_from_path(tmpdir / "walkdata" / "1.txt") == [
@@ -54,6 +84,104 @@ class TestStoredWalkSNMPBackend:
         ]
 
 
+_WALK = """\
+.1.3.6.1.2.1.1.1.0 Linux bob 6.1.0
+.1.3.6.1.2.1.1.3.0 123456
+.1.3.6.1.2.1.2.2.1.2.1 "lo"
+.1.3.6.1.2.1.2.2.1.2.2 "eth0"
+.1.3.6.1.2.1.2.2.1.2.10 "eth1
+with a newline"
+.1.3.6.1.2.1.2.2.1.6.2 "B2 E0 7D 2C 4D 15 "
+.1.3.6.1.2.1.2.2.1.6.10
+.1.3.6.1.2.1.2.2.1.60.1 60
+"""
+
+
+@pytest.fixture(name="backend")
+def fixture_backend(tmp_path: Path) -> StoredWalkSNMPBackend:
+    path = tmp_path / "bob"
+    path.write_text(_WALK)
+    return StoredWalkSNMPBackend(_snmp_config(), logging.getLogger("test"), path)
+
+
+def _snmp_config() -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("bob"),
+        ipaddress=HostAddress("1.2.3.4"),
+        credentials="public",
+        port=42,
+        bulkwalk_enabled=True,
+        snmp_version=SNMPVersion.V2C,
+        bulk_walk_size_of=0,
+        timing={},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.STORED_WALK,
+    )
+
+
+def test_stored_walk_walk(backend: StoredWalkSNMPBackend) -> None:
+    assert backend.walk(".1.3.6.1.2.1.2.2.1.2", context="") == [
+        (".1.3.6.1.2.1.2.2.1.2.1", b"lo"),
+        (".1.3.6.1.2.1.2.2.1.2.2", b"eth0"),
+        (".1.3.6.1.2.1.2.2.1.2.10", b"eth1\nwith a newline"),
+    ]
+    assert backend.walk(".1.3.6.1.2.1.2.2.1.6", context="") == [
+        (".1.3.6.1.2.1.2.2.1.6.2", b"\xb2\xe0},M\x15"),
+        (".1.3.6.1.2.1.2.2.1.6.10", b""),
+    ]
+    assert backend.walk(".1.3.6.1.2.1.2.2.1.7", context="") == []
+    assert backend.walk(".1.3.6.1.2.1.2.2.1.2.*", context="") == [(".1.3.6.1.2.1.2.2.1.2.1", b"lo")]
+
+
+def test_stored_walk_get(backend: StoredWalkSNMPBackend) -> None:
+    assert backend.get(".1.3.6.1.2.1.1.1.0", context="") == b"Linux bob 6.1.0"
+    assert backend.get(".1.3.6.1.2.1.1.1", context="") is None
+    assert backend.get(".1.3.6.1.2.1.1.*", context="") == b"Linux bob 6.1.0"
+    assert backend.get(".1.3.6.1.2.1.1.2.0", context="") is None
+
+
+def test_stored_walk_index_is_shared(backend: StoredWalkSNMPBackend) -> None:
+    other = StoredWalkSNMPBackend(_snmp_config(), logging.getLogger("test"), backend.path)
+    assert other.read_walk_index() is backend.read_walk_index()
+
+
+def test_stored_walk_index_is_renewed(backend: StoredWalkSNMPBackend) -> None:
+    assert backend.get(".1.3.6.1.2.1.1.3.0", context="") == b"123456"
+
+    backend.path.write_text(_WALK.replace("123456", "1234567"))
+    assert backend.get(".1.3.6.1.2.1.1.3.0", context="") == b"1234567"
+
+
+def test_stored_walk_file_is_read_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "big"
+    with path.open("w") as f:
+        for table in range(1, 6):
+            for column in range(1, 4):
+                for row in range(1, 21):
+                    f.write(f'.1.3.6.1.4.1.9.{table}.1.{column}.{row} "Value {row}"\n')
+    backend = StoredWalkSNMPBackend(_snmp_config(), logging.getLogger("test"), path)
+    read_paths = []
+    read_walk_from_path = StoredWalkSNMPBackend.read_walk_from_path
+
+    def _read_walk_from_path(path: Path) -> Sequence[str]:
+        read_paths.append(path)
+        return read_walk_from_path(path)
+
+    monkeypatch.setattr(
+        StoredWalkSNMPBackend, "read_walk_from_path", staticmethod(_read_walk_from_path)
+    )
+
+    rows = [backend.walk(f".1.3.6.1.4.1.9.{table}.1.2", context="") for table in range(1, 6)]
+
+    assert [len(table_rows) for table_rows in rows] == [20] * 5
+    assert rows[0][-1] == (".1.3.6.1.4.1.9.1.1.2.20", b"Value 20")
+    # The file is parsed once, the walks are lookups in the index
+    assert read_paths == [path]
+
+
 @pytest.fixture
 def create_files(tmpdir):
     tmpdir.mkdir("walkdata")
@@ -3,13 +3,22 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+from collections.abc import Sequence
 from typing import Literal
 
 import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
 
 from cmk.utils.exceptions import MKGeneralException
 
-from cmk.gui.graphing._timeseries import time_series_math
+from cmk.gui.graphing._timeseries import (
+    _time_series_math_pointwise,
+    _time_series_math_vectorized,
+    time_series_math,
+    time_series_operators,
+    VECTORIZED_MIN_OPERANDS,
+)
 from cmk.gui.graphing._type_defs import Operators
 from cmk.gui.time_series import TimeSeries
 
@@ -29,3 +38,43 @@ def test__time_series_math_exc_symbol(args: tuple[Literal["%"], list[TimeSeries]
 def test__time_series_math_stable_singles(operator: Operators) -> None:
     test_ts = TimeSeries([0, 180, 60, 6, 5, 10, None, -2, -3.14])
     assert time_series_math(operator, [test_ts]) == test_ts
+
+
+_TIME_SERIES_VALUES = st.lists(
+    st.one_of(
+        st.none(),
+        st.integers(min_value=-1000, max_value=1000),
+        st.floats(min_value=-1e6, max_value=1e6, allow_nan=False),
+    ),
+    min_size=0,
+    max_size=20,
+)
+
+
+def _time_series(values: Sequence[float | None]) -> TimeSeries:
+    return TimeSeries(values, (0, 60 * len(values), 60))
+
+
+@pytest.mark.parametrize("operator", list(time_series_operators()))
+@settings(max_examples=200)
+@given(data=st.data())
+def test__time_series_math_vectorized_equals_pointwise(
+    operator: Operators, data: st.DataObject
+) -> None:
+    num_operands = 2 if operator in ("-", "/") else data.draw(st.integers(1, 12))
+    operands = [_time_series(data.draw(_TIME_SERIES_VALUES)) for _ in range(num_operands)]
+
+    pointwise = _time_series_math_pointwise(operator, operands)
+    vectorized = _time_series_math_vectorized(operator, operands)
+
+    assert vectorized.twindow == pointwise.twindow
+    assert [v is None for v in vectorized.values] == [v is None for v in pointwise.values]
+    assert [v for v in vectorized.values if v is not None] == pytest.approx(
+        [v for v in pointwise.values if v is not None], rel=1e-9, abs=1e-6
+    )
+
+
+def test__time_series_math_selects_vectorized() -> None:
+    operands = [_time_series([n, None, 1.5]) for n in range(VECTORIZED_MIN_OPERANDS)]
+    result = time_series_math("+", operands)
+    assert result == _time_series([sum(range(VECTORIZED_MIN_OPERANDS)), None, 1.5 * len(operands)])
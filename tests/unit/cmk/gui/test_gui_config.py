@@ -3,7 +3,7 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
-# pylint: disable=redefined-outer-name
+# pylint: disable=redefined-outer-name,protected-access
 
 from dataclasses import asdict
 from pathlib import Path
@@ -239,6 +239,52 @@ def test_load_config_allows_local_plugin_setting(request_context: None) -> None:
     assert active_config.ding == "ding"  # type: ignore[attr-defined]
 
 
+def test_load_config_from_cache(request_context: None, monkeypatch: pytest.MonkeyPatch) -> None:
+    config_path = Path(cmk.utils.paths.default_config_dir, "multisite.d", "wato", "global.mk")
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    config_path.write_text("quicksearch_dropdown_limit = 1337\n")
+    cmk.gui.config.load_config()
+
+    with monkeypatch.context() as m:
+        m.setattr(
+            cmk.gui.config,
+            "_load_config_file_to",
+            lambda *args: pytest.fail("The config files did not change"),
+        )
+        cmk.gui.config.load_config()
+        assert active_config.quicksearch_dropdown_limit == 1337
+
+    config_path.write_text("quicksearch_dropdown_limit = 42\n")
+    cmk.gui.config.load_config()
+    assert active_config.quicksearch_dropdown_limit == 42
+
+    config_path.unlink()
+    cmk.gui.config.load_config()
+    assert active_config.quicksearch_dropdown_limit == 80
+
+
+def test_load_config_broken_cache(request_context: None) -> None:
+    with Path(cmk.utils.paths.default_config_dir, "multisite.mk").open("w") as f:
+        f.write("quicksearch_dropdown_limit = 1337\n")
+    cache_path = cmk.gui.config._config_cache_path()
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_bytes(b"broken")
+
+    cmk.gui.config.load_config()
+    assert active_config.quicksearch_dropdown_limit == 1337
+
+
+def test_load_config_not_cachable(request_context: None) -> None:
+    with Path(cmk.utils.paths.default_config_dir, "multisite.mk").open("w") as f:
+        f.write(
+            "quicksearch_dropdown_limit = 1337\ndef helper():\n    pass\nunpicklable = lambda: 0\n"
+        )
+
+    cmk.gui.config.load_config()
+    cmk.gui.config.load_config()
+    assert active_config.quicksearch_dropdown_limit == 1337
+
+
 @pytest.mark.usefixtures("load_config")
 def test_default_tags() -> None:
     groups = {
@@ -11,7 +11,7 @@ from pytest import MonkeyPatch
 import cmk.utils
 from cmk.utils.exceptions import MKGeneralException
 from cmk.utils.hostaddress import HostName
-from cmk.utils.structured_data import ImmutableTree, SDFilterChoice
+from cmk.utils.structured_data import archive_tree, ImmutableTree, SDFilterChoice
 
 import cmk.gui.inventory
 from cmk.gui.inventory import (
@@ -341,6 +341,26 @@ def test_get_history_archive_but_no_inv_tree(request_context: None) -> None:
     assert len(corrupted_history_files) == 0
 
 
+def test_get_history_of_archived_nodes(request_context: None) -> None:
+    hostname = HostName("inv-host")
+
+    # history
+    for timestamp, raw_tree in enumerate([{"inv": "attr-0"}, {"inv": "attr-1"}]):
+        archive_tree(
+            Path(cmk.utils.paths.inventory_archive_dir, hostname),
+            timestamp,
+            ImmutableTree.deserialize(raw_tree),
+        )
+
+    history, corrupted_history_files = cmk.gui.inventory.get_history(hostname)
+
+    assert [(entry.new, entry.changed, entry.removed) for entry in history] == [
+        (1, 0, 0),
+        (0, 1, 0),
+    ]
+    assert len(corrupted_history_files) == 0
+
+
 @pytest.fixture(name="create_inventory_history")
 def _create_inventory_history() -> None:
     hostname = HostName("inv-host")
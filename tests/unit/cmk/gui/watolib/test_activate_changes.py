@@ -18,6 +18,7 @@ import tests.testlib.utils as testlibutils
 from livestatus import SiteConfiguration, SiteId
 
 import cmk.utils.paths
+import cmk.utils.store as store
 import cmk.utils.version as cmk_version
 
 import cmk.gui.watolib.activate_changes as activate_changes
@@ -371,6 +372,51 @@ def test_get_config_sync_file_infos() -> None:
     }
 
 
+def test_config_sync_file_hashes_are_reused() -> None:
+    base_dir = cmk.utils.paths.omd_root / "replication"
+    _create_get_config_sync_file_infos_test_config(base_dir)
+    replication_paths = [
+        ReplicationPath("dir", "d4-multiple-files", "etc/d4", []),
+        ReplicationPath("dir", "links", "links", []),
+    ]
+
+    file_hashes = activate_changes.ConfigSyncFileHashes.load()
+    sync_infos = activate_changes._get_config_sync_file_infos(
+        replication_paths, base_dir, file_hashes=file_hashes
+    )
+    file_hashes.save()
+    assert (file_hashes.num_reused, file_hashes.num_computed) == (0, 4)
+
+    base_dir.joinpath("etc/d4/x1").write_text("Däng1 changed")
+    file_hashes = activate_changes.ConfigSyncFileHashes.load()
+    new_sync_infos = activate_changes._get_config_sync_file_infos(
+        replication_paths, base_dir, file_hashes=file_hashes
+    )
+    assert (file_hashes.num_reused, file_hashes.num_computed) == (3, 1)
+
+    assert new_sync_infos == {
+        **sync_infos,
+        "etc/d4/x1": ConfigSyncFileInfo(
+            st_mode=33200,
+            st_size=14,
+            link_target=None,
+            file_hash="56c2c0c6f715de302a848583d7cbd2fa3b0348a11c3cefd25a5240826bea8161",
+        ),
+    }
+
+
+def test_config_sync_file_hashes_drop_unused() -> None:
+    store.save_object_to_pickle_file(
+        activate_changes.ConfigSyncFileHashes.path(), {(1, 2, 3): "abc"}
+    )
+
+    file_hashes = activate_changes.ConfigSyncFileHashes.load()
+    assert file_hashes._hashes == {(1, 2, 3): "abc"}
+    file_hashes.save()
+
+    assert not activate_changes.ConfigSyncFileHashes.load()._hashes
+
+
 def _create_get_config_sync_file_infos_test_config(base_dir: Path) -> None:
     base_dir.joinpath("etc/d1").mkdir(parents=True, exist_ok=True)
 
@@ -605,7 +651,7 @@ def _get_test_sync_archive(tmp_path: Path) -> bytes:
     tmp_path.joinpath("broken-symlink").symlink_to("eeg")
     tmp_path.joinpath("working-symlink").symlink_to("ding")
 
-    return activate_changes._get_sync_archive(
+    with activate_changes._sync_archive(
         [
             "etc/abc",
             "file-to-dir/aaa",
@@ -615,7 +661,8 @@ def _get_test_sync_archive(tmp_path: Path) -> bytes:
             "working-symlink",
         ],
         tmp_path,
-    )
+    ) as sync_archive:
+        return sync_archive.read()
 
 
 class TestAutomationReceiveConfigSync:
@@ -663,7 +710,7 @@ class TestAutomationReceiveConfigSync:
         automation.execute(
             activate_changes.ReceiveConfigSyncRequest(
                 site_id=SiteId("remote"),
-                sync_archive=_get_test_sync_archive(tmp_path.joinpath("central")),
+                sync_archive=io.BytesIO(_get_test_sync_archive(tmp_path.joinpath("central"))),
                 to_delete=[
                     "to_delete",
                     "working-symlink/file",
@@ -709,15 +756,11 @@ class TestAutomationReceiveConfigSync:
             "_request",
             request,
         )
-        assert (
-            activate_changes.AutomationReceiveConfigSync().get_request()
-            == activate_changes.ReceiveConfigSyncRequest(
-                site_id=SiteId("NO_SITE"),
-                sync_archive=b"some data",
-                to_delete=["x/y/z.txt", "abc.ending", "/ä/☃/☕"],
-                config_generation=123,
-            )
-        )
+        api_request = activate_changes.AutomationReceiveConfigSync().get_request()
+        assert api_request.site_id == SiteId("NO_SITE")
+        assert api_request.sync_archive.read() == b"some data"
+        assert api_request.to_delete == ["x/y/z.txt", "abc.ending", "/ä/☃/☕"]
+        assert api_request.config_generation == 123
 
 
 def test_get_current_config_generation() -> None:
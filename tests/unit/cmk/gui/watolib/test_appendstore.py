@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from cmk.gui.watolib import appendstore
+from cmk.gui.watolib.appendstore import ABCAppendStore
+
+
+class _DictStore(ABCAppendStore[dict[str, object]]):
+    @staticmethod
+    def _serialize(entry: dict[str, object]) -> object:
+        return entry
+
+    @staticmethod
+    def _deserialize(raw: object) -> dict[str, object]:
+        assert isinstance(raw, dict)
+        return raw
+
+
+@pytest.fixture(name="store")
+def fixture_store(tmp_path: Path) -> _DictStore:
+    return _DictStore(tmp_path / "store.mk")
+
+
+def _entries(num: int) -> list[dict[str, object]]:
+    return [{"n": n, "text": f"Entry {n} ä" + "x" * (n % 7)} for n in range(num)]
+
+
+def test_append_writes_json_if_possible(store: _DictStore) -> None:
+    store.append({"a": None, "b": [True, 1.5]})
+    store.append({"a": (1, 2)})
+    # Keys other than strings do not survive the JSON round trip
+    int_key_entry: dict[Any, object] = {1: "int key"}
+    store.append(int_key_entry)
+
+    assert store._path.read_bytes().split(b"\0") == [
+        b'{"a": null, "b": [true, 1.5]}',
+        b"{'a': (1, 2)}",
+        b"{1: 'int key'}",
+        b"",
+    ]
+    assert store.read() == [{"a": None, "b": [True, 1.5]}, {"a": (1, 2)}, {1: "int key"}]
+
+
+def test_read_legacy_entries(store: _DictStore) -> None:
+    entries = [{"a": 'it\'s "quoted"', "b": None}, {"c": "\U0001f600", "d": (1,)}, {"e": 1.0}]
+    store._path.write_bytes(b"".join(repr(e).encode("utf-8") + b"\0" for e in entries))
+
+    assert store.read() == entries
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64 * 1024])
+def test_read_last(store: _DictStore, monkeypatch: pytest.MonkeyPatch, chunk_size: int) -> None:
+    monkeypatch.setattr(appendstore, "_CHUNK_SIZE", chunk_size)
+    entries = _entries(20)
+    for entry in entries:
+        store.append(entry)
+
+    assert store.read_last(0) == []
+    assert store.read_last(1) == entries[-1:]
+    assert store.read_last(5) == entries[-5:]
+    assert store.read_last(100) == entries
+
+
+def test_read_last_not_existing(store: _DictStore) -> None:
+    assert store.read_last(10) == []
+
+
+def test_read_since(store: _DictStore) -> None:
+    entries = _entries(10)
+    assert store.read_since(0) == ([], 0)
+
+    for entry in entries[:4]:
+        store.append(entry)
+    read, offset = store.read_since(0)
+    assert read == entries[:4]
+
+    assert store.read_since(offset) == ([], offset)
+
+    for entry in entries[4:]:
+        store.append(entry)
+    read, offset = store.read_since(offset)
+    assert read == entries[4:]
+    assert offset == store._path.stat().st_size
+
+
+def test_read_since_ignores_incomplete_entry(store: _DictStore) -> None:
+    store.append({"a": 1})
+    with store._path.open("ab") as f:
+        f.write(b'{"b": ')
+
+    read, offset = store.read_since(0)
+    assert read == [{"a": 1}]
+    assert offset == len(b'{"a": 1}\0')
+
+
+def test_read_since_after_clear(store: _DictStore) -> None:
+    for entry in _entries(5):
+        store.append(entry)
+    _read, offset = store.read_since(0)
+
+    store._path.unlink()
+    store.append({"a": 1})
+    assert store.read_since(offset) == ([{"a": 1}], len(b'{"a": 1}\0'))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 64 * 1024])
+def test_count(store: _DictStore, monkeypatch: pytest.MonkeyPatch, chunk_size: int) -> None:
+    monkeypatch.setattr(appendstore, "_CHUNK_SIZE", chunk_size)
+    assert store.count() == 0
+
+    for entry in _entries(7):
+        store.append(entry)
+    assert store.count() == 7
+
+    with store._path.open("ab") as f:
+        f.write(b"\0\0{}")
+    assert store.count() == len(store.read()) == 8
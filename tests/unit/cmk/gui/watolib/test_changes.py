@@ -101,6 +101,17 @@ class TestAuditLogStore:
         store.append(entry)
         assert list(store.read()) == [entry, entry]
 
+    @pytest.mark.parametrize("timestamp", [0, 999, 1000, 1500, 1998, 1999])
+    def test_get_entries_since(self, store: AuditLogStore, timestamp: int) -> None:
+        entries = [
+            AuditLogStore.Entry(1000 + n, None, "user", "action", "Mässädsch", None)
+            for n in range(1000)
+        ]
+        for entry in entries:
+            store.append(entry)
+
+        assert store.get_entries_since(timestamp) == [e for e in entries if e.time > timestamp]
+
     @pytest.mark.usefixtures("request_context")
     def test_transport_html(self, store: AuditLogStore) -> None:
         entry = AuditLogStore.Entry(
@@ -105,6 +105,7 @@ def test_registered_configvars() -> None:
         "enable_sounds",
         "escape_plugin_output",
         "event_limit",
+        "event_processing_workers",
         "eventsocket_queue_len",
         "failed_notification_horizon",
         "hard_query_limit",
@@ -3,12 +3,15 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import io
 from collections.abc import Sequence
 from dataclasses import dataclass
 from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
+import requests
+import werkzeug.formparser
 
 from cmk.utils import version as cmk_version
 
@@ -128,3 +131,28 @@ class TestCheckmkAutomationBackgroundJob:
                 api_request,
             )
             assert RESULT == "i was very different previously"
+
+
+def test_multipart_form_data() -> None:
+    archive = io.BytesIO(b"\0" * 100_000 + b"\r\n--end")
+    body = automations._MultipartFormData({"secret": "s3cr3t", "debug": ""}, {"archive": archive})
+    encoded = requests.Request(
+        "POST",
+        "http://localhost",
+        data=body,
+        headers={"Content-Type": body.content_type},
+    ).prepare()
+    assert encoded.headers["Content-Length"] == str(len(body))
+
+    raw = body.readall()
+    assert len(raw) == len(body)
+    _stream, form, files = werkzeug.formparser.parse_form_data(
+        {
+            "REQUEST_METHOD": "POST",
+            "CONTENT_TYPE": body.content_type,
+            "CONTENT_LENGTH": str(len(raw)),
+            "wsgi.input": io.BytesIO(raw),
+        }
+    )
+    assert form.to_dict() == {"secret": "s3cr3t", "debug": ""}
+    assert files["archive"].read() == b"\0" * 100_000 + b"\r\n--end"
@@ -6,6 +6,7 @@
 # pylint: disable=protected-access
 
 import dataclasses
+import hashlib
 import logging
 from collections.abc import Sequence
 from functools import partial
@@ -252,3 +253,43 @@ def test_walk_raises_on_timeout_without_snmpv3_context_stop_on_timeout() -> None
 
     # pylint: disable=unidiomatic-typecheck
     assert type(excinfo.value) is SNMPContextTimeout
+
+
+def test_get_snmp_table_walks_uncached_columns_at_once() -> None:
+    class Backend(SNMPTestBackend):
+        def __init__(self) -> None:
+            super().__init__(SNMPConfig, logger)
+            self.walked: list[Sequence[str]] = []
+
+        def walk_columns(self, /, oids, *, context, **kw):
+            self.walked.append(oids)
+            return super().walk_columns(oids, context=context, **kw)
+
+    backend = Backend()
+    tree = BackendSNMPTree(
+        base=".1.2",
+        oids=[
+            BackendOIDSpec("1", "string", False),
+            BackendOIDSpec(SpecialColumn.END, "string", False),
+            BackendOIDSpec("2", "string", True),
+            BackendOIDSpec("3", "string", False),
+        ],
+    )
+    context_hash = hashlib.shake_256(b"no_context").hexdigest(15)
+    walk_cache = {(".1.2.2", context_hash, True): [(".1.2.2.1", b"cached")]}
+
+    table = get_snmp_table(
+        section_name=SectionName("unit_test"), tree=tree, walk_cache=walk_cache, backend=backend
+    )
+
+    assert backend.walked == [[".1.2.1", ".1.2.3"]]
+    assert table == [
+        ["C0FEFE", "1", "cached", "C0FEFE"],
+        ["C0FEFE", "2", "", "C0FEFE"],
+        ["C0FEFE", "3", "", "C0FEFE"],
+    ]
+    assert sorted(walk_cache) == [
+        (".1.2.1", context_hash, False),
+        (".1.2.2", context_hash, True),
+        (".1.2.3", context_hash, False),
+    ]
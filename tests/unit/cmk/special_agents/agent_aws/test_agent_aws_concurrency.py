@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import json
+import time
+from collections.abc import Sequence
+from datetime import datetime as dt
+
+import pytest
+
+from cmk.special_agents import agent_aws
+
+from .agent_aws_fake_clients import FakeCloudwatchClient, FakeS3Client
+
+_REGIONS = ["region", "eu-central-1", "us-east-2", "ap-south-1"]
+
+_ARGS = [
+    "--access-key-id",
+    "key",
+    "--secret-access-key",
+    "secret",
+    "--hostname",
+    "aws",
+    "--piggyback-naming-convention",
+    "ip_region_instance",
+    "--no-cache",
+    "--regions",
+    *_REGIONS,
+    "--services",
+    "s3",
+    "cloudwatch_alarms",
+    "--s3-limits",
+    "--s3-requests",
+    "--cloudwatch-alarms",
+]
+
+
+class _SlowClient:
+    """Takes some time for every API call like a real client"""
+
+    def __init__(self, client: object) -> None:
+        self._client = client
+
+    def __getattr__(self, name: str) -> object:
+        method = getattr(self._client, name)
+
+        def call(*args: object, **kwargs: object) -> object:
+            time.sleep(0.02)
+            return method(*args, **kwargs)
+
+        return call
+
+
+class _FakeSession:
+    def client(self, client_key: str, config: object = None) -> object:
+        if client_key == "s3":
+            return _SlowClient(FakeS3Client())
+        if client_key == "cloudwatch":
+            return _SlowClient(FakeCloudwatchClient())
+        return object()
+
+
+@pytest.fixture(name="fake_aws")
+def fixture_fake_aws(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(agent_aws, "NOW", dt.strptime("2020-09-28 15:30 UTC", "%Y-%m-%d %H:%M %Z"))
+    monkeypatch.setattr(agent_aws, "_get_account_id", lambda args, config: "123456789012")
+    monkeypatch.setattr(
+        agent_aws, "_create_session_from_args", lambda args, region, config: _FakeSession()
+    )
+
+
+def _run_agent(max_workers: int, capsys: pytest.CaptureFixture[str]) -> str:
+    assert agent_aws.main([*_ARGS, "--max-workers", str(max_workers)]) == 0
+    return capsys.readouterr().out
+
+
+def _output_structure(output: str) -> Sequence[str | int]:
+    # The fake clients make up random values, only the amounts are the same
+    return [len(json.loads(line)) if line.startswith("[") else line for line in output.splitlines()]
+
+
+@pytest.mark.usefixtures("fake_aws")
+def test_concurrent_agent_output(capsys: pytest.CaptureFixture[str]) -> None:
+    sequential_output = _run_agent(1, capsys)
+    concurrent_output = _run_agent(8, capsys)
+
+    # The S3 limits are only fetched in the first region, the buckets are all in "region"
+    assert sequential_output.count("<<<aws_s3_limits") == 1
+    assert sequential_output.count("<<<aws_s3_summary") == 1
+    assert _output_structure(concurrent_output) == _output_structure(sequential_output)
+
+
+def test_section_colleagues() -> None:
+    config = agent_aws._configure_aws(agent_aws.parse_arguments(_ARGS), _ARGS)
+    s3_limits_distributor = agent_aws.ResultDistributorS3Limits()
+    all_sections = []
+    for region in _REGIONS[:2]:
+        session = _FakeSession()
+        sections = agent_aws.AWSSectionsGeneric("aws", session, "123456789012")  # type: ignore[arg-type]
+        sections.init_sections(["s3"], region, config, s3_limits_distributor)
+        all_sections.append(sections)
+
+    assert [[s.name for s in sections.sections] for sections in all_sections] == [
+        ["s3_limits", "s3_summary", "s3", "s3_requests"],
+        ["s3_summary", "s3", "s3_requests"],
+    ]
+    s3_limits, s3_summary, s3, s3_requests = all_sections[0].sections
+    assert s3_limits.colleagues == [s3_summary, all_sections[1].sections[0]]
+    assert s3_summary.colleagues == [s3, s3_requests]
+    assert not s3.colleagues
@@ -26,37 +26,7 @@ from cmk.special_agents.agent_aws import (
     TagsOption,
 )
 
-from .agent_aws_fake_clients import FakeCloudwatchClient, S3BucketTaggingIB, S3ListBucketsIB
-
-
-class FakeS3Client:
-    def list_buckets(self):
-        return {
-            "Buckets": S3ListBucketsIB.create_instances(amount=4),
-            "Owner": {
-                "DisplayName": "string",
-                "ID": "string",
-            },
-        }
-
-    def get_bucket_location(self, Bucket=""):
-        if Bucket in ["Name-0", "Name-1", "Name-2"]:
-            return {
-                "LocationConstraint": "region",
-            }
-        return {}
-
-    def get_bucket_tagging(self, Bucket=""):
-        if Bucket == "Name-0":
-            return {
-                "TagSet": S3BucketTaggingIB.create_instances(amount=1),
-            }
-        if Bucket == "Name-1":
-            return {
-                "TagSet": S3BucketTaggingIB.create_instances(amount=2),
-            }
-        return {}
-
+from .agent_aws_fake_clients import FakeCloudwatchClient, FakeS3Client
 
 S3Sections = tuple[S3Limits, S3Summary, S3, S3Requests]
 
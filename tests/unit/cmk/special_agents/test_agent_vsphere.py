@@ -2,15 +2,24 @@
 # Copyright (C) 2019 Checkmk GmbH - License: GNU General Public License v2
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
-from collections.abc import Mapping, Sequence
+import re
+import time
+import tracemalloc
+from collections.abc import Iterator, Mapping, Sequence
 from unittest.mock import Mock
 
 import pytest
 
 from cmk.special_agents.agent_vsphere import (
+    ESXConnection,
+    ESXCookieInvalid,
     eval_multipath_info,
+    fetch_counters,
     fetch_virtual_machines,
+    get_section_licenses,
     get_section_snapshot_summary,
+    iter_property_objects,
+    PropertyObject,
 )
 
 
@@ -96,7 +105,7 @@ def test_cloning_vm_is_processed(mocker: Mock) -> None:
     )
 
     connection = mocker.Mock()
-    connection.query_server = mocker.Mock(return_value=data)
+    connection.stream_server = mocker.Mock(return_value=[[data.encode()]])
     opt = mocker.Mock()
     opt.skip_placeholder_vm = False
 
@@ -166,3 +175,216 @@ def test_get_section_snapshot_summary(
     expected_output: Sequence[str],
 ) -> None:
     assert get_section_snapshot_summary(virtual_machines) == expected_output
+
+
+_ENVELOPE = (
+    '<?xml version="1.0" encoding="UTF-8"?><soapenv:Envelope xmlns:soapenc="http://schemas.xmlsoap.'
+    'org/soap/encoding/" xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:xsd="http:'
+    '//www.w3.org/2001/XMLSchema" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"><soapenv:Bo'
+    "dy>%s</soapenv:Body></soapenv:Envelope>"
+)
+
+_VM_OBJECT = (
+    '<objects><obj type="VirtualMachine">vm-%(index)s</obj><propSet><name>config.datastoreUrl</name>'
+    '<val xsi:type="ArrayOfVirtualMachineConfigInfoDatastoreUrlPair"><VirtualMachineConfigInfoDatas'
+    'toreUrlPair xsi:type="VirtualMachineConfigInfoDatastoreUrlPair"><name>Storage</name><url>/vmfs'
+    "/volumes/11111111-22222222-0000-000000000000</url></VirtualMachineConfigInfoDatastoreUrlPair><"
+    '/val></propSet><propSet><name>config.hardware.device</name><val xsi:type="ArrayOfVirtualDevice'
+    '"><VirtualDevice xsi:type="VirtualDisk"><key>2000</key><deviceInfo><label>Hard disk 1</label><'
+    "summary>16,777,216 KB</summary></deviceInfo><connectable><startConnected>true</startConnected>"
+    "<allowGuestControl>false</allowGuestControl><connected>true</connected><status>ok</status></co"
+    'nnectable></VirtualDevice></val></propSet><propSet><name>name</name><val xsi:type="xsd:string"'
+    '>VM &amp; &lt;%(index)s&gt;</val></propSet><propSet><name>runtime.host</name><val type="HostSys'
+    'tem" xsi:type="ManagedObjectReference">host-%(host)s</val></propSet><propSet><name>snapshot.ro'
+    'otSnapshotList</name><val xsi:type="ArrayOfVirtualMachineSnapshotTree"><VirtualMachineSnapshot'
+    'Tree xsi:type="VirtualMachineSnapshotTree"><snapshot type="VirtualMachineSnapshot">snapshot-1<'
+    '/snapshot><vm type="VirtualMachine">vm-%(index)s</vm><name>Before update</name><description>'
+    "</description><id>1</id><createTime>2023-11-06T15:39:39.347543Z</createTime><state>poweredOn</"
+    "state><quiesced>false</quiesced></VirtualMachineSnapshotTree></val></propSet></objects>"
+)
+
+
+def _vmdetails_pages(vm_count: int, page_size: int) -> Sequence[str]:
+    """Responses like the ones recorded from a vCenter, paged like the property collector does"""
+    pages = []
+    for start in range(0, vm_count, page_size):
+        token = "<token>%s</token>" % start if start + page_size < vm_count else ""
+        objects = "".join(
+            _VM_OBJECT % {"index": index, "host": index % 7}
+            for index in range(start, min(start + page_size, vm_count))
+        )
+        pages.append(
+            _ENVELOPE
+            % (
+                '<RetrievePropertiesExResponse xmlns="urn:vim25"><returnval>%s%s</returnval>'
+                "</RetrievePropertiesExResponse>" % (token, objects)
+            )
+        )
+    return pages
+
+
+def _chunked(page: str, size: int) -> Iterator[bytes]:
+    data = page.encode()
+    return (data[start : start + size] for start in range(0, len(data), size))
+
+
+def _regex_property_objects(response: str) -> Sequence[PropertyObject]:
+    # How the agent extracted the objects before parsing the responses as XML
+    return [
+        PropertyObject(
+            re.findall('<obj type="VirtualMachine">(.*)</obj>', entry[:512], re.DOTALL)[0],
+            re.findall(
+                "<propSet><name>(.*?)</name><val.*?>(.*?)</val></propSet>", entry, re.DOTALL
+            ),
+        )
+        for entry in re.findall("<objects>(.*?)</objects>", response, re.DOTALL)
+    ]
+
+
+def test_iter_property_objects() -> None:
+    pages = _vmdetails_pages(5, 2)
+    assert list(iter_property_objects(_chunked(page, 7) for page in pages)) == (
+        _regex_property_objects("".join(pages))
+    )
+
+
+def _streaming_connection(
+    mocker: Mock, responses: Sequence[Iterator[bytes]]
+) -> tuple[ESXConnection, Mock]:
+    session = mocker.Mock()
+    session.postsoap.side_effect = [
+        mocker.Mock(iter_content=mocker.Mock(return_value=chunks)) for chunks in responses
+    ]
+    connection = ESXConnection.__new__(ESXConnection)
+    connection._session = session
+    connection._soap_templates = mocker.Mock(
+        retrieveproperties="retrieve", continuetoken="continue %(token)s"
+    )
+    return connection, session
+
+
+def test_stream_server_finds_token_in_small_chunks(mocker: Mock) -> None:
+    pages = _vmdetails_pages(3, 2)
+    connection, session = _streaming_connection(mocker, [_chunked(page, 7) for page in pages])
+
+    assert [b"".join(page) for page in connection.stream_server("retrieveproperties")] == [
+        page.encode() for page in pages
+    ]
+    assert [call.args[0] for call in session.postsoap.call_args_list] == [
+        "retrieve",
+        "continue 0",
+    ]
+
+
+def test_stream_server_detects_fault_in_small_chunks(mocker: Mock) -> None:
+    response = (
+        _ENVELOPE % "<soapenv:Fault><detail><NotAuthenticatedFault/></detail></soapenv:Fault>"
+    )
+    connection, _session = _streaming_connection(mocker, [_chunked(response, 7)])
+
+    with pytest.raises(ESXCookieInvalid):
+        list(connection.stream_server("retrieveproperties"))
+
+
+def test_fetch_virtual_machines_of_all_pages(mocker: Mock) -> None:
+    connection = mocker.Mock()
+    connection.stream_server = mocker.Mock(
+        return_value=[_chunked(page, 100) for page in _vmdetails_pages(3, 2)]
+    )
+    opt = mocker.Mock(skip_placeholder_vm=True, vm_piggyname="alias", spaces="underscore")
+
+    vms, vm_esx_host = fetch_virtual_machines(
+        connection, hostsystems={"host-1": "esx1"}, datastores={}, opt=opt
+    )
+
+    assert list(vms) == ["VM_&amp;_&lt;0&gt;", "VM_&amp;_&lt;1&gt;", "VM_&amp;_&lt;2&gt;"]
+    assert vm_esx_host == {
+        "host-0": ["VM &amp; &lt;0&gt;"],
+        "esx1": ["VM &amp; &lt;1&gt;"],
+        "host-2": ["VM &amp; &lt;2&gt;"],
+    }
+    assert vms["VM_&amp;_&lt;1&gt;"] == {
+        "config.datastoreUrl": "name Storage",
+        "config.hardware.device": (
+            "virtualDeviceType VirtualDisk|label Hard disk 1|summary 16,777,216 KB|"
+            "startConnected true|allowGuestControl false|connected true|status ok"
+        ),
+        "name": "VM &amp; &lt;1&gt;",
+        "runtime.host": "esx1",
+        "snapshot.rootSnapshotList": "1 %d poweredOn Before update"
+        % time.mktime(time.strptime("2023-11-06T15:39:39", "%Y-%m-%dT%H:%M:%S")),
+    }
+
+
+def test_fetch_counters(mocker: Mock) -> None:
+    response = _ENVELOPE % (
+        '<QueryPerfResponse xmlns="urn:vim25"><returnval xsi:type="PerfEntityMetric"><entity type="'
+        'HostSystem">ha-host</entity><sampleInfo><timestamp>2023-11-06T15:39:40Z</timestamp><interv'
+        "al>20</interval></sampleInfo><sampleInfo><timestamp>2023-11-06T15:40:00Z</timestamp><inter"
+        'val>20</interval></sampleInfo><value xsi:type="PerfMetricIntSeries"><id><counterId>125</co'
+        "unterId><instance></instance></id><value>12</value><value>13</value></value><value xsi:typ"
+        'e="PerfMetricIntSeries"><id><counterId>131</counterId><instance>vmnic0</instance></id><val'
+        'ue>1</value><value>2</value><value>3</value></value><value xsi:type="PerfMetricIntSeries">'
+        "<id><counterId>132</counterId><instance>vmnic0</instance></id><value>7</value></value></re"
+        "turnval></QueryPerfResponse>"
+    )
+    connection = mocker.Mock(perf_samples=2)
+    connection.stream_server = mocker.Mock(return_value=[_chunked(response, 50)])
+
+    assert fetch_counters(connection, "ha-host", [("125", [""]), ("131", ["vmnic0"])]) == [
+        ("125", "", ["12", "13"]),
+        ("131", "vmnic0", ["1", "2"]),
+    ]
+
+
+def test_get_section_licenses(mocker: Mock) -> None:
+    licenses = "".join(
+        "<LicenseManagerLicenseInfo><licenseKey>00000-00000</licenseKey><editionKey>%s</editionKey>"
+        "<name>%s</name><total>%s</total><used>%s</used><costUnit>cpuPackage</costUnit><properties>"
+        '<key>ProductName</key><value xsi:type="xsd:string">VMware</value></properties>'
+        "</LicenseManagerLicenseInfo>" % license_
+        for license_ in [
+            ("esx.enterprisePlus.cpuPackage", "vSphere 7 Enterprise Plus", 8, 6),
+            ("eval", "Evaluation Mode", 0, 0),
+        ]
+    )
+    response = _ENVELOPE % (
+        '<RetrievePropertiesExResponse xmlns="urn:vim25"><returnval><objects><obj type="LicenseMana'
+        'ger">LicenseManager</obj><propSet><name>licenses</name><val xsi:type="ArrayOfLicenseManage'
+        'rLicenseInfo">%s</val></propSet></objects></returnval></RetrievePropertiesExResponse>'
+        % licenses
+    )
+    connection = mocker.Mock()
+    connection.stream_server = mocker.Mock(return_value=[[response.encode()]])
+
+    assert get_section_licenses(connection) == [
+        "<<<esx_vsphere_licenses:sep(9)>>>",
+        "vSphere 7 Enterprise Plus\t6 8",
+    ]
+
+
+def test_parse_vmdetails_while_received() -> None:
+    pages = _vmdetails_pages(1000, 200)
+
+    def _received() -> Iterator[Iterator[bytes]]:
+        # The response pages are only in memory while they are received
+        return (_chunked(page, 64 * 1024) for page in pages)
+
+    def _parse_with_regex() -> int:
+        return len(
+            _regex_property_objects("".join(b"".join(page).decode() for page in _received()))
+        )
+
+    def _parse_streamed() -> int:
+        return sum(1 for _obj in iter_property_objects(_received()))
+
+    peaks = []
+    for parse in (_parse_with_regex, _parse_streamed):
+        tracemalloc.start()
+        assert parse() == 1000
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+
+    regex_peak, streaming_peak = peaks
+    assert streaming_peak < regex_peak
@@ -6,6 +6,8 @@
 # pylint: disable=protected-access
 
 import json
+import random
+from collections.abc import Callable, Sequence
 
 import pytest
 
@@ -15,6 +17,10 @@ from livestatus import RRDResponse
 
 from cmk.utils.prediction import _prediction
 
+_CalculateDataForPrediction = Callable[
+    [range, Sequence[tuple[range, Sequence[float | None], int]]], _prediction.PredictionData
+]
+
 
 def _load_fake_rrd_response(start: int, end: int) -> RRDResponse:
     raw = json.loads(
@@ -176,7 +182,15 @@ def _load_fake_rrd_response(start: int, end: int) -> RRDResponse:
         ),
     ],
 )
+@pytest.mark.parametrize(
+    "calculate_data_for_prediction",
+    [
+        pytest.param(_prediction._calculate_data_for_prediction, id="pointwise"),
+        pytest.param(_prediction._calculate_data_for_prediction_vectorized, id="vectorized"),
+    ],
+)
 def test_calculate_data_for_prediction(
+    calculate_data_for_prediction: _CalculateDataForPrediction,
     timezone: str,
     timegroup: str,
     time_windows: list[tuple[int, int]],
@@ -193,7 +207,7 @@ def test_calculate_data_for_prediction(
         if (response := _load_fake_rrd_response(start, end))
     ]
 
-    data_for_pred = _prediction._calculate_data_for_prediction(raw_slices[0][0], raw_slices)
+    data_for_pred = calculate_data_for_prediction(raw_slices[0][0], raw_slices)
 
     expected_reference = _prediction.PredictionData.model_validate_json(
         (
@@ -210,3 +224,32 @@ def test_calculate_data_for_prediction(
     assert len(expected_reference.points) == len(data_for_pred.points)
     for cal, ref in zip(data_for_pred.points, expected_reference.points):
         assert cal == pytest.approx(ref, rel=1e-12, abs=1e-12)
+
+
+def _make_raw_slices(
+    num_slices: int, slice_length: int, step: int
+) -> list[tuple[range, Sequence[float | None], int]]:
+    rng = random.Random(4711)
+    youngest = range(1700000000, 1700000000 + slice_length, step)
+    raw_slices: list[tuple[range, Sequence[float | None], int]] = [
+        (youngest, [rng.uniform(0.0, 100.0) for _ in youngest], 0)
+    ]
+    for n in range(1, num_slices):
+        # older slices come in a coarser resolution and need to be resampled
+        shift = n * 86400
+        window = range(youngest.start - shift, youngest.stop - shift, 5 * step)
+        values = [None if rng.random() < 0.02 else rng.uniform(0.0, 100.0) for _ in window]
+        raw_slices.append((window, values, shift))
+    return raw_slices
+
+
+def test_calculate_data_for_prediction_four_weeks() -> None:
+    """Compare the implementations on a four week horizon with a one minute resolution"""
+    raw_slices = _make_raw_slices(num_slices=28, slice_length=86400, step=60)
+
+    pointwise = _prediction._calculate_data_for_prediction(raw_slices[0][0], raw_slices)
+    vectorized = _prediction._calculate_data_for_prediction_vectorized(raw_slices[0][0], raw_slices)
+
+    assert len(vectorized.points) == len(pointwise.points) == 1440
+    for vectorized_point, pointwise_point in zip(vectorized.points, pointwise.points):
+        assert vectorized_point == pytest.approx(pointwise_point, rel=1e-9)
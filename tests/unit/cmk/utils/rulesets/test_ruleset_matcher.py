@@ -9,6 +9,8 @@ from collections.abc import Mapping, Sequence
 from typing import Any
 
 import pytest
+from hypothesis import given
+from hypothesis import strategies as st
 from pytest import MonkeyPatch
 
 from tests.testlib.base import Scenario
@@ -16,6 +18,7 @@ from tests.testlib.base import Scenario
 from cmk.utils.hostaddress import HostName
 from cmk.utils.rulesets.ruleset_matcher import (
     LabelManager,
+    matches_host_tags,
     matches_tag_condition,
     RuleConditionsSpec,
     RulesetMatcher,
@@ -859,3 +862,86 @@ def test_matches_tag_condition(
         )
         is expected_result
     )
+
+
+_TAG_GROUPS = [TagGroupID(f"group{g}") for g in range(3)]
+_TAGS = [TagID(f"tag{t}") for t in range(3)]
+
+# None is the condition on an unset tag
+_condition_tag = st.sampled_from([*_TAGS, None])
+_tag_condition = st.one_of(
+    _condition_tag,
+    st.builds(lambda t: {"$ne": t}, _condition_tag),
+    st.builds(lambda ts: {"$or": ts}, st.lists(_condition_tag, max_size=3)),
+    st.builds(lambda ts: {"$nor": ts}, st.lists(_condition_tag, max_size=3)),
+)
+
+
+@given(
+    host_tags=st.lists(
+        st.dictionaries(st.sampled_from(_TAG_GROUPS), st.sampled_from(_TAGS)), max_size=8
+    ),
+    tag_conditions=st.dictionaries(st.sampled_from(_TAG_GROUPS), _tag_condition, max_size=3),
+)
+def test_match_hosts_by_tags_equals_matches_host_tags(
+    host_tags: Sequence[Mapping[TagGroupID, TagID]],
+    tag_conditions: Mapping[TagGroupID, TagCondition],
+) -> None:
+    hosts = {HostName(f"host{n}"): tags for n, tags in enumerate(host_tags)}
+    matcher = _make_matcher(hosts)
+
+    assert matcher.ruleset_optimizer._match_hosts_by_tags(set(hosts), tag_conditions) == {
+        host_name
+        for host_name, tags in hosts.items()
+        if matches_host_tags(set(tags.items()), tag_conditions)
+    }
+
+
+def _make_matcher(host_tags: Mapping[HostName, Mapping[TagGroupID, TagID]]) -> RulesetMatcher:
+    return RulesetMatcher(
+        host_tags=dict(host_tags),
+        host_paths={},
+        label_manager=LabelManager(
+            explicit_host_labels={},
+            host_label_rules=(),
+            service_label_rules=(),
+            discovered_labels_of_service=lambda *args, **kw: {},
+        ),
+        all_configured_hosts=list(host_tags),
+        clusters_of={},
+        nodes_of={},
+    )
+
+
+def test_get_host_ruleset_by_tags() -> None:
+    num_hosts = 300
+    matcher = _make_matcher(
+        {
+            HostName(f"host{n}"): {
+                TagGroupID("site"): TagID(f"site{n % 10}"),
+                TagGroupID("criticality"): TagID("prod" if n % 3 else "test"),
+                TagGroupID("agent"): TagID("cmk-agent" if n % 2 else "snmp"),
+            }
+            for n in range(num_hosts)
+        }
+    )
+    tag_ruleset: Sequence[RuleSpec[int]] = [
+        {
+            "id": str(n),
+            "value": n,
+            "condition": {
+                "host_tags": {
+                    TagGroupID("site"): TagID(f"site{n % 10}"),
+                    TagGroupID("criticality"): {"$ne": TagID("test")},
+                    TagGroupID("agent"): {"$or": [TagID("cmk-agent"), TagID("snmp")]},
+                }
+            },
+        }
+        for n in range(50)
+    ]
+
+    host_values = matcher.ruleset_optimizer.get_host_ruleset(tag_ruleset, with_foreign_hosts=False)
+
+    assert len(host_values) == num_hosts * 2 // 3
+    assert host_values[HostName("host1")] == list(range(1, 50, 10))
+    assert HostName("host3") not in host_values
@@ -4,7 +4,10 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import gzip
+import os
+import pickle
 import shutil
+import sqlite3
 from collections.abc import Iterable, Mapping, Sequence
 from pathlib import Path
 from typing import Literal
@@ -13,14 +16,20 @@ import pytest
 
 from tests.testlib import repo_path
 
+from cmk.utils import store
 from cmk.utils.hostaddress import HostName
 from cmk.utils.structured_data import (
     _MutableAttributes,
     _MutableTable,
+    ArchivedTreeLoader,
+    compact_archived_nodes,
     ImmutableAttributes,
     ImmutableDeltaTree,
     ImmutableTable,
     ImmutableTree,
+    IndexedRow,
+    InventoryIndex,
+    load_tree,
     MutableTree,
     parse_visible_raw_path,
     RetentionInterval,
@@ -28,6 +37,7 @@ from cmk.utils.structured_data import (
     SDNodeName,
     SDPath,
     SDRetentionFilterChoices,
+    TreeOrArchiveStore,
     TreeStore,
     UpdateResult,
 )
@@ -835,6 +845,44 @@ def test_save_tree(tmp_path: Path) -> None:
     with gzip.open(str(gzip_filepath), "rb") as f:
         f.read()
 
+    assert target.with_suffix(".pkl").exists()
+
+
+def test_load_tree_prefers_recent_pickle_file(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    target = tmp_path / "inventory" / str(host_name)
+    tree = MutableTree()
+    tree.add(path=("path-to", "node"), pairs=[{"foo": 1, "bär": 2}])
+    TreeStore(tmp_path / "inventory").save(host_name=host_name, tree=tree)
+    pickle_tree = ImmutableTree.deserialize({"pickle": {"foo": 1}})
+    store.save_bytes_to_file(target.with_suffix(".pkl"), pickle.dumps(pickle_tree.serialize()))
+
+    assert load_tree(target) == pickle_tree
+
+    # Written by an older version
+    os.utime(target.with_suffix(".pkl"), (0, 0))
+
+    assert load_tree(target) == tree
+
+
+@pytest.mark.parametrize(
+    "tree_name",
+    [
+        HostName("tree_old_heute"),
+        HostName("tree_new_heute"),
+        HostName("tree_new_interfaces"),
+    ],
+)
+def test_load_real_tree_from_pickle_file(tree_name: HostName, tmp_path: Path) -> None:
+    tree = _get_tree_store().load(host_name=tree_name)
+    TreeStore(tmp_path / "inventory").save(host_name=tree_name, tree=_make_mutable_tree(tree))
+    target = tmp_path / "inventory" / str(tree_name)
+    legacy_target = tmp_path / "legacy"
+    shutil.copy(target, legacy_target)
+
+    assert load_tree(target) == tree
+    assert load_tree(legacy_target) == tree
+
 
 @pytest.mark.parametrize(
     "tree_name",
@@ -1576,3 +1624,311 @@ def test_serialize_retention_interval(
     expected_raw_retention_interval: tuple[int, int, int, Literal["previous", "current"]],
 ) -> None:
     assert retention_interval.serialize() == expected_raw_retention_interval
+
+
+def _archive_trees(
+    tmp_path: Path, host_name: HostName, trees: Sequence[ImmutableTree]
+) -> TreeOrArchiveStore:
+    tree_store = TreeOrArchiveStore(tmp_path / "inventory", tmp_path / "inventory_archive")
+    for timestamp, tree in enumerate(trees, start=1):
+        tree_store.save(host_name=host_name, tree=_make_mutable_tree(tree))
+        os.utime(tmp_path / "inventory" / str(host_name), (timestamp, timestamp))
+        tree_store.archive(host_name=host_name)
+    return tree_store
+
+
+def test_archive_and_load_real_trees(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    trees = [
+        _get_tree_store().load(host_name=tree_name)
+        for tree_name in (
+            HostName("tree_old_heute"),
+            HostName("tree_new_heute"),
+            HostName("tree_new_heute"),
+            HostName("tree_new_interfaces"),
+        )
+    ]
+    tree_store = _archive_trees(tmp_path, host_name, trees)
+    host_dir = tmp_path / "inventory_archive" / str(host_name)
+
+    assert sorted(p.name for p in host_dir.iterdir()) == [".nodes", "1", "2", "3", "4"]
+    loader = ArchivedTreeLoader(host_dir)
+    loaded_trees = [loader.load(host_dir / str(timestamp)) for timestamp in range(1, 5)]
+    assert loaded_trees == trees
+    # The unchanged nodes are stored once and are shared by the loaded trees
+    assert loaded_trees[1] is loaded_trees[2]
+    assert not loaded_trees[2].difference(loaded_trees[1]).get_stats()
+    assert tree_store.load_previous(host_name=host_name) == trees[-1]
+
+
+def test_archive_stores_nodes_once(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    tree = _get_tree_store().load(host_name=HostName("tree_new_heute"))
+    _archive_trees(tmp_path, host_name, [tree])
+    nodes_file = tmp_path / "inventory_archive" / str(host_name) / ".nodes"
+    size = nodes_file.stat().st_size
+
+    _archive_trees(tmp_path, host_name, [tree, tree])
+
+    assert nodes_file.stat().st_size == size
+
+
+def test_archive_ignores_incomplete_nodes(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    host_dir = tmp_path / "inventory_archive" / str(host_name)
+    host_dir.mkdir(parents=True)
+    tree = ImmutableTree.deserialize({"Attributes": {"Pairs": {"a": 1}}, "Table": {}, "Nodes": {}})
+    (host_dir / ".nodes").write_text("0123 {'Attri")
+
+    _archive_trees(tmp_path, host_name, [tree])
+
+    assert ArchivedTreeLoader(host_dir).load(host_dir / "1") == tree
+
+
+def test_load_legacy_archived_tree(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    host_dir = tmp_path / "inventory_archive" / str(host_name)
+    legacy_tree = _get_tree_store().load(host_name=HostName("tree_new_addresses"))
+    store.save_object_to_file(host_dir / "1", legacy_tree.serialize())
+    tree_store = TreeOrArchiveStore(tmp_path / "inventory", tmp_path / "inventory_archive")
+
+    assert tree_store.load_previous(host_name=host_name) == legacy_tree
+    assert ArchivedTreeLoader(host_dir).load(host_dir / "1") == legacy_tree
+
+
+def test_compact_archived_nodes(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    trees = [
+        ImmutableTree.deserialize({"Attributes": {"Pairs": {"a": n}}, "Table": {}, "Nodes": {}})
+        for n in range(3)
+    ]
+    _archive_trees(tmp_path, host_name, trees)
+    host_dir = tmp_path / "inventory_archive" / str(host_name)
+    nodes_file = host_dir / ".nodes"
+    (host_dir / "1").unlink()
+
+    compact_archived_nodes(host_dir)
+
+    assert len(nodes_file.read_text().splitlines()) == 2
+    loader = ArchivedTreeLoader(host_dir)
+    assert [loader.load(host_dir / str(timestamp)) for timestamp in (2, 3)] == trees[1:]
+    content = nodes_file.read_text()
+    compact_archived_nodes(host_dir)
+    assert nodes_file.read_text() == content
+
+
+def test_compact_archived_nodes_keeps_shared_nodes(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    tree = _get_tree_store().load(host_name=HostName("tree_new_heute"))
+    trees = [tree.merge(ImmutableTree.deserialize({"changing": {"uptime": n}})) for n in range(2)]
+    _archive_trees(tmp_path, host_name, trees)
+    host_dir = tmp_path / "inventory_archive" / str(host_name)
+    (host_dir / "1").unlink()
+
+    compact_archived_nodes(host_dir)
+
+    assert ArchivedTreeLoader(host_dir).load(host_dir / "2") == trees[1]
+
+
+def test_archive_of_slightly_changing_trees(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    tree = _get_tree_store().load(host_name=HostName("tree_new_heute"))
+    # Usually only a few values change between two inventories
+    trees = [tree.merge(ImmutableTree.deserialize({"changing": {"uptime": n}})) for n in range(20)]
+    legacy_dir = tmp_path / "legacy_archive"
+    for timestamp, tree in enumerate(trees, start=1):
+        store.save_object_to_file(legacy_dir / str(timestamp), tree.serialize())
+    legacy_size = sum(p.stat().st_size for p in legacy_dir.iterdir())
+
+    _archive_trees(tmp_path, host_name, trees)
+    host_dir = tmp_path / "inventory_archive" / str(host_name)
+    archive_size = sum(p.stat().st_size for p in host_dir.iterdir())
+    loader = ArchivedTreeLoader(host_dir)
+    loaded_trees = [loader.load(host_dir / str(timestamp)) for timestamp in range(1, 21)]
+    deltas = [
+        current.difference(previous) for previous, current in zip(loaded_trees, loaded_trees[1:])
+    ]
+
+    assert all(delta.get_stats() == {"changed": 1} for delta in deltas)
+    assert archive_size < legacy_size / 10
+
+
+def _packages_tree(packages: Mapping[str, object]) -> ImmutableTree:
+    return ImmutableTree.deserialize(
+        {
+            "Attributes": {},
+            "Table": {},
+            "Nodes": {
+                "software": {
+                    "Attributes": {},
+                    "Table": {},
+                    "Nodes": {
+                        "packages": {
+                            "Attributes": {},
+                            "Table": {
+                                "KeyColumns": ["name"],
+                                "Rows": [
+                                    {"name": name, "version": version}
+                                    for name, version in packages.items()
+                                ],
+                                "Retentions": {("bash",): {"version": (1, 2, 3, "previous")}},
+                            },
+                            "Nodes": {},
+                        }
+                    },
+                },
+            },
+        }
+    )
+
+
+def test_inventory_index_query(tmp_path: Path) -> None:
+    index = InventoryIndex(tmp_path / "inventory_index.sqlite")
+    assert index.query(("software", "packages")) == []
+    assert index.indexed_hosts() == {}
+
+    index.update(
+        host_name=HostName("web"),
+        tree=_packages_tree({"bash": "5.1", "zsh": "5.9", "vim": None}),
+        tree_mtime_ns=1,
+    )
+    index.update(
+        host_name=HostName("db"),
+        tree=_packages_tree({"bash": "5.2", "postgres": 16, "big": 2**70, "flag": True}),
+        tree_mtime_ns=2,
+    )
+
+    assert index.indexed_hosts() == {"web": 1, "db": 2}
+    assert index.query(("software", "packages"), host_names=[HostName("web")]) == [
+        IndexedRow(
+            host_name=HostName("web"),
+            row={"name": "bash", "version": "5.1"},
+            retentions={"version": RetentionInterval(1, 2, 3, "previous")},
+        ),
+        IndexedRow(host_name=HostName("web"), row={"name": "zsh", "version": "5.9"}, retentions={}),
+        IndexedRow(host_name=HostName("web"), row={"name": "vim", "version": None}, retentions={}),
+    ]
+    assert [
+        (r.host_name, r.row["version"])
+        for r in index.query(
+            ("software", "packages"),
+            where=[("name", "!=", "zsh")],
+            order_by=[("name", "ASC"), ("version", "DESC")],
+            limit=4,
+        )
+    ] == [("db", "5.2"), ("web", "5.1"), ("db", 2**70), ("db", True)]
+    assert [r.row for r in index.query(("software", "packages"), where=[("unknown", "=", 1)])] == []
+    assert index.query(("hardware",)) == []
+
+
+def test_inventory_index_replace_and_remove(tmp_path: Path) -> None:
+    index = InventoryIndex(tmp_path / "inventory_index.sqlite")
+    index.update(host_name=HostName("web"), tree=_packages_tree({"bash": "5.1"}), tree_mtime_ns=1)
+    index.update(host_name=HostName("db"), tree=_packages_tree({"bash": "5.2"}), tree_mtime_ns=1)
+
+    index.update(host_name=HostName("web"), tree=ImmutableTree(), tree_mtime_ns=2)
+
+    assert index.indexed_hosts() == {"web": 2, "db": 1}
+    assert [r.host_name for r in index.query(("software", "packages"))] == ["db"]
+
+    index.remove(host_name=HostName("db"))
+
+    assert index.indexed_hosts() == {"web": 2}
+    assert index.query(("software", "packages")) == []
+
+
+def test_inventory_index_keys_differing_in_case(tmp_path: Path) -> None:
+    index = InventoryIndex(tmp_path / "inventory_index.sqlite")
+    tree = ImmutableTree.deserialize(
+        {
+            "Attributes": {},
+            "Table": {
+                "KeyColumns": ["name"],
+                "Rows": [{"name": "bash", "Name": "Bash"}, {"name": "zsh", "NAME": "ZSH"}],
+            },
+            "Nodes": {},
+        }
+    )
+
+    index.update(host_name=HostName("web"), tree=tree, tree_mtime_ns=1)
+
+    assert [r.row for r in index.query((), where=[("Name", "=", "Bash")])] == [
+        {"name": "bash", "Name": "Bash"}
+    ]
+    assert [r.row for r in index.query((), order_by=[("NAME", "DESC")])] == [
+        {"name": "zsh", "NAME": "ZSH"},
+        {"name": "bash", "Name": "Bash"},
+    ]
+
+
+def test_tree_store_save_with_broken_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    host_name = HostName("heute")
+    index = InventoryIndex(tmp_path / "inventory_index.sqlite")
+    tree_store = TreeStore(tmp_path / "inventory", index)
+    tree_store.save(host_name=host_name, tree=_make_mutable_tree(_packages_tree({"bash": "5.1"})))
+    (tmp_path / "inventory" / ".last").unlink()
+
+    def update(**kwargs: object) -> None:
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(index, "update", update)
+    tree_store.save(host_name=host_name, tree=_make_mutable_tree(_packages_tree({"bash": "5.2"})))
+
+    assert tree_store.load(host_name=host_name) == _packages_tree({"bash": "5.2"})
+    assert (tmp_path / "inventory" / ".last").exists()
+    assert index.indexed_hosts() == {}
+    assert index.query(("software", "packages")) == []
+
+
+def test_inventory_index_of_tree_store(tmp_path: Path) -> None:
+    host_name = HostName("heute")
+    index = InventoryIndex(tmp_path / "inventory_index.sqlite")
+    tree_store = TreeOrArchiveStore(tmp_path / "inventory", tmp_path / "inventory_archive", index)
+    tree = _get_tree_store().load(host_name=HostName("tree_new_heute"))
+
+    tree_store.save(host_name=host_name, tree=_make_mutable_tree(tree))
+
+    assert index.indexed_hosts() == {
+        host_name: (tmp_path / "inventory" / str(host_name)).stat().st_mtime_ns
+    }
+    for path in (("software", "packages"), ("networking", "addresses")):
+        assert [
+            {key: (value, r.retentions.get(key)) for key, value in r.row.items()}
+            for r in index.query(path)
+        ] == tree.get_tree(path).table.rows_with_retentions
+
+    tree_store.archive(host_name=host_name)
+
+    assert index.indexed_hosts() == {}
+    assert index.query(("software", "packages")) == []
+
+
+def test_inventory_index_query_like_trees(tmp_path: Path) -> None:
+    tree = _get_tree_store().load(host_name=HostName("tree_new_heute"))
+    index = InventoryIndex(tmp_path / "inventory_index.sqlite")
+    tree_store = TreeStore(tmp_path / "inventory", index)
+    host_names = [HostName(f"host{n}") for n in range(5)]
+    for host_name in host_names:
+        tree_store.save(host_name=host_name, tree=_make_mutable_tree(tree))
+
+    def is_lib(row: Mapping[str, object]) -> bool:
+        return str(row.get("name", "")).startswith("lib")
+
+    tree_rows = sorted(
+        (
+            (host_name, row)
+            for host_name in host_names
+            for row in tree_store.load(host_name=host_name).get_rows(("software", "packages"))
+            if is_lib(row)
+        ),
+        key=lambda host_row: str(host_row[1].get("name")),
+    )[:100]
+    indexed_rows = index.query(
+        ("software", "packages"),
+        where=[("name", "LIKE", "lib%")],
+        order_by=[("name", "ASC")],
+        limit=100,
+    )
+
+    assert len(indexed_rows) == 100
+    assert [r.row for r in indexed_rows] == [row for _host_name, row in tree_rows]
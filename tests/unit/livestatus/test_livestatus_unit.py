@@ -10,8 +10,10 @@
 import errno
 import socket
 import ssl
-from collections.abc import Sequence
-from contextlib import closing
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import closing, suppress
 from pathlib import Path
 
 import pytest
@@ -341,3 +343,172 @@ def test_livestatus_lql(
     result: str,
 ) -> None:
     assert livestatus.livestatus_lql(*args) == result
+
+
+class _FakeSite(threading.Thread):
+    """Answers every query with rows of the site after some delay, like a remote site"""
+
+    def __init__(
+        self,
+        site_id: str,
+        *,
+        delay: float = 0,
+        rows: int = 2,
+        broken: bool = False,
+        release: threading.Event | None = None,
+    ):
+        super().__init__(daemon=True)
+        self.site_id = site_id
+        self._delay = delay
+        self._release = release
+        self.answered = False
+        self._response = repr([[site_id, n] for n in range(rows)]).encode() + b"\n"
+        self._broken = broken
+        self._server = socket.socket(socket.AF_INET)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen(1)
+        self.url = "tcp:127.0.0.1:%d" % self._server.getsockname()[1]
+
+    def run(self) -> None:
+        with self._server:
+            while True:
+                try:
+                    connection, _address = self._server.accept()
+                except OSError:
+                    return  # closed
+                with connection, suppress(ConnectionResetError):
+                    self._answer(connection)
+
+    def _answer(self, connection: socket.socket) -> None:
+        received = b""
+        while packet := connection.recv(4096):
+            received += packet
+            while b"\n\n" in received:
+                _query, received = received.split(b"\n\n", 1)
+                time.sleep(self._delay)
+                if self._release is not None:
+                    self._release.wait(timeout=5)
+                if self._broken:
+                    connection.sendall(b"No livestatus here\n")
+                    continue
+                connection.sendall(b"200 %11d\n" % len(self._response) + self._response)
+                self.answered = True
+
+    def close(self) -> None:
+        # Wakes up the accept() of the thread
+        self._server.shutdown(socket.SHUT_RDWR)
+        self.join()
+
+
+@pytest.fixture(name="make_sites")
+def fixture_make_sites() -> Iterator[Callable[..., livestatus.MultiSiteConnection]]:
+    fake_sites: list[_FakeSite] = []
+    connections: list[livestatus.MultiSiteConnection] = []
+
+    def make_sites(*sites: _FakeSite) -> livestatus.MultiSiteConnection:
+        fake_sites.extend(sites)
+        for site in sites:
+            site.start()
+        connections.append(
+            livestatus.MultiSiteConnection(
+                livestatus.SiteConfigurations(
+                    {livestatus.SiteId(site.site_id): {"socket": site.url} for site in sites}
+                )
+            )
+        )
+        return connections[-1]
+
+    yield make_sites
+
+    for connection in connections:
+        connection.disconnect()
+    for site in fake_sites:
+        site.close()
+
+
+def test_query_parallel_keeps_order_of_sites(
+    make_sites: Callable[..., livestatus.MultiSiteConnection]
+) -> None:
+    live = make_sites(_FakeSite("slow", delay=0.2), _FakeSite("fast"))
+    live.set_prepend_site(True)
+
+    assert live.query("GET hosts\nColumns: name\n") == [
+        ["slow", "slow", 0],
+        ["slow", "slow", 1],
+        ["fast", "fast", 0],
+        ["fast", "fast", 1],
+    ]
+    assert live.alive_sites() == ["slow", "fast"]
+
+
+def test_query_parallel_dead_site(
+    make_sites: Callable[..., livestatus.MultiSiteConnection]
+) -> None:
+    live = make_sites(_FakeSite("broken", broken=True), _FakeSite("fine"))
+
+    assert live.query("GET hosts\nColumns: name\n") == [["fine", 0], ["fine", 1]]
+    assert live.alive_sites() == ["fine"]
+    assert "Malformed response header" in str(
+        live.dead_sites()[livestatus.SiteId("broken")]["exception"]
+    )
+
+
+def test_iter_query_yields_rows_as_they_arrive(
+    make_sites: Callable[..., livestatus.MultiSiteConnection]
+) -> None:
+    release = threading.Event()
+    slow = _FakeSite("slow", release=release)
+    live = make_sites(slow, _FakeSite("fast"))
+
+    rows = live.iter_query("GET hosts\nColumns: name\n")
+    assert next(rows) == ["fast", 0]
+    assert not slow.answered
+    release.set()
+    assert list(rows) == [["fast", 1], ["slow", 0], ["slow", 1]]
+
+
+def test_iter_query_stopped_early(
+    make_sites: Callable[..., livestatus.MultiSiteConnection]
+) -> None:
+    live = make_sites(_FakeSite("slow", delay=0.2), _FakeSite("fast"))
+
+    for _row in live.iter_query("GET hosts\nColumns: name\n"):
+        break
+
+    # The rest of the response of the slow site must not end up in the next one
+    assert live.get_connection(livestatus.SiteId("slow")).socket is None
+    assert live.alive_sites() == ["slow", "fast"]
+    assert live.query("GET hosts\nColumns: name\n") == [
+        ["slow", 0],
+        ["slow", 1],
+        ["fast", 0],
+        ["fast", 1],
+    ]
+
+
+def _query_site_by_site(live: livestatus.MultiSiteConnection, query: str) -> list[object]:
+    """What query_parallel did before: receive and parse the responses in the order of the sites"""
+    sent = []
+    for connected_site in live.connections:
+        str_query = connected_site.connection.build_query(livestatus.Query(query), "")
+        connected_site.connection.send_query(str_query)
+        sent.append((connected_site.connection, str_query))
+    raw_responses = [(c, c.receive_raw_response(str_query, ())) for c, str_query in sent]
+    return [
+        row
+        for connection, raw_response in raw_responses
+        for row in connection.parse_raw_response(raw_response, livestatus.Query(query))
+    ]
+
+
+def test_query_parallel_like_site_by_site(
+    make_sites: Callable[..., livestatus.MultiSiteConnection]
+) -> None:
+    # The slowest site comes first, the others answer while it is still busy
+    live = make_sites(*(_FakeSite(f"site{n}", delay=0.1 - 0.02 * n, rows=100) for n in range(5)))
+    query = "GET services\nColumns: host_name state\n"
+
+    site_by_site = _query_site_by_site(live, query)
+
+    assert live.query(query) == site_by_site
+    assert sorted(live.iter_query(query), key=repr) == sorted(site_by_site, key=repr)